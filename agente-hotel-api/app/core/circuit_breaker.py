@@ -1,12 +1,16 @@
 # [PROMPT GA-03] app/core/circuit_breaker.py
 
+import time
 from datetime import datetime, timedelta
 from enum import Enum
+from typing import Optional
 
 from prometheus_client import Counter, Gauge
+from pydantic import ValidationError
 
 from ..core.logging import logger
-from ..exceptions.pms_exceptions import CircuitBreakerOpenError
+from ..core.prometheus import registry
+from ..exceptions.pms_exceptions import CircuitBreakerOpenError, PMSError, PMSNotFoundError
 
 
 class CircuitState(Enum):
@@ -58,11 +62,17 @@ class CircuitBreaker:
             self._on_success()
             pms_circuit_breaker_calls_total.labels(state=pre_state, result="success").inc()
             return result
-        except self.expected_exception:
+        except self.expected_exception as e:
+            if not self._is_failure(e):
+                raise
             self._on_failure()
             pms_circuit_breaker_calls_total.labels(state=pre_state, result="failure").inc()
             raise
 
+    def _is_failure(self, error: BaseException) -> bool:
+        """Si una excepción esperada cuenta como fallo del servicio protegido."""
+        return True
+
     def _should_attempt_reset(self):
         return self.last_failure_time and (datetime.now() - self.last_failure_time) > timedelta(
             seconds=self.recovery_timeout
@@ -85,3 +95,224 @@ class CircuitBreaker:
             if self.state != CircuitState.OPEN:
                 self.state = CircuitState.OPEN
                 logger.error(f"Circuit breaker opened after {self.failure_count} failures")
+
+
+# ---------------------------------------------------------------------------
+# Circuit breaker compartido por el clúster (estado en Redis)
+# ---------------------------------------------------------------------------
+
+pms_circuit_breaker_probes_total = Counter(
+    "pms_circuit_breaker_probes_total",
+    "Sondas HALF_OPEN del breaker compartido por resultado",
+    ["result"],
+    registry=registry,
+)
+
+# Admisión. KEYS[1] = hash de estado, KEYS[2] = lease de la sonda half-open.
+# ARGV = recovery_ms, probe_ttl_ms. Devuelve {veredicto, dato}:
+# closed → pasar (dato = fallos consecutivos), probe → pasar como única sonda
+# del clúster, open → rechazar (dato = ms de recovery restantes), probing →
+# rechazar mientras otra réplica sondea (dato = TTL del lease de la sonda).
+_ADMIT_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if state == 'closed' then
+    return {'closed', tonumber(redis.call('HGET', KEYS[1], 'failures') or 0)}
+end
+local opened = tonumber(redis.call('HGET', KEYS[1], 'opened_at') or 0)
+local remaining = opened + tonumber(ARGV[1]) - now
+if state == 'open' and remaining > 0 then
+    return {'open', remaining}
+end
+if redis.call('SET', KEYS[2], '1', 'NX', 'PX', ARGV[2]) then
+    redis.call('HSET', KEYS[1], 'state', 'half_open')
+    return {'probe', 0}
+end
+return {'probing', tonumber(redis.call('PTTL', KEYS[2]))}
+"""
+
+# Resultado. ARGV = success|failure, umbral, 1 si la llamada era la sonda.
+# Devuelve {estado, fallos consecutivos, ms hasta reintentar si quedó abierto}.
+_RECORD_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HGET', KEYS[1], 'state') or 'closed'
+if ARGV[1] == 'success' then
+    if ARGV[3] == '1' or state == 'closed' then
+        redis.call('HSET', KEYS[1], 'state', 'closed', 'failures', 0)
+        if ARGV[3] == '1' then redis.call('DEL', KEYS[2]) end
+        return {'closed', 0, 0}
+    end
+    return {state, tonumber(redis.call('HGET', KEYS[1], 'failures') or 0), 0}
+end
+local failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+if ARGV[3] == '1' or (state == 'closed' and failures >= tonumber(ARGV[2])) then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', now)
+    redis.call('DEL', KEYS[2])
+    return {'open', failures, tonumber(ARGV[4])}
+end
+return {state, failures, 0}
+"""
+
+# Errores de negocio: el PMS respondió, no indican caída (tampoco una respuesta
+# con formato inválido, que reintentar no arregla)
+_NON_FAILURE_ERRORS = (PMSNotFoundError, ValidationError)
+
+_STATES = {"closed": CircuitState.CLOSED, "open": CircuitState.OPEN, "half_open": CircuitState.HALF_OPEN}
+
+
+class DistributedCircuitBreaker(CircuitBreaker):
+    """
+    Circuit breaker con estado compartido en Redis entre workers y pods.
+
+    - Fallos consecutivos se cuentan a nivel clúster: un proceso abre el
+      breaker para todos.
+    - Tras `recovery_timeout`, un lease `SET NX PX` elige una única sonda
+      HALF_OPEN en todo el clúster; el resto sigue rechazando hasta que la
+      sonda cierra (éxito) o reabre (fallo) el breaker.
+    - Vista local cacheada: con el breaker cerrado se consulta Redis como
+      mucho cada `sync_interval` segundos, y un breaker abierto se rechaza
+      localmente hasta que vence su recovery, sin ida a Redis por llamada.
+    - Cuenta como fallo `expected_exception` y cualquier `PMSError` (el
+      adaptador envuelve los errores HTTP en `PMSError`), salvo no encontrado
+      y errores de validación.
+    - Si Redis no responde se comporta como el `CircuitBreaker` local.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        name: str,
+        failure_threshold=5,
+        recovery_timeout=30,
+        expected_exception=Exception,
+        sync_interval: float = 1.0,
+        probe_timeout: Optional[float] = None,
+    ):
+        super().__init__(failure_threshold, recovery_timeout, (expected_exception, PMSError))
+        self.redis = redis_client
+        self.sync_interval = sync_interval
+        self.probe_timeout = probe_timeout if probe_timeout is not None else max(float(recovery_timeout), 1.0)
+        self._keys = [f"circuit:{name}", f"circuit:{name}:probe"]
+        self._synced_at = float("-inf")
+        self._open_until = 0.0
+        # Scripts registrados en redis-py (EVALSHA, recarga si el servidor los perdió)
+        self._admit_script = None
+        self._record_script = None
+
+    async def call(self, func, *args, **kwargs):
+        verdict = await self._admit()
+        if verdict is None:
+            return await super().call(func, *args, **kwargs)
+        if verdict == "open":
+            raise CircuitBreakerOpenError("Circuit breaker is OPEN (cluster)")
+
+        probe = verdict == "probe"
+        pre_state = CircuitState.HALF_OPEN.value if probe else CircuitState.CLOSED.value
+        recorded = False
+        try:
+            try:
+                result = await func(*args, **kwargs)
+            except self.expected_exception as e:
+                if not self._is_failure(e):
+                    raise
+                pms_circuit_breaker_calls_total.labels(state=pre_state, result="failure").inc()
+                if probe:
+                    pms_circuit_breaker_probes_total.labels(result="failure").inc()
+                recorded = True
+                await self._record("failure", probe)
+                raise
+            pms_circuit_breaker_calls_total.labels(state=pre_state, result="success").inc()
+            if probe:
+                pms_circuit_breaker_probes_total.labels(result="success").inc()
+            if probe or self.failure_count:
+                recorded = True
+                await self._record("success", probe)
+            return result
+        finally:
+            # Una sonda que no llegó a registrar resultado (error no contado,
+            # cancelación) libera el lease para que otra réplica sondee ya
+            if probe and not recorded:
+                await self._release_probe()
+
+    def _is_failure(self, error: BaseException) -> bool:
+        # Los errores del adaptador llegan envueltos: mirar también la causa
+        for candidate in (error, error.__cause__, error.__context__):
+            if isinstance(candidate, _NON_FAILURE_ERRORS):
+                return False
+        return True
+
+    async def _release_probe(self) -> None:
+        try:
+            await self.redis.delete(self._keys[1])
+        except Exception as e:
+            logger.warning("circuit_breaker_redis_unavailable", error=str(e))
+
+    async def _admit(self) -> Optional[str]:
+        """closed/probe/open, o None si Redis no está disponible."""
+        now = time.monotonic()
+        if self.state == CircuitState.OPEN and now < self._open_until:
+            return "open"
+        if self.state == CircuitState.CLOSED and now - self._synced_at < self.sync_interval:
+            return "closed"
+        try:
+            if self._admit_script is None:
+                self._admit_script = self.redis.register_script(_ADMIT_SCRIPT)
+            verdict, value = await self._admit_script(
+                keys=self._keys, args=[int(self.recovery_timeout * 1000), int(self.probe_timeout * 1000)]
+            )
+            verdict = verdict.decode() if isinstance(verdict, bytes) else str(verdict)
+        except Exception as e:
+            logger.warning("circuit_breaker_redis_unavailable", error=str(e))
+            return None
+        self._synced_at = time.monotonic()
+        if verdict == "open":
+            self.state = CircuitState.OPEN
+            self._open_until = self._synced_at + max(int(value), 0) / 1000
+        elif verdict == "probing":
+            # Otra réplica sondea: volver a preguntar pronto para ver si cerró
+            self.state = CircuitState.OPEN
+            self._open_until = self._synced_at + min(max(int(value), 0) / 1000, self.sync_interval)
+            return "open"
+        elif verdict == "probe":
+            self.state = CircuitState.HALF_OPEN
+        elif verdict == "closed":
+            self.state = CircuitState.CLOSED
+            self.failure_count = int(value)
+        else:
+            return None
+        return verdict
+
+    async def _record(self, outcome: str, probe: bool) -> None:
+        try:
+            if self._record_script is None:
+                self._record_script = self.redis.register_script(_RECORD_SCRIPT)
+            state, failures, retry_ms = await self._record_script(
+                keys=self._keys,
+                args=[outcome, self.failure_threshold, "1" if probe else "0", int(self.recovery_timeout * 1000)],
+            )
+            state = state.decode() if isinstance(state, bytes) else str(state)
+        except Exception as e:
+            logger.warning("circuit_breaker_redis_unavailable", error=str(e))
+            if outcome == "failure":
+                self._on_failure()
+            else:
+                self._on_success()
+            return
+        previous = self.state
+        self.state = _STATES.get(state, CircuitState.CLOSED)
+        self.failure_count = int(failures)
+        self._synced_at = time.monotonic()
+        pms_circuit_breaker_failure_streak.set(self.failure_count)
+        if self.state == CircuitState.OPEN:
+            self.last_failure_time = datetime.now()
+            self._open_until = self._synced_at + int(retry_ms) / 1000
+            if previous != CircuitState.OPEN:
+                logger.error(f"Circuit breaker opened after {self.failure_count} failures (cluster)")
+        elif previous == CircuitState.HALF_OPEN and self.state == CircuitState.CLOSED:
+            logger.info("Circuit breaker reset and closed (cluster probe succeeded).")
+
+    def snapshot(self) -> dict:
+        """Vista local del estado compartido (para health/admin)."""
+        return {"state": self.state.value, "failure_count": self.failure_count}
@@ -3,8 +3,9 @@
 import time
 import traceback
 from uuid import uuid4
-from fastapi import Request
+from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 
 try:  # opentelemetry es opcional en entornos locales/test
@@ -18,6 +19,14 @@ from .settings import settings
 from .tenant_middleware import TenantMiddleware
 
 
+def _build_csp() -> str:
+    default_sources = ["'self'"]
+    raw = getattr(settings, "csp_extra_sources", None)
+    extra_list = raw.split() if isinstance(raw, str) and raw else []
+    merged = default_sources + list(dict.fromkeys(extra_list))
+    return f"default-src {' '.join(merged)}"
+
+
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """Aplica cabeceras de seguridad estándar.
 
@@ -25,11 +34,7 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """
 
     def build_csp(self) -> str:
-        default_sources = ["'self'"]
-        raw = getattr(settings, "csp_extra_sources", None)
-        extra_list = raw.split() if isinstance(raw, str) and raw else []
-        merged = default_sources + list(dict.fromkeys(extra_list))
-        return f"default-src {' '.join(merged)}"
+        return _build_csp()
 
     async def dispatch(self, request, call_next):  # type: ignore[override]
         response = await call_next(request)
@@ -98,7 +103,7 @@ async def logging_and_metrics_middleware(request: Request, call_next):
 
     # Metrics
     metrics_service.record_request_latency(
-        method=request.method, endpoint=request.url.path, latency=duration, status_code=response.status_code
+        method=request.method, endpoint=route_template(request.scope), latency=duration, status_code=response.status_code
     )
 
     return response
@@ -281,3 +286,236 @@ class TenantMiddleware(BaseHTTPMiddleware):
         finally:
             # Clean up context after request
             clear_tenant_id()
+
+
+UNMATCHED_ROUTE = "__unmatched__"
+
+
+def route_template(scope) -> str:
+    """
+    Plantilla de la ruta que atendió el request (`/reservations/{reservation_id}`),
+    para etiquetar métricas sin una serie por ID. El router la deja en el scope.
+    """
+    root_path = scope.get("root_path", "")
+    mount_prefix = root_path[len(scope.get("app_root_path", root_path)) :]
+    route = scope.get("route")
+    if route is not None:
+        return mount_prefix + getattr(route, "path_format", getattr(route, "path", ""))
+    if mount_prefix:
+        return mount_prefix + "/{path}"
+    return UNMATCHED_ROUTE
+
+
+class RequestBodyTooLarge(HTTPException):
+    """El cuerpo recibido superó el límite (detectado mientras se lee, sin confiar en Content-Length)."""
+
+    def __init__(self, max_allowed: int, received: int):
+        super().__init__(
+            status_code=413,
+            detail={"error": "Request entity too large", "max_size_bytes": max_allowed, "received_bytes": received},
+        )
+
+
+class RequestPipelineMiddleware:
+    """
+    Middleware ASGI puro que reemplaza la pila de `BaseHTTPMiddleware` y
+    middlewares `@app.middleware("http")` (tamaño, seguridad, tenant,
+    correlación, tracing, logging/métricas) por un único paso por request:
+
+    1. Correlation ID y tenant → `scope["state"]` y contextvars.
+    2. Límite de tamaño: rechazo temprano por Content-Length y conteo de los
+       chunks en `receive` (cuerpos chunked o con Content-Length falso).
+    3. Cabeceras de respuesta inyectadas al enviar `http.response.start`.
+    4. Un único punto de medición para el log `http_request`, las métricas y el span.
+
+    No envuelve la respuesta en streams ni crea tareas: el cuerpo fluye directo.
+    """
+
+    def __init__(
+        self, app, max_size: int = 1_000_000, max_media_size: int = 10_000_000, default_tenant: str = "default"
+    ):
+        self.app = app
+        self.max_size = max_size
+        self.max_media_size = max_media_size
+        self.default_tenant = default_tenant
+
+    @staticmethod
+    def _security_headers() -> list[tuple[str, str]]:
+        # Se arma por request: settings puede cambiar en caliente (tests, recarga)
+        headers = [
+            ("X-Content-Type-Options", "nosniff"),
+            ("X-Frame-Options", "DENY"),
+            ("X-XSS-Protection", "1; mode=block"),
+            ("Referrer-Policy", "strict-origin-when-cross-origin"),
+            ("Permissions-Policy", "geolocation=(), microphone=(), camera=()"),
+            ("Content-Security-Policy", _build_csp()),
+        ]
+        if settings.environment == "production":
+            headers.append(("Strict-Transport-Security", "max-age=31536000; includeSubDomains"))
+        if getattr(settings, "coop_enabled", False):
+            headers.append(("Cross-Origin-Opener-Policy", "same-origin"))
+        if getattr(settings, "coep_enabled", False):
+            headers.append(("Cross-Origin-Embedder-Policy", "require-corp"))
+        return headers
+
+    def _resolve_tenant(self, headers: Headers, correlation_id: str) -> str:
+        tenant_id = headers.get("x-tenant-id")
+        if not tenant_id:
+            auth_header = headers.get("authorization")
+            if auth_header and auth_header.startswith("Bearer "):
+                try:
+                    from ..services.auth_service import decode_token
+
+                    tenant_id = decode_token(auth_header.split(" ")[1]).get("tenant_id")
+                except Exception as e:
+                    logger.debug("tenant_extraction_from_jwt_failed", error=str(e), correlation_id=correlation_id)
+        return tenant_id or self.default_tenant
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        from .correlation import set_correlation_id
+        from .tenant_context import reset_tenant_id, set_tenant_id
+
+        start_time = time.perf_counter()
+        headers = Headers(scope=scope)
+        method, path = scope["method"], scope["path"]
+        correlation_id = headers.get("x-request-id") or headers.get("x-correlation-id") or str(uuid4())
+        tenant_id = self._resolve_tenant(headers, correlation_id)
+
+        state = scope.setdefault("state", {})
+        state["correlation_id"] = correlation_id
+        state["tenant_id"] = tenant_id
+        set_correlation_id(correlation_id)
+        tenant_token = set_tenant_id(tenant_id)
+
+        status_code = 500
+        response_started = False
+        span = trace.get_current_span() if trace is not None else None
+        if span is not None and not span.is_recording():
+            span = None
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                response_headers = MutableHeaders(scope=message)
+                for key, value in self._security_headers():
+                    if key not in response_headers:
+                        response_headers.append(key, value)
+                if "cache-control" not in response_headers and (
+                    path.startswith("/health") or path.startswith("/metrics") or method != "GET"
+                ):
+                    response_headers.append("Cache-Control", "no-store")
+                response_headers["X-Tenant-ID"] = tenant_id
+                response_headers["X-Correlation-ID"] = correlation_id
+                response_headers["X-Request-ID"] = correlation_id
+            await send(message)
+
+        try:
+            if span is not None:
+                self._enrich_span(span, scope)
+
+            if method in ("POST", "PUT", "PATCH"):
+                max_allowed = self.max_media_size if "/media" in path else self.max_size
+                declared = headers.get("content-length")
+                if declared and declared.isdigit() and int(declared) > max_allowed:
+                    logger.warning(
+                        "request_too_large",
+                        path=path,
+                        size=int(declared),
+                        max_allowed=max_allowed,
+                        correlation_id=correlation_id,
+                    )
+                    response = JSONResponse(
+                        status_code=413,
+                        content={
+                            "error": "Request entity too large",
+                            "max_size_bytes": max_allowed,
+                            "received_bytes": int(declared),
+                        },
+                    )
+                    await response(scope, receive, send_wrapper)
+                    return
+                receive = self._limited_receive(receive, max_allowed, path, correlation_id)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except RequestBodyTooLarge as exc:
+                # El endpoint no la convirtió en respuesta (p. ej. leyó el cuerpo a mano)
+                if response_started:
+                    raise
+                await JSONResponse(status_code=413, content=exc.detail)(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start_time
+            reset_tenant_id(tenant_token)
+            client = scope.get("client")
+            logger.info(
+                "http_request",
+                correlation_id=correlation_id,
+                method=method,
+                path=path,
+                status_code=status_code,
+                duration_ms=duration * 1000,
+                client_ip=client[0] if client else None,
+            )
+            metrics_service.record_request_latency(
+                method=method, endpoint=route_template(scope), latency=duration, status_code=status_code
+            )
+            if span is not None:
+                self._finish_span(span, status_code)
+
+    @staticmethod
+    def _limited_receive(receive, max_allowed: int, path: str, correlation_id: str):
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_allowed:
+                    logger.warning(
+                        "request_too_large",
+                        path=path,
+                        size=received,
+                        max_allowed=max_allowed,
+                        correlation_id=correlation_id,
+                        streamed=True,
+                    )
+                    raise RequestBodyTooLarge(max_allowed, received)
+            return message
+
+        return limited_receive
+
+    @staticmethod
+    def _enrich_span(span, scope) -> None:
+        from .tracing import enrich_span_from_request
+
+        try:
+            request = Request(scope)
+            enrich_span_from_request(span, request)
+            if not span.attributes or "http.method" not in span.attributes:
+                span.set_attribute("http.method", request.method)
+                span.set_attribute("http.route", request.url.path)
+                span.set_attribute("http.url", str(request.url))
+                if request.client:
+                    span.set_attribute("http.client_ip", request.client.host)
+        except Exception as e:
+            logger.warning("span_enrichment_failed", error=str(e), correlation_id=scope["state"].get("correlation_id"))
+
+    @staticmethod
+    def _finish_span(span, status_code: int) -> None:
+        from opentelemetry.trace import Status, StatusCode
+
+        span.set_attribute("http.status_code", status_code)
+        if 200 <= status_code < 400:
+            span.set_status(Status(StatusCode.OK))
+        elif 400 <= status_code < 500:
+            span.set_attribute("http.error_type", "client_error")
+        else:
+            span.set_status(Status(StatusCode.ERROR, f"HTTP {status_code}"))
+            span.set_attribute("http.error_type", "server_error")
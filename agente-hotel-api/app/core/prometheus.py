@@ -36,11 +36,23 @@ from prometheus_client import (
     REGISTRY,
     generate_latest,
     CONTENT_TYPE_LATEST,
-)
+    CollectorRegistry,
+    multiprocess,
+)
+import asyncio
+import glob
+import os
+import re
+import threading
 import time
+import weakref
 from contextlib import contextmanager
+from typing import Any, Optional, Set
+
 import structlog
 
+from .settings import settings
+
 logger = structlog.get_logger(__name__)
 
 
@@ -51,6 +63,62 @@ logger = structlog.get_logger(__name__)
 # Use default Prometheus REGISTRY to allow test fixtures to reset between runs
 registry = REGISTRY
 
+OVERFLOW_LABEL = "__overflow__"
+
+
+class CardinalityGuard:
+    """
+    Tope de series por métrica para los labels que vienen de datos externos.
+
+    Las métricas con labels abiertos (endpoint, tenant, IP) se etiquetan con
+    `guarded_labels(metric, **labels)` en vez de `metric.labels(...)`. El guard
+    lleva su propio registro de label sets por métrica: uno nuevo por encima de
+    `max_series` no crea una serie, se cuenta en la serie `__overflow__` de la
+    métrica y suma en `metrics_label_sets_dropped_total{metric}`. Las series
+    existentes no cambian. Solo usa la API pública de prometheus_client.
+    """
+
+    def __init__(self, target_registry: Any, max_series: int):
+        self.max_series = max_series
+        self._series: "weakref.WeakKeyDictionary[Any, Set[tuple]]" = weakref.WeakKeyDictionary()
+        self._warned: Set[str] = set()
+        self._lock = threading.Lock()
+        self.dropped = Counter(
+            "metrics_label_sets_dropped_total",
+            "Label sets descartados por el tope de series de la métrica",
+            ["metric"],
+            registry=target_registry,
+        )
+
+    def labels(self, metric: Any, **labelkwargs: Any) -> Any:
+        """`metric.labels(**labelkwargs)`, o la serie `__overflow__` si la métrica llegó al tope."""
+        key = tuple(sorted((name, str(value)) for name, value in labelkwargs.items()))
+        with self._lock:
+            series = self._series.setdefault(metric, set())
+            if key in series or len(series) < self.max_series:
+                child = metric.labels(**labelkwargs)  # labels inválidos: mismo error que prometheus_client
+                series.add(key)
+                return child
+        self._overflowed(metric)
+        return metric.labels(**{name: OVERFLOW_LABEL for name in labelkwargs})
+
+    def _overflowed(self, metric: Any) -> None:
+        name = metric.describe()[0].name
+        self.dropped.labels(metric=name).inc()
+        with self._lock:
+            if name in self._warned:
+                return
+            self._warned.add(name)
+        logger.warning("metrics.cardinality_limit_reached", metric=name, max_series=self.max_series)
+
+
+cardinality_guard = CardinalityGuard(registry, int(settings.metrics_max_series_per_metric))
+
+
+def guarded_labels(metric: Any, **labels: Any) -> Any:
+    """Serie de `metric` con tope de cardinalidad (ver `CardinalityGuard`)."""
+    return cardinality_guard.labels(metric, **labels)
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # APPLICATION INFO METRICS
@@ -601,6 +669,122 @@ def track_db_operation(operation: str, table: str, status: str, duration: float)
     db_query_duration_seconds.labels(operation=operation, table=table).observe(duration)
 
 
+# ═══════════════════════════════════════════════════════════════════════════
+# EXPOSITION (MULTIPROCESS + CACHE)
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Archivos de gauges que describen a un proceso vivo: se borran cuando el worker muere.
+# Counters, histogramas y gauges sum/min/max de workers muertos se conservan para no
+# perder los totales acumulados.
+_DEAD_WORKER_FILE = re.compile(r"^gauge_(all|liveall|livesum|livemax|livemin|livemostrecent)_(\d+)\.db$")
+
+
+def multiprocess_dir() -> Optional[str]:
+    """Directorio de modo multiproceso (`PROMETHEUS_MULTIPROC_DIR`), o None si está desactivado."""
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+    return path if path and os.path.isdir(path) else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_dead_worker_files(path: Optional[str] = None) -> int:
+    """
+    Borra los archivos de gauges de workers que ya no existen.
+
+    Uvicorn reinicia workers sin hook de `child_exit`, así que cada worker barre al
+    arrancar los archivos de pids muertos. Devuelve el número de archivos borrados.
+    """
+    path = path or multiprocess_dir()
+    if not path:
+        return 0
+    removed = 0
+    for filename in glob.glob(os.path.join(path, "gauge_*.db")):
+        match = _DEAD_WORKER_FILE.match(os.path.basename(filename))
+        if not match or _pid_alive(int(match.group(2))):
+            continue
+        try:
+            os.remove(filename)
+            removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def mark_worker_dead(pid: Optional[int] = None) -> None:
+    """Apagado ordenado de un worker: sus gauges "live*" dejan de sumarse."""
+    path = multiprocess_dir()
+    if path:
+        multiprocess.mark_process_dead(pid or os.getpid(), path)
+
+
+class MetricsExposition:
+    """
+    Render de `/metrics` fuera del event loop y compartido entre scrapers.
+
+    En modo multiproceso consolida los archivos mmap de todos los workers con
+    `MultiProcessCollector`; si no, serializa el registry del proceso. El render
+    corre en un thread y se cachea `ttl_seconds`: los scrapes concurrentes o que
+    llegan dentro del intervalo reutilizan el mismo resultado (single-flight).
+    """
+
+    def __init__(self, target_registry: Any = None, ttl_seconds: float = 1.0):
+        self._registry = target_registry if target_registry is not None else registry
+        self.ttl_seconds = ttl_seconds
+        self._payload: Optional[bytes] = None
+        self._rendered_at = 0.0
+        self._inflight: Optional[asyncio.Future] = None
+
+    def render_now(self) -> bytes:
+        """Render síncrono, sin caché."""
+        path = multiprocess_dir()
+        if path:
+            consolidated = CollectorRegistry()
+            multiprocess.MultiProcessCollector(consolidated, path=path)
+            return generate_latest(consolidated)
+        return generate_latest(self._registry)
+
+    async def render(self) -> bytes:
+        if self._payload is not None and time.monotonic() - self._rendered_at < self.ttl_seconds:
+            return self._payload
+        loop = asyncio.get_running_loop()
+        if self._inflight is None or self._inflight.get_loop() is not loop:
+            self._inflight = loop.create_task(self._refresh())
+        return await asyncio.shield(self._inflight)
+
+    async def _refresh(self) -> bytes:
+        started = time.perf_counter()
+        try:
+            payload = await asyncio.to_thread(self.render_now)
+        finally:
+            self._inflight = None
+        metrics_render_duration_seconds.observe(time.perf_counter() - started)
+        self._payload = payload
+        self._rendered_at = time.monotonic()
+        return payload
+
+    def invalidate(self) -> None:
+        self._payload = None
+        self._rendered_at = 0.0
+
+
+metrics_render_duration_seconds = Histogram(
+    name="metrics_exposition_render_seconds",
+    documentation="Tiempo de render de /metrics (consolidación multiproceso incluida)",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    registry=registry,
+)
+
+metrics_exposition = MetricsExposition(registry, ttl_seconds=float(settings.metrics_cache_seconds))
+
+
 def get_metrics() -> str:
     """
     Generate Prometheus metrics output in text format.
@@ -608,7 +792,7 @@ def get_metrics() -> str:
     Returns:
         str: Metrics in Prometheus exposition format
     """
-    return generate_latest(registry).decode("utf-8")
+    return metrics_exposition.render_now().decode("utf-8")
 
 
 def get_metrics_content_type() -> str:
@@ -1,11 +1,15 @@
 # app/core/rate_limiter.py
 # Rate limiter para llamadas al PMS (prevenir 429s)
 
+import asyncio
 import time
 from collections import deque
 from typing import Optional
 
+from prometheus_client import Counter, Gauge
+
 from ..core.logging import logger
+from ..core.prometheus import registry
 
 
 class SlidingWindowRateLimiter:
@@ -69,8 +73,6 @@ class SlidingWindowRateLimiter:
         Raises:
             TimeoutError: Si max_wait es superado
         """
-        import asyncio
-        
         start = time.time()
         while not await self.acquire(operation):
             elapsed = time.time() - start
@@ -101,3 +103,212 @@ class SlidingWindowRateLimiter:
         
         # Tiempo hasta que expire el request más viejo
         return self.requests[0] + self.window_seconds - now
+
+
+# ---------------------------------------------------------------------------
+# Rate limiter distribuido (GCRA en Redis) compartido por workers y pods
+# ---------------------------------------------------------------------------
+
+pms_rate_limit_tokens_total = Counter(
+    "pms_rate_limit_tokens_total",
+    "Tokens del rate limiter PMS consumidos por origen (redis, prefetched, fallback)",
+    ["source"],
+    registry=registry,
+)
+pms_rate_limit_quota_used = Gauge(
+    "pms_rate_limit_quota_used",
+    "Requests al PMS en la ventana actual (global = todo el clúster, local = este proceso)",
+    ["scope"],
+    registry=registry,
+)
+pms_rate_limit_throttled_total = Counter(
+    "pms_rate_limit_throttled_total",
+    "Esperas del rate limiter PMS por cuota global agotada",
+    registry=registry,
+)
+
+# GCRA multi-token. Tiempos en microsegundos con el reloj de Redis (TIME), así
+# todos los procesos comparten la misma referencia aunque sus relojes difieran.
+# KEYS[1] = TAT (theoretical arrival time), KEYS[2] = hash ventana → requests
+# ARGV = intervalo de emisión, tolerancia de ráfaga (tau), tokens pedidos, ventana
+# Devuelve {concedidos, retry_after_us, usados_en_ventana}
+_GCRA_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000000 + tonumber(t[2])
+local interval = tonumber(ARGV[1])
+local tau = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local window_us = tonumber(ARGV[4]) * 1000000
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+
+local granted = math.floor((now + tau - tat) / interval) + 1
+if granted > requested then granted = requested end
+if granted < 0 then granted = 0 end
+
+local window = math.floor(now / window_us)
+local used = tonumber(redis.call('HGET', KEYS[2], window) or 0)
+if granted > 0 then
+    tat = tat + granted * interval
+    redis.call('SET', KEYS[1], string.format('%d', tat), 'PX', math.ceil((tat - now) / 1000) + 1000)
+    used = redis.call('HINCRBY', KEYS[2], window, granted)
+    redis.call('HDEL', KEYS[2], window - 2)
+    redis.call('PEXPIRE', KEYS[2], math.ceil(window_us / 500))
+    return {granted, 0, used}
+end
+return {0, tat - tau - now, used}
+"""
+
+
+class RedisGCRARateLimiter:
+    """
+    Rate limiter compartido por todo el clúster (GCRA en un script Lua).
+
+    Misma interfaz que `SlidingWindowRateLimiter` (`acquire`, `wait_if_needed`,
+    `get_current_count`, `get_time_until_available`). Con `max_requests` por
+    `window_seconds` y ráfaga `burst`, ninguna ventana de `window_seconds`
+    supera `max_requests + burst` en todo el clúster.
+
+    Prefetch local: las llamadas concurrentes de un proceso se agrupan y una
+    sola ida a Redis pide tokens para todas (hasta `prefetch`). Un token
+    sobrante (p.ej. de un llamante cancelado) se reutiliza durante
+    `token_ttl` segundos y después se descarta.
+
+    Si Redis no responde se degrada al `SlidingWindowRateLimiter` local, que
+    era el comportamiento previo por proceso.
+    """
+
+    def __init__(
+        self,
+        redis_client,
+        name: str,
+        max_requests: int,
+        window_seconds: int,
+        burst: int = 1,
+        prefetch: int = 5,
+        token_ttl: float = 0.5,
+    ):
+        self.redis = redis_client
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.burst = max(1, burst)
+        self.prefetch = max(1, prefetch)
+        self.token_ttl = token_ttl
+        self._interval_us = window_seconds * 1_000_000 / max_requests
+        self._tau_us = (self.burst - 1) * self._interval_us
+        self._keys = [f"ratelimit:{name}:tat", f"ratelimit:{name}:windows"]
+        self._tokens: deque[float] = deque()  # caducidad (monotonic) de cada token prefetched
+        self._demand = 0
+        self._refill_lock = asyncio.Lock()
+        self._retry_at = 0.0
+        self._local = SlidingWindowRateLimiter(max_requests, window_seconds)
+        self._gcra = None  # script registrado en redis-py (EVALSHA, recarga si el servidor lo perdió)
+        self.global_used = 0
+
+    def _take_prefetched(self) -> bool:
+        now = time.monotonic()
+        while self._tokens and self._tokens[0] <= now:
+            self._tokens.popleft()
+        if not self._tokens:
+            return False
+        self._tokens.popleft()
+        return True
+
+    def _record_local(self, source: str) -> None:
+        self._local.requests.append(time.time())
+        pms_rate_limit_tokens_total.labels(source=source).inc()
+        pms_rate_limit_quota_used.labels(scope="local").set(self.get_current_count())
+
+    async def _refill(self, requested: int) -> Optional[float]:
+        """Pide tokens a Redis. Devuelve segundos hasta el próximo token (0 si concedió)."""
+        if self._gcra is None:
+            self._gcra = self.redis.register_script(_GCRA_SCRIPT)
+        result = await self._gcra(
+            keys=self._keys, args=[self._interval_us, self._tau_us, requested, self.window_seconds]
+        )
+        granted, retry_after_us, used = (int(v) for v in result)
+        self.global_used = used
+        pms_rate_limit_quota_used.labels(scope="global").set(used)
+        if not granted:
+            self._retry_at = time.monotonic() + retry_after_us / 1_000_000
+            return retry_after_us / 1_000_000
+        expires = time.monotonic() + self.token_ttl
+        self._tokens.extend([expires] * granted)
+        return 0.0
+
+    async def _try_acquire(self, operation: str) -> Optional[float]:
+        """0 si hay token, segundos a esperar si no; None si Redis no está disponible."""
+        if self._take_prefetched():
+            self._record_local("prefetched")
+            return 0.0
+        async with self._refill_lock:
+            # Otro llamante pudo traer tokens para nosotros mientras esperábamos el lock
+            if self._take_prefetched():
+                self._record_local("prefetched")
+                return 0.0
+            wait = self._retry_at - time.monotonic()
+            if wait > 0:
+                return wait
+            # Ceder un ciclo para que los llamantes ya programados sumen su demanda al lote
+            await asyncio.sleep(0)
+            try:
+                wait = await self._refill(min(self.prefetch, max(1, self._demand)))
+            except Exception as e:
+                logger.warning("pms_rate_limit_redis_unavailable", operation=operation, error=str(e))
+                return None
+            if wait == 0 and self._take_prefetched():
+                self._record_local("redis")
+                return 0.0
+            return wait
+
+    async def acquire(self, operation: str = "unknown") -> bool:
+        self._demand += 1
+        try:
+            wait = await self._try_acquire(operation)
+        finally:
+            self._demand -= 1
+        if wait is None:
+            allowed = await self._local.acquire(operation)
+            if allowed:
+                pms_rate_limit_tokens_total.labels(source="fallback").inc()
+            return allowed
+        return wait == 0
+
+    async def wait_if_needed(self, operation: str = "unknown", max_wait: float = 5.0):
+        deadline = time.monotonic() + max_wait
+        self._demand += 1
+        try:
+            while True:
+                wait = await self._try_acquire(operation)
+                if wait is None:
+                    await self._local.wait_if_needed(operation, max(0.0, deadline - time.monotonic()))
+                    pms_rate_limit_tokens_total.labels(source="fallback").inc()
+                    return
+                if wait == 0:
+                    return
+                if time.monotonic() + wait > deadline:
+                    raise TimeoutError(f"Rate limit wait timeout after {max_wait}s for operation: {operation}")
+                pms_rate_limit_throttled_total.inc()
+                await asyncio.sleep(wait)
+        finally:
+            self._demand -= 1
+
+    def get_current_count(self) -> int:
+        """Requests de este proceso en la ventana actual."""
+        return self._local.get_current_count()
+
+    def get_time_until_available(self) -> Optional[float]:
+        wait = self._retry_at - time.monotonic()
+        return wait if wait > 0 else None
+
+    def quota_usage(self) -> dict:
+        """Uso de cuota: global (último valor visto en Redis) y local (este proceso)."""
+        return {
+            "limit": self.max_requests,
+            "burst": self.burst,
+            "window_seconds": self.window_seconds,
+            "global_used": self.global_used,
+            "local_used": self.get_current_count(),
+            "prefetched_tokens": len(self._tokens),
+        }
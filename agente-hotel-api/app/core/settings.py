@@ -48,12 +48,62 @@ class Settings(BaseSettings):
     pms_api_key: SecretStr = SecretStr("dev-pms-key")
     pms_timeout: int = 30
     pms_hotel_id: int = 1  # Default hotel ID in QloApps
+    # Single-flight de disponibilidad entre réplicas (ver core/singleflight.py)
+    pms_singleflight_lease_seconds: float = 10.0
+    pms_singleflight_wait_seconds: float = 5.0
+    # Cuota de QloApps compartida por todo el clúster (ver core/rate_limiter.py)
+    pms_rate_limit_per_minute: int = 70
+    pms_rate_limit_burst: int = 10
+    pms_rate_limit_prefetch: int = 5
+    # Caché de disponibilidad por noche (hotel, tipo de habitación, noche)
+    pms_night_cache_ttl_seconds: int = 300
+    # Stale-while-revalidate: noches vencidas se sirven (marcadas) hasta este margen
+    pms_availability_max_stale_seconds: int = 600
+    # Prefetch de ventanas calientes (ver services/availability_refresher.py)
+    pms_prefetch_enabled: bool = False
+    pms_prefetch_interval_seconds: int = 120
+    pms_prefetch_horizon_days: int = 14
+    pms_prefetch_weekends_ahead: int = 8
+    pms_prefetch_popular_nights: int = 30
+    pms_prefetch_max_per_cycle: int = 20
+    pms_prefetch_budget_ratio: float = 0.5  # fracción máxima de la cuota PMS usada por el prefetch
+    pms_prefetch_holidays: list[str] = Field(
+        default=[],
+        description="Fechas ISO (YYYY-MM-DD) de feriados a mantener precargados",
+    )
+
+    # Consultas de disponibilidad en lote: noches pedidas al PMS en paralelo
+    pms_batch_max_concurrency: int = 4
+    # Catálogo de tipos de habitación (ver services/room_type_catalog.py)
+    pms_room_type_refresh_seconds: int = 3600
+    # Detalle de reservas en caché (corto si el feed de cambios está apagado)
+    pms_reservation_cache_ttl_seconds: int = 120
+    # Feed de cambios de reservas (ver services/pms_change_feed.py)
+    pms_change_feed_enabled: bool = False
+    pms_change_feed_interval_seconds: int = 30
+    pms_change_feed_page_size: int = 100
+    pms_change_feed_overlap_seconds: int = 5  # re-lee este margen para tolerar relojes y empates
+    pms_change_feed_backfill_days: int = 7
+    # Alta de reservas en segundo plano (ver services/reservation_saga.py)
+    reservation_saga_enabled: bool = False
+    reservation_saga_max_attempts: int = 5
+    reservation_saga_lease_seconds: int = 60  # una saga tomada por un worker caído vuelve a la cola
+    reservation_saga_retry_base_seconds: float = 5.0
+    reservation_saga_poll_interval_seconds: float = 1.0
 
     # WhatsApp Meta Cloud
     whatsapp_access_token: SecretStr = SecretStr("dev-whatsapp-token")
     whatsapp_phone_number_id: str = "000000000000"
     whatsapp_verify_token: SecretStr = SecretStr("dev-verify-token")
     whatsapp_app_secret: SecretStr = SecretStr("dev-app-secret")
+    # Envío saliente compartido (ver services/whatsapp_sender.py)
+    whatsapp_messages_per_second: float = 80.0  # Tier de throughput del número en Meta
+    whatsapp_send_burst: int = 80
+    whatsapp_send_max_retries: int = 3
+    whatsapp_http2_enabled: bool = True
+    # Caché de media ids salientes (Meta los expira a los 30 días)
+    whatsapp_media_id_ttl_seconds: int = 29 * 86400
+    whatsapp_media_preload_enabled: bool = False  # Subir fotos de habitación y audio fijo al arrancar
 
     # Gmail Configuration
     gmail_username: str = "dev@example.com"
@@ -119,6 +169,10 @@ class Settings(BaseSettings):
     room_images_enabled: bool = True
     room_images_base_url: str = "https://example.com/images/rooms/"  # S3 or local NGINX
 
+    # Template packs por tenant (<tenant_id>.json con {"idioma": {"plantilla": "texto"}}), recarga en caliente
+    template_packs_dir: Optional[str] = None
+    template_packs_reload_interval: int = 60
+
     # Review Request Settings - Feature 6
     review_max_reminders: int = 3
     review_initial_delay_hours: int = 24  # Wait 24h after checkout
@@ -176,6 +230,21 @@ class Settings(BaseSettings):
     # Accept env names in UPPERCASE too (e.g., CHECK_DB_IN_READINESS) for compatibility with platform secrets
     check_db_in_readiness: bool = Field(default=True, validation_alias=AliasChoices("CHECK_DB_IN_READINESS", "check_db_in_readiness"))
     check_redis_in_readiness: bool = Field(default=True, validation_alias=AliasChoices("CHECK_REDIS_IN_READINESS", "check_redis_in_readiness"))
+    # Chequeos de salud cacheados: un prober en segundo plano los refresca y /health/ready responde desde memoria
+    health_probe_interval_seconds: float = 5.0
+    health_check_max_age_seconds: float = 15.0  # antigüedad máxima de un resultado antes de refrescarlo
+    health_check_timeout_seconds: float = 3.0  # timeout de cada chequeo individual
+    health_check_deadline_seconds: float = 5.0  # plazo global para una ronda de chequeos concurrentes
+    # Dashboards: un materializador precalcula los widgets (un snapshot por rol) y las métricas de negocio
+    # se agregan por minuto en memoria antes de volcarse a Redis
+    dashboard_materialize_interval_seconds: float = 5.0
+    dashboard_widget_timeout_seconds: float = 2.0
+    business_metrics_rollup_minutes: int = 1440  # ventana de rollups por serie (24h)
+    business_metrics_flush_seconds: float = 10.0
+
+    # Muestreo de recursos del host (hilo propio, fuera del event loop)
+    host_metrics_sample_seconds: float = 5.0
+    host_metrics_ring_size: int = 720  # 1 hora de muestras cada 5s
 
     # Seguridad / CSP
     csp_extra_sources: Optional[str] = None  # Ej: "https://cdn.example.com https://fonts.gstatic.com"
@@ -185,12 +254,32 @@ class Settings(BaseSettings):
     # Auth
     jwt_algorithm: str = "HS256"
     jwt_expiration_minutes: int = 60
+    # Claims JWT ya verificados que cada proceso reutiliza hasta su expiración
+    jwt_claims_cache_size: int = 10000
+    # Pool de hashing de contraseñas (bcrypt/PBKDF2 fuera del event loop); 0 workers = min(4, CPUs)
+    password_hash_workers: int = 0
+    password_hash_max_queue: int = 32
+    password_hash_per_ip_limit: int = 4
+    # Buffer de eventos de auditoría de seguridad (escritura a Redis en lotes con pipeline)
+    security_audit_queue_size: int = 10000
+    security_audit_batch_size: int = 200
+    security_audit_flush_interval: float = 0.05
+    # Espera máxima de eventos HIGH/CRITICAL con el buffer lleno antes de descartarlos
+    security_audit_overflow_wait: float = 0.5
+    # Listas de IPs (blacklist/whitelist) compartidas en Redis: intervalo de recarga en caliente
+    ip_access_lists_refresh_seconds: float = 5.0
+    # LRU por path de la política de seguridad resuelta en SecurityMiddleware
+    security_policy_cache_size: int = 4096
 
     # Metrics Security Configuration
     metrics_allowed_ips: list[str] = Field(
         default=["127.0.0.1", "::1"],
         description="Allowed IPs for Prometheus scraping. IPv4 and IPv6 supported."
     )
+    # Tope de series por métrica; el excedente va a la serie "__overflow__"
+    metrics_max_series_per_metric: int = 1000
+    # Los scrapes dentro de este intervalo comparten un único render de /metrics
+    metrics_cache_seconds: float = 1.0
 
     # Tracing / Sampling configuration
     trace_sampling_rate: float = Field(
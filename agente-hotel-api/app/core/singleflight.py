@@ -0,0 +1,239 @@
+# app/core/singleflight.py
+# Coalescing de peticiones idénticas (single-flight) en proceso y entre réplicas
+
+"""
+Single-flight: una sola llamada upstream por clave, aunque lleguen N peticiones a la vez.
+
+- `SingleFlight`: en proceso. El primer llamante lanza la operación como tarea
+  propia; el resto espera la misma tarea (cancelar a un llamante no cancela la
+  operación compartida).
+- `RedisSingleFlight`: además coordina réplicas. Quien consigue el lease
+  `SET NX PX` en Redis ejecuta la operación (que escribe la caché) y publica
+  `done`; las demás réplicas se suscriben al canal y releen la caché. Si el
+  líder falla o tarda más que `wait_timeout`, el que espera reintenta el lease
+  o llama él mismo (nunca se bloquea indefinidamente). El lease guarda un
+  token y se libera con compare-and-delete, sin pisar el de otro líder. Si
+  Redis no soporta lease/pub-sub, se degrada a single-flight en proceso.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from prometheus_client import Counter, Histogram
+
+from .logging import logger
+from .prometheus import registry
+
+T = TypeVar("T")
+
+singleflight_coalesced_total = Counter(
+    "singleflight_coalesced_total",
+    "Peticiones servidas por otra llamada en vuelo (sin ir upstream)",
+    ["name", "scope"],
+    registry=registry,
+)
+singleflight_leader_total = Counter(
+    "singleflight_leader_total",
+    "Llamadas que fueron upstream como líder",
+    ["name"],
+    registry=registry,
+)
+singleflight_wait_seconds = Histogram(
+    "singleflight_wait_seconds",
+    "Espera de una réplica hasta que el líder publica el resultado",
+    ["name"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    registry=registry,
+)
+singleflight_leader_timeouts_total = Counter(
+    "singleflight_leader_timeouts_total",
+    "Esperas que vencieron y llamaron upstream por su cuenta",
+    ["name"],
+    registry=registry,
+)
+
+# Token usado cuando Redis no permite coordinar: se actúa como líder sin lease
+_NO_LEASE = ""
+
+# Compare-and-delete: borra el lease solo si sigue guardando nuestro token
+# (si expiró puede ser ya de otro líder). KEYS[1] = lease, ARGV[1] = token.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Una tarea en vuelo por clave dentro del proceso."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def start(self, key: str, fn: Callable[[], Awaitable[T]]) -> "asyncio.Task[T]":
+        """Tarea en vuelo para `key`; si no hay ninguna la lanza con `fn`."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        else:
+            singleflight_coalesced_total.labels(name=self.name, scope="local").inc()
+        return task
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        return await asyncio.shield(self.start(key, fn))
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Evitar "exception was never retrieved" si todos los llamantes se cancelaron
+        if not task.cancelled():
+            task.exception()
+
+
+class RedisSingleFlight(SingleFlight):
+    """Single-flight en proceso + lease en Redis para coordinar réplicas."""
+
+    def __init__(
+        self,
+        name: str,
+        redis_client: Any,
+        lease_seconds: float = 10.0,
+        wait_timeout: float = 5.0,
+        poll_interval: float = 0.05,
+    ):
+        super().__init__(name)
+        self.redis = redis_client
+        self.lease_ms = int(lease_seconds * 1000)
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self._release_script = None  # registrado en redis-py (EVALSHA)
+
+    def _lease_key(self, key: str) -> str:
+        return f"singleflight:{self.name}:lease:{key}"
+
+    def _channel(self, key: str) -> str:
+        return f"singleflight:{self.name}:done:{key}"
+
+    async def do_cached(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[T]],
+        read_cached: Callable[[], Awaitable[Optional[T]]],
+    ) -> T:
+        """
+        Ejecuta `fetch` una sola vez en el clúster para `key`.
+
+        `fetch` debe dejar el resultado en la caché compartida; `read_cached`
+        lo lee (None si no está) y es lo que usan las réplicas que esperan.
+        """
+        return await self.do(key, lambda: self._cluster_flight(key, fetch, read_cached))
+
+    async def _cluster_flight(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[T]],
+        read_cached: Callable[[], Awaitable[Optional[T]]],
+    ) -> T:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            token = await self._acquire(key)
+            if token is not None:
+                return await self._lead(key, token, fetch)
+
+            started = time.monotonic()
+            result = await self._wait_for_leader(key, read_cached, deadline)
+            singleflight_wait_seconds.labels(name=self.name).observe(time.monotonic() - started)
+            if result is not None:
+                singleflight_coalesced_total.labels(name=self.name, scope="cluster").inc()
+                return result
+
+            if time.monotonic() >= deadline:
+                # Líder lento o caído: no bloquear al huésped más allá del presupuesto
+                singleflight_leader_timeouts_total.labels(name=self.name).inc()
+                logger.warning("singleflight.leader_timeout", name=self.name, key=key)
+                singleflight_leader_total.labels(name=self.name).inc()
+                return await fetch()
+            # El líder terminó sin resultado (error): intentar ser líder
+
+    async def _lead(self, key: str, token: str, fetch: Callable[[], Awaitable[T]]) -> T:
+        singleflight_leader_total.labels(name=self.name).inc()
+        outcome = "error"
+        try:
+            result = await fetch()
+            outcome = "ok"
+            return result
+        finally:
+            if token != _NO_LEASE:
+                await self._release(key, token, outcome)
+
+    async def _acquire(self, key: str) -> Optional[str]:
+        """Token si somos líderes, None si otra réplica tiene el lease."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.redis.set(self._lease_key(key), token, nx=True, px=self.lease_ms)
+        except Exception as e:
+            logger.debug("singleflight.lease_unavailable", name=self.name, error=str(e))
+            return _NO_LEASE
+        return token if acquired else None
+
+    async def _release(self, key: str, token: str, outcome: str) -> None:
+        try:
+            if self._release_script is None:
+                self._release_script = self.redis.register_script(_RELEASE_SCRIPT)
+            await self._release_script(keys=[self._lease_key(key)], args=[token])
+            await self.redis.publish(self._channel(key), outcome)
+        except Exception as e:
+            logger.debug("singleflight.release_failed", name=self.name, error=str(e))
+
+    async def _lease_held(self, key: str) -> bool:
+        try:
+            return bool(await self.redis.exists(self._lease_key(key)))
+        except Exception:
+            return False
+
+    async def _wait_for_leader(
+        self,
+        key: str,
+        read_cached: Callable[[], Awaitable[Optional[T]]],
+        deadline: float,
+    ) -> Optional[T]:
+        """Espera el `done` del líder (o sondea la caché); None si no hubo resultado."""
+        try:
+            pubsub = self.redis.pubsub()
+            await pubsub.subscribe(self._channel(key))
+        except Exception as e:
+            logger.debug("singleflight.pubsub_unavailable", name=self.name, error=str(e))
+            pubsub = None
+
+        try:
+            while True:
+                # Releer tras suscribirse: el líder pudo terminar entre el SET NX y el SUBSCRIBE
+                cached = await read_cached()
+                if cached is not None:
+                    return cached
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not await self._lease_held(key):
+                    return None
+                timeout = min(self.poll_interval, remaining)
+                if pubsub is None:
+                    await asyncio.sleep(timeout)
+                    continue
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+                if message is not None and message.get("data") in (b"error", "error"):
+                    return await read_cached()
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.unsubscribe()
+                    await pubsub.aclose()
+                except Exception:
+                    pass
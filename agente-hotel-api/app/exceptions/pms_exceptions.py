@@ -25,6 +25,12 @@ class PMSNotFoundError(PMSError):
     pass
 
 
+class PMSUnknownRoomTypeError(PMSError):
+    """Raised when a room type does not match a single type of the PMS catalog."""
+
+    pass
+
+
 class PMSServerError(PMSError):
     """Raised for 5xx errors from the PMS."""
 
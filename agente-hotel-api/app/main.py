@@ -21,15 +21,8 @@ except ModuleNotFoundError:  # pragma: no cover - degradación cuando no está i
 
 from app.core.settings import settings, Environment
 from app.core.logging import setup_logging, logger
-from app.core.middleware import (
-    correlation_id_middleware,
-    logging_and_metrics_middleware,
-    tracing_enrichment_middleware,
-    global_exception_handler,
-    SecurityHeadersMiddleware,
-    RequestSizeLimitMiddleware,
-    TenantMiddleware,
-)
+from app.core.middleware import global_exception_handler, RequestPipelineMiddleware
+from app.core.prometheus import cleanup_dead_worker_files, mark_worker_dead, multiprocess_dir
 
 # Importar todos los routers
 from app.routers import health, metrics, webhooks, admin, monitoring
@@ -54,8 +47,20 @@ except ImportError:
 # Servicios principales
 from .services.dynamic_tenant_service import dynamic_tenant_service
 from .services.feature_flag_service import get_feature_flag_service
+from .services.host_metrics import stop_host_sampler
 from .core.redis_client import get_redis
+from .services.availability_refresher import AvailabilityRefresher
+from .services.pms_change_feed import PMSChangeFeed
+from .services.reservation_saga import ReservationSagaService, set_reservation_saga_service
+from .services.lock_service import get_lock_service
+from .services.room_type_catalog import RoomTypeCatalogRefresher
+from .services.pms_adapter import QloAppsAdapter
 from .services.session_manager import SessionManager
+from .services.template_service import TemplatePackWatcher
+from .services.whatsapp_client import close_whatsapp_client, get_whatsapp_client
+from .services.whatsapp_media_cache import preload_media_assets
+from .security.audit_logger import close_audit_logger
+from .security.ip_access import get_ip_access_lists
 from sqlalchemy import select, func
 from app.core.database import engine
 from app.models.user import UserSession
@@ -115,10 +120,10 @@ async def _init_monitoring_services(initialized_services: list[str]) -> None:
     try:
         await get_health_service()
         await get_performance_service()
-        await get_business_metrics_service()
+        (await get_business_metrics_service()).start()
         await get_alerting_service()
         await get_tracing_service()
-        await get_dashboard_service()
+        (await get_dashboard_service()).start()
         initialized_services.extend([
             "health_service", "performance_service", "business_metrics_service",
             "alerting_service", "tracing_service", "dashboard_service",
@@ -128,6 +133,19 @@ async def _init_monitoring_services(initialized_services: list[str]) -> None:
         logger.warning(f"⚠️  Error inicializando servicios de monitoreo: {e}")
 
 
+async def _init_metrics_multiprocess(initialized_services: list[str]) -> None:
+    """Modo multiproceso de Prometheus: barre archivos de workers muertos."""
+    path = multiprocess_dir()
+    if not path:
+        return
+    try:
+        removed = await asyncio.to_thread(cleanup_dead_worker_files, path)
+        initialized_services.append("metrics_multiprocess")
+        logger.info("✅ Métricas en modo multiproceso", path=path, dead_worker_files_removed=removed)
+    except Exception as e:
+        logger.warning(f"⚠️  Error limpiando métricas multiproceso: {e}")
+
+
 async def _init_optimization_services(initialized_services: list[str]) -> None:
     """Inicializa servicios de optimización de performance."""
     if not OPTIMIZATION_AVAILABLE:
@@ -174,6 +192,115 @@ async def _init_dynamic_tenant(initialized_services: list[str]) -> None:
         logger.warning(f"⚠️  Error inicializando servicio de tenants: {e}")
 
 
+async def _init_ip_access_lists(initialized_services: list[str]) -> None:
+    """Carga las listas de IPs bloqueadas/confiables de Redis y las recarga en caliente."""
+    try:
+        await get_ip_access_lists().start(await get_redis())
+        initialized_services.append("ip_access_lists")
+        logger.info("✅ Listas de acceso por IP cargadas")
+    except Exception as e:
+        logger.warning(f"⚠️  Error cargando listas de acceso por IP: {e}")
+
+
+async def _init_readiness_prober(initialized_services: list[str]) -> None:
+    """Mantiene calientes los chequeos de /health/ready para que el probe responda desde memoria."""
+    try:
+        health.readiness_checks.start(settings.health_probe_interval_seconds, health.readiness_check_names)
+        initialized_services.append("readiness_prober")
+    except Exception as e:
+        logger.warning(f"⚠️  Error iniciando prober de readiness: {e}")
+
+
+async def _init_template_packs(initialized_services: list[str]) -> TemplatePackWatcher | None:
+    """Inicia la recarga en caliente de packs de plantillas por tenant (si está configurada)."""
+    if not settings.template_packs_dir:
+        return None
+    try:
+        watcher = TemplatePackWatcher(
+            settings.template_packs_dir, refresh_interval=settings.template_packs_reload_interval
+        )
+        await watcher.start()
+        initialized_services.append("template_pack_watcher")
+        logger.info("✅ Packs de plantillas por tenant inicializados")
+        return watcher
+    except Exception as e:
+        logger.warning(f"⚠️  Error inicializando packs de plantillas: {e}")
+        return None
+
+
+async def _init_whatsapp_media_preload(initialized_services: list[str]) -> asyncio.Task | None:
+    """Precarga en segundo plano los media ids de activos frecuentes."""
+    if not settings.whatsapp_media_preload_enabled:
+        return None
+    client = get_whatsapp_client()
+    task = asyncio.create_task(preload_media_assets(client, client.audio_processor))
+    initialized_services.append("whatsapp_media_preload")
+    logger.info("✅ Precarga de media de WhatsApp iniciada")
+    return task
+
+
+async def _init_availability_refresher(initialized_services: list[str]) -> AvailabilityRefresher | None:
+    """Inicia el prefetch de noches calientes de disponibilidad (solo con QloApps real)."""
+    if not settings.pms_prefetch_enabled or str(settings.pms_type).lower() == "mock":
+        return None
+    try:
+        refresher = AvailabilityRefresher(QloAppsAdapter(await get_redis()))
+        await refresher.start()
+        initialized_services.append("availability_refresher")
+        logger.info("✅ Prefetch de disponibilidad iniciado")
+        return refresher
+    except Exception as e:
+        logger.warning(f"⚠️  Error iniciando prefetch de disponibilidad: {e}")
+        return None
+
+
+async def _init_room_type_catalog(initialized_services: list[str]) -> RoomTypeCatalogRefresher | None:
+    """Carga el catálogo de tipos de habitación del PMS y lo refresca periódicamente."""
+    if str(settings.pms_type).lower() == "mock":
+        return None
+    try:
+        refresher = RoomTypeCatalogRefresher(QloAppsAdapter(await get_redis()))
+        await refresher.start()
+        initialized_services.append("room_type_catalog")
+        logger.info("✅ Refresco del catálogo de tipos de habitación iniciado")
+        return refresher
+    except Exception as e:
+        logger.warning(f"⚠️  Error cargando catálogo de tipos de habitación: {e}")
+        return None
+
+
+async def _init_pms_change_feed(initialized_services: list[str]) -> PMSChangeFeed | None:
+    """Inicia el feed de cambios de reservas del PMS (solo con QloApps real)."""
+    if not settings.pms_change_feed_enabled or str(settings.pms_type).lower() == "mock":
+        return None
+    try:
+        feed = PMSChangeFeed(QloAppsAdapter(await get_redis()))
+        await feed.start()
+        initialized_services.append("pms_change_feed")
+        logger.info("✅ Feed de cambios del PMS iniciado")
+        return feed
+    except Exception as e:
+        logger.warning(f"⚠️  Error iniciando feed de cambios del PMS: {e}")
+        return None
+
+
+async def _init_reservation_saga(initialized_services: list[str]) -> ReservationSagaService | None:
+    """Inicia el worker de la saga de reservas (solo con QloApps real)."""
+    if not settings.reservation_saga_enabled or str(settings.pms_type).lower() == "mock":
+        return None
+    try:
+        redis_client = await get_redis()
+        saga = ReservationSagaService(redis_client, QloAppsAdapter(redis_client), await get_lock_service())
+        await saga.start_worker()
+        set_reservation_saga_service(saga)
+        initialized_services.append("reservation_saga")
+        logger.info("✅ Worker de la saga de reservas iniciado")
+        return saga
+    except Exception as e:
+        logger.warning(f"⚠️  Error iniciando la saga de reservas: {e}")
+        return None
+
+
 async def _init_session_manager(initialized_services: list[str]) -> SessionManager | None:
     """Inicializa gestor de sesiones."""
     global _session_manager_cleanup
@@ -325,6 +452,107 @@ async def _shutdown_dlq_worker(task: asyncio.Task | None) -> None:
         logger.warning(f"⚠️  Error deteniendo DLQ Retry Worker: {e}")
 
 
+async def _shutdown_availability_refresher(refresher: AvailabilityRefresher | None) -> None:
+    """Detiene el prefetch de disponibilidad y cierra su adaptador PMS."""
+    if not refresher:
+        return
+    try:
+        await refresher.stop()
+        await refresher.adapter.close()
+        logger.info("✅ Prefetch de disponibilidad detenido")
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo prefetch de disponibilidad: {e}")
+
+
+async def _shutdown_room_type_catalog(refresher: RoomTypeCatalogRefresher | None) -> None:
+    """Detiene el refresco del catálogo de tipos de habitación."""
+    if not refresher:
+        return
+    try:
+        await refresher.stop()
+        await refresher.adapter.close()
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo catálogo de tipos de habitación: {e}")
+
+
+async def _shutdown_pms_change_feed(feed: PMSChangeFeed | None) -> None:
+    """Detiene el feed de cambios del PMS y cierra su adaptador."""
+    if not feed:
+        return
+    try:
+        await feed.stop()
+        await feed.adapter.close()
+        logger.info("✅ Feed de cambios del PMS detenido")
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo feed de cambios del PMS: {e}")
+
+
+async def _shutdown_reservation_saga(saga: ReservationSagaService | None) -> None:
+    """Detiene el worker de la saga; las sagas en curso se retoman al vencer su lease."""
+    if not saga:
+        return
+    try:
+        set_reservation_saga_service(None)
+        await saga.stop_worker()
+        await saga.pms_adapter.close()
+        logger.info("✅ Worker de la saga de reservas detenido")
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo la saga de reservas: {e}")
+
+
+async def _shutdown_ip_access_lists() -> None:
+    """Detiene la recarga de listas de acceso por IP."""
+    try:
+        await get_ip_access_lists().stop()
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo listas de acceso por IP: {e}")
+
+
+async def _shutdown_security_audit() -> None:
+    """Vacía el buffer de eventos de auditoría de seguridad antes de cerrar Redis."""
+    try:
+        await close_audit_logger()
+        logger.info("✅ Eventos de auditoría de seguridad persistidos")
+    except Exception as e:
+        logger.warning(f"⚠️  Error vaciando auditoría de seguridad: {e}")
+
+
+async def _shutdown_monitoring_services() -> None:
+    """Detiene el materializador de dashboards y vuelca los rollups de métricas de negocio."""
+    if not MONITORING_AVAILABLE:
+        return
+    try:
+        await (await get_dashboard_service()).stop()
+        await (await get_business_metrics_service()).stop()
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo servicios de monitoreo: {e}")
+
+
+def _shutdown_host_sampler() -> None:
+    """Detiene el hilo de muestreo de recursos del host."""
+    try:
+        stop_host_sampler()
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo muestreo del host: {e}")
+
+
+async def _shutdown_readiness_prober() -> None:
+    """Detiene el prober de readiness y cierra su cliente HTTP compartido."""
+    try:
+        await health.readiness_checks.stop()
+        await health.close_health_http_client()
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo prober de readiness: {e}")
+
+
+def _shutdown_metrics_multiprocess() -> None:
+    """Retira los gauges "live*" de este worker del agregado multiproceso."""
+    try:
+        mark_worker_dead()
+    except Exception as e:
+        logger.warning(f"⚠️  Error marcando worker de métricas como terminado: {e}")
+
+
 async def _shutdown_dynamic_tenant() -> None:
     """Detiene servicio de tenants."""
     try:
@@ -334,6 +562,26 @@ async def _shutdown_dynamic_tenant() -> None:
         logger.warning(f"⚠️  Error deteniendo servicio de tenants: {e}")
 
 
+async def _shutdown_template_packs(watcher: TemplatePackWatcher | None) -> None:
+    """Detiene la recarga de packs de plantillas."""
+    if not watcher:
+        return
+    try:
+        await watcher.stop()
+        logger.info("✅ Recarga de packs de plantillas detenida")
+    except Exception as e:
+        logger.warning(f"⚠️  Error deteniendo packs de plantillas: {e}")
+
+
+async def _shutdown_whatsapp_sender() -> None:
+    """Cierra el pool saliente compartido hacia la Graph API."""
+    try:
+        await close_whatsapp_client()
+        logger.info("✅ Envío saliente de WhatsApp cerrado")
+    except Exception as e:
+        logger.warning(f"⚠️  Error cerrando envío saliente de WhatsApp: {e}")
+
+
 async def _shutdown_optimization_services() -> None:
     """Detiene servicios de optimización."""
     if not OPTIMIZATION_AVAILABLE:
@@ -385,15 +633,30 @@ async def lifespan(app: FastAPI):
     initialized_services: list[str] = []
     session_manager: SessionManager | None = None
     dlq_worker_task: asyncio.Task | None = None
+    template_pack_watcher: TemplatePackWatcher | None = None
+    media_preload_task: asyncio.Task | None = None
+    availability_refresher: AvailabilityRefresher | None = None
+    pms_change_feed: PMSChangeFeed | None = None
+    reservation_saga: ReservationSagaService | None = None
+    room_type_catalog: RoomTypeCatalogRefresher | None = None
     metrics_tasks: tuple[asyncio.Task, asyncio.Task] | None = None
 
     try:
         # 1. Inicializar servicios
+        await _init_metrics_multiprocess(initialized_services)
         await _init_monitoring_services(initialized_services)
         await _init_optimization_services(initialized_services)
         await _init_dynamic_tenant(initialized_services)
+        await _init_ip_access_lists(initialized_services)
+        await _init_readiness_prober(initialized_services)
+        template_pack_watcher = await _init_template_packs(initialized_services)
+        media_preload_task = await _init_whatsapp_media_preload(initialized_services)
         session_manager = await _init_session_manager(initialized_services)
         dlq_worker_task = await _init_dlq_worker(initialized_services)
+        room_type_catalog = await _init_room_type_catalog(initialized_services)
+        availability_refresher = await _init_availability_refresher(initialized_services)
+        pms_change_feed = await _init_pms_change_feed(initialized_services)
+        reservation_saga = await _init_reservation_saga(initialized_services)
 
         # 2. Verificar conexiones
         await _verify_redis_connection()
@@ -418,12 +681,25 @@ async def lifespan(app: FastAPI):
     finally:
         # Cleanup durante shutdown
         logger.info("🔄 Iniciando shutdown del sistema...")
+        await _shutdown_readiness_prober()
         await _shutdown_session_manager(session_manager)
         await _shutdown_dlq_worker(dlq_worker_task)
+        await _shutdown_reservation_saga(reservation_saga)
+        await _shutdown_availability_refresher(availability_refresher)
+        await _shutdown_pms_change_feed(pms_change_feed)
+        await _shutdown_room_type_catalog(room_type_catalog)
         await _shutdown_dynamic_tenant()
+        await _shutdown_template_packs(template_pack_watcher)
+        _shutdown_metrics_tasks((media_preload_task,))
+        await _shutdown_whatsapp_sender()
         await _shutdown_optimization_services()
+        await _shutdown_monitoring_services()
+        _shutdown_host_sampler()
+        await _shutdown_ip_access_lists()
+        await _shutdown_security_audit()
         if metrics_tasks:
             _shutdown_metrics_tasks(metrics_tasks)
+        _shutdown_metrics_multiprocess()
         logger.info("✅ Conexiones cerradas")
         logger.info("🏁 Sistema de Agente Hotelero IA detenido correctamente")
 
@@ -450,7 +726,7 @@ app = FastAPI(
 
 # OpenTelemetry FastAPI Instrumentation (H1: Trace Enrichment)
 # CRITICAL: This enables automatic span creation for all HTTP requests
-# Without this, tracing_enrichment_middleware gets NonRecordingSpan and H1 doesn't work
+# Without this, RequestPipelineMiddleware gets NonRecordingSpan and H1 doesn't work
 if FastAPIInstrumentor is not None:
     FastAPIInstrumentor.instrument_app(
         app,
@@ -524,12 +800,9 @@ def _rl_handler(request: Request, exc: Exception) -> Response:
 
 
 app.add_exception_handler(RateLimitExceeded, _rl_handler)
-app.add_middleware(RequestSizeLimitMiddleware, max_size=1_000_000, max_media_size=10_000_000)
-app.add_middleware(SecurityHeadersMiddleware)
-app.add_middleware(TenantMiddleware, default_tenant="default")  # Multi-tenancy support
-app.middleware("http")(correlation_id_middleware)
-app.middleware("http")(tracing_enrichment_middleware)  # H1: Enrich spans with business context
-app.middleware("http")(logging_and_metrics_middleware)
+# Un solo middleware ASGI: tamaño de cuerpo, cabeceras de seguridad, tenant,
+# correlation ID, enriquecimiento de spans (H1) y logging/métricas
+app.add_middleware(RequestPipelineMiddleware, max_size=1_000_000, max_media_size=10_000_000, default_tenant="default")
 app.add_exception_handler(Exception, global_exception_handler)
 
 # Routers principales
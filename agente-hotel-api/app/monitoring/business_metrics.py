@@ -4,9 +4,10 @@ Hotel-specific business intelligence and operational metrics
 """
 
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
+import asyncio
 import json
 import logging
 from collections import defaultdict, deque
@@ -14,8 +15,13 @@ from collections import defaultdict, deque
 from prometheus_client import Counter, Histogram, Gauge
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.settings import settings
+
 logger = logging.getLogger(__name__)
 
+ROLLUP_MINUTE_FORMAT = "%Y-%m-%d-%H-%M"
+ROLLUP_TTL = 86400  # 24 hours
+
 
 class MetricCategory(str, Enum):
     """Metric categories for business intelligence"""
@@ -52,6 +58,29 @@ class BusinessMetric:
     metadata: Dict[str, Any] = None
 
 
+@dataclass
+class MetricRollup:
+    """Aggregate of one metric series over one minute"""
+
+    minute: str
+    count: int = 0
+    total: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    last: Optional[float] = None
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.last = value
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
 @dataclass
 class AlertCondition:
     """Alert condition configuration"""
@@ -72,15 +101,20 @@ class AdvancedBusinessMetrics:
         self.db_factory = database_session_factory
 
         # Business metrics storage
-        self.metrics_buffer = deque(maxlen=10000)
         self.alert_conditions = {}
         self.alert_history = defaultdict(list)
 
         # Prometheus metrics for business intelligence
         self._init_prometheus_metrics()
 
-        # Time series data for trends
-        self.time_series_data = defaultdict(lambda: deque(maxlen=1440))  # 24 hours of minute data
+        # Time series data for trends: per-minute rollups per series, bounded to the retention window
+        self.rollup_minutes = int(getattr(settings, "business_metrics_rollup_minutes", 1440))
+        self.time_series_data = defaultdict(lambda: deque(maxlen=self.rollup_minutes))
+
+        # Rollups changed since the last flush to Redis, by (series, minute)
+        self._dirty_rollups: Dict[Tuple[str, str], MetricRollup] = {}
+        self.flush_interval = float(getattr(settings, "business_metrics_flush_seconds", 10.0))
+        self._flusher: Optional[asyncio.Task] = None
 
         # Real-time calculation cache
         self._calculation_cache = {}
@@ -524,27 +558,61 @@ class AdvancedBusinessMetrics:
         return alerts_triggered
 
     async def _store_metric(self, metric: BusinessMetric):
-        """Store business metric"""
+        """Store business metric into its per-minute rollup"""
 
-        # Add to buffer
-        self.metrics_buffer.append(metric)
+        series = f"{metric.category.value}:{metric.name}"
+        minute = metric.timestamp.strftime(ROLLUP_MINUTE_FORMAT)
+        rollups = self.time_series_data[series]
 
-        # Store in Redis for real-time access
-        metric_key = f"metric:{metric.category}:{metric.name}:{metric.timestamp.timestamp()}"
-        metric_data = asdict(metric)
-        metric_data["timestamp"] = metric.timestamp.isoformat()
+        rollup = next((r for r in reversed(rollups) if r.minute <= minute), None)
+        if rollup is None or rollup.minute != minute:
+            if rollups and minute < rollups[-1].minute:
+                # Minute already closed and evicted or never seen: too late to aggregate
+                return
+            rollup = MetricRollup(minute=minute)
+            rollups.append(rollup)
 
-        await self.redis.setex(
-            metric_key,
-            3600,  # 1 hour TTL
-            json.dumps(metric_data),
-        )
+        rollup.add(metric.value)
+        self._dirty_rollups[(series, minute)] = rollup
 
-        # Add to time series
-        minute_key = metric.timestamp.strftime("%Y-%m-%d-%H-%M")
-        self.time_series_data[f"{metric.category}:{metric.name}"].append(
-            {"timestamp": minute_key, "value": metric.value, "labels": metric.labels}
-        )
+    def get_rollups(self, category: MetricCategory, name: str, minutes: int = 60) -> List[MetricRollup]:
+        """Most recent per-minute rollups of a metric series"""
+
+        rollups = self.time_series_data.get(f"{category.value}:{name}")
+        return list(rollups)[-minutes:] if rollups else []
+
+    async def flush_rollups(self):
+        """Write changed rollups to Redis, one key per series and minute, in a single pipeline"""
+
+        if not self.redis or not self._dirty_rollups:
+            return
+
+        dirty, self._dirty_rollups = self._dirty_rollups, {}
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for (series, minute), rollup in dirty.items():
+                pipe.set(f"metric_rollup:{series}:{minute}", json.dumps(asdict(rollup)), ex=ROLLUP_TTL)
+            await pipe.execute()
+        except Exception as e:
+            self._dirty_rollups = {**dirty, **self._dirty_rollups}
+            logger.warning(f"Error flushing business metric rollups: {e}")
+
+    def start(self):
+        """Start periodic flushing of rollups to Redis"""
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush_rollups()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush_rollups()
 
     async def _get_room_occupancy_data(self, session: AsyncSession, date: str) -> Dict[str, Any]:
         """Get room occupancy data from database"""
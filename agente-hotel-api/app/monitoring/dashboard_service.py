@@ -6,12 +6,18 @@ Role-specific dashboards for hotel operations
 from datetime import datetime, timedelta, timezone
 from typing import Dict, List, Optional, Any
 from enum import Enum
+import asyncio
 import json
 import logging
+import time
 from dataclasses import dataclass, asdict
 
+from ..core.settings import settings
+
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_TTL = 3600  # seconds a role snapshot survives in Redis without being rewritten
+
 
 class DashboardRole(str, Enum):
     """Dashboard roles for different user types"""
@@ -76,7 +82,12 @@ class CustomDashboardService:
 
         # Dashboard configurations
         self.dashboards = {}
-        self.widget_data_cache = {}
+
+        # Materialized widget data: one snapshot per role, {"generated_at", "widgets": {id: entry}}
+        self.snapshots: Dict[DashboardRole, Dict[str, Any]] = {}
+        self.widget_timeout = float(getattr(settings, "dashboard_widget_timeout_seconds", 2.0))
+        self.materialize_interval = float(getattr(settings, "dashboard_materialize_interval_seconds", 5.0))
+        self._materializer: Optional[asyncio.Task] = None
 
         # Initialize predefined dashboards
         self._init_dashboards()
@@ -379,7 +390,9 @@ class CustomDashboardService:
 
         dashboard = self.dashboards[role]
 
-        # Get widget data
+        # Get widget data: one snapshot read, recomputing only stale widgets
+        entries = await self._get_widget_entries(role, dashboard.widgets)
+
         dashboard_data = {
             "id": dashboard.id,
             "name": dashboard.name,
@@ -392,7 +405,7 @@ class CustomDashboardService:
         }
 
         for widget in dashboard.widgets:
-            widget_data = await self._get_widget_data(widget)
+            entry = entries[widget.id]
             dashboard_data["widgets"].append(
                 {
                     "id": widget.id,
@@ -400,9 +413,9 @@ class CustomDashboardService:
                     "title": widget.title,
                     "position": widget.position,
                     "config": widget.config,
-                    "data": widget_data,
+                    "data": entry["data"],
                     "refresh_interval": widget.refresh_interval,
-                    "last_updated": datetime.now(timezone.utc).isoformat(),
+                    "last_updated": entry["last_updated"],
                 }
             )
 
@@ -412,26 +425,142 @@ class CustomDashboardService:
         """Get data for a specific widget"""
 
         # Find widget in dashboards
-        widget = None
-        if role and role in self.dashboards:
-            for w in self.dashboards[role].widgets:
-                if w.id == widget_id:
-                    widget = w
-                    break
-        else:
-            # Search all dashboards
-            for dashboard in self.dashboards.values():
-                for w in dashboard.widgets:
-                    if w.id == widget_id:
-                        widget = w
-                        break
-                if widget:
-                    break
-
-        if not widget:
-            raise ValueError(f"Widget not found: {widget_id}")
-
-        return await self._get_widget_data(widget)
+        roles = [role] if role and role in self.dashboards else list(self.dashboards)
+        for dashboard_role in roles:
+            for widget in self.dashboards[dashboard_role].widgets:
+                if widget.id == widget_id:
+                    entries = await self._get_widget_entries(dashboard_role, [widget])
+                    return entries[widget.id]["data"]
+
+        raise ValueError(f"Widget not found: {widget_id}")
+
+    async def _get_widget_entries(self, role: DashboardRole, widgets: List[DashboardWidget]) -> Dict[str, Any]:
+        """Widget entries from the role snapshot, recomputing stale ones concurrently"""
+
+        snapshot = await self._read_snapshot(role)
+        entries = await self._refresh_stale_widgets(widgets, snapshot.get("widgets", {}))
+        if entries is not snapshot.get("widgets"):
+            # Keep fallback computations so the next request does not repeat them
+            self.snapshots[role] = {"generated_at": snapshot.get("generated_at"), "widgets": entries}
+        return entries
+
+    async def _read_snapshot(self, role: DashboardRole) -> Dict[str, Any]:
+        """Snapshot materialized by this worker, or the shared one in Redis when there is none yet"""
+
+        snapshot = self.snapshots.get(role)
+        if snapshot is not None:
+            return snapshot
+        if self.redis:
+            try:
+                cached = await self.redis.get(self._snapshot_key(role))
+                if cached:
+                    snapshot = json.loads(cached)
+                    self.snapshots[role] = snapshot
+                    return snapshot
+            except Exception as e:
+                logger.warning(f"Error reading dashboard snapshot for {role}: {e}")
+        return {"generated_at": None, "widgets": {}}
+
+    @staticmethod
+    def _snapshot_key(role: DashboardRole) -> str:
+        return f"dashboard_snapshot:{role.value}"
+
+    async def _refresh_stale_widgets(
+        self, widgets: List[DashboardWidget], entries: Dict[str, Any], horizon_seconds: float = 0.0
+    ) -> Dict[str, Any]:
+        """
+        Recompute widgets that are (or within `horizon_seconds` will be) older than their
+        refresh interval, concurrently and each under the widget timeout. A widget that
+        times out keeps its previous data. Returns `entries` itself when nothing was stale.
+        """
+
+        now = time.time()
+        stale = [
+            widget
+            for widget in widgets
+            if widget.id not in entries
+            or now + horizon_seconds - entries[widget.id]["computed_at"] >= widget.refresh_interval
+        ]
+        if not stale:
+            return entries
+
+        results = await asyncio.gather(*(self._compute_widget(widget) for widget in stale))
+
+        entries = dict(entries)
+        for widget, data in zip(stale, results):
+            if data is not None:
+                entries[widget.id] = self._snapshot_entry(data)
+            elif widget.id not in entries:
+                # Retried on the next read instead of caching the timeout
+                entries[widget.id] = self._snapshot_entry({"error": "Widget data timeout"}, computed_at=0.0)
+        return entries
+
+    @staticmethod
+    def _snapshot_entry(data: Dict[str, Any], computed_at: Optional[float] = None) -> Dict[str, Any]:
+        computed_at = time.time() if computed_at is None else computed_at
+        return {
+            "data": data,
+            "computed_at": computed_at,
+            "last_updated": datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def _compute_widget(self, widget: DashboardWidget) -> Optional[Dict[str, Any]]:
+        """Widget data, or None if it did not finish within the widget timeout"""
+
+        try:
+            return await asyncio.wait_for(self._get_widget_data(widget), timeout=self.widget_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Widget {widget.id} timed out after {self.widget_timeout}s")
+            return None
+
+    async def materialize(self) -> Dict[DashboardRole, Dict[str, Any]]:
+        """Refresh every role snapshot ahead of expiry and publish them to Redis"""
+
+        roles = list(self.dashboards)
+        results = await asyncio.gather(
+            *(
+                self._refresh_stale_widgets(
+                    self.dashboards[role].widgets,
+                    self.snapshots.get(role, {}).get("widgets", {}),
+                    horizon_seconds=self.materialize_interval,
+                )
+                for role in roles
+            )
+        )
+
+        generated_at = datetime.now(timezone.utc).isoformat()
+        for role, entries in zip(roles, results):
+            self.snapshots[role] = {"generated_at": generated_at, "widgets": entries}
+
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for role in roles:
+                    pipe.set(self._snapshot_key(role), json.dumps(self.snapshots[role], default=str), ex=SNAPSHOT_TTL)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Error publishing dashboard snapshots: {e}")
+
+        return self.snapshots
+
+    def start(self):
+        """Start the background widget materializer"""
+        if self._materializer is None or self._materializer.done():
+            self._materializer = asyncio.create_task(self._materialize_periodically())
+
+    async def stop(self):
+        if self._materializer is not None:
+            self._materializer.cancel()
+            await asyncio.gather(self._materializer, return_exceptions=True)
+            self._materializer = None
+
+    async def _materialize_periodically(self):
+        while True:
+            try:
+                await self.materialize()
+            except Exception as e:
+                logger.error(f"Error materializing dashboards: {e}")
+            await asyncio.sleep(self.materialize_interval)
 
     def _get_data_source_handlers(self) -> Dict[str, callable]:
         """Return mapping of data sources to their handler methods."""
@@ -464,24 +593,15 @@ class CustomDashboardService:
     async def _get_widget_data(self, widget: DashboardWidget) -> Dict[str, Any]:
         """Get data for widget based on its data source. Uses handler mapping (CC reduced from 26 to 5)."""
 
-        # Check cache first
-        cache_key = f"widget_data:{widget.id}"
-        cached_data = await self._get_cached_widget_data(cache_key)
-        if cached_data:
-            return cached_data
-
         try:
             handlers = self._get_data_source_handlers()
             handler = handlers.get(widget.data_source)
-            
+
             if handler:
                 widget_data = await handler()
             else:
                 widget_data = {"error": f"Unknown data source: {widget.data_source}"}
 
-            # Cache the data
-            await self._cache_widget_data(cache_key, widget_data, widget.refresh_interval)
-
             return widget_data
 
         except Exception as e:
@@ -522,23 +642,6 @@ class CustomDashboardService:
 
         return dashboard_id
 
-    async def _get_cached_widget_data(self, cache_key: str) -> Optional[Dict[str, Any]]:
-        """Get cached widget data"""
-        try:
-            cached = await self.redis.get(cache_key)
-            if cached:
-                return json.loads(cached)
-        except Exception as e:
-            logger.warning(f"Error getting cached widget data: {e}")
-        return None
-
-    async def _cache_widget_data(self, cache_key: str, data: Dict[str, Any], ttl: int):
-        """Cache widget data"""
-        try:
-            await self.redis.setex(cache_key, ttl, json.dumps(data, default=str))
-        except Exception as e:
-            logger.warning(f"Error caching widget data: {e}")
-
     # Data source methods (these would connect to actual data)
     async def _get_daily_revenue_data(self) -> Dict[str, Any]:
         """Get daily revenue data"""
@@ -0,0 +1,157 @@
+"""
+Cached Health Checks
+Health checks run concurrently, refreshed by a background prober and served from memory
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from ..core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedCheck:
+    """Last known outcome of a health check"""
+
+    name: str
+    function: Callable[[], Awaitable[Any]]
+    max_age_seconds: float
+    timeout_seconds: float
+    value: Any = None
+    error: Optional[str] = None
+    checked_at: Optional[float] = None  # time.monotonic()
+    duration_ms: float = 0.0
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        return None if self.checked_at is None else time.monotonic() - self.checked_at
+
+    @property
+    def fresh(self) -> bool:
+        return self.checked_at is not None and time.monotonic() - self.checked_at <= self.max_age_seconds
+
+
+class HealthCheckCache:
+    """
+    Registry of health checks whose results are kept in memory.
+
+    - Stale checks are refreshed concurrently, one flight per check: a probe
+      that finds a stale entry joins the refresh already in progress instead of
+      starting another one.
+    - Every refresh is bounded by a global deadline; a check that overruns it
+      keeps running until its own timeout and updates the cache when done.
+    - `start()` runs a background prober that refreshes entries before they
+      go stale, so probes normally never wait on a dependency.
+    """
+
+    def __init__(self, name: str, deadline_seconds: float = 5.0):
+        self.name = name
+        self.deadline_seconds = deadline_seconds
+        self.checks: Dict[str, CachedCheck] = {}
+        self._flights = SingleFlight(f"{name}_health_checks")
+        self._background: Set[asyncio.Task] = set()
+        self._prober: Optional[asyncio.Task] = None
+
+    def register(
+        self, name: str, function: Callable[[], Awaitable[Any]], max_age_seconds: float, timeout_seconds: float
+    ) -> None:
+        self.checks[name] = CachedCheck(
+            name=name, function=function, max_age_seconds=max_age_seconds, timeout_seconds=timeout_seconds
+        )
+
+    def clear(self) -> None:
+        """Forget every result (e.g. after reconfiguring dependencies)"""
+        for check in self.checks.values():
+            check.value, check.error, check.checked_at = None, None, None
+
+    def due(self, names: Iterable[str], within_seconds: float = 0.0) -> List[str]:
+        """Checks that never ran or will be stale within `within_seconds`"""
+        return [
+            name
+            for name in names
+            if self.checks[name].checked_at is None
+            or self.checks[name].age_seconds + within_seconds > self.checks[name].max_age_seconds
+        ]
+
+    async def refresh(self, names: Iterable[str], deadline_seconds: Optional[float] = None) -> None:
+        """Run the given checks concurrently and wait for them up to the deadline"""
+        waiters = [asyncio.ensure_future(self._flights.do(name, lambda name=name: self._run(name))) for name in names]
+        if not waiters:
+            return
+        _, pending = await asyncio.wait(
+            waiters, timeout=self.deadline_seconds if deadline_seconds is None else deadline_seconds
+        )
+        for waiter in pending:
+            # Only the wait is abandoned: the shared flight finishes and caches its result
+            waiter.cancel()
+
+    async def collect(self, names: Iterable[str], wait: bool = True) -> Dict[str, CachedCheck]:
+        """
+        Return the entries for `names`, refreshing the stale ones.
+
+        With `wait=True` stale checks are awaited up to the global deadline
+        (deep health report). With `wait=False` (probes) only checks that
+        never ran are awaited; the rest are served from memory while they
+        refresh in the background.
+        """
+        entries = {name: self.checks[name] for name in names}
+        stale = [name for name, check in entries.items() if not check.fresh]
+        if not stale:
+            return entries
+
+        if wait:
+            await self.refresh(stale)
+            return entries
+
+        missing = [name for name in stale if entries[name].checked_at is None]
+        self._refresh_in_background([name for name in stale if name not in missing])
+        if missing:
+            await self.refresh(missing)
+        return entries
+
+    def _refresh_in_background(self, names: List[str]) -> None:
+        if not names:
+            return
+        task = asyncio.create_task(self.refresh(names))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _run(self, name: str) -> Any:
+        check = self.checks[name]
+        started = time.monotonic()
+        try:
+            value, error = await asyncio.wait_for(check.function(), timeout=check.timeout_seconds), None
+        except asyncio.TimeoutError:
+            value, error = None, f"Health check timeout after {check.timeout_seconds}s"
+        except Exception as e:
+            value, error = None, str(e)
+        check.value, check.error = value, error
+        check.checked_at = time.monotonic()
+        check.duration_ms = (check.checked_at - started) * 1000
+        return value
+
+    def start(self, interval_seconds: float, names: Optional[Callable[[], Iterable[str]]] = None) -> None:
+        """Start the background prober; `names` selects which checks it keeps warm"""
+        if self._prober is None or self._prober.done():
+            self._prober = asyncio.create_task(self._probe(interval_seconds, names))
+
+    async def stop(self) -> None:
+        tasks = [task for task in (self._prober, *self._background) if task is not None]
+        self._prober = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _probe(self, interval_seconds: float, names: Optional[Callable[[], Iterable[str]]]) -> None:
+        while True:
+            try:
+                # Refresh whatever would go stale before the next round
+                await self.refresh(self.due(names() if names else list(self.checks), interval_seconds))
+            except Exception as e:
+                logger.error(f"Health prober {self.name} failed: {e}")
+            await asyncio.sleep(interval_seconds)
@@ -14,6 +14,7 @@ import logging
 from collections import defaultdict, deque
 
 from ..core.settings import settings
+from .health_cache import CachedCheck, HealthCheckCache
 
 logger = logging.getLogger(__name__)
 
@@ -115,8 +116,11 @@ class AdvancedHealthService:
         # Circuit breakers for dependencies
         self.circuit_breakers = {}
 
-        # Health check results cache
-        self.results_cache = {}
+        # Health check results cache: checks and dependencies run concurrently under a global
+        # deadline and are served from memory while younger than their interval
+        self.results_cache = HealthCheckCache(
+            "advanced_health", deadline_seconds=getattr(settings, "health_check_deadline_seconds", 5.0)
+        )
 
         # Initialize default health checks
         self._init_default_checks()
@@ -194,16 +198,33 @@ class AdvancedHealthService:
             "last_run": None,
             "enabled": True,
         }
+        # The check enforces its own timeout; the margin lets it report the timeout itself
+        self.results_cache.register(
+            name,
+            lambda: self._run_health_check(name, self.health_checks[name]),
+            max_age_seconds=interval_seconds,
+            timeout_seconds=timeout_seconds + 1,
+        )
 
         logger.info(f"Registered health check: {name} ({check_type})")
 
-    def register_dependency(self, name: str, dep_type: DependencyType, endpoint: str, check_function: Callable):
+    def register_dependency(
+        self,
+        name: str,
+        dep_type: DependencyType,
+        endpoint: str,
+        check_function: Callable,
+        interval_seconds: int = 120,
+        timeout_seconds: int = 10,
+    ):
         """Register a dependency health check"""
 
         self.dependency_checks[name] = {
             "type": dep_type,
             "endpoint": endpoint,
             "function": check_function,
+            "interval": interval_seconds,
+            "timeout": timeout_seconds,
             "enabled": True,
             "circuit_breaker": {
                 "failure_threshold": 5,
@@ -214,8 +235,19 @@ class AdvancedHealthService:
             },
         }
 
+        self.results_cache.register(
+            self._dependency_key(name),
+            lambda: self._check_dependency(name),
+            max_age_seconds=interval_seconds,
+            timeout_seconds=timeout_seconds + 1,
+        )
+
         logger.info(f"Registered dependency: {name} ({dep_type})")
 
+    @staticmethod
+    def _dependency_key(name: str) -> str:
+        return f"dependency:{name}"
+
     async def check_health(self, check_types: List[CheckType] = None) -> SystemHealth:
         """Perform comprehensive health check"""
 
@@ -226,40 +258,23 @@ class AdvancedHealthService:
         if check_types:
             checks_to_run = {name: check for name, check in self.health_checks.items() if check["type"] in check_types}
 
-        # Run health checks
-        check_results = {}
-        for name, check_config in checks_to_run.items():
-            if not check_config["enabled"]:
-                continue
-
-            try:
-                result = await self._run_health_check(name, check_config)
-                check_results[name] = result
-            except Exception as e:
-                logger.error(f"Health check {name} failed: {e}")
-                check_results[name] = HealthCheckResult(
-                    name=name,
-                    status=HealthStatus.CRITICAL,
-                    check_type=check_config["type"],
-                    duration_ms=0,
-                    timestamp=datetime.now(timezone.utc),
-                    error=str(e),
-                )
-
-        # Check dependencies
-        dependency_results = await self._check_all_dependencies()
-
-        # Get system metrics
-        system_metrics = await self._get_system_metrics()
-
-        # Get business metrics
-        business_metrics = await self._get_business_health_metrics()
-
-        # Get performance indicators
-        performance_indicators = await self._get_performance_indicators()
+        # Run checks and dependencies concurrently; fresh results come from memory
+        check_names = [name for name, check in checks_to_run.items() if check["enabled"]]
+        dependency_names = [name for name, dep in self.dependency_checks.items() if dep["enabled"]]
+        entries = await self.results_cache.collect(
+            check_names + [self._dependency_key(name) for name in dependency_names]
+        )
+        check_results = {name: self._check_result_from_entry(name, entries[name]) for name in check_names}
+        dependency_results = {
+            name: self._dependency_from_entry(name, entries[self._dependency_key(name)]) for name in dependency_names
+        }
 
-        # Count active alerts
-        alerts_active = await self._count_active_alerts()
+        system_metrics, business_metrics, performance_indicators, alerts_active = await asyncio.gather(
+            self._get_system_metrics(),
+            self._get_business_health_metrics(),
+            self._get_performance_indicators(),
+            self._count_active_alerts(),
+        )
 
         # Determine overall status
         overall_status = self._determine_overall_status(check_results, dependency_results, system_metrics)
@@ -280,12 +295,13 @@ class AdvancedHealthService:
         self.health_history.append(system_health)
 
         # Cache results
-        cache_key = "system_health_latest"
-        await self.redis.setex(
-            cache_key,
-            60,  # 1 minute cache
-            json.dumps(asdict(system_health), default=str),
-        )
+        if self.redis:
+            cache_key = "system_health_latest"
+            await self.redis.setex(
+                cache_key,
+                60,  # 1 minute cache
+                json.dumps(asdict(system_health), default=str),
+            )
 
         total_duration = (time.time() - start_time) * 1000
         logger.info(f"Health check completed in {total_duration:.2f}ms - Status: {overall_status}")
@@ -339,17 +355,19 @@ class AdvancedHealthService:
         start_time = time.time()
 
         try:
-            # Check critical dependencies
-            critical_deps = ["postgres_db", "redis_cache"]
-            dependency_results = {}
-
-            for dep_name in critical_deps:
-                if dep_name in self.dependency_checks:
-                    result = await self._check_dependency(dep_name)
-                    dependency_results[dep_name] = result
-
-            # Check business critical components
-            business_checks = [await self._check_reservation_system_health(), await self._check_database_readiness()]
+            # Critical dependencies and business components, served from memory; stale ones
+            # refresh in the background so a hanging dependency does not block the probe
+            critical_deps = [name for name in ("postgres_db", "redis_cache") if name in self.dependency_checks]
+            critical_checks = [
+                name for name in ("reservation_system", "database_readiness") if name in self.health_checks
+            ]
+            entries = await self.results_cache.collect(
+                [self._dependency_key(name) for name in critical_deps] + critical_checks, wait=False
+            )
+            dependency_results = {
+                name: self._dependency_from_entry(name, entries[self._dependency_key(name)]) for name in critical_deps
+            }
+            business_checks = [self._check_result_from_entry(name, entries[name]) for name in critical_checks]
 
             # Determine readiness status
             failed_deps = [
@@ -410,8 +428,9 @@ class AdvancedHealthService:
 
         if dependency_name:
             if dependency_name in self.dependency_checks:
-                result = await self._check_dependency(dependency_name)
-                return {dependency_name: result}
+                key = self._dependency_key(dependency_name)
+                entries = await self.results_cache.collect([key])
+                return {dependency_name: self._dependency_from_entry(dependency_name, entries[key])}
             else:
                 return {}
 
@@ -522,27 +541,43 @@ class AdvancedHealthService:
             )
 
     async def _check_all_dependencies(self) -> Dict[str, DependencyHealth]:
-        """Check all registered dependencies"""
-
-        results = {}
-
-        for name in self.dependency_checks:
-            try:
-                result = await self._check_dependency(name)
-                results[name] = result
-            except Exception as e:
-                logger.error(f"Dependency check {name} failed: {e}")
-                results[name] = DependencyHealth(
-                    name=name,
-                    type=self.dependency_checks[name]["type"],
-                    status=HealthStatus.CRITICAL,
-                    endpoint=self.dependency_checks[name]["endpoint"],
-                    last_check=datetime.now(timezone.utc),
-                    response_time_ms=0,
-                    error_count=1,
-                )
+        """Check all registered dependencies concurrently"""
+
+        names = [name for name, dep in self.dependency_checks.items() if dep["enabled"]]
+        entries = await self.results_cache.collect([self._dependency_key(name) for name in names])
+        return {name: self._dependency_from_entry(name, entries[self._dependency_key(name)]) for name in names}
+
+    def _check_result_from_entry(self, name: str, entry: CachedCheck) -> HealthCheckResult:
+        """Cached result of a check, or a critical result if it has none yet"""
+
+        if entry.value is not None:
+            return entry.value
+        return HealthCheckResult(
+            name=name,
+            status=HealthStatus.CRITICAL,
+            check_type=self.health_checks[name]["type"],
+            duration_ms=entry.duration_ms,
+            timestamp=datetime.now(timezone.utc),
+            error=entry.error or "Health check deadline exceeded",
+        )
 
-        return results
+    def _dependency_from_entry(self, name: str, entry: CachedCheck) -> DependencyHealth:
+        """Cached health of a dependency, or a critical one if it has none yet"""
+
+        if entry.value is not None:
+            return entry.value
+        error = entry.error or "Dependency check deadline exceeded"
+        logger.error(f"Dependency check {name} failed: {error}")
+        return DependencyHealth(
+            name=name,
+            type=self.dependency_checks[name]["type"],
+            status=HealthStatus.CRITICAL,
+            endpoint=self.dependency_checks[name]["endpoint"],
+            last_check=datetime.now(timezone.utc),
+            response_time_ms=entry.duration_ms,
+            error_count=1,
+            metadata={"error": error},
+        )
 
     async def _check_dependency(self, name: str) -> DependencyHealth:
         """Check a specific dependency"""
@@ -576,7 +611,9 @@ class AdvancedHealthService:
         start_time = time.time()
 
         try:
-            result = await dep_config["function"](dep_config["endpoint"])
+            result = await asyncio.wait_for(
+                dep_config["function"](dep_config["endpoint"]), timeout=dep_config["timeout"]
+            )
             response_time_ms = (time.time() - start_time) * 1000
 
             # Reset circuit breaker on success
@@ -625,7 +662,7 @@ class AdvancedHealthService:
                 last_check=datetime.now(timezone.utc),
                 response_time_ms=response_time_ms,
                 error_count=circuit_breaker["failure_count"],
-                metadata={"error": str(e)},
+                metadata={"error": str(e) or type(e).__name__},
             )
 
             # Store in history
@@ -1268,64 +1305,43 @@ class AdvancedHealthService:
         return list(set(suggestions))  # Remove duplicates
 
     def _start_health_monitoring(self):
-        """Start background health monitoring tasks"""
+        """Start background health monitoring task"""
 
-        # Start periodic health checks
         asyncio.create_task(self._periodic_health_checks())
 
-        # Start dependency monitoring
-        asyncio.create_task(self._dependency_monitoring())
-
-    async def _periodic_health_checks(self):
-        """Background task for periodic health checks"""
+    async def _periodic_health_checks(self, tick_seconds: int = 30):
+        """Background prober: refresh due checks and dependencies concurrently"""
 
         while True:
             try:
-                # Run health checks based on their intervals
-                current_time = datetime.now(timezone.utc)
-
-                for name, check_config in self.health_checks.items():
-                    if not check_config["enabled"]:
-                        continue
-
-                    last_run = check_config["last_run"]
-                    interval = check_config["interval"]
-
-                    if last_run is None or (current_time - last_run).total_seconds() >= interval:
-                        try:
-                            result = await self._run_health_check(name, check_config)
-
-                            # Log critical issues
-                            if result.status == HealthStatus.CRITICAL:
-                                logger.critical(f"Health check {name} is CRITICAL: {result.error or result.message}")
-
-                        except Exception as e:
-                            logger.error(f"Error running periodic health check {name}: {e}")
+                # Refresh whatever would go stale before the next tick, so readers never wait
+                checks = [name for name, check in self.health_checks.items() if check["enabled"]]
+                dependencies = [name for name, dep in self.dependency_checks.items() if dep["enabled"]]
+                keys = checks + [self._dependency_key(name) for name in dependencies]
+                due = self.results_cache.due(keys, tick_seconds)
+                await self.results_cache.refresh(due)
+
+                for name in checks:
+                    result = self.results_cache.checks[name].value
+                    # Log critical issues
+                    if name in due and result is not None and result.status == HealthStatus.CRITICAL:
+                        logger.critical(f"Health check {name} is CRITICAL: {result.error or result.message}")
+
+                for name in dependencies:
+                    result = self.results_cache.checks[self._dependency_key(name)].value
+                    if (
+                        self._dependency_key(name) in due
+                        and result is not None
+                        and result.status in [HealthStatus.CRITICAL, HealthStatus.UNHEALTHY]
+                    ):
+                        logger.warning(f"Dependency {name} is {result.status}: {result.metadata}")
 
-                await asyncio.sleep(30)  # Check every 30 seconds
+                await asyncio.sleep(tick_seconds)
 
             except Exception as e:
                 logger.error(f"Error in periodic health checks: {e}")
                 await asyncio.sleep(60)
 
-    async def _dependency_monitoring(self):
-        """Background task for dependency monitoring"""
-
-        while True:
-            try:
-                # Check dependencies every 2 minutes
-                dependency_results = await self._check_all_dependencies()
-
-                for name, result in dependency_results.items():
-                    if result.status in [HealthStatus.CRITICAL, HealthStatus.UNHEALTHY]:
-                        logger.warning(f"Dependency {name} is {result.status}: {result.metadata}")
-
-                await asyncio.sleep(120)  # Check every 2 minutes
-
-            except Exception as e:
-                logger.error(f"Error in dependency monitoring: {e}")
-                await asyncio.sleep(120)
-
 
 # Create singleton instance
 health_service = None
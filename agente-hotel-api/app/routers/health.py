@@ -1,23 +1,40 @@
 # [PROMPT GA-02] app/routers/health.py
 
 from datetime import datetime, timezone
+from typing import Optional
 import httpx
 import os
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
-import redis.asyncio as redis
 
-from ..core.database import get_db
+from ..core.database import AsyncSessionFactory
 from ..core.redis_client import get_redis
 from ..core.settings import settings
 from ..core.logging import logger
 from ..models.schemas import HealthCheck, ReadinessCheck, LivenessCheck
+from ..monitoring.health_cache import HealthCheckCache
 from .metrics import dependency_up, readiness_up, readiness_last_check_timestamp
 
 router = APIRouter(tags=["Health"])
 
+# Cliente HTTP compartido para chequear el PMS (antes se abría uno nuevo por probe)
+_health_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_health_http_client() -> httpx.AsyncClient:
+    global _health_http_client
+    if _health_http_client is None or _health_http_client.is_closed:
+        _health_http_client = httpx.AsyncClient(timeout=settings.health_check_timeout_seconds)
+    return _health_http_client
+
+
+async def close_health_http_client() -> None:
+    global _health_http_client
+    if _health_http_client is not None:
+        await _health_http_client.aclose()
+        _health_http_client = None
+
 
 @router.get("/health", response_model=HealthCheck)
 async def health_check():
@@ -25,40 +42,13 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.now(timezone.utc).isoformat()}
 
 
-@router.get("/health/ready", response_model=ReadinessCheck)
-async def readiness_check(db: AsyncSession = Depends(get_db), redis_client: redis.Redis = Depends(get_redis)):
-    """Verifica que todas las dependencias estén listas.
-
-    - DB y Redis son siempre requeridos.
-    - PMS es opcional: solo se chequea si `check_pms_in_readiness` es True y `pms_type` no es `mock`.
-    """
-    checks = {"database": False, "redis": False}
-
+def _flag_enabled(name: str) -> bool:
     # Read flags directly from environment to ensure they're respected on Fly
-    check_db = os.getenv("CHECK_DB_IN_READINESS", "true").lower() in ("true", "1", "yes")
-    check_redis = os.getenv("CHECK_REDIS_IN_READINESS", "true").lower() in ("true", "1", "yes")
-
-    # Check PostgreSQL (configurable)
-    if check_db:
-        try:
-            await db.execute(text("SELECT 1"))
-            checks["database"] = True
-        except Exception as e:
-            logger.error(f"Database health check failed: {e}")
-    else:
-        checks["database"] = True  # skipped by config
-
-    # Check Redis (configurable)
-    if check_redis:
-        try:
-            await redis_client.ping()
-            checks["redis"] = True
-        except Exception as e:
-            logger.error(f"Redis health check failed: {e}")
-    else:
-        checks["redis"] = True  # skipped by config
+    return os.getenv(name, "true").lower() in ("true", "1", "yes")
+
 
-    # PMS: opcional por configuración y no bloquea si es tipo MOCK
+def _pms_check_enabled() -> bool:
+    """PMS: opcional por configuración y no bloquea si es tipo MOCK"""
     pms_required = bool(getattr(settings, "check_pms_in_readiness", False))
     pms_type = getattr(settings, "pms_type", None)
     # Use .value to get the actual enum value (e.g., "mock" instead of "PMSType.MOCK")
@@ -66,18 +56,72 @@ async def readiness_check(db: AsyncSession = Depends(get_db), redis_client: redi
         pms_type_value = ""
     else:
         pms_type_value = pms_type.value if hasattr(pms_type, "value") else str(pms_type).lower()
+    return pms_required and pms_type_value != "mock"
+
+
+def readiness_check_names() -> list[str]:
+    """Chequeos habilitados por configuración (los mismos que mantiene calientes el prober)"""
+    names = []
+    if _flag_enabled("CHECK_DB_IN_READINESS"):
+        names.append("database")
+    if _flag_enabled("CHECK_REDIS_IN_READINESS"):
+        names.append("redis")
+    if _pms_check_enabled():
+        names.append("pms")
+    return names
+
+
+async def _check_database() -> bool:
+    async with AsyncSessionFactory() as session:
+        await session.execute(text("SELECT 1"))
+    return True
+
+
+async def _check_redis() -> bool:
+    redis_client = await get_redis()
+    await redis_client.ping()
+    return True
+
+
+async def _check_pms() -> bool:
+    # Intento simple al base_url del PMS; podría reemplazarse por un endpoint /health propio del PMS
+    response = await get_health_http_client().get(str(settings.pms_base_url))
+    return response.status_code < 500
+
+
+# Resultados servidos desde memoria; el prober (ver main.py) los refresca antes de que caduquen.
+# Las lambdas resuelven la función en cada llamada para que pueda parchearse.
+readiness_checks = HealthCheckCache("readiness", deadline_seconds=settings.health_check_deadline_seconds)
+for _name, _check in (
+    ("database", lambda: _check_database()),
+    ("redis", lambda: _check_redis()),
+    ("pms", lambda: _check_pms()),
+):
+    readiness_checks.register(
+        _name,
+        _check,
+        max_age_seconds=settings.health_check_max_age_seconds,
+        timeout_seconds=settings.health_check_timeout_seconds,
+    )
 
-    if not pms_required or pms_type_value == "mock":
-        checks["pms"] = True
-    else:
-        checks["pms"] = False
-        try:
-            async with httpx.AsyncClient() as client:
-                # Intento simple al base_url del PMS; podría reemplazarse por un endpoint /health propio del PMS
-                response = await client.get(str(settings.pms_base_url), timeout=5.0)
-                checks["pms"] = response.status_code < 500
-        except Exception as e:
-            logger.error(f"PMS health check failed: {e}")
+
+@router.get("/health/ready", response_model=ReadinessCheck)
+async def readiness_check():
+    """Verifica que todas las dependencias estén listas.
+
+    - DB y Redis son requeridos salvo que se desactiven con CHECK_DB_IN_READINESS / CHECK_REDIS_IN_READINESS.
+    - PMS es opcional: solo se chequea si `check_pms_in_readiness` es True y `pms_type` no es `mock`.
+
+    Los resultados se sirven desde memoria: un resultado caducado se refresca en segundo
+    plano (un solo vuelo por chequeo) y solo se espera, con plazo global, si nunca se ejecutó.
+    """
+    # Los chequeos desactivados por configuración cuentan como OK
+    checks = {"database": True, "redis": True, "pms": True}
+    entries = await readiness_checks.collect(readiness_check_names(), wait=False)
+    for name, entry in entries.items():
+        checks[name] = entry.value is True
+        if not checks[name]:
+            logger.error(f"{name} health check failed: {entry.error or 'no result within deadline'}")
 
     all_healthy = all(checks.values())
 
@@ -1,7 +1,8 @@
 # [PROMPT GA-02] app/routers/metrics.py
 
 from fastapi import APIRouter, Response, Request, HTTPException
-from prometheus_client import Gauge, generate_latest
+from prometheus_client import Gauge
+from app.core.prometheus import metrics_exposition
 from app.core.settings import get_settings
 import logging
 
@@ -63,6 +64,9 @@ async def metrics(request: Request):
     En desarrollo, por defecto permite localhost (127.0.0.1, ::1).
     En producción, debe configurarse con IPs de Prometheus server.
 
+    El render (consolidando todos los workers en modo multiproceso) corre en un
+    thread y se comparte entre scrapes durante `metrics_cache_seconds`.
+
     Returns:
         Response: Prometheus metrics en formato text/plain
 
@@ -88,4 +92,4 @@ async def metrics(request: Request):
         )
 
     logger.info(f"Metrics access granted for IP {client_ip}")
-    return Response(content=generate_latest(), media_type="text/plain")
+    return Response(content=await metrics_exposition.render(), media_type="text/plain")
@@ -20,7 +20,8 @@ from ..services.pms_adapter import get_pms_adapter
 from ..services.session_manager import SessionManager
 from ..services.lock_service import LockService
 from ..services.message_gateway import MessageGateway
-from ..services.whatsapp_client import WhatsAppMetaClient
+from ..services.whatsapp_client import WhatsAppMetaClient, get_whatsapp_client
+from ..services.whatsapp_sender import send_concurrently
 from ..services.feature_flag_service import DEFAULT_FLAGS
 
 router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
@@ -78,18 +79,19 @@ async def _send_location(
 async def _send_audio_with_location(
     client: WhatsAppMetaClient, user_id: str, content: dict
 ) -> None:
-    """Send audio message followed by location."""
-    # Send audio first
-    if content.get("audio_data"):
-        await client.send_audio_message(to=user_id, audio_data=content.get("audio_data"))
-        # Send text if present
-        if text := content.get("text"):
-            await client.send_message(to=user_id, text=text)
-    
-    # Then send location
+    """Send audio (+ text) and location; both parts are independent and go out concurrently."""
+    async def _audio_then_text() -> None:
+        if content.get("audio_data"):
+            await client.send_audio_message(to=user_id, audio_data=content.get("audio_data"))
+            # Send text if present
+            if text := content.get("text"):
+                await client.send_message(to=user_id, text=text)
+
+    parts = [_audio_then_text()]
     location = content.get("location", {})
     if location:
-        await _send_location(client, user_id, location)
+        parts.append(_send_location(client, user_id, location))
+    await send_concurrently(*parts)
 
 
 async def _send_audio_response(
@@ -147,29 +149,30 @@ async def _send_text_with_image(
         except Exception:
             pass
     else:
-        # Default: separate text and image
+        # Default: separate text and image, dispatched concurrently
+        parts = []
         if text:
-            await client.send_message(to=user_id, text=text)
+            parts.append(client.send_message(to=user_id, text=text))
         if image_url:
-            await client.send_image(to=user_id, image_url=image_url, caption=caption)
+            parts.append(client.send_image(to=user_id, image_url=image_url, caption=caption))
+        await send_concurrently(*parts)
 
 
 async def _send_audio_with_image(
     client: WhatsAppMetaClient, user_id: str, result: dict
 ) -> None:
-    """Send audio, text, and image in sequence."""
-    # Audio first
-    if audio_data := result.get("audio_data"):
-        await client.send_audio_message(to=user_id, audio_data=audio_data)
-    
-    # Text if exists
-    if text := result.get("content", ""):
-        await client.send_message(to=user_id, text=text)
-    
-    # Image if exists
+    """Send audio followed by text, concurrently with the image."""
+    async def _audio_then_text() -> None:
+        if audio_data := result.get("audio_data"):
+            await client.send_audio_message(to=user_id, audio_data=audio_data)
+        if text := result.get("content", ""):
+            await client.send_message(to=user_id, text=text)
+
+    parts = [_audio_then_text()]
     if image_url := result.get("image_url"):
         caption = result.get("image_caption", "")
-        await client.send_image(to=user_id, image_url=image_url, caption=caption)
+        parts.append(client.send_image(to=user_id, image_url=image_url, caption=caption))
+    await send_concurrently(*parts)
 
 
 async def _send_interactive_buttons_with_image(
@@ -499,7 +502,8 @@ async def handle_whatsapp_webhook(request: Request):
     
     # Step 5: Process message and send response
     result = await orchestrator.handle_unified_message(unified)
-    whatsapp_client = WhatsAppMetaClient()
+    # Cliente de proceso: pool HTTP y rate shaping compartidos entre webhooks
+    whatsapp_client = get_whatsapp_client()
     
     try:
         if "response_type" in result:
@@ -511,8 +515,6 @@ async def handle_whatsapp_webhook(request: Request):
             await whatsapp_client.send_message(to=unified.user_id, text=result.get("response", ""))
     except Exception as e:
         logger.error("whatsapp.webhook.send_response_error", error=str(e))
-    finally:
-        await whatsapp_client.close()
     
     # Step 6: Build and return response
     return _build_response_payload(result)
@@ -20,8 +20,16 @@ import base64
 from app.core.settings import get_settings
 from app.core.redis_client import get_redis
 from app.security.password_policy import get_password_policy
+from app.security.hashing_pool import HashingPoolSaturated, get_hashing_pool
 from app.models.user import User, UserRole
 from app.repositories.user_repository import UserRepository
+from app.security.token_revocation import (
+    REVOKED_KEY_PREFIX,
+    RevocationListener,
+    VerifiedClaimsCache,
+    publish_revocation,
+    token_revocation_checks_total,
+)
 from prometheus_client import Counter, Histogram, Gauge
 
 logger = logging.getLogger(__name__)
@@ -159,6 +167,10 @@ class AdvancedJWTAuth:
         # Active sessions and revoked tokens
         self.active_sessions: Dict[str, AuthSession] = {}
 
+        # Local validation fast path: verified claims + revocations synced via pub/sub
+        self.claims_cache = VerifiedClaimsCache(max_entries=int(getattr(self.settings, "jwt_claims_cache_size", 10000)))
+        self.revocations: Optional[RevocationListener] = None
+
         logger.info("Advanced JWT Authentication system initialized")
 
     async def initialize(self):
@@ -169,6 +181,25 @@ class AdvancedJWTAuth:
         except Exception as e:
             logger.error(f"Failed to initialize JWT Auth Redis: {e}")
             raise
+        await self.start_revocation_sync()
+
+    async def start_revocation_sync(self) -> None:
+        """Mirror revoked tokens locally; on failure every check keeps going to Redis"""
+        if not self.redis_client or self.revocations is not None:
+            return
+        listener = RevocationListener(self.redis_client)
+        try:
+            await listener.start()
+            self.revocations = listener
+            logger.info("Token revocation sync started")
+        except Exception as e:
+            await listener.stop()
+            logger.warning(f"Token revocation sync unavailable, using Redis lookups: {e}")
+
+    async def close(self) -> None:
+        if self.revocations is not None:
+            await self.revocations.stop()
+            self.revocations = None
 
     def hash_password(self, password: str) -> str:
         """Hash password using bcrypt - DEPRECATED: Use password_policy.hash_password()"""
@@ -179,6 +210,12 @@ class AdvancedJWTAuth:
         """Verify password against hash - DEPRECATED: Use password_policy.verify_password()"""
         return self.pwd_context.verify(plain_password, hashed_password)
 
+    async def verify_password_async(
+        self, plain_password: str, hashed_password: str, client_ip: Optional[str] = None
+    ) -> bool:
+        """verify_password in the bounded hashing pool (raises HashingPoolSaturated when full)"""
+        return await get_hashing_pool().run(self.verify_password, plain_password, hashed_password, client_ip=client_ip)
+
     def validate_password_strength(self, password: str) -> List[str]:
         """
         Validate password strength using PasswordPolicy.
@@ -249,21 +286,44 @@ class AdvancedJWTAuth:
         if extra_claims:
             payload.update(extra_claims)
 
-        token = jwt.encode(payload, self.settings.secret_key, algorithm=self.algorithm)
+        token = jwt.encode(payload, self._signing_key, algorithm=self.algorithm)
 
         return JWTToken(token=token, token_type=token_type, expires_at=expire, user_id=user_id, jti=jti)
 
+    @property
+    def _signing_key(self) -> str:
+        secret = self.settings.secret_key
+        return secret.get_secret_value() if hasattr(secret, "get_secret_value") else secret
+
     def decode_jwt_token(self, token: str) -> Dict[str, Any]:
         """Decode and validate JWT token"""
 
         try:
-            payload = jwt.decode(token, self.settings.secret_key, algorithms=[self.algorithm])
+            payload = jwt.decode(token, self._signing_key, algorithms=[self.algorithm])
             return payload
         except jwt.ExpiredSignatureError:
             raise ValueError("Token has expired")
         except jwt.InvalidTokenError as e:
             raise ValueError(f"Invalid token: {str(e)}")
 
+    def _verified_claims(self, token: str) -> Dict[str, Any]:
+        """Decode token, reusing claims already verified by this process until the token expires"""
+        claims = self.claims_cache.get(token)
+        if claims is None:
+            claims = self.decode_jwt_token(token)
+            self.claims_cache.put(token, claims)
+        return dict(claims)
+
+    async def _is_revoked(self, jti: Optional[str]) -> bool:
+        """Local lookup while revocation sync is healthy, Redis otherwise"""
+        if self.revocations is not None and self.revocations.synced:
+            token_revocation_checks_total.labels(source="local").inc()
+            return self.revocations.is_revoked(jti)
+        if self.redis_client:
+            token_revocation_checks_total.labels(source="redis").inc()
+            return bool(await self.redis_client.get(f"{REVOKED_KEY_PREFIX}{jti}"))
+        return False
+
     async def authenticate_user(
         self,
         username: str,
@@ -290,8 +350,15 @@ class AdvancedJWTAuth:
                 logger.warning(f"Attempted login to locked account: {username}")
                 return None
 
-            # Verify password
-            if not self.verify_password(password, user.hashed_password):
+            # Verify password (off the event loop; floods are refused, not queued)
+            try:
+                password_ok = await self.verify_password_async(password, user.hashed_password, ip_address)
+            except HashingPoolSaturated as e:
+                auth_operations_total.labels(operation="authenticate", status="throttled").inc()
+                logger.warning(f"Login throttled for {username}: {e.reason}")
+                return None
+
+            if not password_ok:
                 await self._handle_failed_login(user)
                 auth_operations_total.labels(operation="authenticate", status="invalid_password").inc()
                 return None
@@ -369,7 +436,7 @@ class AdvancedJWTAuth:
         """Refresh access token using refresh token"""
 
         try:
-            payload = self.decode_jwt_token(refresh_token)
+            payload = self._verified_claims(refresh_token)
 
             if payload.get("type") != TokenType.REFRESH.value:
                 return None
@@ -378,10 +445,8 @@ class AdvancedJWTAuth:
             jti = payload.get("jti")
 
             # Check if token is revoked
-            if self.redis_client:
-                is_revoked = await self.redis_client.get(f"revoked_token:{jti}")
-                if is_revoked:
-                    return None
+            if await self._is_revoked(jti):
+                return None
 
             # Get user and verify still active
             user = await self.user_repository.get_by_id(user_id)
@@ -424,12 +489,12 @@ class AdvancedJWTAuth:
             if not jti:
                 return False
 
-            # Calculate TTL until token expires
-            exp_datetime = datetime.fromtimestamp(exp, tz=timezone.utc)
-            ttl = int((exp_datetime - datetime.now(timezone.utc)).total_seconds())
-
-            if ttl > 0 and self.redis_client:
-                await self.redis_client.setex(f"revoked_token:{jti}", ttl, "1")
+            # Persist until the token expires and broadcast to every process
+            if self.redis_client:
+                await publish_revocation(self.redis_client, jti, exp)
+            if self.revocations is not None:
+                self.revocations.add(jti, exp)
+            self.claims_cache.discard(token)
 
             auth_operations_total.labels(operation="revoke_token", status="success").inc()
 
@@ -477,7 +542,7 @@ class AdvancedJWTAuth:
         """Validate token and check permissions"""
 
         try:
-            payload = self.decode_jwt_token(token)
+            payload = self._verified_claims(token)
 
             if payload.get("type") != TokenType.ACCESS.value:
                 return None
@@ -486,10 +551,8 @@ class AdvancedJWTAuth:
             user_id = payload.get("sub")
 
             # Check if token is revoked
-            if self.redis_client:
-                is_revoked = await self.redis_client.get(f"revoked_token:{jti}")
-                if is_revoked:
-                    return None
+            if await self._is_revoked(jti):
+                return None
 
             # Check permissions if required
             if required_permissions:
@@ -505,6 +568,33 @@ class AdvancedJWTAuth:
             logger.error(f"Token validation error: {e}")
             return None
 
+    async def verify_token(self, token: str) -> Dict[str, Any]:
+        """Verify access token for middleware/routers: {valid, reason, user, session}"""
+
+        try:
+            payload = self._verified_claims(token)
+        except ValueError as e:
+            return {"valid": False, "reason": str(e)}
+
+        if payload.get("type") != TokenType.ACCESS.value:
+            return {"valid": False, "reason": "Invalid token type"}
+
+        try:
+            if await self._is_revoked(payload.get("jti")):
+                return {"valid": False, "reason": "Token has been revoked"}
+        except Exception as e:
+            logger.error(f"Token revocation check error: {e}")
+            return {"valid": False, "reason": "Token verification unavailable"}
+
+        user = {
+            "user_id": payload.get("sub"),
+            "email": payload.get("email"),
+            "role": payload.get("role"),
+            "permissions": payload.get("permissions", []),
+        }
+        session = {"session_id": payload["session_id"]} if payload.get("session_id") else None
+        return {"valid": True, "user": user, "session": session, "claims": payload}
+
     def check_permission(self, user_role: UserRole, permission: Permission) -> bool:
         """Check if user role has specific permission"""
         return permission in self.role_permissions.get(user_role, [])
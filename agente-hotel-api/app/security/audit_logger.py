@@ -5,17 +5,19 @@ Comprehensive security event logging and monitoring
 
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
 from enum import Enum
 import json
 import uuid
-from ipaddress import ip_address, ip_network
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
+from ..core.prometheus import guarded_labels
+from ..core.redis_client import get_redis
 from ..core.settings import get_settings
 from ..core.tenant_context import get_tenant_id
+from .ip_access import CIDRTrie, get_ip_access_lists
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +32,24 @@ suspicious_activity_total = Counter(
     "suspicious_activity_total", "Total suspicious activities detected", ["activity_type", "source_ip"]
 )
 
+security_audit_queue_depth = Gauge("security_audit_queue_depth", "Security events buffered for storage")
+
+security_audit_dropped_total = Counter(
+    "security_audit_events_dropped_total", "Security events dropped before reaching storage", ["reason"]
+)
+
+security_audit_flush_batch_size = Histogram(
+    "security_audit_flush_batch_size",
+    "Security events written per pipelined flush",
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+# Retention of stored events and their indexes (seconds)
+EVENT_TTL = 86400 * 30
+TIMELINE_TTL = 86400 * 90
+USER_INDEX_TTL = 86400 * 90
+IP_INDEX_TTL = 86400 * 30
+
 
 class SecurityEventType(Enum):
     """Types of security events"""
@@ -66,6 +86,8 @@ class SecurityEventType(Enum):
     SUSPICIOUS_ACTIVITY = "suspicious_activity"
     RATE_LIMIT_EXCEEDED = "rate_limit_exceeded"
     INVALID_TOKEN = "invalid_token"
+    AUTHENTICATION_FAILED = "authentication_failed"
+    MFA_REQUIRED = "mfa_required"
     BRUTE_FORCE_ATTEMPT = "brute_force_attempt"
     UNUSUAL_LOCATION = "unusual_location"
 
@@ -73,6 +95,7 @@ class SecurityEventType(Enum):
     CONFIGURATION_CHANGED = "configuration_changed"
     SECURITY_POLICY_VIOLATED = "security_policy_violated"
     ENCRYPTION_KEY_ROTATED = "encryption_key_rotated"
+    SYSTEM_ERROR = "system_error"
 
 
 class SecuritySeverity(Enum):
@@ -84,6 +107,10 @@ class SecuritySeverity(Enum):
     CRITICAL = "critical"
 
 
+# Name used by the security middleware and routers
+ThreatLevel = SecuritySeverity
+
+
 class SuspiciousActivityType(Enum):
     """Types of suspicious activities"""
 
@@ -158,71 +185,98 @@ class SecurityAuditLogger:
         # Known threat indicators
         self.threat_indicators: Dict[str, ThreatIndicator] = {}
 
-        # IP whitelist and blacklist
-        self.ip_whitelist = [ip_network("10.0.0.0/8"), ip_network("172.16.0.0/12"), ip_network("192.168.0.0/16")]
-        self.ip_blacklist = []
+        # IP whitelist and blacklist, plus the shared lists hot-reloaded from Redis
+        self.ip_whitelist = CIDRTrie(["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"])
+        self.ip_blacklist = CIDRTrie()
+        self.ip_lists = get_ip_access_lists()
 
         # Suspicious user agents
         self.suspicious_user_agents = ["sqlmap", "nikto", "nmap", "masscan", "burp", "zap", "gobuster", "dirb"]
 
+        # Storage buffer: events are written to Redis in pipelined batches by a background flusher
+        self.queue_size = int(getattr(self.settings, "security_audit_queue_size", 10000))
+        self.batch_size = int(getattr(self.settings, "security_audit_batch_size", 200))
+        self.flush_interval = float(getattr(self.settings, "security_audit_flush_interval", 0.05))
+        self.overflow_wait = float(getattr(self.settings, "security_audit_overflow_wait", 0.5))
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Future] = None
+        self._pending: List[tuple] = []
+        self._started = False
+
+        # Geolocation per IP, reused across events and batches
+        self.geo_cache_size = 4096
+        self._geo_cache: Dict[str, Dict[str, str]] = {}
+
         logger.info("Security Audit Logger initialized")
 
     async def initialize(self):
         """Initialize Redis connection"""
         try:
-            # Mock Redis client for now
+            self.redis_client = await get_redis()
+        except Exception as e:
+            logger.warning(f"Security audit storage unavailable, events will only be logged: {e}")
             self.redis_client = None
+        try:
             await self._load_threat_indicators()
-            logger.info("Security Audit Logger initialized (mock mode)")
+            logger.info("Security Audit Logger initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Security Audit Logger: {e}")
             raise
 
+    async def start(self):
+        """Connect storage and start the background flusher"""
+        await self.initialize()
+        self._ensure_flusher()
+        self._started = True
+
+    async def stop(self):
+        """Stop the flusher, writing every event still buffered"""
+        flusher, queue = self._flusher, self._queue
+        self._flusher = None
+        if flusher is not None:
+            flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+        # A write already in progress finishes; the batch still being gathered is written here
+        if self._flushing is not None:
+            await asyncio.gather(self._flushing, return_exceptions=True)
+            self._flushing = None
+        batch, self._pending = self._pending, []
+        while queue is not None and not queue.empty():
+            batch.append(queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                await self._flush_batch(batch)
+                batch = []
+        if batch:
+            await self._flush_batch(batch)
+        security_audit_queue_depth.set(0)
+
+    def submit_security_event(self, event: SecurityEvent) -> bool:
+        """Queue an event without waiting; analysis and storage run in the background flusher.
+
+        Meant for high-volume, low-value events (e.g. access granted) on the request path.
+        Returns False when the buffer is full and the event was dropped.
+        """
+        # Tenant context belongs to the request, not to the flusher task
+        if not event.tenant_id:
+            event.tenant_id = get_tenant_id()
+        if not self._offer(event, analyzed=False):
+            security_audit_dropped_total.labels(reason="queue_full").inc()
+            return False
+        return True
+
     async def log_security_event(self, event: SecurityEvent) -> bool:
         """Log a security event"""
 
         try:
             start_time = asyncio.get_event_loop().time()
 
-            # Populate tenant_id if missing
-            if not event.tenant_id:
-                event.tenant_id = get_tenant_id()
-
-            # Enrich event with location data if IP present and location missing
-            if event.ip_address and not event.location:
-                event.location = await self._get_ip_geolocation(event.ip_address)
-
-            # Calculate risk score
-            event.risk_score = self._calculate_risk_score(event)
-
-            # Enrich event data
-            await self._enrich_event_data(event)
-
-            # Check for suspicious activity
-            await self._check_suspicious_activity(event)
+            await self._analyze_event(event)
 
             # Store event
             await self._store_security_event(event)
 
-            # Update metrics
-            security_events_total.labels(
-                event_type=event.event_type.value, severity=event.severity.value, status=event.result
-            ).inc()
-
-            # Log based on severity
-            if event.severity == SecuritySeverity.CRITICAL:
-                logger.critical(f"CRITICAL Security Event: {event.event_type.value} - {event.details}")
-            elif event.severity == SecuritySeverity.HIGH:
-                logger.error(f"HIGH Security Event: {event.event_type.value} - {event.details}")
-            elif event.severity == SecuritySeverity.MEDIUM:
-                logger.warning(f"MEDIUM Security Event: {event.event_type.value} - {event.details}")
-            else:
-                logger.info(f"Security Event: {event.event_type.value}")
-
-            # Trigger alerts for high-severity events
-            if event.severity in [SecuritySeverity.HIGH, SecuritySeverity.CRITICAL]:
-                await self._trigger_security_alert(event)
-
             # Update audit duration metric
             audit_duration = asyncio.get_event_loop().time() - start_time
             security_audit_duration.labels(operation="log_event").observe(audit_duration)
@@ -233,6 +287,50 @@ class SecurityAuditLogger:
             logger.error(f"Failed to log security event: {e}")
             return False
 
+    async def _analyze_event(self, event: SecurityEvent, check_activity: bool = True):
+        """Enrich, score and alert on an event before it is stored
+
+        The flusher passes `check_activity=False` and counts the suspicious-activity
+        windows of the whole batch in its storage pipeline instead.
+        """
+
+        # Populate tenant_id if missing
+        if not event.tenant_id:
+            event.tenant_id = get_tenant_id()
+
+        # Enrich event with location data if IP present and location missing
+        if event.ip_address and not event.location:
+            event.location = await self._geolocate(event.ip_address)
+
+        # Calculate risk score
+        event.risk_score = self._calculate_risk_score(event)
+
+        # Enrich event data
+        await self._enrich_event_data(event)
+
+        # Check for suspicious activity
+        if check_activity:
+            await self._check_suspicious_activity(event)
+
+        # Update metrics
+        security_events_total.labels(
+            event_type=event.event_type.value, severity=event.severity.value, status=event.result
+        ).inc()
+
+        # Log based on severity
+        if event.severity == SecuritySeverity.CRITICAL:
+            logger.critical(f"CRITICAL Security Event: {event.event_type.value} - {event.details}")
+        elif event.severity == SecuritySeverity.HIGH:
+            logger.error(f"HIGH Security Event: {event.event_type.value} - {event.details}")
+        elif event.severity == SecuritySeverity.MEDIUM:
+            logger.warning(f"MEDIUM Security Event: {event.event_type.value} - {event.details}")
+        else:
+            logger.info(f"Security Event: {event.event_type.value}")
+
+        # Trigger alerts for high-severity events
+        if event.severity in [SecuritySeverity.HIGH, SecuritySeverity.CRITICAL]:
+            await self._trigger_security_alert(event)
+
     async def log_authentication_event(
         self,
         event_type: SecurityEventType,
@@ -374,7 +472,7 @@ class SecurityAuditLogger:
 
         # Add geolocation for IP address (mock implementation)
         if event.ip_address:
-            event.location = await self._get_ip_geolocation(event.ip_address)
+            event.location = await self._geolocate(event.ip_address)
 
         # Add correlation ID if not present
         if not event.correlation_id:
@@ -387,44 +485,56 @@ class SecurityAuditLogger:
             return
 
         try:
-            # Check for multiple failed logins
-            if event.event_type == SecurityEventType.LOGIN_FAILED:
-                key = f"failed_logins:{event.ip_address}"
-                count = await self.redis_client.incr(key)
-                await self.redis_client.expire(key, 3600)  # 1 hour window
-
-                if count >= self.failed_login_threshold:
-                    await self._log_suspicious_activity(
-                        SuspiciousActivityType.MULTIPLE_FAILED_LOGINS,
-                        event.ip_address,
-                        {"failed_count": count, "threshold": self.failed_login_threshold},
-                    )
-
-            # Check for rapid requests
-            if event.endpoint:
-                key = f"requests:{event.ip_address}:{datetime.now().strftime('%Y%m%d%H%M')}"
-                count = await self.redis_client.incr(key)
-                await self.redis_client.expire(key, 60)  # 1 minute window
-
-                if count >= self.rate_limit_threshold:
-                    await self._log_suspicious_activity(
-                        SuspiciousActivityType.RAPID_REQUESTS,
-                        event.ip_address,
-                        {"request_count": count, "threshold": self.rate_limit_threshold},
-                    )
-
-            # Check for unusual user agent
-            if event.user_agent and self._is_suspicious_user_agent(event.user_agent):
+            windows = self._activity_windows(event)
+            counts = await self._increment_windows(windows) if windows else []
+            await self._report_suspicious_activity(event, windows, counts)
+        except Exception as e:
+            logger.error(f"Error checking suspicious activity: {e}")
+
+    def _activity_windows(self, event: SecurityEvent) -> List[Tuple[SuspiciousActivityType, str, int, int, str]]:
+        """Windowed counters an event increments: (activity, key, window seconds, threshold, detail name)"""
+        windows = []
+        # Check for multiple failed logins (1 hour window)
+        if event.event_type == SecurityEventType.LOGIN_FAILED:
+            windows.append(
+                (
+                    SuspiciousActivityType.MULTIPLE_FAILED_LOGINS,
+                    f"failed_logins:{event.ip_address}",
+                    3600,
+                    self.failed_login_threshold,
+                    "failed_count",
+                )
+            )
+        # Check for rapid requests (1 minute window)
+        if event.endpoint:
+            windows.append(
+                (
+                    SuspiciousActivityType.RAPID_REQUESTS,
+                    f"requests:{event.ip_address}:{datetime.now().strftime('%Y%m%d%H%M')}",
+                    60,
+                    self.rate_limit_threshold,
+                    "request_count",
+                )
+            )
+        return windows
+
+    async def _report_suspicious_activity(self, event: SecurityEvent, windows: List[tuple], counts: List[int]) -> None:
+        """Log the activity patterns an event (and its window counts) reveals"""
+        for (activity_type, _, _, threshold, detail), count in zip(windows, counts):
+            if count >= threshold:
                 await self._log_suspicious_activity(
-                    SuspiciousActivityType.UNUSUAL_USER_AGENT, event.ip_address, {"user_agent": event.user_agent}
+                    activity_type, event.ip_address, {detail: count, "threshold": threshold}
                 )
 
-            # Check for geographic anomaly (mock implementation)
-            if event.user_id and event.location:
-                await self._check_geographic_anomaly(event)
+        # Check for unusual user agent
+        if event.user_agent and self._is_suspicious_user_agent(event.user_agent):
+            await self._log_suspicious_activity(
+                SuspiciousActivityType.UNUSUAL_USER_AGENT, event.ip_address, {"user_agent": event.user_agent}
+            )
 
-        except Exception as e:
-            logger.error(f"Error checking suspicious activity: {e}")
+        # Check for geographic anomaly (mock implementation)
+        if event.user_id and event.location:
+            await self._check_geographic_anomaly(event)
 
     async def _log_suspicious_activity(
         self, activity_type: SuspiciousActivityType, source_ip: str, details: Dict[str, Any]
@@ -440,39 +550,158 @@ class SecurityAuditLogger:
 
         await self.log_security_event(suspicious_event)
 
-        suspicious_activity_total.labels(activity_type=activity_type.value, source_ip=source_ip).inc()
+        guarded_labels(suspicious_activity_total, activity_type=activity_type.value, source_ip=source_ip).inc()
+
+    async def _increment_windows(self, windows: List[tuple]) -> List[int]:
+        """Increment an event's windowed counters in one round trip"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        for _, key, window_seconds, _, _ in windows:
+            pipe.incr(key)
+            pipe.expire(key, window_seconds)
+        return (await pipe.execute())[::2]
 
     async def _store_security_event(self, event: SecurityEvent):
-        """Store security event in Redis and/or database"""
+        """Buffer security event for the next pipelined write.
+
+        When the buffer is full, low and medium events are dropped (and counted);
+        high and critical events wait up to `overflow_wait` seconds for room.
+        """
 
         if not self.redis_client:
             return
 
-        try:
-            # Store individual event
-            event_key = f"security_event:{event.event_id}"
-            event_data = json.dumps(event.to_dict())
-            await self.redis_client.setex(event_key, 86400 * 30, event_data)  # 30 days
+        if self._offer(event, analyzed=True):
+            return
 
-            # Add to event timeline
-            timeline_key = f"security_timeline:{datetime.now().strftime('%Y%m%d')}"
-            await self.redis_client.zadd(timeline_key, {event.event_id: event.timestamp.timestamp()})
-            await self.redis_client.expire(timeline_key, 86400 * 90)  # 90 days
+        if event.severity in (SecuritySeverity.HIGH, SecuritySeverity.CRITICAL):
+            try:
+                await asyncio.wait_for(self._queue.put((event, True)), timeout=self.overflow_wait)
+                security_audit_queue_depth.set(self._queue.qsize())
+                return
+            except asyncio.TimeoutError:
+                pass
 
-            # Add to user event history if user_id present
-            if event.user_id:
-                user_key = f"user_events:{event.user_id}"
-                await self.redis_client.zadd(user_key, {event.event_id: event.timestamp.timestamp()})
-                await self.redis_client.expire(user_key, 86400 * 90)  # 90 days
+        security_audit_dropped_total.labels(reason="queue_full").inc()
+        logger.warning(f"Security audit buffer full, dropped {event.severity.value} {event.event_type.value} event")
+
+    def _offer(self, event: SecurityEvent, analyzed: bool) -> bool:
+        queue = self._ensure_flusher()
+        try:
+            queue.put_nowait((event, analyzed))
+        except asyncio.QueueFull:
+            return False
+        security_audit_queue_depth.set(queue.qsize())
+        return True
+
+    def _ensure_flusher(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+            self._loop = loop
+            self._flusher = None
+        if self._flusher is None or self._flusher.done():
+            self._flusher = loop.create_task(self._run_flusher(self._queue))
+        return self._queue
+
+    async def _run_flusher(self, queue: asyncio.Queue):
+        """Drain the buffer in batches: wait for one event, linger briefly, take what is queued"""
+        while True:
+            batch = [await queue.get()]
+            self._pending = batch
+            if queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            security_audit_queue_depth.set(queue.qsize())
+
+            # Shielded so that stop() lets an in-progress write finish
+            self._flushing = asyncio.ensure_future(self._flush_batch(batch))
+            self._pending = []
+            await asyncio.shield(self._flushing)
+            self._flushing = None
+
+    async def _flush_batch(self, batch: List[tuple]):
+        # Events submitted unanalyzed: enrich and score here, and count their
+        # suspicious-activity windows in the same pipeline that stores the batch
+        activity: List[tuple] = []
+        for event, analyzed in batch:
+            if analyzed:
+                continue
+            try:
+                await self._analyze_event(event, check_activity=False)
+                if event.ip_address and self.redis_client:
+                    activity.append((event, self._activity_windows(event)))
+            except Exception as e:
+                logger.error(f"Failed to analyze security event: {e}")
 
-            # Add to IP event history
+        if not self.redis_client:
+            return
+        windows = [window for _, event_windows in activity for window in event_windows]
+        counts = await self._write_events([event for event, _ in batch], windows)
+        if not counts:
+            return
+        for event, event_windows in activity:
+            event_counts, counts = counts[: len(event_windows)], counts[len(event_windows) :]
+            try:
+                await self._report_suspicious_activity(event, event_windows, event_counts)
+            except Exception as e:
+                logger.error(f"Error checking suspicious activity: {e}")
+
+    async def _write_events(self, events: List[SecurityEvent], windows: Optional[List[tuple]] = None) -> List[int]:
+        """Store events and their day/user/IP indexes in a single pipelined round trip
+
+        `windows` are suspicious-activity counters incremented in the same round
+        trip; their new values are returned (empty if the write failed).
+        """
+
+        start_time = asyncio.get_event_loop().time()
+        pipe = self.redis_client.pipeline(transaction=False)
+        indexes: Dict[str, tuple] = {}
+        windows = windows or []
+        for _, key, window_seconds, _, _ in windows:
+            pipe.incr(key)
+            pipe.expire(key, window_seconds)
+
+        def index(key: str, event: SecurityEvent, ttl: int):
+            members, _ = indexes.setdefault(key, ({}, ttl))
+            members[event.event_id] = event.timestamp.timestamp()
+
+        stored = 0
+        for event in events:
+            try:
+                event_data = json.dumps(event.to_dict(), default=str)
+            except Exception as e:
+                logger.error(f"Failed to serialize security event {event.event_id}: {e}")
+                security_audit_dropped_total.labels(reason="serialization").inc()
+                continue
+
+            pipe.setex(f"security_event:{event.event_id}", EVENT_TTL, event_data)
+            # Timeline partitioned by the event's own day
+            index(f"security_timeline:{event.timestamp.strftime('%Y%m%d')}", event, TIMELINE_TTL)
+            if event.user_id:
+                index(f"user_events:{event.user_id}", event, USER_INDEX_TTL)
             if event.ip_address:
-                ip_key = f"ip_events:{event.ip_address}"
-                await self.redis_client.zadd(ip_key, {event.event_id: event.timestamp.timestamp()})
-                await self.redis_client.expire(ip_key, 86400 * 30)  # 30 days
+                index(f"ip_events:{event.ip_address}", event, IP_INDEX_TTL)
+            stored += 1
 
+        if not stored and not windows:
+            return []
+
+        # One ZADD/EXPIRE per index key and batch instead of per event
+        for key, (members, ttl) in indexes.items():
+            pipe.zadd(key, members)
+            pipe.expire(key, ttl)
+
+        try:
+            results = await pipe.execute()
+            security_audit_flush_batch_size.observe(stored)
+            return results[: 2 * len(windows) : 2]
         except Exception as e:
-            logger.error(f"Failed to store security event: {e}")
+            logger.error(f"Failed to store {stored} security events: {e}")
+            security_audit_dropped_total.labels(reason="storage_error").inc(stored)
+            return []
+        finally:
+            security_audit_duration.labels(operation="flush").observe(asyncio.get_event_loop().time() - start_time)
 
     async def _trigger_security_alert(self, event: SecurityEvent):
         """Trigger security alert for high-severity events"""
@@ -505,23 +734,15 @@ class SecurityAuditLogger:
     def _is_suspicious_ip(self, ip_str: str) -> bool:
         """Check if IP is suspicious"""
         try:
-            ip = ip_address(ip_str)
-            for blacklisted_network in self.ip_blacklist:
-                if ip in blacklisted_network:
-                    return True
-            return False
-        except Exception:
+            return ip_str in self.ip_blacklist or self.ip_lists.is_blacklisted(ip_str)
+        except ValueError:
             return True  # Invalid IP format is suspicious
 
     def _is_whitelisted_ip(self, ip_str: str) -> bool:
         """Check if IP is whitelisted"""
         try:
-            ip = ip_address(ip_str)
-            for whitelisted_network in self.ip_whitelist:
-                if ip in whitelisted_network:
-                    return True
-            return False
-        except Exception:
+            return ip_str in self.ip_whitelist or self.ip_lists.is_whitelisted(ip_str)
+        except ValueError:
             return False
 
     def _is_suspicious_user_agent(self, user_agent: str) -> bool:
@@ -534,6 +755,16 @@ class SecurityAuditLogger:
         hour = timestamp.hour
         return hour < 6 or hour > 22  # Before 6 AM or after 10 PM
 
+    async def _geolocate(self, ip_address: str) -> Dict[str, str]:
+        """Geolocation for an IP, looked up once and cached (bounded, oldest evicted first)"""
+        location = self._geo_cache.get(ip_address)
+        if location is None:
+            location = await self._get_ip_geolocation(ip_address)
+            if len(self._geo_cache) >= self.geo_cache_size:
+                self._geo_cache.pop(next(iter(self._geo_cache)))
+            self._geo_cache[ip_address] = location
+        return dict(location)
+
     async def _get_ip_geolocation(self, ip_address: str) -> Dict[str, str]:
         """Get IP geolocation (mock implementation)"""
         # In real implementation, use GeoIP database or service
@@ -624,10 +855,23 @@ class SecurityAuditLogger:
 _audit_logger = None
 
 
-async def get_audit_logger() -> SecurityAuditLogger:
-    """Get global security audit logger instance"""
+def _get_audit_logger_sync() -> SecurityAuditLogger:
+    """Shared instance without IO, for constructors such as the security middleware"""
     global _audit_logger
     if _audit_logger is None:
         _audit_logger = SecurityAuditLogger()
-        await _audit_logger.initialize()
     return _audit_logger
+
+
+async def get_audit_logger() -> SecurityAuditLogger:
+    """Get global security audit logger instance"""
+    audit_logger = _get_audit_logger_sync()
+    if not audit_logger._started:
+        await audit_logger.start()
+    return audit_logger
+
+
+async def close_audit_logger():
+    """Flush buffered events of the global instance, if one was created"""
+    if _audit_logger is not None:
+        await _audit_logger.stop()
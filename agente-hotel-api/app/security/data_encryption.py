@@ -5,7 +5,9 @@ Advanced encryption for sensitive data protection
 
 import asyncio
 import logging
-from typing import Dict, Any, Optional, Union, Tuple
+import os
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Sequence, Union, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
@@ -18,11 +20,14 @@ from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
 
 from prometheus_client import Counter, Histogram
 
+from app.security.hashing_pool import get_hashing_pool
+
 logger = logging.getLogger(__name__)
 
 # Prometheus metrics
@@ -34,6 +39,14 @@ encryption_duration_seconds = Histogram(
     "encryption_duration_seconds", "Encryption operation duration", ["operation", "algorithm"]
 )
 
+# Fields that should be encrypted
+PII_FIELDS = frozenset(["email", "phone", "ssn", "passport_number", "credit_card", "address", "date_of_birth"])
+
+# Bulk PII batches with more values than this are sealed/opened in a worker thread
+BULK_THREAD_THRESHOLD = 256
+
+GCM_TAG_SIZE = 16
+
 
 class EncryptionAlgorithm(Enum):
     """Supported encryption algorithms"""
@@ -115,6 +128,13 @@ class DataEncryptionService:
         self.encryption_keys: Dict[str, EncryptionKey] = {}
         self.master_key: Optional[bytes] = None
 
+        # Active key per (classification, algorithm) and cipher objects per key
+        self._active_key_index: Dict[Tuple[DataClassification, EncryptionAlgorithm], str] = {}
+        self._ciphers: Dict[Tuple[EncryptionAlgorithm, bytes], Any] = {}
+        # Unwrapped envelope data keys, by wrapped key
+        self._data_keys: "OrderedDict[str, AESGCM]" = OrderedDict()
+        self._max_data_keys = 1024
+
         # Key rotation settings
         self.key_rotation_interval_days = 90
         self.max_key_age_days = 365
@@ -162,10 +182,25 @@ class DataEncryptionService:
                 key_id=key_id, algorithm=algorithm, key_data=key_data, classification=classification
             )
 
-            self.encryption_keys[key_id] = encryption_key
+            self._register_key(encryption_key)
 
         logger.info(f"Initialized {len(self.encryption_keys)} default encryption keys")
 
+    def _register_key(self, encryption_key: EncryptionKey) -> None:
+        """Store key and make it the active one for its classification/algorithm"""
+        self.encryption_keys[encryption_key.key_id] = encryption_key
+        if encryption_key.is_active:
+            self._active_key_index[(encryption_key.classification, encryption_key.algorithm)] = encryption_key.key_id
+
+    def _cipher(self, algorithm: EncryptionAlgorithm, key: bytes) -> Any:
+        """Cached AESGCM/Fernet instance for a key"""
+        cache_key = (algorithm, key)
+        cipher = self._ciphers.get(cache_key)
+        if cipher is None:
+            cipher = AESGCM(key) if algorithm == EncryptionAlgorithm.AES_256_GCM else Fernet(key)
+            self._ciphers[cache_key] = cipher
+        return cipher
+
     async def _generate_key(self, algorithm: EncryptionAlgorithm) -> bytes:
         """Generate encryption key for specific algorithm"""
 
@@ -227,6 +262,7 @@ class DataEncryptionService:
                 encrypted_data = await self._encrypt_rsa(data, encryption_key.key_data)
             else:
                 raise ValueError(f"Unsupported algorithm: {algorithm}")
+            encrypted_data.key_id = key_id
 
             # Update metrics
             duration = asyncio.get_event_loop().time() - start_time
@@ -245,8 +281,10 @@ class DataEncryptionService:
             logger.error(f"Encryption failed: {e}")
             raise
 
-    async def decrypt_data(self, encrypted_data: EncryptedData) -> bytes:
-        """Decrypt encrypted data"""
+    async def decrypt_data(
+        self, encrypted_data: EncryptedData, field_name: Optional[str] = None, record_id: Optional[str] = None
+    ) -> bytes:
+        """Decrypt encrypted data (envelope PII values need the field and record they were sealed for)"""
 
         start_time = asyncio.get_event_loop().time()
 
@@ -256,7 +294,11 @@ class DataEncryptionService:
                 raise ValueError(f"Encryption key not found: {encrypted_data.key_id}")
 
             # Perform decryption based on algorithm
-            if encrypted_data.algorithm == EncryptionAlgorithm.AES_256_GCM:
+            if encrypted_data.metadata.get("envelope"):
+                if not field_name:
+                    raise ValueError("Envelope-encrypted PII must be opened with its field name")
+                data = self._open_value(encrypted_data.to_dict(), field_name, record_id)
+            elif encrypted_data.algorithm == EncryptionAlgorithm.AES_256_GCM:
                 data = await self._decrypt_aes_gcm(encrypted_data, encryption_key.key_data)
             elif encrypted_data.algorithm == EncryptionAlgorithm.FERNET:
                 data = await self._decrypt_fernet(encrypted_data, encryption_key.key_data)
@@ -292,34 +334,27 @@ class DataEncryptionService:
         """Encrypt with AES-256-GCM"""
 
         nonce = secrets.token_bytes(12)  # 96-bit nonce for GCM
-        cipher = Cipher(algorithms.AES(key), modes.GCM(nonce), backend=default_backend())
-        encryptor = cipher.encryptor()
-
-        ciphertext = encryptor.update(data) + encryptor.finalize()
+        sealed = self._cipher(EncryptionAlgorithm.AES_256_GCM, key).encrypt(nonce, data, None)
 
         return EncryptedData(
-            encrypted_data=ciphertext,
+            encrypted_data=sealed[:-GCM_TAG_SIZE],
             algorithm=EncryptionAlgorithm.AES_256_GCM,
             key_id="",  # Will be set by caller
             nonce=nonce,
-            tag=encryptor.tag,
+            tag=sealed[-GCM_TAG_SIZE:],
         )
 
     async def _decrypt_aes_gcm(self, encrypted_data: EncryptedData, key: bytes) -> bytes:
         """Decrypt with AES-256-GCM"""
 
-        cipher = Cipher(
-            algorithms.AES(key), modes.GCM(encrypted_data.nonce, encrypted_data.tag), backend=default_backend()
+        return self._cipher(EncryptionAlgorithm.AES_256_GCM, key).decrypt(
+            encrypted_data.nonce, encrypted_data.encrypted_data + encrypted_data.tag, None
         )
-        decryptor = cipher.decryptor()
-
-        return decryptor.update(encrypted_data.encrypted_data) + decryptor.finalize()
 
     async def _encrypt_fernet(self, data: bytes, key: bytes) -> EncryptedData:
         """Encrypt with Fernet (AES-128 + HMAC)"""
 
-        f = Fernet(key)
-        ciphertext = f.encrypt(data)
+        ciphertext = self._cipher(EncryptionAlgorithm.FERNET, key).encrypt(data)
 
         return EncryptedData(
             encrypted_data=ciphertext,
@@ -330,8 +365,7 @@ class DataEncryptionService:
     async def _decrypt_fernet(self, encrypted_data: EncryptedData, key: bytes) -> bytes:
         """Decrypt with Fernet"""
 
-        f = Fernet(key)
-        return f.decrypt(encrypted_data.encrypted_data)
+        return self._cipher(EncryptionAlgorithm.FERNET, key).decrypt(encrypted_data.encrypted_data)
 
     async def _encrypt_chacha20(self, data: bytes, key: bytes) -> EncryptedData:
         """Encrypt with ChaCha20-Poly1305"""
@@ -393,8 +427,14 @@ class DataEncryptionService:
     def _get_default_key_id(self, classification: DataClassification, algorithm: EncryptionAlgorithm) -> str:
         """Get default key ID for classification and algorithm"""
 
+        key_id = self._active_key_index.get((classification, algorithm))
+        key = self.encryption_keys.get(key_id) if key_id else None
+        if key is not None and key.is_active:
+            return key_id
+
         for key_id, key in self.encryption_keys.items():
             if key.classification == classification and key.algorithm == algorithm and key.is_active:
+                self._active_key_index[(classification, algorithm)] = key_id
                 return key_id
 
         raise ValueError(f"No active key found for {classification.value} with {algorithm.value}")
@@ -414,7 +454,7 @@ class DataEncryptionService:
             key_id=key_id, algorithm=algorithm, key_data=key_data, classification=classification
         )
 
-        self.encryption_keys[key_id] = encryption_key
+        self._register_key(encryption_key)
 
         logger.info(f"Created new encryption key: {key_id}")
         return key_id
@@ -458,6 +498,16 @@ class DataEncryptionService:
         except Exception:
             return False
 
+    async def hash_password_async(self, password: str, salt: Optional[bytes] = None) -> Tuple[bytes, bytes]:
+        """PBKDF2 hash in the bounded hashing pool"""
+        return await get_hashing_pool().run(self.hash_password, password, salt)
+
+    async def verify_password_async(
+        self, password: str, hashed: bytes, salt: bytes, client_ip: Optional[str] = None
+    ) -> bool:
+        """PBKDF2 verification in the bounded hashing pool (raises HashingPoolSaturated when full)"""
+        return await get_hashing_pool().run(self.verify_password, password, hashed, salt, client_ip=client_ip)
+
     def generate_secure_token(self, length: int = 32) -> str:
         """Generate cryptographically secure token"""
         return secrets.token_urlsafe(length)
@@ -471,37 +521,202 @@ class DataEncryptionService:
         expected = self.compute_hmac(data, key)
         return hmac.compare_digest(expected, signature)
 
-    async def encrypt_pii_data(self, pii_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def encrypt_pii_data(self, pii_data: Dict[str, Any], record_id: Optional[str] = None) -> Dict[str, Any]:
         """Encrypt personally identifiable information"""
+        return (await self.encrypt_pii_records([pii_data], None if record_id is None else [record_id]))[0]
 
-        encrypted_pii = {}
-
-        # Fields that should be encrypted
-        pii_fields = ["email", "phone", "ssn", "passport_number", "credit_card", "address", "date_of_birth"]
+    async def decrypt_pii_data(self, encrypted_pii: Dict[str, Any], record_id: Optional[str] = None) -> Dict[str, Any]:
+        """Decrypt personally identifiable information"""
+        return (await self.decrypt_pii_records([encrypted_pii], None if record_id is None else [record_id]))[0]
+
+    async def encrypt_pii_records(
+        self, records: List[Dict[str, Any]], record_ids: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Encrypt the PII fields of many records under one envelope data key.
+
+        A fresh AES-256-GCM data key seals every PII value of the batch and is
+        itself wrapped by the active RESTRICTED key. The associated data is the
+        field name plus the record id from `record_ids`, so a ciphertext only
+        opens in the field and record it was sealed for; decrypt with the same
+        ids. Each encrypted field keeps the `EncryptedData.to_dict()` layout with
+        the wrapped key in `metadata["envelope"]`, so rotating the key-encryption
+        key only rewraps data keys (see `rewrap_pii_records`).
+        """
 
-        for field_name, value in pii_data.items():
-            if field_name in pii_fields and value:
-                encrypted_data = await self.encrypt_data(str(value), DataClassification.RESTRICTED)
-                encrypted_pii[field_name] = encrypted_data.to_dict()
+        start_time = asyncio.get_event_loop().time()
+        kek_id = self._get_default_key_id(DataClassification.RESTRICTED, EncryptionAlgorithm.AES_256_GCM)
+        try:
+            ids = self._record_ids(records, record_ids)
+            if self._pii_value_count(records) > BULK_THREAD_THRESHOLD:
+                sealed = await asyncio.to_thread(self._seal_records, records, ids, kek_id)
             else:
-                encrypted_pii[field_name] = value
-
-        return encrypted_pii
+                sealed = self._seal_records(records, ids, kek_id)
+        except Exception as e:
+            encryption_operations_total.labels(operation="encrypt_bulk", algorithm="envelope", status="error").inc()
+            logger.error(f"Bulk PII encryption failed: {e}")
+            raise
 
-    async def decrypt_pii_data(self, encrypted_pii: Dict[str, Any]) -> Dict[str, Any]:
-        """Decrypt personally identifiable information"""
+        duration = asyncio.get_event_loop().time() - start_time
+        encryption_duration_seconds.labels(operation="encrypt_bulk", algorithm="envelope").observe(duration)
+        encryption_operations_total.labels(operation="encrypt_bulk", algorithm="envelope", status="success").inc()
+        return sealed
 
-        decrypted_pii = {}
+    async def decrypt_pii_records(
+        self, records: List[Dict[str, Any]], record_ids: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Decrypt PII fields of many records (envelope and per-field legacy formats)"""
 
-        for field_name, value in encrypted_pii.items():
-            if isinstance(value, dict) and "encrypted_data" in value:
-                encrypted_data = EncryptedData.from_dict(value)
-                decrypted_bytes = await self.decrypt_data(encrypted_data)
-                decrypted_pii[field_name] = decrypted_bytes.decode("utf-8")
+        start_time = asyncio.get_event_loop().time()
+        try:
+            ids = self._record_ids(records, record_ids)
+            if self._pii_value_count(records) > BULK_THREAD_THRESHOLD:
+                opened, legacy = await asyncio.to_thread(self._open_records, records, ids)
             else:
-                decrypted_pii[field] = value
+                opened, legacy = self._open_records(records, ids)
+
+            # Fields encrypted one by one with encrypt_data before envelopes existed
+            for index, field_name in legacy:
+                encrypted_data = EncryptedData.from_dict(opened[index][field_name])
+                opened[index][field_name] = (await self.decrypt_data(encrypted_data)).decode("utf-8")
+        except Exception as e:
+            encryption_operations_total.labels(operation="decrypt_bulk", algorithm="envelope", status="error").inc()
+            logger.error(f"Bulk PII decryption failed: {e}")
+            raise
+
+        duration = asyncio.get_event_loop().time() - start_time
+        encryption_duration_seconds.labels(operation="decrypt_bulk", algorithm="envelope").observe(duration)
+        encryption_operations_total.labels(operation="decrypt_bulk", algorithm="envelope", status="success").inc()
+        return opened
+
+    async def rewrap_pii_records(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Move envelopes to the active RESTRICTED key without touching ciphertexts.
+
+        Run after `rotate_key`; the retired key only needs to stay loaded until
+        every stored record has been rewrapped.
+        """
+
+        kek_id = self._get_default_key_id(DataClassification.RESTRICTED, EncryptionAlgorithm.AES_256_GCM)
+        rewrapped: Dict[str, Dict[str, Any]] = {}
+        result = []
+        for record in records:
+            updated = dict(record)
+            for field_name, value in record.items():
+                envelope = self._envelope_of(value)
+                if not envelope or envelope["kek_id"] == kek_id:
+                    continue
+                wrapped = envelope["wrapped_key"]
+                if wrapped not in rewrapped:
+                    rewrapped[wrapped] = self._wrap_data_key(self._unwrap_data_key(envelope), kek_id)
+                updated[field_name] = {
+                    **value,
+                    "key_id": kek_id,
+                    "metadata": {**value["metadata"], "envelope": rewrapped[wrapped]},
+                }
+            result.append(updated)
+        return result
+
+    @staticmethod
+    def _pii_value_count(records: List[Dict[str, Any]]) -> int:
+        return sum(1 for record in records for name in record if name in PII_FIELDS)
+
+    @staticmethod
+    def _record_ids(records: List[Dict[str, Any]], record_ids: Optional[Sequence[str]]) -> List[Optional[str]]:
+        if record_ids is None:
+            return [None] * len(records)
+        if len(record_ids) != len(records):
+            raise ValueError(f"Expected {len(records)} record ids, got {len(record_ids)}")
+        return list(record_ids)
+
+    @staticmethod
+    def _pii_aad(field_name: str, record_id: Optional[str]) -> bytes:
+        # Built from the caller's context, never from the stored metadata
+        return field_name.encode() if record_id is None else f"{record_id}:{field_name}".encode()
+
+    @staticmethod
+    def _envelope_of(value: Any) -> Optional[Dict[str, str]]:
+        if isinstance(value, dict) and "encrypted_data" in value:
+            return (value.get("metadata") or {}).get("envelope")
+        return None
+
+    def _wrap_data_key(self, data_key: bytes, kek_id: str) -> Dict[str, str]:
+        kek = self.encryption_keys[kek_id]
+        nonce = os.urandom(12)
+        wrapped = self._cipher(EncryptionAlgorithm.AES_256_GCM, kek.key_data).encrypt(nonce, data_key, kek_id.encode())
+        return {"kek_id": kek_id, "wrapped_key": b64encode(nonce + wrapped).decode()}
+
+    def _unwrap_data_key(self, envelope: Dict[str, str]) -> bytes:
+        kek = self.encryption_keys.get(envelope["kek_id"])
+        if not kek:
+            raise ValueError(f"Encryption key not found: {envelope['kek_id']}")
+        raw = b64decode(envelope["wrapped_key"])
+        return self._cipher(EncryptionAlgorithm.AES_256_GCM, kek.key_data).decrypt(
+            raw[:12], raw[12:], envelope["kek_id"].encode()
+        )
 
-        return decrypted_pii
+    def _data_key_cipher(self, envelope: Dict[str, str]) -> AESGCM:
+        wrapped = envelope["wrapped_key"]
+        cipher = self._data_keys.get(wrapped)
+        if cipher is None:
+            cipher = AESGCM(self._unwrap_data_key(envelope))
+            self._data_keys[wrapped] = cipher
+            if len(self._data_keys) > self._max_data_keys:
+                self._data_keys.popitem(last=False)
+        else:
+            self._data_keys.move_to_end(wrapped)
+        return cipher
+
+    def _seal_records(
+        self, records: List[Dict[str, Any]], record_ids: List[Optional[str]], kek_id: str
+    ) -> List[Dict[str, Any]]:
+        data_key = AESGCM.generate_key(bit_length=256)
+        cipher = AESGCM(data_key)
+        envelope = self._wrap_data_key(data_key, kek_id)
+        created_at = datetime.now(timezone.utc).isoformat()
+
+        sealed_records = []
+        for record, record_id in zip(records, record_ids):
+            sealed: Dict[str, Any] = {}
+            for field_name, value in record.items():
+                if field_name not in PII_FIELDS or not value:
+                    sealed[field_name] = value
+                    continue
+                nonce = os.urandom(12)
+                ciphertext = cipher.encrypt(nonce, str(value).encode("utf-8"), self._pii_aad(field_name, record_id))
+                sealed[field_name] = {
+                    "encrypted_data": b64encode(ciphertext[:-GCM_TAG_SIZE]).decode(),
+                    "algorithm": EncryptionAlgorithm.AES_256_GCM.value,
+                    "key_id": kek_id,
+                    "nonce": b64encode(nonce).decode(),
+                    "tag": b64encode(ciphertext[-GCM_TAG_SIZE:]).decode(),
+                    "metadata": {"envelope": envelope},
+                    "created_at": created_at,
+                }
+            sealed_records.append(sealed)
+        return sealed_records
+
+    def _open_value(self, value: Dict[str, Any], field_name: str, record_id: Optional[str]) -> bytes:
+        cipher = self._data_key_cipher(value["metadata"]["envelope"])
+        ciphertext = b64decode(value["encrypted_data"]) + b64decode(value["tag"])
+        return cipher.decrypt(b64decode(value["nonce"]), ciphertext, self._pii_aad(field_name, record_id))
+
+    def _open_records(
+        self, records: List[Dict[str, Any]], record_ids: List[Optional[str]]
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[int, str]]]:
+        opened_records = []
+        legacy: List[Tuple[int, str]] = []
+        for index, (record, record_id) in enumerate(zip(records, record_ids)):
+            opened: Dict[str, Any] = {}
+            for field_name, value in record.items():
+                if self._envelope_of(value):
+                    opened[field_name] = self._open_value(value, field_name, record_id).decode("utf-8")
+                else:
+                    opened[field_name] = value
+                    if isinstance(value, dict) and "encrypted_data" in value:
+                        legacy.append((index, field_name))
+            opened_records.append(opened)
+        return opened_records, legacy
 
     async def get_encryption_status(self) -> Dict[str, Any]:
         """Get encryption service status"""
@@ -0,0 +1,126 @@
+"""
+Password Hashing Pool
+Bounded executor for bcrypt/PBKDF2 work so logins never block the event loop
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Prometheus metrics
+password_hash_queue_wait_seconds = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password hashing job waits for a worker",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+password_hash_inflight = Gauge("password_hash_inflight", "Password hashing jobs queued or running")
+
+password_hash_rejected_total = Counter(
+    "password_hash_rejected_total", "Password hashing jobs rejected by admission control", ["reason"]
+)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when a hashing job is refused to protect the pool"""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Password hashing pool saturated: {reason}")
+        self.reason = reason
+
+
+class PasswordHashingPool:
+    """
+    Dedicated thread pool for password hashing with admission control.
+
+    bcrypt and OpenSSL's PBKDF2 release the GIL, so hashing in these threads
+    leaves the event loop free. At most `max_workers + max_queue` jobs are
+    admitted at once and each client IP may hold at most `per_ip_limit` of
+    them; beyond that `HashingPoolSaturated` is raised immediately instead of
+    queueing, so a login flood cannot starve other clients or grow memory.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 32, per_ip_limit: int = 4):
+        self.max_workers = max_workers
+        self.capacity = max_workers + max_queue
+        self.per_ip_limit = per_ip_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._inflight = 0
+        self._per_ip: Dict[str, int] = defaultdict(int)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    async def run(self, func: Callable[..., T], *args: Any, client_ip: Optional[str] = None) -> T:
+        if self._inflight >= self.capacity:
+            password_hash_rejected_total.labels(reason="queue_full").inc()
+            raise HashingPoolSaturated("queue_full")
+        if client_ip and self._per_ip[client_ip] >= self.per_ip_limit:
+            password_hash_rejected_total.labels(reason="per_ip_limit").inc()
+            raise HashingPoolSaturated("per_ip_limit")
+
+        loop = asyncio.get_running_loop()
+        self._admit(client_ip, 1)
+        enqueued = time.perf_counter()
+
+        def job() -> T:
+            password_hash_queue_wait_seconds.observe(time.perf_counter() - enqueued)
+            return func(*args)
+
+        try:
+            future = self._executor.submit(job)
+        except BaseException:
+            self._admit(client_ip, -1)
+            raise
+        # Admission is released by the job itself (finished, or cancelled before
+        # it started), not by the caller: a disconnected client whose hash is
+        # already running keeps holding its slot until the thread is free
+        future.add_done_callback(lambda _: self._release_from_thread(loop, client_ip))
+        return await asyncio.wrap_future(future)
+
+    def _admit(self, client_ip: Optional[str], delta: int) -> None:
+        self._inflight += delta
+        password_hash_inflight.set(self._inflight)
+        if client_ip:
+            self._per_ip[client_ip] += delta
+            if self._per_ip[client_ip] <= 0:
+                del self._per_ip[client_ip]
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop, client_ip: Optional[str]) -> None:
+        try:
+            loop.call_soon_threadsafe(self._admit, client_ip, -1)
+        except RuntimeError:  # loop already closed
+            self._admit(client_ip, -1)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_hashing_pool: Optional[PasswordHashingPool] = None
+
+
+def get_hashing_pool() -> PasswordHashingPool:
+    """Get global password hashing pool"""
+    global _hashing_pool
+    if _hashing_pool is None:
+        workers = int(getattr(settings, "password_hash_workers", 0)) or min(4, os.cpu_count() or 1)
+        _hashing_pool = PasswordHashingPool(
+            max_workers=workers,
+            max_queue=int(getattr(settings, "password_hash_max_queue", 32)),
+            per_ip_limit=int(getattr(settings, "password_hash_per_ip_limit", 4)),
+        )
+        logger.info(f"Password hashing pool started with {workers} workers")
+    return _hashing_pool
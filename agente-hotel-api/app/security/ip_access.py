@@ -0,0 +1,234 @@
+"""
+IP Access Lists
+CIDR tries for IP allow/deny lists, hot-reloaded from Redis
+"""
+
+import asyncio
+import logging
+import socket
+from ipaddress import IPv4Network, IPv6Network, ip_network
+from typing import Dict, Iterable, Optional, Set, Tuple, Union
+
+from prometheus_client import Counter, Gauge
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_KEY = "security:ip_blacklist"
+WHITELIST_KEY = "security:ip_whitelist"
+VERSION_KEY = "security:ip_lists:version"
+
+_IPV4_MAPPED_PREFIX = b"\x00" * 10 + b"\xff\xff"
+
+# Prometheus metrics
+ip_access_list_entries = Gauge("ip_access_list_entries", "CIDR entries loaded in IP access lists", ["list"])
+
+ip_access_list_reloads_total = Counter("ip_access_list_reloads_total", "IP access list reloads from Redis", ["result"])
+
+Network = Union[str, IPv4Network, IPv6Network]
+
+
+class _Node:
+    """One byte of address: children by byte value and byte values where a prefix ends"""
+
+    __slots__ = ("children", "terminals")
+
+    def __init__(self):
+        self.children: Dict[int, "_Node"] = {}
+        self.terminals: Set[int] = set()
+
+
+class CIDRTrie:
+    """
+    Membership test of an address against many IPv4/IPv6 networks.
+
+    Multibit trie with an 8-bit stride: a prefix that does not end on a byte
+    boundary is expanded into the byte values it covers at its last level, so
+    a lookup is at most 4 (IPv4) or 16 (IPv6) dict probes regardless of how
+    many networks are loaded. Addresses are parsed with `inet_pton`; IPv4-mapped
+    IPv6 addresses match IPv4 networks.
+    """
+
+    def __init__(self, networks: Iterable[Network] = ()):
+        self._roots = {4: _Node(), 6: _Node()}
+        self._match_all = {4: False, 6: False}
+        self._size = 0
+        for network in networks:
+            self.add(network)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, network: Network) -> None:
+        """Add a network ("10.0.0.0/8", "2001:db8::/32") or single address"""
+        if isinstance(network, str):
+            network = ip_network(network.strip(), strict=False)
+        self._size += 1
+        prefix = network.prefixlen
+        if prefix == 0:
+            self._match_all[network.version] = True
+            return
+
+        address = network.network_address.packed
+        full, rest = divmod(prefix, 8)
+        depth = full if rest else full - 1
+        node = self._roots[network.version]
+        for byte in address[:depth]:
+            node = node.children.setdefault(byte, _Node())
+        if rest:
+            first = address[full] & (0xFF << (8 - rest)) & 0xFF
+            node.terminals.update(range(first, first + (1 << (8 - rest))))
+        else:
+            node.terminals.add(address[full - 1])
+
+    def __contains__(self, address: str) -> bool:
+        version, packed = _pack(address)
+        if self._match_all[version]:
+            return True
+        node = self._roots[version]
+        for byte in packed:
+            if byte in node.terminals:
+                return True
+            node = node.children.get(byte)
+            if node is None:
+                return False
+        return False
+
+
+def _pack(address: str) -> Tuple[int, bytes]:
+    """Return (version, packed bytes); raises ValueError for invalid addresses"""
+    try:
+        return 4, socket.inet_pton(socket.AF_INET, address)
+    except (OSError, TypeError):
+        pass
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, address)
+    except (OSError, TypeError):
+        raise ValueError(f"Invalid IP address: {address!r}") from None
+    if packed[:12] == _IPV4_MAPPED_PREFIX:
+        return 4, packed[12:]
+    return 6, packed
+
+
+def _build_trie(networks: Iterable[bytes]) -> CIDRTrie:
+    trie = CIDRTrie()
+    for raw in networks:
+        value = raw.decode() if isinstance(raw, bytes) else raw
+        try:
+            trie.add(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid CIDR in IP access list: {value!r}")
+    return trie
+
+
+class IPAccessLists:
+    """
+    Global blacklist/whitelist shared by the security middleware and audit logger.
+
+    Lists live in the Redis sets `security:ip_blacklist` and
+    `security:ip_whitelist`; writers bump `security:ip_lists:version` (see
+    `update_ip_access_lists`). Each worker polls the version and, when it
+    changes, rebuilds both tries off the event loop and swaps them in, so
+    lookups never touch Redis.
+    """
+
+    def __init__(self, refresh_interval: float = 5.0):
+        self.refresh_interval = refresh_interval
+        self.blacklist = CIDRTrie()
+        self.whitelist = CIDRTrie()
+        self.version: Optional[bytes] = None
+        self.redis_client = None
+        self._task: Optional[asyncio.Task] = None
+
+    def is_blacklisted(self, address: str) -> bool:
+        return address in self.blacklist
+
+    def is_whitelisted(self, address: str) -> bool:
+        return address in self.whitelist
+
+    async def reload(self, force: bool = False) -> bool:
+        """Rebuild the tries if the version in Redis changed; returns whether they were swapped"""
+        if not self.redis_client:
+            return False
+        version = await self.redis_client.get(VERSION_KEY)
+        if version == self.version and not force:
+            return False
+
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.smembers(BLACKLIST_KEY)
+        pipe.smembers(WHITELIST_KEY)
+        blacklisted, whitelisted = await pipe.execute()
+        blacklist = await asyncio.to_thread(_build_trie, blacklisted)
+        whitelist = await asyncio.to_thread(_build_trie, whitelisted)
+
+        self.blacklist, self.whitelist, self.version = blacklist, whitelist, version
+        ip_access_list_entries.labels(list="blacklist").set(len(blacklist))
+        ip_access_list_entries.labels(list="whitelist").set(len(whitelist))
+        logger.info(f"IP access lists reloaded: {len(blacklist)} blacklisted, {len(whitelist)} whitelisted")
+        return True
+
+    async def start(self, redis_client) -> None:
+        """Load the lists and keep polling for changes"""
+        self.redis_client = redis_client
+        try:
+            await self.reload(force=True)
+            ip_access_list_reloads_total.labels(result="success").inc()
+        except Exception as e:
+            ip_access_list_reloads_total.labels(result="error").inc()
+            logger.warning(f"Initial IP access list load failed, retrying in background: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if await self.reload():
+                    ip_access_list_reloads_total.labels(result="success").inc()
+            except Exception as e:
+                ip_access_list_reloads_total.labels(result="error").inc()
+                logger.warning(f"IP access list reload failed, keeping previous lists: {e}")
+
+
+async def update_ip_access_lists(
+    redis_client,
+    blacklist_add: Iterable[str] = (),
+    blacklist_remove: Iterable[str] = (),
+    whitelist_add: Iterable[str] = (),
+    whitelist_remove: Iterable[str] = (),
+) -> None:
+    """Change the shared lists and bump their version atomically so every worker reloads"""
+    for network in (*blacklist_add, *whitelist_add):
+        ip_network(network, strict=False)  # reject invalid entries before writing
+
+    pipe = redis_client.pipeline(transaction=True)
+    if blacklist_add:
+        pipe.sadd(BLACKLIST_KEY, *blacklist_add)
+    if blacklist_remove:
+        pipe.srem(BLACKLIST_KEY, *blacklist_remove)
+    if whitelist_add:
+        pipe.sadd(WHITELIST_KEY, *whitelist_add)
+    if whitelist_remove:
+        pipe.srem(WHITELIST_KEY, *whitelist_remove)
+    pipe.incr(VERSION_KEY)
+    await pipe.execute()
+
+
+_ip_access_lists: Optional[IPAccessLists] = None
+
+
+def get_ip_access_lists() -> IPAccessLists:
+    """Get global IP access lists"""
+    global _ip_access_lists
+    if _ip_access_lists is None:
+        _ip_access_lists = IPAccessLists(
+            refresh_interval=float(getattr(settings, "ip_access_lists_refresh_seconds", 5.0))
+        )
+    return _ip_access_lists
@@ -22,6 +22,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.logging import logger
+from app.security.hashing_pool import HashingPoolSaturated, get_hashing_pool
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -139,9 +140,10 @@ class PasswordPolicy:
             result = await session.execute(stmt)
             password_hashes = result.scalars().all()
 
-            # Check if new password matches any in history
+            # Check if new password matches any in history (bcrypt runs in the hashing pool)
+            pool = get_hashing_pool()
             for old_hash in password_hashes:
-                if pwd_context.verify(new_password, old_hash):
+                if await pool.run(pwd_context.verify, new_password, old_hash):
                     logger.warning(
                         "password_reuse_attempt",
                         user_id=user_id,
@@ -151,6 +153,15 @@ class PasswordPolicy:
 
             return True, None
 
+        except HashingPoolSaturated as e:
+            # Fail closed - a hashing flood must not disable the reuse check
+            logger.warning(
+                "password_history_check_saturated",
+                user_id=user_id,
+                reason=e.reason,
+            )
+            return False, "Password history check is temporarily unavailable. Please try again"
+
         except Exception as e:
             logger.error(
                 "password_history_check_failed",
@@ -278,6 +289,21 @@ class PasswordPolicy:
         """
         return pwd_context.verify(plain_password, hashed_password)
 
+    async def hash_password_async(self, password: str) -> str:
+        """hash_password in the bounded hashing pool (never blocks the event loop)."""
+        return await get_hashing_pool().run(self.hash_password, password)
+
+    async def verify_password_async(
+        self, plain_password: str, hashed_password: str, client_ip: Optional[str] = None
+    ) -> bool:
+        """
+        verify_password in the bounded hashing pool.
+
+        Raises:
+            HashingPoolSaturated: pool queue full or per-IP limit reached
+        """
+        return await get_hashing_pool().run(self.verify_password, plain_password, hashed_password, client_ip=client_ip)
+
 
 # Global password policy instance (configurable via settings)
 password_policy = PasswordPolicy(
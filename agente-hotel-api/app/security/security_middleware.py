@@ -8,18 +8,20 @@ from typing import Dict, List, Any, Optional, Callable
 from datetime import datetime, timezone
 import json
 import time
-import ipaddress
 import re
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from functools import lru_cache
 
 from fastapi import Request, Response, HTTPException, status
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
 
+from app.core.settings import settings
 from app.security.advanced_jwt_auth import AdvancedJWTAuth, UserRole
-from app.security.audit_logger import SecurityAuditLogger, SecurityEvent, ThreatLevel
-from app.security.data_encryption import DataEncryption
+from app.security.audit_logger import SecurityEvent, SecurityEventType, ThreatLevel, _get_audit_logger_sync
+from app.security.data_encryption import DataEncryptionService
+from app.security.ip_access import CIDRTrie, get_ip_access_lists
 from app.security.rate_limiter import AdvancedRateLimiter, RateLimitRule
 
 logger = logging.getLogger(__name__)
@@ -48,6 +50,45 @@ class SecurityPolicy:
     audit_level: ThreatLevel = ThreatLevel.LOW
     ip_whitelist: Optional[List[str]] = None
     ip_blacklist: Optional[List[str]] = None
+    whitelist_trie: CIDRTrie = field(init=False, repr=False, compare=False)
+    blacklist_trie: CIDRTrie = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.whitelist_trie = CIDRTrie(self.ip_whitelist or ())
+        self.blacklist_trie = CIDRTrie(self.ip_blacklist or ())
+
+
+DEFAULT_SECURITY_POLICY = SecurityPolicy(
+    endpoint_pattern=".*",
+    security_level=SecurityLevel.AUTHENTICATED,
+    allowed_roles=[UserRole.GUEST, UserRole.RECEPTIONIST, UserRole.MANAGER, UserRole.ADMIN],
+    rate_limit_rules=[RateLimitRule.API_REQUESTS],
+    audit_level=ThreatLevel.MEDIUM,
+)
+
+
+class EndpointPolicyRouter:
+    """
+    Resolves the security policy of a path.
+
+    All endpoint patterns are compiled into one alternation matched from the
+    start of the path, so the first pattern in table order wins exactly as
+    with `re.match` over each pattern; results are memoized per path.
+    """
+
+    def __init__(
+        self, policies: Dict[str, SecurityPolicy], default: SecurityPolicy = DEFAULT_SECURITY_POLICY, cache_size=4096
+    ):
+        self.policies = list(policies.values())
+        self.default = default
+        self._pattern = re.compile("|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(policies)))
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, path: str) -> SecurityPolicy:
+        match = self._pattern.match(path) if self.policies else None
+        if match is None:
+            return self.default
+        return self.policies[int(match.lastgroup[1:])]
 
 
 class SecurityMiddleware(BaseHTTPMiddleware):
@@ -56,9 +97,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     def __init__(self, app):
         super().__init__(app)
         self.jwt_auth = AdvancedJWTAuth()
-        self.audit_logger = SecurityAuditLogger()
-        self.data_encryption = DataEncryption()
+        self.audit_logger = _get_audit_logger_sync()
+        self.data_encryption = DataEncryptionService()
         self.rate_limiter = AdvancedRateLimiter()
+        self.ip_lists = get_ip_access_lists()
 
         # Security headers
         self.security_headers = {
@@ -73,6 +115,9 @@ class SecurityMiddleware(BaseHTTPMiddleware):
 
         # Security policies for different endpoints
         self.security_policies = self._initialize_security_policies()
+        self.policy_router = EndpointPolicyRouter(
+            self.security_policies, cache_size=int(getattr(settings, "security_policy_cache_size", 4096))
+        )
 
         logger.info("Security middleware initialized")
 
@@ -210,7 +255,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             ip_check_result = await self._check_ip_filtering(client_ip, policy)
             if not ip_check_result["allowed"]:
                 await self._log_security_event(
-                    request, SecurityEvent.ACCESS_DENIED, ThreatLevel.HIGH, f"IP blocked: {ip_check_result['reason']}"
+                    request,
+                    SecurityEventType.ACCESS_DENIED,
+                    ThreatLevel.HIGH,
+                    f"IP blocked: {ip_check_result['reason']}",
                 )
                 return JSONResponse(
                     status_code=status.HTTP_403_FORBIDDEN, content={"detail": "Access denied"}, headers=response_headers
@@ -223,7 +271,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 if not rate_limit_result[0]:
                     await self._log_security_event(
                         request,
-                        SecurityEvent.RATE_LIMIT_EXCEEDED,
+                        SecurityEventType.RATE_LIMIT_EXCEEDED,
                         ThreatLevel.MEDIUM,
                         f"Rate limit exceeded: {rule.value}",
                     )
@@ -241,7 +289,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             auth_result = await self._check_authentication_authorization(request, policy)
             if not auth_result["allowed"]:
                 await self._log_security_event(
-                    request, SecurityEvent.AUTHENTICATION_FAILED, ThreatLevel.HIGH, auth_result["reason"]
+                    request, SecurityEventType.AUTHENTICATION_FAILED, ThreatLevel.HIGH, auth_result["reason"]
                 )
 
                 return JSONResponse(
@@ -255,7 +303,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 mfa_result = await self._check_mfa_requirement(auth_result["user"])
                 if not mfa_result["valid"]:
                     await self._log_security_event(
-                        request, SecurityEvent.MFA_REQUIRED, ThreatLevel.HIGH, "MFA verification required"
+                        request, SecurityEventType.MFA_REQUIRED, ThreatLevel.HIGH, "MFA verification required"
                     )
 
                     return JSONResponse(
@@ -276,8 +324,8 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                 "session": auth_result.get("session"),
             }
 
-            # Log successful access
-            await self._log_security_event(request, SecurityEvent.ACCESS_GRANTED, policy.audit_level, "Access granted")
+            # Log successful access (buffered: the handler does not wait for the audit write)
+            self._submit_security_event(request, SecurityEventType.ACCESS_GRANTED, policy.audit_level, "Access granted")
 
             # Process request
             response = await call_next(request)
@@ -300,7 +348,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             logger.error(f"Security middleware error: {e}")
 
             await self._log_security_event(
-                request, SecurityEvent.SYSTEM_ERROR, ThreatLevel.HIGH, f"Security middleware error: {str(e)}"
+                request, SecurityEventType.SYSTEM_ERROR, ThreatLevel.HIGH, f"Security middleware error: {str(e)}"
             )
 
             return JSONResponse(
@@ -329,34 +377,26 @@ class SecurityMiddleware(BaseHTTPMiddleware):
     def _get_security_policy(self, endpoint: str) -> SecurityPolicy:
         """Get security policy for endpoint"""
 
-        for pattern, policy in self.security_policies.items():
-            if re.match(pattern, endpoint):
-                return policy
-
-        # Default policy for unmatched endpoints
-        return SecurityPolicy(
-            endpoint_pattern=".*",
-            security_level=SecurityLevel.AUTHENTICATED,
-            allowed_roles=[UserRole.GUEST, UserRole.RECEPTIONIST, UserRole.MANAGER, UserRole.ADMIN],
-            rate_limit_rules=[RateLimitRule.API_REQUESTS],
-            audit_level=ThreatLevel.MEDIUM,
-        )
+        return self.policy_router.resolve(endpoint)
 
     async def _check_ip_filtering(self, client_ip: str, policy: SecurityPolicy) -> Dict[str, Any]:
         """Check IP whitelist/blacklist filtering"""
 
         try:
-            # Check blacklist first
-            if policy.ip_blacklist:
-                for blacklisted_ip in policy.ip_blacklist:
-                    if self._ip_matches(client_ip, blacklisted_ip):
-                        return {"allowed": False, "reason": "IP blacklisted"}
+            # Global blacklist (hot-reloaded from Redis); globally trusted IPs are exempt
+            if self._ip_listed(self.ip_lists.blacklist, client_ip) and not self._ip_listed(
+                self.ip_lists.whitelist, client_ip
+            ):
+                return {"allowed": False, "reason": "IP blacklisted"}
+
+            # Check policy blacklist
+            if policy.ip_blacklist and self._ip_listed(policy.blacklist_trie, client_ip):
+                return {"allowed": False, "reason": "IP blacklisted"}
 
             # Check whitelist
             if policy.ip_whitelist:
-                for whitelisted_ip in policy.ip_whitelist:
-                    if self._ip_matches(client_ip, whitelisted_ip):
-                        return {"allowed": True, "reason": "IP whitelisted"}
+                if self._ip_listed(policy.whitelist_trie, client_ip):
+                    return {"allowed": True, "reason": "IP whitelisted"}
 
                 # If whitelist exists but IP not in it, deny
                 return {"allowed": False, "reason": "IP not whitelisted"}
@@ -369,17 +409,15 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             # Fail secure - deny access on error
             return {"allowed": False, "reason": "IP filtering error"}
 
-    def _ip_matches(self, client_ip: str, filter_ip: str) -> bool:
-        """Check if client IP matches filter (supports CIDR notation)"""
+    @staticmethod
+    def _ip_listed(networks: CIDRTrie, client_ip: str) -> bool:
+        """Check if client IP is in a CIDR list; unparseable addresses match no list"""
 
+        if not len(networks):
+            return False
         try:
-            # Handle CIDR notation
-            if "/" in filter_ip:
-                network = ipaddress.ip_network(filter_ip, strict=False)
-                return ipaddress.ip_address(client_ip) in network
-            else:
-                return client_ip == filter_ip
-        except Exception:
+            return client_ip in networks
+        except ValueError:
             return False
 
     async def _check_authentication_authorization(self, request: Request, policy: SecurityPolicy) -> Dict[str, Any]:
@@ -400,7 +438,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
         token = auth_header.split(" ")[1]
 
         try:
-            # Verify token
+            # Verify token (verified claims and revocations are resolved in-process)
             verification_result = await self.jwt_auth.verify_token(token)
             if not verification_result["valid"]:
                 return {
@@ -411,6 +449,10 @@ class SecurityMiddleware(BaseHTTPMiddleware):
 
             user = verification_result["user"]
             session = verification_result.get("session")
+            try:
+                role = UserRole(user.get("role"))
+            except ValueError:
+                role = None
 
             # Check if authentication is sufficient
             if policy.security_level == SecurityLevel.AUTHENTICATED:
@@ -418,7 +460,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
 
             # Check role-based authorization
             if policy.security_level in [SecurityLevel.AUTHORIZED, SecurityLevel.ADMIN, SecurityLevel.SYSTEM]:
-                if user.role not in policy.allowed_roles:
+                if role not in policy.allowed_roles:
                     return {
                         "allowed": False,
                         "reason": f"Insufficient privileges. Required roles: {[r.value for r in policy.allowed_roles]}",
@@ -426,7 +468,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                     }
 
                 # Check admin access
-                if policy.security_level == SecurityLevel.ADMIN and user.role not in [UserRole.ADMIN, UserRole.SYSTEM]:
+                if policy.security_level == SecurityLevel.ADMIN and role not in [UserRole.ADMIN, UserRole.SYSTEM]:
                     return {
                         "allowed": False,
                         "reason": "Admin access required",
@@ -434,7 +476,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
                     }
 
                 # Check system access
-                if policy.security_level == SecurityLevel.SYSTEM and user.role != UserRole.SYSTEM:
+                if policy.security_level == SecurityLevel.SYSTEM and role != UserRole.SYSTEM:
                     return {
                         "allowed": False,
                         "reason": "System access required",
@@ -452,7 +494,7 @@ class SecurityMiddleware(BaseHTTPMiddleware):
 
         try:
             # Check if user has MFA enabled and verified
-            mfa_status = await self.jwt_auth.get_mfa_status(user.user_id)
+            mfa_status = await self.jwt_auth.get_mfa_status(user["user_id"])
 
             if not mfa_status["enabled"]:
                 return {"valid": False, "reason": "MFA not enabled"}
@@ -492,29 +534,51 @@ class SecurityMiddleware(BaseHTTPMiddleware):
             return response
 
     async def _log_security_event(
-        self, request: Request, event: SecurityEvent, threat_level: ThreatLevel, details: str
+        self, request: Request, event_type: SecurityEventType, threat_level: ThreatLevel, details: str
     ):
         """Log security event"""
 
         try:
-            client_ip = self._get_client_ip(request)
-            user_id = getattr(request.state, "security_context", {}).get("user", {}).get("user_id")
-
             await self.audit_logger.log_security_event(
-                event=event,
-                user_id=user_id,
-                source_ip=client_ip,
-                endpoint=request.url.path,
-                method=request.method,
-                threat_level=threat_level,
-                details=details,
-                user_agent=request.headers.get("User-Agent"),
-                session_id=getattr(request.state, "security_context", {}).get("session", {}).get("session_id"),
+                self._build_security_event(request, event_type, threat_level, details)
+            )
+
+        except Exception as e:
+            logger.error(f"Security event logging error: {e}")
+
+    def _submit_security_event(
+        self, request: Request, event_type: SecurityEventType, threat_level: ThreatLevel, details: str
+    ):
+        """Queue security event for background analysis and storage"""
+
+        try:
+            self.audit_logger.submit_security_event(
+                self._build_security_event(request, event_type, threat_level, details)
             )
 
         except Exception as e:
             logger.error(f"Security event logging error: {e}")
 
+    def _build_security_event(
+        self, request: Request, event_type: SecurityEventType, threat_level: ThreatLevel, details: str
+    ) -> SecurityEvent:
+        security_context = getattr(request.state, "security_context", {})
+        user = security_context.get("user") or {}
+        session = security_context.get("session") or {}
+
+        return SecurityEvent(
+            event_type=event_type,
+            severity=threat_level,
+            user_id=user.get("user_id"),
+            session_id=session.get("session_id"),
+            ip_address=self._get_client_ip(request),
+            user_agent=request.headers.get("User-Agent"),
+            endpoint=request.url.path,
+            method=request.method,
+            result="success" if event_type == SecurityEventType.ACCESS_GRANTED else "blocked",
+            details={"message": details},
+        )
+
     async def _log_request_response(self, request: Request, response: Response, processing_time: float):
         """Log request/response for audit purposes"""
 
@@ -0,0 +1,194 @@
+"""
+Token Revocation Sync and Verified Claims Cache
+Local fast path for JWT validation: verified claims LRU plus a revocation set
+kept in sync across processes through Redis pub/sub
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from prometheus_client import Counter
+
+logger = logging.getLogger(__name__)
+
+REVOKED_KEY_PREFIX = "revoked_token:"
+REVOCATION_CHANNEL = "auth:revoked_tokens"
+
+# Prometheus metrics
+jwt_claims_cache_total = Counter("jwt_claims_cache_total", "Verified JWT claims cache lookups", ["result"])
+
+token_revocation_checks_total = Counter(
+    "token_revocation_checks_total", "Token revocation checks by source", ["source"]
+)
+
+
+class VerifiedClaimsCache:
+    """LRU of signature-verified claims keyed by token hash, bounded by size and token expiry"""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            jwt_claims_cache_total.labels(result="miss").inc()
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            jwt_claims_cache_total.labels(result="expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        jwt_claims_cache_total.labels(result="hit").inc()
+        return claims
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        exp = claims.get("exp")
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            return
+        key = self._key(token)
+        self._entries[key] = (float(exp), claims)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self._entries.pop(self._key(token), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RevocationListener:
+    """
+    Process-local set of revoked JTIs mirrored from Redis.
+
+    On start it subscribes to the revocation channel and then loads the existing
+    `revoked_token:*` keys, so no revocation published in between is lost. While
+    the subscription is healthy `synced` is True and lookups need no network hop;
+    if it drops, callers fall back to Redis until it reconnects and reloads.
+    """
+
+    def __init__(self, redis_client: Any, channel: str = REVOCATION_CHANNEL, reconnect_delay: float = 1.0):
+        self.redis_client = redis_client
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self.synced = False
+        self._revoked: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._pubsub: Any = None
+        self._ready = asyncio.Event()
+
+    async def start(self, timeout: float = 5.0) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        await asyncio.wait_for(self._ready.wait(), timeout)
+
+    async def stop(self) -> None:
+        self.synced = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._close_pubsub()
+
+    def add(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._revoked[jti]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._subscribe_and_load()
+                self.synced = True
+                self._ready.set()
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Revocation listener disconnected, falling back to Redis lookups: {e}")
+            self.synced = False
+            await self._close_pubsub()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _subscribe_and_load(self) -> None:
+        self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.channel)
+
+        keys = [key async for key in self.redis_client.scan_iter(match=f"{REVOKED_KEY_PREFIX}*", count=1000)]
+        if not keys:
+            return
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.pttl(key)
+            ttls = await pipe.execute()
+        now = time.time()
+        for key, ttl in zip(keys, ttls):
+            if ttl and ttl > 0:
+                key = key.decode() if isinstance(key, bytes) else key
+                self.add(key[len(REVOKED_KEY_PREFIX) :], now + ttl / 1000)
+        self._prune()
+
+    async def _listen(self) -> None:
+        while True:
+            message = await self._pubsub.get_message(timeout=1.0)
+            if message and message.get("type") == "message":
+                self._apply(message["data"])
+            elif message is None and len(self._revoked) > 10000:
+                self._prune()
+
+    def _apply(self, data: Any) -> None:
+        payload = data.decode() if isinstance(data, bytes) else str(data)
+        jti, _, expires_at = payload.rpartition(":")
+        try:
+            self.add(jti, float(expires_at))
+        except ValueError:
+            logger.warning(f"Ignoring malformed revocation message: {payload!r}")
+
+    def _prune(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    async def _close_pubsub(self) -> None:
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.aclose()
+            except Exception:
+                pass
+            self._pubsub = None
+
+
+async def publish_revocation(redis_client: Any, jti: str, expires_at: float, channel: str = REVOCATION_CHANNEL) -> None:
+    """Persist the revocation and broadcast it to every process in one round-trip"""
+    ttl = int(expires_at - time.time())
+    if ttl <= 0:
+        return
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.setex(f"{REVOKED_KEY_PREFIX}{jti}", ttl, "1")
+        pipe.publish(channel, f"{jti}:{expires_at}")
+        await pipe.execute()
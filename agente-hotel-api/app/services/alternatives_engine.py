@@ -0,0 +1,212 @@
+# app/services/alternatives_engine.py
+# Búsqueda de fechas/tipos alternativos sobre la disponibilidad por noche
+
+"""
+Motor de alternativas para estadías sin disponibilidad.
+
+Sobre la disponibilidad por noche (la misma que cachea `QloAppsAdapter`) se
+arma un índice por tipo de habitación: sumas de prefijos de la tarifa y una
+sparse table de mínimos del cupo. Con eso cualquier ventana (tipo, inicio,
+noches) se evalúa en O(1): está disponible si el cupo mínimo alcanza y su
+precio es una resta de prefijos.
+
+La búsqueda recorre las ventanas cercanas a la pedida — inicio corrido
+±`max_shift_days`, estadías más cortas o largas hasta `max_length_delta`
+noches y otros tipos con capacidad suficiente — y se queda con las `limit`
+mejores por cercanía y precio.
+"""
+
+import heapq
+import math
+from dataclasses import asdict, dataclass
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Alternative:
+    check_in: date
+    check_out: date
+    room_type_id: Any
+    room_type: str
+    available_rooms: int
+    total_price: float
+    price_per_night: float
+    currency: str
+    shift_days: int
+    nights_delta: int
+    score: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["check_in"], data["check_out"] = self.check_in.isoformat(), self.check_out.isoformat()
+        return data
+
+
+class _TypeSeries:
+    """Cupo y tarifa de un tipo de habitación noche a noche, preprocesados para ventanas O(1)."""
+
+    __slots__ = ("info", "price_prefix", "min_table")
+
+    def __init__(self, info: Dict[str, Any], available: List[int], prices: List[float]):
+        self.info = info
+        prefix = [0.0]
+        for price in prices:
+            prefix.append(prefix[-1] + price)
+        self.price_prefix = prefix
+        # Sparse table: min_table[k][i] = mínimo de available[i : i + 2**k]
+        table = [available]
+        k = 1
+        while (1 << k) <= len(available):
+            prev, half = table[-1], 1 << (k - 1)
+            table.append([min(prev[i], prev[i + half]) for i in range(len(available) - (1 << k) + 1)])
+            k += 1
+        self.min_table = table
+
+    def min_available(self, start: int, length: int) -> int:
+        k = length.bit_length() - 1
+        row = self.min_table[k]
+        return min(row[start], row[start + length - (1 << k)])
+
+    def total_price(self, start: int, length: int) -> float:
+        return self.price_prefix[start + length] - self.price_prefix[start]
+
+
+class AvailabilityIndex:
+    """Disponibilidad de un rango de noches para todos los tipos de habitación."""
+
+    def __init__(self, start: date, nights: List[Iterable[Dict[str, Any]]]):
+        self.start = start
+        self.size = len(nights)
+        per_night = [{room.get("room_type_id"): room for room in rooms} for rooms in nights]
+        type_ids = list(dict.fromkeys(t for night in per_night for t in night))
+
+        self.types: Dict[Any, _TypeSeries] = {}
+        for type_id in type_ids:
+            sample = next(night[type_id] for night in per_night if type_id in night)
+            available = [
+                int(night[type_id].get("available_rooms", 0)) if type_id in night else 0 for night in per_night
+            ]
+            # Una noche sin dato para el tipo no se vende: cupo 0, tarifa de referencia
+            fallback = float(sample.get("price_per_night", 0))
+            prices = [
+                float(night[type_id].get("price_per_night", fallback)) if type_id in night else fallback
+                for night in per_night
+            ]
+            info = {
+                "name": sample.get("room_type_name") or sample.get("room_type") or str(type_id),
+                "max_occupancy": int(sample.get("max_occupancy", 99)),
+                "currency": sample.get("currency", "USD"),
+            }
+            self.types[type_id] = _TypeSeries(info, available, prices)
+
+    def offset(self, night: date) -> int:
+        return (night - self.start).days
+
+    def window(self, type_id: Any, check_in: date, nights: int) -> Optional[Tuple[int, float]]:
+        """(cupo mínimo, precio total) de la ventana, o None si cae fuera del índice."""
+        series = self.types.get(type_id)
+        start = self.offset(check_in)
+        if series is None or nights < 1 or start < 0 or start + nights > self.size:
+            return None
+        return series.min_available(start, nights), series.total_price(start, nights)
+
+
+class AlternativesEngine:
+    """Ventanas disponibles cercanas a una estadía pedida, ordenadas por cercanía y precio."""
+
+    def __init__(
+        self,
+        max_shift_days: int = 3,
+        max_length_delta: int = 1,
+        shift_weight: float = 1.0,
+        length_weight: float = 1.5,
+        room_type_weight: float = 2.0,
+        price_weight: float = 1.0,
+    ):
+        self.max_shift_days = max_shift_days
+        self.max_length_delta = max_length_delta
+        self.shift_weight = shift_weight
+        self.length_weight = length_weight
+        self.room_type_weight = room_type_weight
+        # Precio relativo al de referencia: el doble de caro pesa como correrse un día
+        self.price_weight = price_weight
+
+    def search(
+        self,
+        index: AvailabilityIndex,
+        check_in: date,
+        check_out: date,
+        guests: int = 1,
+        room_type_id: Any = None,
+        rooms: int = 1,
+        limit: int = 3,
+        earliest: Optional[date] = None,
+    ) -> List[Alternative]:
+        """
+        Mejores `limit` alternativas disponibles, sin incluir la estadía pedida.
+
+        Args:
+            index: Disponibilidad por noche que cubre las ventanas a evaluar
+            check_in, check_out: Estadía pedida
+            guests: Huéspedes (filtra tipos por capacidad, repartidos en `rooms`)
+            room_type_id: Tipo pedido; None = cualquiera (sin penalizar el tipo)
+            rooms: Habitaciones necesarias
+            limit: Cantidad de alternativas a devolver
+            earliest: Primer check-in aceptable (p. ej. hoy)
+        """
+        nights = (check_out - check_in).days
+        if nights < 1:
+            return []
+        per_room = math.ceil(guests / max(1, rooms))
+        eligible = [t for t, s in index.types.items() if s.info["max_occupancy"] >= per_room]
+        reference = self._reference_price(index, check_in, nights, room_type_id, eligible)
+
+        candidates: List[Alternative] = []
+        for type_id in eligible:
+            series = index.types[type_id]
+            type_penalty = 0.0 if room_type_id is None or type_id == room_type_id else self.room_type_weight
+            for shift in range(-self.max_shift_days, self.max_shift_days + 1):
+                start = check_in + timedelta(days=shift)
+                if earliest is not None and start < earliest:
+                    continue
+                for delta in range(-self.max_length_delta, self.max_length_delta + 1):
+                    length = nights + delta
+                    if shift == 0 and delta == 0 and type_penalty == 0.0:
+                        continue  # la estadía pedida
+                    window = index.window(type_id, start, length)
+                    if window is None or window[0] < rooms:
+                        continue
+                    available, total = window
+                    per_night = total / length
+                    score = (
+                        abs(shift) * self.shift_weight
+                        + abs(delta) * self.length_weight
+                        + type_penalty
+                        + self.price_weight * (per_night / reference if reference else 0.0)
+                    )
+                    candidates.append(
+                        Alternative(
+                            check_in=start,
+                            check_out=start + timedelta(days=length),
+                            room_type_id=type_id,
+                            room_type=series.info["name"],
+                            available_rooms=available,
+                            total_price=round(total * rooms, 2),
+                            price_per_night=round(per_night, 2),
+                            currency=series.info["currency"],
+                            shift_days=shift,
+                            nights_delta=delta,
+                            score=round(score, 4),
+                        )
+                    )
+        return heapq.nsmallest(limit, candidates, key=lambda a: (a.score, a.check_in, str(a.room_type_id)))
+
+    @staticmethod
+    def _reference_price(
+        index: AvailabilityIndex, check_in: date, nights: int, room_type_id: Any, eligible: List[Any]
+    ) -> float:
+        """Tarifa por noche de la estadía pedida (del tipo pedido, o la más baja entre los elegibles)."""
+        types = [room_type_id] if room_type_id in index.types else eligible
+        prices = [w[1] / nights for w in (index.window(t, check_in, nights) for t in types) if w is not None]
+        return min(prices) if prices else 0.0
@@ -358,12 +358,12 @@ class AudioSystemHealthChecker:
         start_time = time.time()
 
         try:
-            import psutil
+            from app.services.host_metrics import get_host_sampler
 
-            # Verificar uso de memoria
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage("/")
-            cpu_percent = psutil.cpu_percent(interval=0.1)
+            # Verificar uso de memoria (muestra del sampler compartido)
+            sample = await get_host_sampler().snapshot()
+            memory, disk = sample.memory, sample.disk
+            cpu_percent = sample.cpu_percent
 
             issues = []
 
@@ -0,0 +1,279 @@
+# app/services/availability_refresher.py
+# Prefetch de ventanas de disponibilidad calientes y métricas de frescura
+
+"""
+Refresco en segundo plano de la caché de disponibilidad por noche.
+
+Cada ciclo elige las noches "calientes" — los próximos N días, los viernes y
+sábados de los próximos fines de semana, los feriados configurados y las
+noches más consultadas por huéspedes — y vuelve a pedir a QloApps solo las
+que vencerían antes del próximo ciclo, un rango por tramo de noches
+consecutivas. El prefetch usa la misma cuota PMS
+que los huéspedes pero nunca espera por ella: si no hay token o el clúster
+ya consumió `budget_ratio` de la cuota, el ciclo termina. Un lease en Redis
+hace que en cada intervalo refresque un solo worker.
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from ..core.logging import logger
+from ..core.prometheus import registry
+from ..core.settings import settings
+
+availability_night_age_seconds = Histogram(
+    "pms_availability_night_age_seconds",
+    "Antigüedad de las noches de disponibilidad servidas desde caché",
+    buckets=(1, 5, 15, 30, 60, 120, 180, 300, 450, 600, 900, 1800),
+    registry=registry,
+)
+availability_queries_total = Counter(
+    "pms_availability_queries_total",
+    "Consultas de disponibilidad de huéspedes por origen (cache|stale|pms|stale_fallback)",
+    ["source"],
+    registry=registry,
+)
+availability_prefetch_total = Counter(
+    "pms_availability_prefetch_total",
+    "Noches evaluadas por el prefetch (refreshed|fresh|budget|error)",
+    ["result"],
+    registry=registry,
+)
+availability_revalidations_total = Counter(
+    "pms_availability_revalidations_total",
+    "Revalidaciones en segundo plano de noches servidas vencidas",
+    ["result"],
+    registry=registry,
+)
+availability_index_invalidated_keys = Counter(
+    "pms_availability_index_invalidated_keys_total",
+    "Claves de disponibilidad borradas vía índice por noche (sin SCAN)",
+    registry=registry,
+)
+
+POPULARITY_KEY = "pms:availability:popularity"
+LEASE_KEY = "pms:availability:prefetch_lease"
+
+# Popularidad del clúster, atómico. KEYS[1] = ZSET noche ISO → score.
+# ARGV = hoy (ISO), decaimiento, top a devolver y TTL. Los incrementos de
+# cada worker ya están sumados (`_publish_popularity`); el script borra las
+# noches pasadas, devuelve el top y después decae los scores (como
+# `NightPopularity.age`), borrando los que quedan < 0.1.
+_POPULARITY_SCRIPT = """
+local entries = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+for i = 1, #entries, 2 do
+    if entries[i] < ARGV[1] then
+        redis.call('ZREM', KEYS[1], entries[i])
+    end
+end
+local top = redis.call('ZREVRANGE', KEYS[1], 0, tonumber(ARGV[3]) - 1)
+local decay = tonumber(ARGV[2])
+for i = 1, #entries, 2 do
+    if entries[i] >= ARGV[1] then
+        local score = tonumber(entries[i + 1]) * decay
+        if score < 0.1 then
+            redis.call('ZREM', KEYS[1], entries[i])
+        else
+            redis.call('ZADD', KEYS[1], score, entries[i])
+        end
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return top
+"""
+
+
+class NightPopularity:
+    """Conteo de noches consultadas en este proceso, con decaimiento por ciclo."""
+
+    def __init__(self, decay: float = 0.5):
+        self.decay = decay
+        self._counts: Dict[date, float] = {}
+        self._pending: Dict[date, int] = {}
+
+    def record(self, nights: Iterable[date]) -> None:
+        for night in nights:
+            self._counts[night] = self._counts.get(night, 0.0) + 1.0
+            self._pending[night] = self._pending.get(night, 0) + 1
+
+    def drain_pending(self) -> Dict[date, int]:
+        """Incrementos desde la última llamada (para publicarlos en Redis)."""
+        pending, self._pending = self._pending, {}
+        return pending
+
+    def top(self, limit: int, today: date) -> List[date]:
+        upcoming = [(count, night) for night, count in self._counts.items() if night >= today]
+        return [night for _, night in sorted(upcoming, key=lambda item: (-item[0], item[1]))[:limit]]
+
+    def age(self, today: date) -> None:
+        self._counts = {
+            night: count * self.decay
+            for night, count in self._counts.items()
+            if night >= today and count * self.decay >= 0.1
+        }
+
+
+availability_popularity = NightPopularity()
+
+
+class AvailabilityRefresher:
+    """Mantiene frescas en caché las noches calientes de un `QloAppsAdapter`."""
+
+    def __init__(
+        self,
+        adapter: Any,
+        interval: Optional[float] = None,
+        horizon_days: Optional[int] = None,
+        weekends_ahead: Optional[int] = None,
+        holidays: Optional[Iterable[Any]] = None,
+        popular_nights: Optional[int] = None,
+        max_per_cycle: Optional[int] = None,
+        budget_ratio: Optional[float] = None,
+        popularity: Optional[NightPopularity] = None,
+    ):
+        self.adapter = adapter
+        self.redis = adapter.redis
+        self.interval = float(interval if interval is not None else settings.pms_prefetch_interval_seconds)
+        self.horizon_days = int(horizon_days if horizon_days is not None else settings.pms_prefetch_horizon_days)
+        self.weekends_ahead = int(
+            weekends_ahead if weekends_ahead is not None else settings.pms_prefetch_weekends_ahead
+        )
+        self.holidays = sorted(
+            date.fromisoformat(str(d)) for d in (holidays if holidays is not None else settings.pms_prefetch_holidays)
+        )
+        self.popular_nights = int(
+            popular_nights if popular_nights is not None else settings.pms_prefetch_popular_nights
+        )
+        self.max_per_cycle = int(max_per_cycle if max_per_cycle is not None else settings.pms_prefetch_max_per_cycle)
+        self.budget_ratio = float(budget_ratio if budget_ratio is not None else settings.pms_prefetch_budget_ratio)
+        self.popularity = popularity or availability_popularity
+        self._popularity_script = None  # registrado en redis-py (EVALSHA)
+        self._task: Optional[asyncio.Task] = None
+
+    def scheduled_nights(self, today: date) -> List[date]:
+        """Próximos `horizon_days`, fines de semana (viernes y sábado) y feriados."""
+        nights = [today + timedelta(days=i) for i in range(self.horizon_days)]
+        first_friday = today + timedelta(days=(4 - today.weekday()) % 7)
+        for week in range(self.weekends_ahead):
+            friday = first_friday + timedelta(weeks=week)
+            nights += [friday, friday + timedelta(days=1)]
+        nights += [d for d in self.holidays if today <= d <= today + timedelta(days=365)]
+        return nights
+
+    async def candidate_nights(self, today: date) -> List[date]:
+        """Noches a mantener frescas, por prioridad y sin repetir."""
+        scheduled = self.scheduled_nights(today)
+        near, rest = scheduled[: self.horizon_days], scheduled[self.horizon_days :]
+        await self._publish_popularity()
+        popular = await self._popular_nights(today)
+        return list(dict.fromkeys(near + popular + rest))
+
+    async def run_cycle(self, today: Optional[date] = None) -> int:
+        """Refresca las noches calientes que vencerían antes del próximo ciclo. Devuelve cuántas."""
+        today = today or date.today()
+        # Todos los workers publican y envejecen su conteo; solo el del lease refresca
+        await self._publish_popularity()
+        refreshed = await self._refresh_hot_nights(today) if await self._acquire_lease() else 0
+        self.popularity.age(today)
+        return refreshed
+
+    async def _refresh_hot_nights(self, today: date) -> int:
+        candidates = await self.candidate_nights(today)
+        ages = await self.adapter.night_ages(candidates)
+        due = []
+        for night in candidates:
+            age = ages.get(night)
+            if age is not None and age + self.interval < self.adapter.night_cache_ttl:
+                availability_prefetch_total.labels(result="fresh").inc()
+            else:
+                due.append(night)
+
+        # Las noches consecutivas se piden juntas: una llamada (y un token) por tramo
+        selected = due[: self.max_per_cycle]
+        refreshed = 0
+        try:
+            refreshed = await self.adapter.refresh_nights(selected, self._take_budget)
+        except Exception as e:
+            availability_prefetch_total.labels(result="error").inc()
+            logger.warning("availability_refresher.refresh_failed", nights=len(selected), error=str(e))
+        availability_prefetch_total.labels(result="refreshed").inc(refreshed)
+        if len(due) > refreshed:
+            availability_prefetch_total.labels(result="budget").inc(len(due) - refreshed)
+
+        logger.info("availability_refresher.cycle", candidates=len(candidates), refreshed=refreshed)
+        return refreshed
+
+    async def _take_budget(self) -> bool:
+        """Token de la cuota PMS sin esperar, dejando la mayor parte para huéspedes."""
+        limiter = self.adapter.rate_limiter
+        usage = limiter.quota_usage() if hasattr(limiter, "quota_usage") else {}
+        if isinstance(usage, dict) and usage.get("limit"):
+            if usage.get("global_used", 0) >= usage["limit"] * self.budget_ratio:
+                return False
+        return bool(await limiter.acquire("availability_prefetch"))
+
+    async def _acquire_lease(self) -> bool:
+        """Un solo worker refresca por intervalo; sin Redis, cada worker refresca por su cuenta."""
+        try:
+            ttl_ms = max(1, int(self.interval * 1000 * 0.9))
+            return bool(await self.redis.set(LEASE_KEY, uuid.uuid4().hex, nx=True, px=ttl_ms))
+        except Exception as e:
+            logger.debug("availability_refresher.lease_unavailable", error=str(e))
+            return True
+
+    async def _publish_popularity(self) -> None:
+        """Suma al ZSET del clúster las consultas de este worker desde el último ciclo."""
+        pending = self.popularity.drain_pending()
+        if not pending:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for night, count in pending.items():
+                pipe.zincrby(POPULARITY_KEY, count, night.isoformat())
+            pipe.expire(POPULARITY_KEY, 86400)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug("availability_refresher.popularity_publish_failed", error=str(e))
+
+    async def _popular_nights(self, today: date) -> List[date]:
+        """
+        Top de noches consultadas en todo el clúster (ZSET en Redis) o en este proceso.
+
+        Solo lo llama el worker con el lease, así que el ZSET decae una vez
+        por ciclo igual que el conteo local, y no guarda noches pasadas.
+        """
+        args: List[Any] = [today.isoformat(), self.popularity.decay, self.popular_nights, 86400]
+        try:
+            if self._popularity_script is None:
+                self._popularity_script = self.redis.register_script(_POPULARITY_SCRIPT)
+            members = await self._popularity_script(keys=[POPULARITY_KEY], args=args)
+            return [date.fromisoformat(m.decode() if isinstance(m, bytes) else m) for m in members]
+        except Exception as e:
+            logger.debug("availability_refresher.popularity_local", error=str(e))
+            return self.popularity.top(self.popular_nights, today)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+        logger.info("AvailabilityRefresher started", interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):  # pragma: no cover
+                pass
+
+    async def _loop(self):  # pragma: no cover (timing)
+        while True:
+            started = time.monotonic()
+            try:
+                await self.run_cycle()
+            except Exception as e:
+                logger.warning("availability_refresher.cycle_failed", error=str(e))
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
@@ -0,0 +1,207 @@
+"""
+Host Metrics Sampler para Agente Hotelero IA System
+Muestreo de recursos del host en un hilo propio, fuera del event loop
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+
+import psutil
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HostSample:
+    """Lectura puntual de los recursos del host"""
+
+    cpu_percent: float
+    cpu_count: int
+    cpu_freq_current: float
+    memory: Any  # psutil.virtual_memory()
+    swap: Any  # psutil.swap_memory()
+    disk: Any  # psutil.disk_usage("/")
+    network: Any  # psutil.net_io_counters()
+    process_count: int
+    load_average: Tuple[float, float, float]
+    timestamp: float  # time.time()
+
+
+class RingBuffer(Generic[T]):
+    """
+    Buffer circular de tamaño fijo con un único escritor.
+
+    El escritor guarda el elemento en su hueco y después publica el nuevo
+    contador; bajo el GIL ambas asignaciones son atómicas, así que los lectores
+    no necesitan lock: ven el estado anterior o el nuevo, nunca uno a medias.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items: List[Optional[T]] = [None] * capacity
+        self._written = 0
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def append(self, item: T) -> None:
+        self._items[self._written % self.capacity] = item
+        self._written += 1
+
+    def latest(self) -> Optional[T]:
+        written = self._written
+        return self._items[(written - 1) % self.capacity] if written else None
+
+    def last(self, n: int) -> List[T]:
+        """Los últimos `n` elementos, del más antiguo al más reciente"""
+        written = self._written
+        n = min(n, written, self.capacity - 1)  # deja un hueco de margen frente al escritor
+        return [self._items[i % self.capacity] for i in range(written - n, written)]
+
+
+class SlidingTrend:
+    """
+    Pendiente de la regresión lineal sobre las últimas `window` muestras.
+
+    Mantiene Σy y Σxy al añadir cada valor (x = posición en la ventana), así
+    que actualizar y consultar la tendencia es O(1) en lugar de recorrer la serie.
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values: deque = deque()
+        self._sum_y = 0.0
+        self._sum_xy = 0.0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def push(self, value: float) -> None:
+        n = len(self._values)
+        if n < self.window:
+            self._sum_xy += n * value
+            self._sum_y += value
+            self._values.append(value)
+            return
+        # La ventana se desplaza: cada x baja una posición y el más antiguo sale
+        oldest = self._values.popleft()
+        self._sum_y -= oldest
+        self._sum_xy = self._sum_xy - self._sum_y + (n - 1) * value
+        self._sum_y += value
+        self._values.append(value)
+
+    def slope(self) -> float:
+        n = len(self._values)
+        if n < 2:
+            return 0.0
+        sum_x = n * (n - 1) / 2
+        sum_x2 = (n - 1) * n * (2 * n - 1) / 6
+        denominator = n * sum_x2 - sum_x * sum_x
+        return (n * self._sum_xy - sum_x * self._sum_y) / denominator
+
+    def values(self) -> List[float]:
+        return list(self._values)
+
+
+class HostMetricsSampler:
+    """
+    Un hilo por proceso que muestrea CPU, memoria, disco, red y procesos con
+    una cadencia fija y deja cada lectura en un RingBuffer.
+
+    `psutil.cpu_percent(interval=None)` devuelve el uso desde la llamada
+    anterior, así que el hilo nunca duerme dentro de psutil y los servicios
+    async solo leen la última muestra, sin bloquear el event loop.
+    """
+
+    def __init__(self, interval_seconds: float = 5.0, capacity: int = 720):
+        self.interval_seconds = interval_seconds
+        self.samples: RingBuffer[HostSample] = RingBuffer(capacity)
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._sample_lock = threading.Lock()
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # Primera llamada: fija la referencia del delta de CPU
+        psutil.cpu_percent(interval=None)
+        self._thread = threading.Thread(target=self._run, name="host-metrics-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 1)
+            self._thread = None
+
+    async def snapshot(self) -> HostSample:
+        """Última muestra para código async: si aún no hay ninguna, se toma en un hilo"""
+        return self.samples.latest() or await asyncio.to_thread(self.sample_now)
+
+    def sample_now(self) -> HostSample:
+        """Toma una muestra inmediatamente y la publica en el buffer"""
+        with self._sample_lock:
+            sample = self._take_sample()
+            self.samples.append(sample)
+            return sample
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample_now()
+            except Exception as e:
+                logger.warning(f"Error muestreando métricas del host: {e}")
+            self._stop.wait(self.interval_seconds)
+
+    @staticmethod
+    def _take_sample() -> HostSample:
+        cpu_freq = psutil.cpu_freq()
+        try:
+            load_average = tuple(psutil.getloadavg())
+        except (AttributeError, OSError):
+            load_average = (0.0, 0.0, 0.0)
+
+        return HostSample(
+            cpu_percent=psutil.cpu_percent(interval=None),
+            cpu_count=psutil.cpu_count(),
+            cpu_freq_current=cpu_freq.current if cpu_freq else 0,
+            memory=psutil.virtual_memory(),
+            swap=psutil.swap_memory(),
+            disk=psutil.disk_usage("/"),
+            network=psutil.net_io_counters(),
+            process_count=len(psutil.pids()),
+            load_average=load_average,
+            timestamp=time.time(),
+        )
+
+
+# Instancia global del sampler (una por proceso)
+_host_sampler: Optional[HostMetricsSampler] = None
+
+
+def get_host_sampler() -> HostMetricsSampler:
+    """Obtener el sampler compartido, arrancándolo si hace falta"""
+    global _host_sampler
+    if _host_sampler is None:
+        _host_sampler = HostMetricsSampler(
+            interval_seconds=settings.host_metrics_sample_seconds,
+            capacity=settings.host_metrics_ring_size,
+        )
+    _host_sampler.start()
+    return _host_sampler
+
+
+def stop_host_sampler() -> None:
+    """Detener el hilo del sampler compartido"""
+    if _host_sampler is not None:
+        _host_sampler.stop()
@@ -2,6 +2,7 @@
 
 from prometheus_client import Counter, Histogram, Gauge
 from ..core.prometheus import (
+    guarded_labels,
     registry,
     http_requests_total as core_http_requests_total,
     http_request_duration_seconds as core_http_request_duration_seconds,
@@ -94,8 +95,9 @@ class MetricsService:
 
     def record_request_latency(self, method: str, endpoint: str, latency: float, status_code: int):
         # Histograma no incluye status_code; el contador sí
-        self.request_latency.labels(method=method, endpoint=endpoint).observe(latency)
-        self.requests_total.labels(method=method, endpoint=endpoint, status_code=str(status_code)).inc()
+        # Endpoint y tenant vienen del request: series con tope (ver CardinalityGuard)
+        guarded_labels(self.request_latency, method=method, endpoint=endpoint).observe(latency)
+        guarded_labels(self.requests_total, method=method, endpoint=endpoint, status_code=str(status_code)).inc()
 
     def check_slo_violations(self) -> list:
         # Placeholder: devolvería lista de violaciones basado en distribución
@@ -107,9 +109,9 @@ class MetricsService:
 
     # ---- Tenancy ----
     def inc_tenant_request(self, tenant_id: str, error: bool = False):
-        self.tenant_request_total.labels(tenant_id=tenant_id).inc()
+        guarded_labels(self.tenant_request_total, tenant_id=tenant_id).inc()
         if error:
-            self.tenant_request_errors.labels(tenant_id=tenant_id).inc()
+            guarded_labels(self.tenant_request_errors, tenant_id=tenant_id).inc()
 
     # ---- NLP Confidence & Fallback ----
     def categorize_confidence(self, confidence: float) -> str:
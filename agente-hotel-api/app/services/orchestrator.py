@@ -2,7 +2,8 @@
 
 import time
 import asyncio
-from typing import Optional
+from contextlib import contextmanager
+from typing import Awaitable, Optional, TypeVar
 from datetime import datetime, timezone, date
 from prometheus_client import Histogram, Counter
 from .message_gateway import MessageGateway
@@ -39,6 +40,9 @@ from .review_service import get_review_service
 from .alert_service import alert_manager
 from ..utils.locale_utils import format_currency, format_date_locale
 from ..core.settings import settings  # Exponer settings a nivel de módulo para tests/patching
+from ..core.prometheus import registry
+
+T = TypeVar("T")
 
 # Re-export helpers so tests can patch `app.services.orchestrator.get_room_image_url`
 try:
@@ -215,6 +219,8 @@ class Orchestrator:
                 logger.error("orchestrator.session_save_failed", error=str(session_error), user_id=message.user_id)
 
         # Generate response based on reason
+        lang = self._detect_language(None, message)
+        tenant_id = getattr(message, "tenant_id", None)
         if reason == "urgent_after_hours":
             # Usar overrides por tenant si existen
             start = end = None
@@ -229,13 +235,18 @@ class Orchestrator:
                 pass
             hours_str = format_business_hours(start_hour=start, end_hour=end)
             response_text = self.template_service.get_response(
-                "escalated_to_staff", next_business_time=hours_str
+                "escalated_to_staff", language=lang, tenant_id=tenant_id, next_business_time=hours_str
             )
         elif reason == "nlp_failure":
-            response_text = self.template_service.get_response("fallback_human_needed")
+            response_text = self.template_service.get_response(
+                "fallback_human_needed", language=lang, tenant_id=tenant_id
+            )
         else:
             response_text = self.template_service.get_response(
-                "escalated_to_staff", reason="Necesitas asistencia especializada"
+                "escalated_to_staff",
+                language=lang,
+                tenant_id=tenant_id,
+                reason="Necesitas asistencia especializada",
             )
 
         return {
@@ -289,12 +300,15 @@ class Orchestrator:
             return _override_is_bh(start_hour=start, end_hour=end, timezone=tz)
         return _bh.is_business_hours(start_hour=start, end_hour=end, timezone=tz)
 
-    def _build_hours_query_response(self, start, end) -> dict:
+    def _build_hours_query_response(self, message: UnifiedMessage, start, end) -> dict:
         """Build response for business hours query intent."""
         from ..utils import business_hours as _bh
         business_hours_str = _bh.format_business_hours(start_hour=start, end_hour=end)
         response_text = self.template_service.get_response(
-            "business_hours_info", business_hours=business_hours_str
+            "business_hours_info",
+            language=self._detect_language(None, message),
+            tenant_id=getattr(message, "tenant_id", None),
+            business_hours=business_hours_str,
         )
         return {"response_type": "text", "content": response_text}
 
@@ -326,7 +340,11 @@ class Orchestrator:
         next_open_str = self._format_next_open_time(next_open, start)
 
         response_text = self.template_service.get_response(
-            template_key, business_hours=business_hours_str, next_open_time=next_open_str
+            template_key,
+            language=self._detect_language(None, message),
+            tenant_id=getattr(message, "tenant_id", None),
+            business_hours=business_hours_str,
+            next_open_time=next_open_str,
         )
 
         logger.info(
@@ -386,7 +404,7 @@ class Orchestrator:
 
         # Handle explicit hours query intent
         if intent in ("consultar_horario", "business_hours"):
-            return self._build_hours_query_response(start, end)
+            return self._build_hours_query_response(message, start, end)
 
         # Outside business hours - non-urgent
         if not in_business_hours and not is_urgent:
@@ -430,10 +448,6 @@ class Orchestrator:
         """
         # Preparar datos para opciones de habitaciones (formateo por idioma y sin símbolo)
         lang = message.metadata.get("detected_language", "es") if isinstance(message.metadata, dict) else "es"
-        try:
-            self.template_service.set_language(lang)
-        except Exception:
-            pass
         d_checkin = date(2023, 1, 1)
         d_checkout = date(2023, 1, 5)
         room_data = {
@@ -470,7 +484,7 @@ class Orchestrator:
                     logger.info("orchestrator.sending_audio_before_interactive_list")
 
                     # Preparar lista interactiva para follow-up
-                    room_options = self.template_service.get_interactive_list("room_options", **room_data)
+                    room_options = self.template_service.get_interactive_list("room_options", language=lang, **room_data)
 
                     # Primero enviamos el audio y luego indicamos que hay que enviar la lista
                     return {
@@ -486,7 +500,7 @@ class Orchestrator:
                 # Si hay error, continuamos con la lista interactiva normal
 
         # Enviar lista interactiva con opciones de habitaciones
-        room_options = self.template_service.get_interactive_list("room_options", **room_data)
+        room_options = self.template_service.get_interactive_list("room_options", language=lang, **room_data)
 
         return {"response_type": "interactive_list", "content": room_options}
 
@@ -512,6 +526,7 @@ class Orchestrator:
         if isinstance(intent, dict):
             intent = intent.get("name")
         tenant_id = getattr(message, "tenant_id", None)
+        lang = self._detect_language(nlp_result, message)
 
         # PART 1: Handle confirmation of pending late checkout
         if session_data.get("pending_late_checkout"):
@@ -538,7 +553,11 @@ class Orchestrator:
 
                     if confirmation["success"]:
                         response_text = self.template_service.get_response(
-                            "late_checkout_confirmed", checkout_time=checkout_time, fee=fee
+                            "late_checkout_confirmed",
+                            language=lang,
+                            tenant_id=tenant_id,
+                            checkout_time=checkout_time,
+                            fee=fee,
                         )
 
                         # Clear pending late checkout from session
@@ -567,7 +586,9 @@ class Orchestrator:
 
         if not booking_id:
             # No booking ID in session - ask for it
-            response_text = self.template_service.get_response("late_checkout_no_booking")
+            response_text = self.template_service.get_response(
+                "late_checkout_no_booking", language=lang, tenant_id=tenant_id
+            )
 
             # Update session to expect booking ID
             session_data["awaiting_booking_id_for"] = "late_checkout"
@@ -594,11 +615,15 @@ class Orchestrator:
                 # Check if it's free (no next booking and policy allows)
                 if fee == 0:
                     response_text = self.template_service.get_response(
-                        "late_checkout_free", checkout_time=checkout_time
+                        "late_checkout_free", language=lang, tenant_id=tenant_id, checkout_time=checkout_time
                     )
                 else:
                     response_text = self.template_service.get_response(
-                        "late_checkout_available", checkout_time=checkout_time, fee=fee
+                        "late_checkout_available",
+                        language=lang,
+                        tenant_id=tenant_id,
+                        checkout_time=checkout_time,
+                        fee=fee,
                     )
 
                 # Store late checkout request in session for confirmation
@@ -612,7 +637,10 @@ class Orchestrator:
             else:
                 # Not available - room has next booking
                 response_text = self.template_service.get_response(
-                    "late_checkout_not_available", standard_time=HOTEL_STANDARD_CHECKOUT_TIME
+                    "late_checkout_not_available",
+                    language=lang,
+                    tenant_id=tenant_id,
+                    standard_time=HOTEL_STANDARD_CHECKOUT_TIME,
                 )
 
             logger.info(
@@ -799,7 +827,7 @@ class Orchestrator:
                 guests=entities.get("guests"),
             )
 
-        getattr(message, "tenant_id", None)
+        tenant_id = getattr(message, "tenant_id", None)
 
         # Comprobar si la feature flag de mensajes interactivos está activada
         ff_service = await get_feature_flag_service()
@@ -808,11 +836,6 @@ class Orchestrator:
         # Datos de disponibilidad (simulados - en producción vendrían del PMS)
         # Formatear importes según idioma detectado (sin símbolo, plantillas lo incluyen)
         lang = message.metadata.get("detected_language", "es") if isinstance(message.metadata, dict) else "es"
-        try:
-            # Asegurar que TemplateService use el mismo idioma (handlers directos en tests)
-            self.template_service.set_language(lang)
-        except Exception:
-            pass
         availability_data = {
             "checkin": "hoy",
             "checkout": "mañana",
@@ -823,7 +846,9 @@ class Orchestrator:
         }
 
         # Preparar mensaje de respuesta de texto
-        response_text = self.template_service.get_response("availability_found", **availability_data)
+        response_text = self.template_service.get_response(
+            "availability_found", language=lang, tenant_id=tenant_id, **availability_data
+        )
 
         # Feature 3: Preparar imagen de habitación si está habilitada
         room_image_url = None
@@ -839,6 +864,8 @@ class Orchestrator:
                     # Preparar caption personalizado para la imagen
                     room_image_caption = self.template_service.get_response(
                         "room_photo_caption",
+                        language=lang,
+                        tenant_id=tenant_id,
                         room_type=room_type,
                         price=availability_data.get("price", 0),
                         guests=availability_data.get("guests", 2),
@@ -889,7 +916,7 @@ class Orchestrator:
         if use_interactive:
             # Respuesta con botones interactivos
             button_template = self.template_service.get_interactive_buttons(
-                "availability_confirmation", **availability_data
+                "availability_confirmation", language=lang, **availability_data
             )
 
             # Si hay imagen, incluirla junto con los botones interactivos
@@ -950,7 +977,12 @@ class Orchestrator:
         await self.session_manager.update_session(message.user_id, session_data, tenant_id)
 
         # Preparar texto de respuesta
-        response_text = self.template_service.get_response("reservation_instructions", **reservation_data)
+        response_text = self.template_service.get_response(
+            "reservation_instructions",
+            language=self._detect_language(nlp_result, message),
+            tenant_id=tenant_id,
+            **reservation_data,
+        )
 
         # Si el mensaje original era de audio, responder con audio también
         if message.tipo == "audio":
@@ -989,7 +1021,11 @@ class Orchestrator:
         from app.core.settings import settings
 
         # Usar template de ubicación con datos de configuración
-        response_text = self.template_service.get_response("location_info")
+        response_text = self.template_service.get_response(
+            "location_info",
+            language=self._detect_language(nlp_result, message),
+            tenant_id=getattr(message, "tenant_id", None),
+        )
 
         # Obtener coordenadas desde settings
         latitude = settings.hotel_latitude
@@ -1080,7 +1116,7 @@ class Orchestrator:
             "booking_id": booking_id,
         }
 
-    def _detect_language(self, nlp_result: dict, message: UnifiedMessage) -> str:
+    def _detect_language(self, nlp_result: dict | None, message: UnifiedMessage) -> str:
         """Detect language from NLP result or message metadata."""
         lang = None
         if isinstance(nlp_result, dict):
@@ -1130,7 +1166,9 @@ class Orchestrator:
         except Exception as sess_err:
             logger.debug("session_update_failed", error=str(sess_err))
 
-    def _build_qr_response(self, qr_result: dict, reservation_data: dict) -> dict:
+    def _build_qr_response(
+        self, qr_result: dict, reservation_data: dict, lang: str, message: UnifiedMessage
+    ) -> dict:
         """Build response with QR code image."""
         booking_id = reservation_data["booking_id"]
         try:
@@ -1145,6 +1183,8 @@ class Orchestrator:
 
         confirmation_text = self.template_service.get_response(
             "booking_confirmed_with_qr",
+            language=lang,
+            tenant_id=getattr(message, "tenant_id", None),
             booking_id=booking_id,
             guest_name=reservation_data["guest_name"],
             check_in=str(reservation_data["check_in_date"]),
@@ -1167,11 +1207,7 @@ class Orchestrator:
         try:
             ff = await get_feature_flag_service()
             if await ff.is_enabled("features.interactive_messages", default=False) and message.tipo != "audio":
-                try:
-                    self.template_service.set_language(lang)
-                except Exception:
-                    pass
-                buttons = self.template_service.get_interactive_buttons("arrival_options")
+                buttons = self.template_service.get_interactive_buttons("arrival_options", language=lang)
                 if buttons:
                     return {"response_type": "interactive_buttons", "content": buttons}
         except Exception:
@@ -1181,6 +1217,8 @@ class Orchestrator:
             "response_type": "text",
             "content": self.template_service.get_response(
                 "booking_confirmed_no_qr",
+                language=lang,
+                tenant_id=getattr(message, "tenant_id", None),
                 booking_id=reservation_data["booking_id"],
                 check_in=str(reservation_data["check_in_date"]),
                 check_out=str(reservation_data["check_out_date"]),
@@ -1235,7 +1273,7 @@ class Orchestrator:
 
         # Build appropriate response
         if qr_result and qr_result.get("success"):
-            return self._build_qr_response(qr_result, reservation_data)
+            return self._build_qr_response(qr_result, reservation_data, lang, message)
         
         return await self._build_fallback_confirmation_response(reservation_data, lang, message)
 
@@ -1391,10 +1429,6 @@ class Orchestrator:
                 )
             
             message.metadata["detected_language"] = detected_language
-            try:
-                self.template_service.set_language(detected_language)
-            except Exception:
-                pass
             
             return nlp_result, intent_name
             
@@ -1417,10 +1451,6 @@ class Orchestrator:
             
             detected_language = await self.nlp_engine.detect_language(text)
             message.metadata["detected_language"] = detected_language
-            try:
-                self.template_service.set_language(detected_language)
-            except Exception:
-                pass
             
             nlp_result = self._get_fallback_intent(text, detected_language)
             intent_name = nlp_result["intent"]["name"]
@@ -1530,30 +1560,57 @@ class Orchestrator:
         )
         intents_detected.labels(intent=intent_name, confidence_level=confidence_level).inc()
 
-    async def _prepare_session_and_context(self, message: UnifiedMessage, nlp_result: dict) -> tuple[dict, bool, str]:
-        """
-        Get/create session and determine feature flags and response language.
-        Returns (session, enhanced_fallback_enabled, response_language).
-        """
-        tenant_id = getattr(message, "tenant_id", None)
-        
-        # Get/create session
-        session = await self.session_manager.get_or_create_session(
-            message.user_id, message.canal, tenant_id
+    async def _load_session(self, message: UnifiedMessage) -> dict:
+        """Get or create the conversation session (one Redis round trip)."""
+        return await self.session_manager.get_or_create_session(
+            message.user_id, message.canal, getattr(message, "tenant_id", None)
         )
-        
-        # Check feature flags
+
+    async def _load_enhanced_fallback_flag(self) -> bool:
+        """Read the `nlp.fallback.enhanced` feature flag."""
         ff_service = await get_feature_flag_service()
-        enhanced_fallback = await ff_service.is_enabled("nlp.fallback.enhanced", default=True)
-        
-        # Record confidence metric
+        return await ff_service.is_enabled("nlp.fallback.enhanced", default=True)
+
+    def _response_language(self, message: UnifiedMessage, nlp_result: dict) -> str:
+        """Record the NLP confidence metric and resolve the response language."""
         confidence = nlp_result.get("intent", {}).get("confidence", 0.0)
         metrics_service.record_nlp_confidence(confidence)
-        
-        # Determine response language
-        response_language = nlp_result.get("language", message.metadata.get("detected_language", "es"))
-        
-        return session, enhanced_fallback, response_language
+        return nlp_result.get("language", message.metadata.get("detected_language", "es"))
+
+    async def _understand_message(self, message: UnifiedMessage, span) -> tuple[dict, str]:
+        """Transcribe audio (if any) and run NLP; the only chain that needs the text."""
+        if message.tipo == "audio":
+            with _pipeline_step("audio_transcription"):
+                try:
+                    await self._process_audio_message(message)
+                except Exception as e:
+                    raise _AudioStepError(e) from e
+        with _pipeline_step("nlp"):
+            return await self._process_nlp(message, span)
+
+    async def _gather_message_context(self, message: UnifiedMessage, span) -> tuple[dict, str, dict, bool]:
+        """
+        Run the independent pipeline steps concurrently.
+
+        Execution plan (each step gets its own span and timing):
+            ┌ audio_transcription → nlp
+            ├ session            (Redis)
+            └ feature_flags      (Redis)
+        The session and flags do not depend on the text, so their round trips
+        overlap with STT/NLP instead of being added after them.
+        Returns (nlp_result, intent_name, session, enhanced_fallback).
+        """
+        try:
+            async with asyncio.TaskGroup() as tg:
+                understanding = tg.create_task(self._understand_message(message, span))
+                session_task = tg.create_task(_timed_step("session", self._load_session(message)))
+                flag_task = tg.create_task(_timed_step("feature_flags", self._load_enhanced_fallback_flag()))
+        except BaseExceptionGroup as group:
+            # Mantener la semántica previa: el manejador global recibe la excepción original
+            raise _first_exception(group) from None
+
+        nlp_result, intent_name = understanding.result()
+        return nlp_result, intent_name, session_task.result(), flag_task.result()
 
     async def _handle_low_confidence_check(
         self, 
@@ -1623,7 +1680,11 @@ class Orchestrator:
             # Return degraded response
             return {
                 "response_type": "text",
-                "content": self.template_service.get_response("system_degraded"),
+                "content": self.template_service.get_response(
+                    "system_degraded",
+                    language=self._detect_language(nlp_result, message),
+                    tenant_id=getattr(message, "tenant_id", None),
+                ),
                 "original_message": message
             }
 
@@ -1655,36 +1716,38 @@ class Orchestrator:
         # Métrica de negocio: contar mensaje por canal
         messages_by_channel.labels(channel=message.canal).inc()
 
-        # Step 1: Process audio messages (extracted to helper)
-        if message.tipo == "audio":
-            await self._process_audio_message(message)
-
         try:
-            # Step 2: Process NLP (extracted to helper)
-            nlp_result, intent_name = await self._process_nlp(message, span)
-            
-            # Step 3: Record metrics
-            await self._record_intent_metrics(nlp_result, intent_name)
+            # Step 1: STT+NLP, session and feature flags run concurrently
+            nlp_result, intent_name, session, enhanced_fallback = await self._gather_message_context(message, span)
 
-            # Step 4 & 5: Get session and context
-            session, enhanced_fallback, response_language = await self._prepare_session_and_context(message, nlp_result)
+            # Step 2: Record metrics
+            await self._record_intent_metrics(nlp_result, intent_name)
+            response_language = self._response_language(message, nlp_result)
 
-            # Step 6: Check business hours handling
-            bh_result = await self._handle_business_hours(nlp_result, session, message)
+            # Step 3: Check business hours handling
+            with _pipeline_step("business_hours"):
+                bh_result = await self._handle_business_hours(nlp_result, session, message)
             if bh_result is not None:
                 if bh_result.get("response_type", "text") == "text":
                     return {"response_type": "text", "content": bh_result.get("content", ""), "original_message": message}
                 return {**bh_result, "original_message": message}
 
-            # Step 7: Handle very low confidence
+            # Step 4: Handle very low confidence
             low_conf_response = await self._handle_low_confidence_check(
                 message, nlp_result, enhanced_fallback, response_language
             )
             if low_conf_response:
                 return low_conf_response
 
-            # Step 8: Handle intent and build response
-            return await self._execute_intent_handler(nlp_result, session, message, intent_name)
+            # Step 5: Handle intent and build response
+            with _pipeline_step("intent_handler"):
+                return await self._execute_intent_handler(nlp_result, session, message, intent_name)
+
+        except _AudioStepError as audio_failure:
+            # Como antes del fan-out: lo que escapa del manejo de audio (DLQ incluida)
+            # llega al caller en vez de convertirse en un general_error
+            status = "error"
+            raise audio_failure.error from None
 
         except Exception as e:
             # Global error handler remains here
@@ -1703,7 +1766,9 @@ class Orchestrator:
                 )
             return {
                 "response_type": "text",
-                "content": self.template_service.get_response("general_error"),
+                "content": self.template_service.get_response(
+                    "general_error", language=self._detect_language(None, message), tenant_id=tenant_id
+                ),
                 "original_message": message
             }
         finally:
@@ -1889,13 +1954,19 @@ class Orchestrator:
 
             return {
                 "response_type": "text",
-                "content": self.template_service.get_response("reservation_instructions", **reservation_data),
+                "content": self.template_service.get_response(
+                    "reservation_instructions",
+                    language=self._detect_language(None, message),
+                    tenant_id=tenant_id,
+                    **reservation_data,
+                ),
             }
 
         elif interactive_id == "more_options":
             # Usuario quiere ver más opciones de habitaciones
             room_options = self.template_service.get_interactive_list(
                 "room_options",
+                language=self._detect_language(None, message),
                 checkin="01/01/2023",
                 checkout="05/01/2023",
                 price_single=8000,
@@ -1987,17 +2058,7 @@ class Orchestrator:
             intent = "help_message"
         return intent
 
-    def _sync_template_language(self, nlp_result: dict, message: UnifiedMessage) -> str | None:
-        """Sync template service language and return detected language."""
-        try:
-            lang = self._detect_language(nlp_result, message)
-            if isinstance(lang, str) and lang:
-                self.template_service.set_language(lang)
-            return lang
-        except Exception:
-            return None
-
-    async def _try_interactive_info_menu(self, intent: str, message: UnifiedMessage) -> dict | None:
+    async def _try_interactive_info_menu(self, intent: str, message: UnifiedMessage, lang: str) -> dict | None:
         """Try to return interactive menu for info intents if feature flag enabled."""
         try:
             ff = await get_feature_flag_service()
@@ -2007,7 +2068,7 @@ class Orchestrator:
                     "check_out_info", "cancellation_policy", "pricing_info",
                 }
                 if intent in info_intents and message.tipo != "audio":
-                    buttons = self.template_service.get_interactive_buttons("info_menu")
+                    buttons = self.template_service.get_interactive_buttons("info_menu", language=lang)
                     if buttons:
                         return {"response_type": "interactive_buttons", "content": buttons}
         except Exception:
@@ -2082,16 +2143,18 @@ class Orchestrator:
             Response dict with text or audio content
         """
         intent = self._normalize_intent(nlp_result)
-        self._sync_template_language(nlp_result, message)
+        lang = self._detect_language(nlp_result, message)
 
         # Try interactive menu if feature flag enabled
-        interactive_response = await self._try_interactive_info_menu(intent, message)
+        interactive_response = await self._try_interactive_info_menu(intent, message, lang)
         if interactive_response:
             return interactive_response
 
         # Build context and get template response
         context = self._get_info_context(intent, message)
-        response_text = self.template_service.get_response(intent, **context)
+        response_text = self.template_service.get_response(
+            intent, language=lang, tenant_id=getattr(message, "tenant_id", None), **context
+        )
 
         # If original message was audio, respond with audio
         if message.tipo == "audio":
@@ -2166,6 +2229,48 @@ orchestrator_errors_total = Counter(
 orchestrator_degraded_responses = Counter(
     "orchestrator_degraded_responses_total", "Respuestas degradadas por fallo de servicios externos"
 )
+orchestrator_step_duration = Histogram(
+    "orchestrator_step_duration_seconds",
+    "Duración de cada paso del pipeline de mensajes del orquestador",
+    ["step"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+
+
+@contextmanager
+def _pipeline_step(step: str):
+    """Span `orchestrator.<step>` + histograma de duración para un paso del pipeline."""
+    from ..core.tracing import tracer
+
+    start = time.perf_counter()
+    with tracer.start_as_current_span(f"orchestrator.{step}") as step_span:
+        step_span.set_attribute("orchestrator.step", step)
+        try:
+            yield step_span
+        finally:
+            orchestrator_step_duration.labels(step=step).observe(time.perf_counter() - start)
+
+
+async def _timed_step(step: str, awaitable: Awaitable[T]) -> T:
+    with _pipeline_step(step):
+        return await awaitable
+
+
+class _AudioStepError(Exception):
+    """Fallo del paso de audio dentro del fan-out; `process_message` re-lanza `error`."""
+
+    def __init__(self, error: Exception):
+        super().__init__(str(error))
+        self.error = error
+
+
+def _first_exception(group: BaseExceptionGroup) -> BaseException:
+    """Primera excepción hoja de un (Base)ExceptionGroup de TaskGroup."""
+    exc: BaseException = group
+    while isinstance(exc, BaseExceptionGroup):
+        exc = exc.exceptions[0]
+    return exc
 
 # Singleton instance
 _orchestrator_instance: Optional[Orchestrator] = None
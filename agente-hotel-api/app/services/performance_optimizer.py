@@ -11,7 +11,6 @@ import logging
 import json
 from datetime import datetime
 
-import psutil
 import redis.asyncio as redis
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine
@@ -20,6 +19,7 @@ from prometheus_client import Histogram, Counter, Gauge
 from app.core.database import AsyncSessionFactory
 from app.core.redis_client import get_redis_client
 from app.core.settings import settings
+from app.services.host_metrics import get_host_sampler
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -124,11 +124,10 @@ class PerformanceOptimizer:
     async def collect_metrics(self) -> PerformanceMetrics:
         """Recopilar métricas actuales del sistema"""
         try:
-            # Métricas del sistema
-            cpu_usage = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage("/")
-            network = psutil.net_io_counters()
+            # Métricas del sistema (última muestra del sampler compartido, sin bloquear)
+            sample = await get_host_sampler().snapshot()
+            cpu_usage = sample.cpu_percent
+            memory, disk, network = sample.memory, sample.disk, sample.network
 
             # Métricas de base de datos
             db_metrics = await self._collect_db_metrics()
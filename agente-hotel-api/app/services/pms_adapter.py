@@ -1,9 +1,11 @@
 # [PROMPT GA-03 + B.1] app/services/pms_adapter.py
 # Enhanced with QloApps real integration
 
+import asyncio
 import json
-from datetime import date, datetime
-from typing import List, Optional, Dict, Any
+import time
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Iterable, List, NamedTuple, Optional, Dict, Any, Set, Tuple, Union
 from uuid import uuid4
 
 import httpx
@@ -13,13 +15,23 @@ from pydantic import ValidationError
 
 from ..core.prometheus import registry, metrics
 from ..core.settings import settings
-from ..core.circuit_breaker import CircuitBreaker
+from ..core.circuit_breaker import DistributedCircuitBreaker
 from ..core.logging import logger
 from ..core.retry import retry_with_backoff
-from ..core.rate_limiter import SlidingWindowRateLimiter
-from ..exceptions.pms_exceptions import CircuitBreakerOpenError, PMSError, PMSAuthError
+from ..core.rate_limiter import RedisGCRARateLimiter
+from ..core.singleflight import RedisSingleFlight, SingleFlight
+from ..exceptions.pms_exceptions import CircuitBreakerOpenError, PMSError, PMSAuthError, PMSUnknownRoomTypeError
+from .availability_refresher import (
+    AvailabilityRefresher,
+    availability_index_invalidated_keys,
+    availability_night_age_seconds,
+    availability_popularity,
+    availability_queries_total,
+    availability_revalidations_total,
+)
 from .business_metrics import record_reservation, failed_reservations
 from .qloapps_client import create_qloapps_client
+from .room_type_catalog import get_room_type_catalog
 from ..models.pms_schemas import (
     RoomAvailability,
     AvailabilityResponse,
@@ -74,6 +86,99 @@ cache_misses_total = metrics.pms_cache_misses_total
 circuit_breaker_state = metrics.pms_circuit_breaker_state
 
 
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _stay_nights(check_in: Any, check_out: Any) -> List[date]:
+    """Noches de una estadía: [check_in, check_out)."""
+    start, end = _as_date(check_in), _as_date(check_out)
+    return [start + timedelta(days=i) for i in range((end - start).days)]
+
+
+def _unwrap_night(value: Any, now: float) -> Optional[Tuple[List[Dict[str, Any]], float]]:
+    """(habitaciones, antigüedad en s) de una entrada de noche cacheada."""
+    if isinstance(value, dict) and isinstance(value.get("rooms"), list):
+        return value["rooms"], max(0.0, now - float(value.get("fetched_at", now)))
+    if isinstance(value, list):
+        return value, 0.0
+    return None
+
+
+def _compose_nights(nights: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Combina la disponibilidad por noche en la de la estadía completa.
+
+    Un tipo de habitación está disponible si lo está todas las noches: cupo =
+    mínimo por noche, total = suma de tarifas nocturnas. Devuelve el mismo
+    formato que `QloAppsClient.check_availability` para un rango.
+    """
+    if not nights:
+        return []
+    combined: Dict[Any, Dict[str, Any]] = {}
+    for room in nights[0]:
+        price = float(room.get("price_per_night", 0))
+        combined[room.get("room_type_id")] = {**room, "total_price": price}
+    for rooms in nights[1:]:
+        by_type = {room.get("room_type_id"): room for room in rooms}
+        for type_id in list(combined):
+            room = by_type.get(type_id)
+            if room is None:
+                del combined[type_id]
+                continue
+            entry = combined[type_id]
+            entry["available_rooms"] = min(entry.get("available_rooms", 0), room.get("available_rooms", 0))
+            entry["total_price"] += float(room.get("price_per_night", 0))
+    for entry in combined.values():
+        entry["price_per_night"] = round(entry["total_price"] / len(nights), 2)
+    return list(combined.values())
+
+
+def _contiguous_runs(nights: Iterable[date]) -> List[Tuple[date, date]]:
+    """Tramos [inicio, fin) de noches consecutivas, en orden."""
+    runs: List[Tuple[date, date]] = []
+    for night in sorted(set(nights)):
+        if runs and runs[-1][1] == night:
+            runs[-1] = (runs[-1][0], night + timedelta(days=1))
+        else:
+            runs.append((night, night + timedelta(days=1)))
+    return runs
+
+
+def _night_rows(rooms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Filas de un rango de QloApps como filas de una de sus noches."""
+    return [{**room, "total_price": float(room.get("price_per_night", 0))} for room in rooms]
+
+
+def _has_sold_out(rooms: List[Dict[str, Any]], room_type_id: Optional[int]) -> bool:
+    """Algún tipo sin cupo en el rango (no se sabe en qué noche)."""
+    if room_type_id is not None and not rooms:
+        return True
+    return any(room.get("available_rooms") is not None and int(room["available_rooms"]) <= 0 for room in rooms)
+
+
+async def _night_of(run: "asyncio.Future", night: date) -> Tuple[List[Dict[str, Any]], bool]:
+    return (await run)[night]
+
+
+class AvailabilityQuery(NamedTuple):
+    """Una consulta de `check_availability_batch` (también se aceptan tuplas equivalentes)."""
+
+    check_in: date
+    check_out: date
+    guests: int = 1
+    room_type: Optional[str] = None
+
+
+def _as_query(query: Any) -> AvailabilityQuery:
+    q = query if isinstance(query, AvailabilityQuery) else AvailabilityQuery(*query)
+    return AvailabilityQuery(_as_date(q.check_in), _as_date(q.check_out), int(q.guests), q.room_type or None)
+
+
 class QloAppsAdapter:
     """
     Production-ready QloApps PMS Adapter.
@@ -110,24 +215,65 @@ class QloAppsAdapter:
                 "Accept": "application/json",
             },
         )
-        self.circuit_breaker = CircuitBreaker(
-            failure_threshold=5, recovery_timeout=30, expected_exception=httpx.HTTPError
+        # Breaker compartido por todos los workers/pods: un proceso detecta la caída
+        # para todos y solo uno sondea en HALF_OPEN
+        self.circuit_breaker = DistributedCircuitBreaker(
+            redis_client,
+            "pms",
+            failure_threshold=5,
+            recovery_timeout=30,
+            expected_exception=httpx.HTTPError,
         )
         # Inicializar estado del CB
         circuit_breaker_state.set(0)
 
         # Rate limiter para PMS (QloApps límite: ~80 req/min)
-        # Usamos 70 req/min como margen de seguridad
-        self.rate_limiter = SlidingWindowRateLimiter(
-            max_requests=70,  # 70 requests max
-            window_seconds=60,  # en 60 segundos
+        # Usamos 70 req/min como margen de seguridad, repartidos entre todo el clúster
+        # (GCRA en Redis; ráfaga + tasa nunca superan el límite de QloApps)
+        self.rate_limiter = RedisGCRARateLimiter(
+            redis_client,
+            "pms",
+            max_requests=int(settings.pms_rate_limit_per_minute),
+            window_seconds=60,
+            burst=int(settings.pms_rate_limit_burst),
+            prefetch=int(settings.pms_rate_limit_prefetch),
         )
 
+        # Coalescing de misses de disponibilidad (en proceso y entre réplicas)
+        self.availability_flight = RedisSingleFlight(
+            "pms_availability",
+            redis_client,
+            lease_seconds=float(settings.pms_singleflight_lease_seconds),
+            wait_timeout=float(settings.pms_singleflight_wait_seconds),
+        )
+        # Estadías solapadas que piden la misma noche a la vez → 1 llamada por noche
+        self.night_flight = SingleFlight("pms_availability_night")
+        self.night_cache_ttl = int(settings.pms_night_cache_ttl_seconds)
+        # Stale-while-revalidate: una noche vencida se sirve (marcada) hasta este margen
+        self.night_max_stale = int(settings.pms_availability_max_stale_seconds)
+        # Detalle de reservas; el feed de cambios (pms_change_feed.py) lo mantiene al día
+        self.reservation_cache_ttl = int(settings.pms_reservation_cache_ttl_seconds)
+        self._background: Set[asyncio.Task] = set()
+        # Tipos de habitación del PMS (se recarga desde get_room_types)
+        self.room_types = get_room_type_catalog(self.hotel_id)
+        self.batch_concurrency = max(1, int(settings.pms_batch_max_concurrency))
+        # Índices por noche de las claves de disponibilidad: la invalidación borra
+        # exactamente las claves afectadas sin recorrer el keyspace con SCAN.
+        # Los dobles de test sin comandos de sets siguen usando SCAN por patrón.
+        self._availability_indexed = isinstance(redis_client, redis.Redis)
+        self._index_ttl = max(self.night_cache_ttl + self.night_max_stale, 300) + 60
+
     async def close(self):
         """Close connections."""
+        for task in list(self._background):
+            task.cancel()
         await self.qloapps.close()
         await self.client.aclose()
 
+    def get_quota_usage(self) -> Dict[str, Any]:
+        """Uso de cuota del PMS (global del clúster y local del proceso) y estado del breaker."""
+        return {**self.rate_limiter.quota_usage(), "circuit_breaker": self.circuit_breaker.snapshot()}
+
     async def test_connection(self) -> bool:
         """Test PMS connectivity."""
         try:
@@ -143,11 +289,9 @@ class QloAppsAdapter:
         """Pre-warm cache with frequently accessed data at startup."""
         logger.info("🔥 Warming PMS cache...")
         try:
-            # Pre-warm availability cache for common date ranges
-            # This is a placeholder - actual implementation depends on PMS API
-            # In production, cache most frequently queried dates
-            logger.info("✓ Cache warming strategy enabled")
-            logger.info("✅ PMS cache warming completed successfully")
+            # Un ciclo del refresher: próximos días, fines de semana, feriados y noches populares
+            refreshed = await AvailabilityRefresher(self).run_cycle()
+            logger.info("✅ PMS cache warming completed successfully", nights=refreshed)
         except Exception as e:
             logger.warning(f"⚠️  Cache warming failed (non-critical): {e}")
 
@@ -165,6 +309,15 @@ class QloAppsAdapter:
             logger.error(f"Cache get error: {e}")
             return None
 
+    async def _peek_cache_list(self, key: str) -> Optional[list]:
+        """Lectura de caché sin métricas de hit/miss (sondeo de réplicas en espera)."""
+        try:
+            cached = await self.redis.get(key)
+            data = json.loads(cached) if cached else None
+            return data if isinstance(data, list) else None
+        except Exception:
+            return None
+
     async def _set_cache(self, key: str, value, ttl: int = 300):
         try:
             await self.redis.setex(key, ttl, json.dumps(value, default=str))
@@ -185,6 +338,271 @@ class QloAppsAdapter:
         except Exception as e:
             logger.error(f"Cache invalidation error: {e}")
 
+    def _night_key(self, night: date, room_type_id: Optional[int]) -> str:
+        return f"availability:night:{self.hotel_id}:{night.isoformat()}:{room_type_id if room_type_id is not None else 'any'}"
+
+    def _night_index_key(self, night: date) -> str:
+        """Set con las claves de disponibilidad (por noche y por rango) que incluyen la noche."""
+        return f"availability:index:{self.hotel_id}:{night.isoformat()}"
+
+    def _indexed_nights_key(self) -> str:
+        """Set con las noches que tienen índice (para invalidar toda la disponibilidad)."""
+        return f"availability:index:{self.hotel_id}:nights"
+
+    async def _index_availability_key(self, key: str, nights: List[date]) -> bool:
+        """
+        Registra `key` en el índice de cada noche que cubre. Se llama *antes* de
+        escribir la clave: si el registro falla no se cachea, así ninguna entrada
+        queda fuera del alcance de la invalidación. Los índices viven más que
+        cualquier entrada indexada (cada registro renueva su TTL).
+        """
+        if not self._availability_indexed:
+            return True
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for night in nights:
+                pipe.sadd(self._night_index_key(night), key)
+                pipe.expire(self._night_index_key(night), self._index_ttl)
+            pipe.sadd(self._indexed_nights_key(), *(n.isoformat() for n in nights))
+            pipe.expire(self._indexed_nights_key(), self._index_ttl)
+            await pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("pms.availability_index_failed", key=key, error=str(e))
+            return False
+
+    async def _invalidate_indexed_nights(self, nights: List[date], room_type_id: Optional[int]) -> int:
+        """
+        SMEMBERS de los índices de las noches + UNLINK de las claves afectadas
+        (con su marcador `:stale`). Con `room_type_id` solo caen las entradas de
+        ese tipo y las de "todos los tipos". Devuelve cuántas claves se borraron.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for night in nights:
+            pipe.smembers(self._night_index_key(night))
+        members = await pipe.execute()
+
+        doomed: Set[str] = set()
+        pipe = self.redis.pipeline(transaction=False)
+        for night, keys in zip(nights, members):
+            keys = {k.decode() if isinstance(k, bytes) else k for k in keys}
+            if room_type_id is not None:
+                keys = {k for k in keys if self._indexed_key_affected(k, room_type_id)}
+            if not keys:
+                continue
+            doomed |= keys
+            pipe.srem(self._night_index_key(night), *keys)
+        if not doomed:
+            return 0
+        stale_markers = [f"{k}:stale" for k in doomed if not k.startswith("availability:night:")]
+        pipe.unlink(*doomed, *stale_markers)
+        await pipe.execute()
+        availability_index_invalidated_keys.inc(len(doomed))
+        return len(doomed)
+
+    def _indexed_key_affected(self, key: str, room_type_id: int) -> bool:
+        """Entrada indexada (por noche o por rango) que depende del cupo de `room_type_id`."""
+        if key.startswith("availability:night:"):
+            room_type = key.rsplit(":", 1)[-1]
+            return room_type in ("any", str(room_type_id))
+        parts = key.split(":")
+        if len(parts) < 5:
+            return True
+        room_type = parts[4]
+        if room_type == "any":
+            return True
+        resolved = self.room_types.resolve(room_type)
+        return resolved is None or resolved == room_type_id
+
+    async def _invalidate_all_availability(self) -> None:
+        """Invalida toda la disponibilidad cacheada (no se sabe qué noches cambiaron)."""
+        if not self._availability_indexed:
+            await self._invalidate_cache_pattern("availability:*")
+            return
+        try:
+            raw = await self.redis.smembers(self._indexed_nights_key())
+            nights = sorted(date.fromisoformat(n.decode() if isinstance(n, bytes) else n) for n in raw)
+            removed = await self._invalidate_indexed_nights(nights, None) if nights else 0
+            await self.redis.unlink(self._indexed_nights_key(), *(self._night_index_key(n) for n in nights))
+            logger.info("pms.availability_invalidated", keys=removed, nights=len(nights))
+        except Exception as e:
+            logger.error(f"Cache invalidation error: {e}")
+
+    async def _get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """GET de varias claves en un solo round-trip (MGET si el cliente lo soporta)."""
+        try:
+            mget = getattr(self.redis, "mget", None)
+            raw = await mget(keys) if mget is not None else await asyncio.gather(*(self.redis.get(k) for k in keys))
+        except Exception as e:
+            logger.error(f"Cache mget error: {e}")
+            return [None] * len(keys)
+        if not isinstance(raw, (list, tuple)) or len(raw) != len(keys):
+            return [None] * len(keys)
+        values: List[Optional[Any]] = []
+        for item in raw:
+            try:
+                values.append(json.loads(item) if item else None)
+            except (TypeError, ValueError):
+                values.append(None)
+        return values
+
+    async def _get_cached_nights(
+        self, nights: List[date], room_type_id: Optional[int], record_metrics: bool = True
+    ) -> Dict[date, Tuple[List[Dict[str, Any]], float]]:
+        """
+        Noches ya cacheadas con su antigüedad en segundos. Para un tipo concreto
+        también sirve la entrada de "todos los tipos" de esa noche, filtrada.
+        Las noches más viejas que TTL + margen de staleness se tratan como ausentes.
+        """
+        keys = [self._night_key(n, None) for n in nights]
+        if room_type_id is not None:
+            keys += [self._night_key(n, room_type_id) for n in nights]
+        values = await self._get_many(keys)
+
+        now = time.time()
+        cached: Dict[date, Tuple[List[Dict[str, Any]], float]] = {}
+        for i, night in enumerate(nights):
+            entry = _unwrap_night(values[len(nights) + i], now) if room_type_id is not None else None
+            if entry is None:
+                entry = _unwrap_night(values[i], now)
+                if entry is not None and room_type_id is not None:
+                    entry = ([r for r in entry[0] if r.get("room_type_id") == room_type_id], entry[1])
+            if entry is not None and entry[1] <= self.night_cache_ttl + self.night_max_stale:
+                cached[night] = entry
+        if record_metrics:
+            hits = len(cached)
+            if hits:
+                cache_hits_total.labels(operation="availability_night").inc(hits)
+            if hits < len(nights):
+                cache_misses_total.labels(operation="availability_night").inc(len(nights) - hits)
+            for _, age in cached.values():
+                availability_night_age_seconds.observe(age)
+        return cached
+
+    async def _store_night(self, night: date, room_type_id: Optional[int], rooms: List[Dict[str, Any]]) -> None:
+        key = self._night_key(night, room_type_id)
+        if not await self._index_availability_key(key, [night]):
+            return
+        # La clave vive TTL + margen de staleness; la frescura se decide con `fetched_at`
+        await self._set_cache(
+            key,
+            {"fetched_at": time.time(), "rooms": rooms},
+            ttl=self.night_cache_ttl + self.night_max_stale,
+        )
+
+    async def night_ages(self, nights: List[date]) -> Dict[date, float]:
+        """Antigüedad (s) de las noches cacheadas para todos los tipos; las ausentes no aparecen."""
+        cached = await self._get_cached_nights(nights, None, record_metrics=False)
+        return {night: age for night, (_, age) in cached.items()}
+
+    async def refresh_nights(self, nights: Iterable[date], take_quota: Callable[[], Awaitable[bool]]) -> int:
+        """
+        Refresca noches (todos los tipos), una llamada por tramo de noches
+        consecutivas. Cada llamada necesita un token de `take_quota`, que no
+        espera; sin token se detiene. Devuelve cuántas noches quedaron en caché.
+        """
+        refreshed = 0
+        semaphore = asyncio.Semaphore(1)
+        for start, end in _contiguous_runs(nights):
+            if not await take_quota():
+                break
+            by_night = await self._fetch_run(start, end, None, semaphore, take_quota=take_quota)
+            for night, (rooms, exact) in sorted(by_night.items()):
+                if exact:
+                    await self._store_night(night, None, rooms)
+                    refreshed += 1
+        return refreshed
+
+    def _revalidate_in_background(self, nights: List[date], room_type_id: Optional[int]) -> None:
+        nights = [n for n in nights if not self.night_flight.inflight(self._night_key(n, room_type_id))]
+        if not nights:
+            return
+        task = asyncio.create_task(self._revalidate_nights(nights, room_type_id))
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _revalidate_nights(self, nights: List[date], room_type_id: Optional[int]) -> None:
+        try:
+            await self._store_nights(await self._fetch_nights(nights, room_type_id), room_type_id)
+            availability_revalidations_total.labels(result="ok").inc(len(nights))
+        except Exception as e:
+            availability_revalidations_total.labels(result="error").inc(len(nights))
+            logger.warning("pms.availability_revalidation_failed", nights=[str(n) for n in nights], error=str(e))
+
+    async def _store_nights(
+        self, by_night: Dict[date, Tuple[List[Dict[str, Any]], bool]], room_type_id: Optional[int]
+    ) -> None:
+        """Cachea las noches exactas; las aproximadas solo sirven a la estadía que las pidió."""
+        for night, (rooms, exact) in sorted(by_night.items()):
+            if exact:
+                await self._store_night(night, room_type_id, rooms)
+
+    async def _invalidate_nights(self, check_in: date, check_out: date, room_type_id: Optional[int] = None):
+        """
+        Invalida solo las noches [check_in, check_out) afectadas por una reserva
+        y las respuestas por rango que las incluyen; el resto de la caché sigue válida.
+        """
+        nights = _stay_nights(check_in, check_out)
+        if not nights:
+            return
+        try:
+            if self._availability_indexed:
+                removed = await self._invalidate_indexed_nights(nights, room_type_id)
+                if room_type_id is not None:
+                    # Por si la noche se cacheó antes de existir el índice
+                    await self.redis.unlink(*(self._night_key(n, t) for n in nights for t in (None, room_type_id)))
+                logger.info(
+                    "pms.availability_nights_invalidated",
+                    check_in=str(check_in),
+                    check_out=str(check_out),
+                    room_type_id=room_type_id,
+                    keys=removed,
+                )
+                return
+
+            if room_type_id is None:
+                for night in nights:
+                    await self._invalidate_cache_pattern(f"availability:night:{self.hotel_id}:{night.isoformat()}:*")
+            else:
+                keys = [self._night_key(n, t) for n in nights for t in (None, room_type_id)]
+                await self.redis.delete(*keys)
+
+            cursor: int = 0
+            while True:
+                cursor, keys = await self.redis.scan(cursor=cursor, match="availability:*", count=100)
+                stale = [k for k in keys if self._range_key_affected(k, check_in, check_out, room_type_id)]
+                if stale:
+                    await self.redis.delete(*stale)
+                if cursor == 0:
+                    break
+            logger.info(
+                "pms.availability_nights_invalidated",
+                check_in=str(check_in),
+                check_out=str(check_out),
+                room_type_id=room_type_id,
+            )
+        except Exception as e:
+            logger.error(f"Cache invalidation error: {e}")
+
+    def _range_key_affected(self, key: Any, check_in: date, check_out: date, room_type_id: Optional[int]) -> bool:
+        """Clave `availability:{in}:{out}:{guests}:{tipo}[:stale]` que se solapa con la estadía."""
+        if isinstance(key, bytes):
+            key = key.decode()
+        parts = key.split(":")
+        if len(parts) < 5 or parts[1] == "night":
+            return False
+        try:
+            start, end = date.fromisoformat(parts[1]), date.fromisoformat(parts[2])
+        except ValueError:
+            return False
+        if start >= check_out or end <= check_in:
+            return False
+        room_type = parts[4]
+        if room_type_id is None or room_type == "any":
+            return True
+        resolved = self.room_types.resolve(room_type)
+        return resolved is None or resolved == room_type_id
+
     async def check_availability(
         self, check_in: date, check_out: date, guests: int = 1, room_type: Optional[str] = None
     ) -> List[dict]:
@@ -219,6 +637,10 @@ class QloAppsAdapter:
                 room_type=room_type or "any",
             )
         
+        if check_out <= check_in:
+            raise PMSError(f"Invalid stay: check_out {check_out} must be after check_in {check_in}")
+        availability_popularity.record(_stay_nights(check_in, check_out))
+
         cache_key = f"availability:{check_in}:{check_out}:{guests}:{room_type or 'any'}"
         stale_cache_key = f"{cache_key}:stale"
 
@@ -226,71 +648,22 @@ class QloAppsAdapter:
         if isinstance(cached_data, list):
             logger.debug("Returning availability from cache")
             cache_hits_total.labels(operation="availability").inc()
+            availability_queries_total.labels(source="cache").inc()
             # Mark as fresh (not stale)
             await self.redis.delete(stale_cache_key)
             return cached_data
 
-        async def fetch_availability():
-            # Rate limit: wait if needed antes de llamar al PMS
-            await self.rate_limiter.wait_if_needed(
-                operation="check_availability", max_wait=5.0
-            )
-            
-            try:
-                # Call QloApps API
-                rooms = await self.qloapps.check_availability(
-                    hotel_id=self.hotel_id,
-                    date_from=check_in,
-                    date_to=check_out,
-                    num_rooms=1,
-                    num_adults=guests,
-                    num_children=0,
-                    room_type_id=self._get_room_type_id(room_type) if room_type else None,
-                )
-                return rooms
-            except PMSAuthError as e:
-                logger.error(f"PMS authentication failed: {e}")
-                raise
-            except Exception as e:
-                logger.error(f"QloApps availability check failed: {e}")
-                raise PMSError(f"Failed to check availability: {str(e)}")
-
-        try:
-            with pms_latency.labels(endpoint="/hotel_booking", method="GET").time():
-                data = await self.circuit_breaker.call(
-                    retry_with_backoff, fetch_availability, operation_label="check_availability"
-                )
-
-            # Normalize response
-            normalized = self._normalize_qloapps_availability(data, guests)
-
-            # SECURITY FIX: Validate response schema before caching
-            try:
-                # Validar cada room contra schema
-                validated_rooms = [
-                    RoomAvailability(**room).model_dump() for room in normalized
-                ]
-            except ValidationError as e:
-                logger.error(
-                    "pms_response_validation_failed",
-                    operation="check_availability",
-                    error=str(e),
-                    data_preview=str(normalized)[:200],
-                )
-                # Métricas de error de validación
-                pms_errors.labels(
-                    operation="check_availability", error_type="validation_error"
-                ).inc()
-                raise PMSError(f"Invalid PMS response format: {e}")
+        async def fetch_and_cache():
+            return await self._fetch_availability(check_in, check_out, guests, room_type, cache_key, stale_cache_key)
 
-            # Cache the result (fresh) - usar datos validados
-            await self._set_cache(cache_key, validated_rooms, ttl=300)
-            # Remove stale marker since we have fresh data
-            await self.redis.delete(stale_cache_key)
-            circuit_breaker_state.set(0)
-            pms_operations.labels(operation="check_availability", status="success").inc()
+        async def read_cached():
+            return await self._peek_cache_list(cache_key)
 
-            return validated_rooms
+        try:
+            # Single-flight: N huéspedes (y N réplicas) con la misma clave → 1 llamada al PMS
+            rooms = await self.availability_flight.do_cached(cache_key, fetch_and_cache, read_cached)
+            # Los llamantes coalescidos comparten resultado: cada uno recibe su copia
+            return [dict(room) for room in rooms]
 
         except CircuitBreakerOpenError:
             logger.error("Circuit breaker is open, attempting fallback with stale cache")
@@ -303,6 +676,7 @@ class QloAppsAdapter:
                 logger.warning("Using stale cache data due to circuit breaker")
                 # Mark as stale (only valid for 60 seconds)
                 await self.redis.setex(stale_cache_key, 60, "true")
+                availability_queries_total.labels(source="stale_fallback").inc()
                 # Return stale data with marker
                 return [{**room, "potentially_stale": True} for room in stale_data]
 
@@ -323,11 +697,276 @@ class QloAppsAdapter:
                 logger.warning(f"Using stale cache data due to error: {e}")
                 # Mark as stale (only valid for 60 seconds)
                 await self.redis.setex(stale_cache_key, 60, "true")
+                availability_queries_total.labels(source="stale_fallback").inc()
                 # Return stale data with marker
                 return [{**room, "potentially_stale": True} for room in stale_data]
 
             raise PMSError(f"Unable to check availability: {str(e)}")
 
+    async def check_availability_batch(
+        self, queries: Iterable[Union[AvailabilityQuery, Tuple[Any, ...]]], return_exceptions: bool = False
+    ) -> List[Union[List[dict], BaseException]]:
+        """
+        Varias consultas de disponibilidad (fechas alternativas, tipos de habitación)
+        con el mínimo de llamadas al PMS. Devuelve los resultados en el orden recibido.
+
+        Las consultas repetidas se resuelven una vez; las noches que faltan en caché
+        se piden en paralelo (hasta `pms_batch_max_concurrency`, siempre dentro del
+        rate limit) y luego cada consulta se compone desde la caché por noche.
+
+        Args:
+            queries: `AvailabilityQuery` o tuplas (check_in, check_out, guests, room_type)
+            return_exceptions: Como en `asyncio.gather`: devolver el error de cada
+                consulta en su posición en lugar de lanzar el primero
+
+        Returns:
+            Una lista de habitaciones (o excepción) por consulta
+        """
+        normalized = [_as_query(q) for q in queries]
+        unique = list(dict.fromkeys(normalized))
+        await self._warm_nights(unique)
+
+        results = await asyncio.gather(*(self.check_availability(*q) for q in unique), return_exceptions=True)
+        by_query = dict(zip(unique, results))
+        ordered: List[Union[List[dict], BaseException]] = []
+        for query in normalized:
+            result = by_query[query]
+            if isinstance(result, BaseException):
+                if not return_exceptions:
+                    raise result
+                ordered.append(result)
+            else:
+                ordered.append([dict(room) for room in result])
+        return ordered
+
+    async def _warm_nights(self, queries: List[AvailabilityQuery]) -> None:
+        """Trae del PMS las noches del lote que no están en caché (una llamada por tramo)."""
+        types_by_night: Dict[date, Set[Optional[int]]] = {}
+        for q in queries:
+            if q.check_out <= q.check_in:
+                continue
+            room_type_id = self.room_types.resolve(q.room_type) if q.room_type else None
+            for night in _stay_nights(q.check_in, q.check_out):
+                types_by_night.setdefault(night, set()).add(room_type_id)
+
+        # Una noche pedida para varios tipos (o sin filtro) se trae una vez para todos
+        wanted: Dict[Optional[int], List[date]] = {}
+        for night, type_ids in sorted(types_by_night.items()):
+            room_type_id = next(iter(type_ids)) if len(type_ids) == 1 else None
+            wanted.setdefault(room_type_id, []).append(night)
+
+        missing: Dict[Optional[int], List[date]] = {}
+        for room_type_id, nights in wanted.items():
+            cached = await self._get_cached_nights(nights, room_type_id, record_metrics=False)
+            missing[room_type_id] = [night for night in nights if night not in cached]
+        missing = {room_type_id: nights for room_type_id, nights in missing.items() if nights}
+        if not missing:
+            return
+
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+
+        async def warm(room_type_id: Optional[int], nights: List[date]) -> None:
+            await self._store_nights(await self._fetch_nights(nights, room_type_id, semaphore), room_type_id)
+
+        outcomes = await asyncio.gather(*(warm(*item) for item in missing.items()), return_exceptions=True)
+        failed = sum(isinstance(o, BaseException) for o in outcomes)
+        # Las noches que fallaron las reintenta (o sirve vencidas) cada consulta por su cuenta
+        logger.debug(
+            "pms.availability_batch_warmed", nights=sum(len(n) for n in missing.values()), failed_groups=failed
+        )
+
+    async def _fetch_availability(
+        self,
+        check_in: date,
+        check_out: date,
+        guests: int,
+        room_type: Optional[str],
+        cache_key: str,
+        stale_cache_key: str,
+    ) -> List[dict]:
+        """
+        Compone la estadía a partir de la caché por noche y pide a QloApps solo
+        las noches que faltan; valida y cachea. La ejecuta solo el líder del single-flight.
+
+        Stale-while-revalidate: una noche vencida (pero dentro del margen de
+        staleness) se usa sin esperar al PMS; la respuesta lleva `potentially_stale`
+        y la noche se revalida en segundo plano.
+        """
+        # Tipo no reconocido → sin filtro (todas las opciones) antes que el tipo equivocado
+        room_type_id = self.room_types.resolve(room_type) if room_type else None
+        nights = _stay_nights(check_in, check_out)
+        cached = await self._get_cached_nights(nights, room_type_id)
+        missing = [n for n in nights if n not in cached]
+        stale = [n for n in nights if n in cached and cached[n][1] > self.night_cache_ttl]
+
+        fetched = await self._fetch_nights(missing, room_type_id) if missing else {}
+        by_night = {night: rooms for night, (rooms, _) in cached.items()}
+        by_night.update({night: rooms for night, (rooms, _) in fetched.items()})
+        data = _compose_nights([by_night[n] for n in nights])
+
+        # Normalize response
+        normalized = self._normalize_qloapps_availability(data, guests)
+
+        # SECURITY FIX: Validate response schema before caching
+        try:
+            # Validar cada room contra schema
+            validated_rooms = [
+                RoomAvailability(**room).model_dump() for room in normalized
+            ]
+        except ValidationError as e:
+            logger.error(
+                "pms_response_validation_failed",
+                operation="check_availability",
+                error=str(e),
+                data_preview=str(normalized)[:200],
+            )
+            # Métricas de error de validación
+            pms_errors.labels(
+                operation="check_availability", error_type="validation_error"
+            ).inc()
+            raise PMSError(f"Invalid PMS response format: {e}")
+
+        # Cachear noches nuevas (datos crudos por noche)
+        await self._store_nights(fetched, room_type_id)
+        circuit_breaker_state.set(0)
+        pms_operations.labels(operation="check_availability", status="success").inc()
+
+        if stale:
+            self._revalidate_in_background(stale, room_type_id)
+            availability_queries_total.labels(source="stale").inc()
+            # Misma semántica que el fallback: marcador por 60 s y sin cachear la respuesta
+            await self.redis.setex(stale_cache_key, 60, "true")
+            return [{**room, "potentially_stale": True} for room in validated_rooms]
+
+        availability_queries_total.labels(source="pms" if missing else "cache").inc()
+        # Cache the result (fresh) - usar datos validados; no sobrevive a la noche más vieja
+        oldest = max((age for _, age in cached.values()), default=0.0)
+        if await self._index_availability_key(cache_key, nights):
+            await self._set_cache(cache_key, validated_rooms, ttl=max(1, 300 - int(oldest)))
+        # Remove stale marker since we have fresh data
+        await self.redis.delete(stale_cache_key)
+
+        return validated_rooms
+
+    async def _fetch_nights(
+        self, nights: List[date], room_type_id: Optional[int], semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Dict[date, Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Disponibilidad de varias noches: una llamada a QloApps por tramo de noches
+        consecutivas (no una por noche), hasta `pms_batch_max_concurrency` tramos
+        a la vez. Las noches que ya pide otra estadía se esperan (coalescing por noche).
+
+        Devuelve {noche: (habitaciones, exacta)}; ver `_fetch_run`.
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.batch_concurrency)
+        keys = {night: self._night_key(night, room_type_id) for night in nights}
+        runs: Dict[date, asyncio.Future] = {}
+        for start, end in _contiguous_runs(n for n in nights if not self.night_flight.inflight(keys[n])):
+            run = asyncio.ensure_future(self._fetch_run(start, end, room_type_id, semaphore))
+            runs.update(dict.fromkeys(_stay_nights(start, end), run))
+        # Las noches ya en vuelo se unen a esa llamada (su lambda no se ejecuta);
+        # el resto publica su parte del tramo para las estadías que lleguen después
+        flights = [self.night_flight.start(keys[n], lambda n=n: _night_of(runs[n], n)) for n in nights]
+        results = await asyncio.gather(*(asyncio.shield(flight) for flight in flights))
+        return dict(zip(nights, results))
+
+    async def _fetch_run(
+        self,
+        start: date,
+        end: date,
+        room_type_id: Optional[int],
+        semaphore: asyncio.Semaphore,
+        take_quota: Optional[Callable[[], Awaitable[bool]]] = None,
+    ) -> Dict[date, Tuple[List[Dict[str, Any]], bool]]:
+        """
+        Las noches [start, end) con una llamada de rango. QloApps responde el rango
+        agregado (cupo mínimo, tarifa nocturna) y cada noche se queda con esa fila:
+        el cupo puede quedar corto para una noche suelta, nunca de más.
+
+        Si un tipo viene agotado en un tramo de varias noches no se sabe qué noche
+        lo agota: el tramo se parte en mitades (búsqueda binaria) para no marcar como
+        agotadas las noches con cupo, sin pasar nunca de una llamada por noche. Lo
+        que quede sin resolver se devuelve con `exacta=False`: vale para la estadía
+        que lo pidió (su mínimo es el del tramo) pero no se cachea.
+
+        `take_quota` (prefetch): la primera llamada ya tiene token y las de la
+        búsqueda binaria lo piden sin esperar; sin él, cada llamada espera su cuota.
+        """
+        wait_for_quota = take_quota is None
+        budget = (end - start).days
+        level, result = [(start, end)], {}
+        while level:
+            responses = await asyncio.gather(
+                *(self._call_availability(s, e, room_type_id, semaphore, wait_for_quota) for s, e in level)
+            )
+            budget -= len(level)
+            unresolved = []
+            for (s, e), rooms in zip(level, responses):
+                if (e - s).days > 1 and _has_sold_out(rooms, room_type_id):
+                    unresolved.append((s, e, rooms))
+                else:
+                    result.update(dict.fromkeys(_stay_nights(s, e), (_night_rows(rooms), True)))
+            if not unresolved:
+                break
+            if 2 * len(unresolved) > budget or not await self._reserve_quota(2 * len(unresolved), take_quota):
+                for s, e, rooms in unresolved:
+                    result.update(dict.fromkeys(_stay_nights(s, e), (_night_rows(rooms), False)))
+                break
+            level = []
+            for s, e, _ in unresolved:
+                middle = s + timedelta(days=(e - s).days // 2)
+                level += [(s, middle), (middle, e)]
+        return result
+
+    @staticmethod
+    async def _reserve_quota(calls: int, take_quota: Optional[Callable[[], Awaitable[bool]]]) -> bool:
+        if take_quota is None:
+            return True
+        for _ in range(calls):
+            if not await take_quota():
+                return False
+        return True
+
+    async def _call_availability(
+        self,
+        date_from: date,
+        date_to: date,
+        room_type_id: Optional[int],
+        semaphore: asyncio.Semaphore,
+        wait_for_quota: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """Una consulta de rango a QloApps (rate limit, circuit breaker y reintentos)."""
+
+        async def fetch_range():
+            # Rate limit: wait if needed antes de llamar al PMS
+            if wait_for_quota:
+                await self.rate_limiter.wait_if_needed(operation="check_availability", max_wait=5.0)
+            try:
+                # num_adults=1: la noche cacheada sirve a cualquier nº de huéspedes;
+                # la ocupación se filtra al normalizar
+                return await self.qloapps.check_availability(
+                    hotel_id=self.hotel_id,
+                    date_from=date_from,
+                    date_to=date_to,
+                    num_rooms=1,
+                    num_adults=1,
+                    num_children=0,
+                    room_type_id=room_type_id,
+                )
+            except PMSAuthError as e:
+                logger.error(f"PMS authentication failed: {e}")
+                raise
+            except Exception as e:
+                logger.error(f"QloApps availability check failed: {e}")
+                raise PMSError(f"Failed to check availability: {str(e)}")
+
+        async with semaphore:
+            with pms_latency.labels(endpoint="/hotel_booking", method="GET").time():
+                rooms = await self.circuit_breaker.call(
+                    retry_with_backoff, fetch_range, operation_label="check_availability"
+                )
+        return [dict(room) for room in rooms or []]
+
     async def create_reservation(self, reservation_data: dict) -> dict:
         """
         Create a new reservation in QloApps.
@@ -349,6 +988,14 @@ class QloAppsAdapter:
         if "reservation_uuid" not in reservation_data:
             reservation_data["reservation_uuid"] = str(uuid4())
 
+        # Un tipo desconocido no se reserva "por defecto" ni cuenta como fallo del PMS
+        try:
+            room_type_id = self._get_room_type_id(reservation_data.get("room_type"))
+        except PMSUnknownRoomTypeError:
+            pms_operations.labels(operation="create_reservation", status="failure").inc()
+            failed_reservations.labels(reason="validation_error").inc()
+            raise
+
         async def post_reservation():
             # Rate limit: wait if needed antes de crear reserva
             await self.rate_limiter.wait_if_needed(
@@ -373,9 +1020,6 @@ class QloAppsAdapter:
                     "address": reservation_data.get("special_requests", ""),
                 }
 
-                # Get room type ID
-                room_type_id = self._get_room_type_id(reservation_data.get("room_type"))
-
                 # Create booking in QloApps
                 booking = await self.qloapps.create_booking(
                     hotel_id=self.hotel_id,
@@ -385,6 +1029,8 @@ class QloAppsAdapter:
                     num_rooms=1,
                     guest_info=guest_info,
                     payment_info=None,  # Handle payment separately if needed
+                    # Reintentos (retry_with_backoff o la saga) no duplican la reserva
+                    idempotency_key=reservation_data["reservation_uuid"],
                 )
 
                 # Add our internal UUID to response
@@ -417,8 +1063,8 @@ class QloAppsAdapter:
                 ).inc()
                 raise PMSError(f"Invalid reservation response format: {e}")
 
-            # Invalidate availability cache
-            await self._invalidate_cache_pattern("availability:*")
+            # Invalidar solo las noches reservadas (y recordarlas para la cancelación)
+            await self._invalidate_booked_nights(reservation_data, validated_result)
 
             pms_operations.labels(operation="create_reservation", status="success").inc()
 
@@ -446,6 +1092,96 @@ class QloAppsAdapter:
 
             raise PMSError(f"Unable to create reservation: {str(e)}")
 
+    async def find_created_reservation(self, reservation_data: dict) -> Optional[Dict[str, Any]]:
+        """
+        Busca en QloApps la reserva creada con este `reservation_uuid` (su `external_reference`).
+
+        Para quien perdió la respuesta de `create_reservation`: si el POST llegó,
+        devuelve la confirmación (e invalida sus noches como lo habría hecho el
+        alta); si no, None y se puede volver a enviar.
+        """
+
+        async def lookup():
+            await self.rate_limiter.wait_if_needed(operation="find_reservation", max_wait=5.0)
+            return await self.qloapps.find_booking_by_external_reference(reservation_data["reservation_uuid"])
+
+        with pms_latency.labels(endpoint="/hotel_bookings", method="GET").time():
+            booking = await self.circuit_breaker.call(lookup)
+        if booking is None:
+            return None
+
+        confirmation = ReservationConfirmation(
+            reservation_uuid=reservation_data["reservation_uuid"],
+            booking_id=str(booking["booking_id"]) if booking.get("booking_id") is not None else None,
+            booking_reference=booking.get("booking_reference") or "",
+            status=booking.get("status") or "pending",
+            total_amount=booking.get("total_amount", 0.0),
+            currency=booking.get("currency") or "USD",
+            check_in=booking.get("check_in") or reservation_data["checkin"],
+            check_out=booking.get("check_out") or reservation_data["checkout"],
+        ).model_dump()
+        await self._invalidate_booked_nights(reservation_data, confirmation)
+        pms_operations.labels(operation="find_reservation", status="found").inc()
+        return confirmation
+
+    async def _invalidate_booked_nights(self, reservation_data: dict, confirmation: dict) -> None:
+        try:
+            check_in = date.fromisoformat(str(confirmation.get("check_in") or reservation_data["checkin"])[:10])
+            check_out = date.fromisoformat(str(confirmation.get("check_out") or reservation_data["checkout"])[:10])
+        except (KeyError, ValueError):
+            await self._invalidate_all_availability()
+            return
+
+        room_type = reservation_data.get("room_type")
+        room_type_id = self.room_types.resolve(room_type) if room_type else None
+        await self._invalidate_nights(check_in, check_out, room_type_id)
+
+        booking_id = confirmation.get("booking_id")
+        if booking_id:
+            await self.remember_booking_nights(booking_id, check_in, check_out, room_type_id)
+
+    async def remember_booking_nights(
+        self, booking_id: Any, check_in: date, check_out: date, room_type_id: Optional[int]
+    ) -> None:
+        """Registra qué noches ocupa una reserva para invalidar solo esas al cancelarla."""
+        # Hasta el check-out: una cancelación posterior ya no libera noches futuras
+        ttl = max(3600, ((check_out - date.today()).days + 1) * 86400)
+        await self._set_cache(
+            f"pms:booking_nights:{booking_id}",
+            {"check_in": check_in.isoformat(), "check_out": check_out.isoformat(), "room_type_id": room_type_id},
+            ttl=ttl,
+        )
+
+    async def _invalidate_cancelled_nights(self, reservation_id: str) -> None:
+        record_key = f"pms:booking_nights:{reservation_id}"
+        try:
+            raw = await self.redis.get(record_key)
+            record = json.loads(raw) if raw else None
+        except Exception as e:
+            logger.debug(f"Booking nights lookup failed: {e}")
+            record = None
+
+        if not isinstance(record, dict):
+            # Reserva creada por otro canal (o registro expirado): no sabemos qué noches libera
+            await self._invalidate_all_availability()
+            return
+
+        await self._invalidate_nights(
+            date.fromisoformat(record["check_in"]),
+            date.fromisoformat(record["check_out"]),
+            record.get("room_type_id"),
+        )
+        try:
+            await self.redis.delete(record_key)
+        except Exception as e:
+            logger.debug(f"Booking nights cleanup failed: {e}")
+
+    async def _forget_reservation(self, booking_id: Any) -> None:
+        try:
+            await self.redis.delete(f"reservation:{booking_id}", f"late_checkout_check:{booking_id}")
+        except Exception as e:
+            logger.debug(f"Reservation cache cleanup failed: {e}")
+
     def _record_business_reservation(self, reservation_data: dict, result: dict, status: str):
         """Helper para registrar métricas de negocio de reservas"""
         try:
@@ -508,7 +1244,15 @@ class QloAppsAdapter:
             if not booking_id:
                 raise PMSError(f"Invalid reservation ID format: {reservation_id}")
 
+            cache_key = f"reservation:{booking_id}"
+            cached = await self._get_cached_reservation(cache_key)
+            if cached is not None:
+                cache_hits_total.labels(operation="get_reservation").inc()
+                return cached
+
+            cache_misses_total.labels(operation="get_reservation").inc()
             booking = await self.qloapps.get_booking(booking_id)
+            await self._set_cache(cache_key, booking, ttl=self.reservation_cache_ttl)
             pms_operations.labels(operation="get_reservation", status="success").inc()
 
             return booking
@@ -519,6 +1263,14 @@ class QloAppsAdapter:
             pms_errors.labels(operation="get_reservation", error_type=e.__class__.__name__).inc()
             raise PMSError(f"Unable to retrieve reservation: {str(e)}")
 
+    async def _get_cached_reservation(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            cached = await self.redis.get(key)
+            data = json.loads(cached) if cached else None
+            return data if isinstance(data, dict) else None
+        except Exception:
+            return None
+
     async def cancel_reservation(self, reservation_id: str, reason: Optional[str] = None) -> bool:
         """
         Cancel a reservation.
@@ -539,8 +1291,9 @@ class QloAppsAdapter:
             success = await self.qloapps.cancel_booking(booking_id, reason)
 
             if success:
-                # Invalidate availability cache since rooms are now available
-                await self._invalidate_cache_pattern("availability:*")
+                # Las noches liberadas vuelven a estar disponibles
+                await self._invalidate_cancelled_nights(reservation_id)
+                await self._forget_reservation(booking_id)
                 pms_operations.labels(operation="cancel_reservation", status="success").inc()
                 logger.info(f"✅ Reservation {reservation_id} cancelled successfully")
             else:
@@ -772,9 +1525,15 @@ class QloAppsAdapter:
 
             if cached:
                 from typing import cast
+
+                # El catálogo del proceso también se arma desde la caché compartida
+                if isinstance(cached, list):
+                    self.room_types.build(cached)
                 return cast(List[Dict[str, Any]], cached)
 
             room_types = await self.qloapps.get_room_types()
+            if isinstance(room_types, list):
+                self.room_types.build(room_types)
 
             # Cache room types for longer (1 hour) since they don't change often
             await self._set_cache(cache_key, room_types, ttl=3600)
@@ -832,16 +1591,15 @@ class QloAppsAdapter:
 
         Returns:
             Room type ID for QloApps
-        """
-        # Room type mapping (this should be configurable or fetched from QloApps)
-        room_type_mapping = {"single": 1, "doble": 2, "double": 2, "twin": 3, "suite": 4, "deluxe": 5, "superior": 6}
-
-        if not room_type_name:
-            return 2  # Default to double room
 
-        # Normalize and lookup
-        normalized_name = room_type_name.lower().strip()
-        return room_type_mapping.get(normalized_name, 2)
+        Raises:
+            PMSUnknownRoomTypeError: If the name does not match a single catalog type
+        """
+        # Catálogo cargado del PMS (alias multilingües, sin acentos/plurales, fuzzy ±1)
+        room_type_id = self.room_types.resolve(room_type_name) if room_type_name else None
+        if room_type_id is None:
+            raise PMSUnknownRoomTypeError(f"Unknown room type: {room_type_name!r}")
+        return room_type_id
 
     def _normalize_qloapps_availability(self, rooms: List[Dict], guests: int) -> List[dict]:
         """
@@ -913,6 +1671,14 @@ class MockPMSAdapter:
             }
         ]
 
+    async def check_availability_batch(self, queries, return_exceptions: bool = False) -> List[Any]:
+        normalized = [_as_query(q) for q in queries]
+        return list(
+            await asyncio.gather(
+                *(self.check_availability(*q) for q in normalized), return_exceptions=return_exceptions
+            )
+        )
+
     async def create_reservation(self, reservation_data: dict) -> dict:
         # Devuelve una reserva simulada con un UUID
         rid = reservation_data.get("reservation_uuid") or str(uuid4())
@@ -63,6 +63,7 @@ class QloAppsClient:
         params: Optional[Dict] = None,
         json_data: Optional[Dict] = None,
         xml_data: Optional[str] = None,
+        headers: Optional[Dict[str, str]] = None,
     ) -> Dict[str, Any]:
         """
         Make authenticated request to QloApps API.
@@ -73,6 +74,7 @@ class QloAppsClient:
             params: Query parameters
             json_data: JSON request body (will be converted to XML if needed)
             xml_data: Raw XML request body
+            headers: Extra request headers (e.g. Idempotency-Key)
 
         Returns:
             Response data as dictionary
@@ -89,9 +91,9 @@ class QloAppsClient:
             params["output_format"] = "JSON"
 
             # Propagate correlation headers per request
-            headers = correlation_headers()
+            request_headers = {**correlation_headers(), **(headers or {})}
             response = await self.client.request(
-                method=method, url=endpoint, params=params, json=json_data, headers=headers or None
+                method=method, url=endpoint, params=params, json=json_data, headers=request_headers or None
             )
 
             # Handle specific HTTP errors
@@ -271,6 +273,7 @@ class QloAppsClient:
         num_rooms: int,
         guest_info: Dict[str, Any],
         payment_info: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Create a new booking/reservation.
@@ -289,6 +292,8 @@ class QloAppsClient:
                 - country: str (optional)
                 - address: str (optional)
             payment_info: Payment information (optional for deposit/prepayment)
+            idempotency_key: Sent as `Idempotency-Key` and `external_reference`, so
+                retrying a POST whose response was lost does not book twice
 
         Returns:
             Booking confirmation dictionary:
@@ -320,7 +325,12 @@ class QloAppsClient:
         if payment_info:
             booking_data["payment"] = payment_info
 
-        response = await self._request("POST", "/hotel_bookings", json_data=booking_data)
+        headers = None
+        if idempotency_key:
+            booking_data["external_reference"] = idempotency_key
+            headers = {"Idempotency-Key": idempotency_key}
+
+        response = await self._request("POST", "/hotel_bookings", json_data=booking_data, headers=headers)
 
         booking = response.get("booking", {})
 
@@ -346,8 +356,53 @@ class QloAppsClient:
             Complete booking information
         """
         response = await self._request("GET", f"/hotel_bookings/{booking_id}")
-        booking = response.get("booking", {})
+        return self._normalize_booking(response.get("booking", {}))
+
+    async def list_bookings_modified_since(self, since: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List bookings modified at or after a timestamp, oldest first.
+
+        Uses the PrestaShop webservice filters (`filter[date_upd]` with
+        `date=1`), sorted by modification date and ID so pages are stable.
+
+        Args:
+            since: Lower bound for `date_upd` ("YYYY-MM-DD HH:MM:SS")
+            limit: Page size
+            offset: Page offset
+
+        Returns:
+            Bookings in the same format as `get_booking`
+        """
+        params = {
+            "display": "full",
+            "date": 1,
+            "filter[date_upd]": f">[{since}]",
+            "sort": "[date_upd_ASC,id_ASC]",
+            "limit": f"{offset},{limit}",
+        }
+        response = await self._request("GET", "/hotel_bookings", params=params)
+        return [self._normalize_booking(b) for b in response.get("bookings", []) or []]
+
+    async def find_booking_by_external_reference(self, reference: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the booking created with a given `external_reference`.
+
+        Lets a caller that lost the response to `create_booking` check whether
+        the POST reached QloApps before sending it again.
+
+        Args:
+            reference: The `idempotency_key` passed to `create_booking`
+
+        Returns:
+            Booking in the same format as `get_booking`, or None if none exists
+        """
+        params = {"display": "full", "filter[external_reference]": f"[{reference}]", "limit": "0,1"}
+        response = await self._request("GET", "/hotel_bookings", params=params)
+        bookings = response.get("bookings", []) or []
+        return self._normalize_booking(bookings[0]) if bookings else None
 
+    @staticmethod
+    def _normalize_booking(booking: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "booking_id": booking.get("id_booking"),
             "booking_reference": booking.get("booking_reference"),
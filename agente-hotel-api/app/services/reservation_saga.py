@@ -0,0 +1,402 @@
+# app/services/reservation_saga.py
+# Creación de reservas en segundo plano con compensación (saga)
+
+"""
+Saga de creación de reservas.
+
+`start()` bloquea la habitación, persiste la saga en Redis y responde al
+instante con un acuse "processing"; un worker la avanza después:
+
+    locked ──▶ submitted ──▶ confirmed
+                   │
+                   └──▶ compensated (se libera el lock y se avisa al huésped)
+
+Cada transición se persiste *antes* de su efecto (write-ahead), y la cola es
+un ZSET cuyo score es "cuándo volver a mirarla": al tomarla, un worker la
+arrienda por `lease_seconds` con un token propio y renueva el lease mientras
+la avanza (el POST al PMS puede tardar más que el lease). Si el worker muere a
+mitad de camino, la saga vuelve a estar disponible al vencer el lease y otro
+worker la retoma desde el último estado persistido; cada escritura verifica el
+token, así que un worker que perdió el lease no pisa el estado ni avisa dos
+veces al huésped. Una saga retomada en `submitted` primero busca en el
+PMS la reserva con su ID como `external_reference` y solo reenvía el POST si
+no existe (que además lleva ese ID como clave de idempotencia).
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from prometheus_client import Counter, Histogram
+
+from ..core.logging import logger
+from ..core.prometheus import registry
+from ..core.settings import settings
+from .template_service import get_template_service
+
+reservation_saga_transitions_total = Counter(
+    "reservation_saga_transitions_total",
+    "Transiciones de la saga de reservas por estado alcanzado",
+    ["state"],
+    registry=registry,
+)
+reservation_saga_duration_seconds = Histogram(
+    "reservation_saga_duration_seconds",
+    "Tiempo desde el acuse al huésped hasta el estado final",
+    ["outcome"],
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300, 900),
+    registry=registry,
+)
+
+LOCKED = "locked"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+COMPENSATED = "compensated"
+TERMINAL_STATES = {CONFIRMED, COMPENSATED}
+
+SAGA_KEY = "reservation_saga:{}"
+QUEUE_KEY = "reservation_saga:queue"
+# Token del worker que tiene arrendada cada saga (saga_id → token)
+OWNERS_KEY = "reservation_saga:owners"
+# Las sagas terminadas se conservan para consultar su estado
+FINISHED_TTL_SECONDS = 7 * 86400
+
+# Toma la saga vencida más antigua y la arrienda (ZSET score = vencimiento del lease)
+_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #due == 0 then
+  return false
+end
+redis.call('ZADD', KEYS[1], ARGV[2], due[1])
+redis.call('HSET', KEYS[2], due[1], ARGV[3])
+return due[1]
+"""
+
+# Extiende el lease si el token sigue siendo el del dueño (XX: no re-encola una saga terminada)
+_RENEW_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+  return 0
+end
+redis.call('ZADD', KEYS[1], 'XX', ARGV[3], ARGV[1])
+return 1
+"""
+
+# Persiste la saga solo si el token sigue siendo el del dueño
+_SAVE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+  return 0
+end
+if tonumber(ARGV[4]) > 0 then
+  redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[4])
+else
+  redis.call('SET', KEYS[1], ARGV[3])
+end
+return 1
+"""
+
+# Suelta el lease: re-encola para el próximo intento (ARGV[3]) o saca la saga de la cola
+_RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[2], ARGV[1]) ~= ARGV[2] then
+  return 0
+end
+redis.call('HDEL', KEYS[2], ARGV[1])
+if ARGV[3] == '' then
+  redis.call('ZREM', KEYS[1], ARGV[1])
+else
+  redis.call('ZADD', KEYS[1], ARGV[3], ARGV[1])
+end
+return 1
+"""
+
+
+class _LeaseLost(Exception):
+    """Otro worker tomó la saga: este deja de avanzarla."""
+
+
+Notifier = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def guest_message(saga: Dict[str, Any]) -> str:
+    """Texto para el huésped según el estado de la saga."""
+    language = saga["reservation_data"].get("language")
+    templates = get_template_service()
+    if saga["state"] == CONFIRMED:
+        booking = saga.get("booking") or {}
+        reference = booking.get("booking_reference") or booking.get("reservation_id") or saga["id"]
+        return templates.get_response("reservation_saga_confirmed", language=language, booking_reference=reference)
+    if saga["state"] == COMPENSATED:
+        return templates.get_response("reservation_saga_failed", language=language)
+    return templates.get_response("reservation_processing", language=language)
+
+
+async def _whatsapp_notifier(saga: Dict[str, Any]) -> None:
+    """Avisa el resultado por WhatsApp (el user_id del canal es el teléfono del huésped)."""
+    from .whatsapp_client import get_whatsapp_client
+
+    await get_whatsapp_client().send_message(saga["user_id"], guest_message(saga))
+
+
+class ReservationSagaService:
+    """Persistencia, cola y worker de la saga de creación de reservas."""
+
+    def __init__(
+        self,
+        redis_client: Any,
+        pms_adapter: Any,
+        lock_service: Any,
+        notifier: Optional[Notifier] = None,
+        max_attempts: Optional[int] = None,
+        lease_seconds: Optional[float] = None,
+        retry_base_seconds: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.redis = redis_client
+        self._claim = redis_client.register_script(_CLAIM_SCRIPT)
+        self._renew = redis_client.register_script(_RENEW_SCRIPT)
+        self._save_owned = redis_client.register_script(_SAVE_SCRIPT)
+        self._release = redis_client.register_script(_RELEASE_SCRIPT)
+        self.pms_adapter = pms_adapter
+        self.lock_service = lock_service
+        self.notifier = notifier or _whatsapp_notifier
+        self.max_attempts = int(max_attempts if max_attempts is not None else settings.reservation_saga_max_attempts)
+        self.lease_seconds = float(
+            lease_seconds if lease_seconds is not None else settings.reservation_saga_lease_seconds
+        )
+        self.retry_base_seconds = float(
+            retry_base_seconds if retry_base_seconds is not None else settings.reservation_saga_retry_base_seconds
+        )
+        self.poll_interval = float(
+            poll_interval if poll_interval is not None else settings.reservation_saga_poll_interval_seconds
+        )
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # API para el flujo conversacional
+    # ------------------------------------------------------------------
+
+    async def start(self, reservation_data: Dict[str, Any], session_id: str, user_id: str) -> Dict[str, Any]:
+        """
+        Bloquea la habitación y encola la reserva. Responde sin esperar al PMS.
+
+        Reintentos del huésped con el mismo `reservation_uuid` devuelven la misma saga.
+
+        Returns:
+            {"saga_id", "status", "message", ...}: "processing" si quedó encolada, o el
+            estado final; `message` es el acuse para responderle al huésped
+        """
+        saga_id = str(reservation_data.get("reservation_uuid") or uuid.uuid4())
+        existing = await self.get(saga_id)
+        if existing is not None:
+            return self._ack(existing)
+
+        now = time.time()
+        saga: Dict[str, Any] = {
+            "id": saga_id,
+            "state": LOCKED,
+            "reservation_data": {**reservation_data, "reservation_uuid": saga_id},
+            "session_id": session_id,
+            "user_id": user_id,
+            "lock_key": None,
+            "attempts": 0,
+            "booking": None,
+            "error": None,
+            "lock_released": False,
+            "notified": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        saga["lock_key"] = await self.lock_service.acquire_lock(
+            str(reservation_data.get("room_type") or "any"),
+            str(reservation_data.get("checkin")),
+            str(reservation_data.get("checkout")),
+            session_id,
+            user_id,
+        )
+        if not saga["lock_key"]:
+            # Otro huésped tiene la habitación: se termina sin tocar el PMS
+            saga.update(state=COMPENSATED, error="room_locked", lock_released=True, notified=True)
+            await self._save(saga)
+            reservation_saga_transitions_total.labels(state=COMPENSATED).inc()
+            return self._ack(saga)
+
+        await self._save(saga)
+        await self.redis.zadd(QUEUE_KEY, {saga_id: now})
+        reservation_saga_transitions_total.labels(state=LOCKED).inc()
+        logger.info("reservation_saga.started", saga_id=saga_id, session_id=session_id)
+        return self._ack(saga)
+
+    async def get(self, saga_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(SAGA_KEY.format(saga_id))
+        return json.loads(raw) if raw else None
+
+    @staticmethod
+    def _ack(saga: Dict[str, Any]) -> Dict[str, Any]:
+        status = saga["state"] if saga["state"] in TERMINAL_STATES else "processing"
+        return {
+            "saga_id": saga["id"],
+            "status": status,
+            "booking": saga.get("booking"),
+            "error": saga.get("error"),
+            "message": guest_message(saga),
+        }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    async def run_once(self) -> bool:
+        """Avanza una saga vencida, si hay. Devuelve si procesó alguna."""
+        now, token = time.time(), uuid.uuid4().hex
+        claimed = await self._claim(keys=[QUEUE_KEY, OWNERS_KEY], args=[now, now + self.lease_seconds, token])
+        if not claimed:
+            return False
+        saga_id = claimed.decode() if isinstance(claimed, bytes) else str(claimed)
+        saga = await self.get(saga_id)
+        if saga is None:
+            await self._release(keys=[QUEUE_KEY, OWNERS_KEY], args=[saga_id, token, ""])
+            return True
+        saga["claim"] = token
+        heartbeat = asyncio.create_task(self._heartbeat(saga_id, token))
+        try:
+            await self._advance(saga)
+        except _LeaseLost:
+            logger.warning("reservation_saga.lease_lost", saga_id=saga_id, state=saga["state"])
+        finally:
+            heartbeat.cancel()
+        return True
+
+    async def _heartbeat(self, saga_id: str, token: str) -> None:
+        """Renueva el lease mientras `_advance` corre; termina si otro worker lo tomó."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await self._renew(
+                    keys=[QUEUE_KEY, OWNERS_KEY], args=[saga_id, token, time.time() + self.lease_seconds]
+                )
+            except Exception as e:
+                logger.warning("reservation_saga.lease_renew_failed", saga_id=saga_id, error=str(e))
+                continue
+            if not renewed:
+                return
+
+    async def _advance(self, saga: Dict[str, Any]) -> None:
+        if saga["state"] in TERMINAL_STATES:
+            # Caída después de persistir el final: completar efectos pendientes
+            await self._finish(saga)
+            return
+
+        # Write-ahead: si morimos durante el POST, quien retome sabe que puede estar enviada
+        resumed = saga["state"] == SUBMITTED
+        saga["attempts"] += 1
+        await self._transition(saga, SUBMITTED)
+        try:
+            booking = None
+            if resumed:
+                # El POST anterior pudo llegar al PMS: buscarlo antes de reenviar
+                booking = await self.pms_adapter.find_created_reservation(dict(saga["reservation_data"]))
+                if booking is not None:
+                    logger.info("reservation_saga.recovered_booking", saga_id=saga["id"])
+            if booking is None:
+                booking = await self.pms_adapter.create_reservation(dict(saga["reservation_data"]))
+        except Exception as e:
+            saga["error"] = str(e)
+            if saga["attempts"] >= self.max_attempts:
+                logger.warning("reservation_saga.compensating", saga_id=saga["id"], error=str(e))
+                await self._transition(saga, COMPENSATED)
+                await self._finish(saga)
+                return
+            await self._save(saga)
+            delay = self.retry_base_seconds * (2 ** (saga["attempts"] - 1))
+            await self._release_claim(saga, time.time() + delay)
+            logger.info("reservation_saga.retry_scheduled", saga_id=saga["id"], attempt=saga["attempts"], delay=delay)
+            return
+
+        saga["booking"], saga["error"] = booking, None
+        await self._transition(saga, CONFIRMED)
+        await self._finish(saga)
+
+    async def _finish(self, saga: Dict[str, Any]) -> None:
+        """Efectos del estado final, idempotentes: liberar el lock y avisar al huésped una sola vez."""
+        if saga.get("lock_key") and not saga.get("lock_released"):
+            # Confirmada: la reserva ya existe en el PMS. Compensada: la habitación vuelve a estar libre
+            await self.lock_service.release_lock(saga["lock_key"])
+            saga["lock_released"] = True
+            await self._save(saga)
+        if not saga.get("notified"):
+            try:
+                await self.notifier(saga)
+            except Exception as e:
+                logger.warning("reservation_saga.notify_failed", saga_id=saga["id"], error=str(e))
+            saga["notified"] = True
+            await self._save(saga)
+        await self._release_claim(saga, None)
+        reservation_saga_duration_seconds.labels(outcome=saga["state"]).observe(
+            max(0.0, time.time() - saga["created_at"])
+        )
+
+    async def _transition(self, saga: Dict[str, Any], state: str) -> None:
+        saga["state"] = state
+        await self._save(saga)
+        reservation_saga_transitions_total.labels(state=state).inc()
+
+    async def _save(self, saga: Dict[str, Any]) -> None:
+        """Persiste la saga; en el worker, solo mientras conserve el lease (si no, `_LeaseLost`)."""
+        saga["updated_at"] = time.time()
+        token = saga.get("claim")
+        payload = json.dumps({k: v for k, v in saga.items() if k != "claim"}, default=str)
+        ttl = FINISHED_TTL_SECONDS if saga["state"] in TERMINAL_STATES else 0
+        if token is None:
+            await self.redis.set(SAGA_KEY.format(saga["id"]), payload, ex=ttl or None)
+        elif not await self._save_owned(
+            keys=[SAGA_KEY.format(saga["id"]), OWNERS_KEY], args=[saga["id"], token, payload, ttl]
+        ):
+            raise _LeaseLost(saga["id"])
+
+    async def _release_claim(self, saga: Dict[str, Any], retry_at: Optional[float]) -> None:
+        """Re-encola la saga para `retry_at`, o la saca de la cola si es None."""
+        token = saga.get("claim")
+        if token is None:
+            if retry_at is None:
+                await self.redis.zrem(QUEUE_KEY, saga["id"])
+            else:
+                await self.redis.zadd(QUEUE_KEY, {saga["id"]: retry_at})
+            return
+        args = [saga["id"], token, "" if retry_at is None else retry_at]
+        if not await self._release(keys=[QUEUE_KEY, OWNERS_KEY], args=args):
+            raise _LeaseLost(saga["id"])
+
+    async def start_worker(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+        logger.info("ReservationSaga worker started", poll_interval=self.poll_interval)
+
+    async def stop_worker(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):  # pragma: no cover
+                pass
+
+    async def _loop(self):  # pragma: no cover (timing)
+        while True:
+            try:
+                if await self.run_once():
+                    continue
+            except Exception as e:
+                logger.warning("reservation_saga.worker_error", error=str(e))
+            await asyncio.sleep(self.poll_interval)
+
+
+_saga_service: Optional[ReservationSagaService] = None
+
+
+def get_reservation_saga_service() -> Optional[ReservationSagaService]:
+    """Servicio iniciado en el lifespan (None si la saga está deshabilitada)."""
+    return _saga_service
+
+
+def set_reservation_saga_service(service: Optional[ReservationSagaService]) -> None:
+    global _saga_service
+    _saga_service = service
@@ -4,7 +4,6 @@ Monitoreo avanzado de recursos del sistema con predicción y alertas proactivas
 """
 
 import asyncio
-import psutil
 import logging
 from typing import Dict, List, Optional
 from dataclasses import dataclass, asdict
@@ -16,6 +15,7 @@ import redis.asyncio as redis
 from prometheus_client import Histogram, Counter, Gauge
 
 from app.core.redis_client import get_redis_client
+from app.services.host_metrics import SlidingTrend, get_host_sampler
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -146,11 +146,22 @@ class ResourceMonitor:
 
         self.last_alert_times: Dict[str, datetime] = {}
 
+        # Tendencias incrementales sobre las últimas métricas analizadas
+        self.cpu_short_trend = SlidingTrend(5)
+        self.trends: Dict[ResourceType, SlidingTrend] = {
+            ResourceType.CPU: SlidingTrend(10),
+            ResourceType.MEMORY: SlidingTrend(10),
+            ResourceType.DISK: SlidingTrend(10),
+        }
+
     async def start(self):
         """Inicializar el monitor de recursos"""
         try:
             self.redis_client = await get_redis_client()
 
+            # Arrancar el muestreo del host en su hilo
+            get_host_sampler()
+
             # Inicializar historia desde Redis si existe
             await self._load_metrics_history()
 
@@ -178,6 +189,8 @@ class ResourceMonitor:
                     ResourceMetrics(**item)
                     for item in history_list[-100:]  # Últimos 100
                 ]
+                for metrics in self.metrics_history:
+                    self._push_trends(metrics)
                 logger.info(f"Cargada historia de {len(self.metrics_history)} métricas")
         except Exception as e:
             logger.warning(f"Error cargando historia de métricas: {e}")
@@ -206,36 +219,15 @@ class ResourceMonitor:
         """Recopilar métricas actuales del sistema"""
         with resource_monitoring_duration.labels("metrics_collection").time():
             try:
-                # CPU metrics
-                cpu_percent = psutil.cpu_percent(interval=1)
-                cpu_count = psutil.cpu_count()
-                cpu_freq = psutil.cpu_freq()
-                cpu_freq_current = cpu_freq.current if cpu_freq else 0
-
-                # Memory metrics
-                memory = psutil.virtual_memory()
-                swap = psutil.swap_memory()
-
-                # Disk metrics
-                disk = psutil.disk_usage("/")
-
-                # Network metrics
-                network = psutil.net_io_counters()
-
-                # Process metrics
-                process_count = len(psutil.pids())
-
-                # Load average (solo en Unix)
-                try:
-                    load_avg = psutil.getloadavg()
-                    load_1m, load_5m, load_15m = load_avg
-                except (AttributeError, OSError):
-                    load_1m = load_5m = load_15m = 0.0
+                # Última muestra del sampler compartido: no bloquea el event loop
+                sample = await get_host_sampler().snapshot()
+                memory, swap, disk, network = sample.memory, sample.swap, sample.disk, sample.network
+                load_1m, load_5m, load_15m = sample.load_average
 
                 metrics = ResourceMetrics(
-                    cpu_percent=cpu_percent,
-                    cpu_count=cpu_count,
-                    cpu_freq_current=cpu_freq_current,
+                    cpu_percent=sample.cpu_percent,
+                    cpu_count=sample.cpu_count,
+                    cpu_freq_current=sample.cpu_freq_current,
                     memory_total=memory.total,
                     memory_used=memory.used,
                     memory_percent=memory.percent,
@@ -252,11 +244,11 @@ class ResourceMonitor:
                     network_packets_sent=network.packets_sent,
                     network_packets_recv=network.packets_recv,
                     network_errors=network.errin + network.errout,
-                    process_count=process_count,
+                    process_count=sample.process_count,
                     load_average_1m=load_1m,
                     load_average_5m=load_5m,
                     load_average_15m=load_15m,
-                    timestamp=datetime.now(),
+                    timestamp=datetime.fromtimestamp(sample.timestamp),
                 )
 
                 # Actualizar métricas de Prometheus
@@ -310,6 +302,7 @@ class ResourceMonitor:
         try:
             # Agregar métricas a historia
             self.metrics_history.append(metrics)
+            self._push_trends(metrics)
 
             # Mantener solo las últimas N métricas
             if len(self.metrics_history) > self.config["history_retention"]:
@@ -328,6 +321,13 @@ class ResourceMonitor:
         except Exception as e:
             logger.error(f"Error analizando tendencias de recursos: {e}")
 
+    def _push_trends(self, metrics: ResourceMetrics):
+        """Actualizar las tendencias incrementales con una nueva medición"""
+        self.cpu_short_trend.push(metrics.cpu_percent)
+        self.trends[ResourceType.CPU].push(metrics.cpu_percent)
+        self.trends[ResourceType.MEMORY].push(metrics.memory_percent)
+        self.trends[ResourceType.DISK].push(metrics.disk_percent)
+
     async def _analyze_cpu_trends(self, metrics: ResourceMetrics):
         """Analizar tendencias de CPU"""
         try:
@@ -352,9 +352,8 @@ class ResourceMonitor:
                 )
 
             # Análisis de tendencia
-            if len(self.metrics_history) >= 5:
-                recent_cpu = [m.cpu_percent for m in self.metrics_history[-5:]]
-                cpu_trend = self._calculate_trend(recent_cpu)
+            if len(self.cpu_short_trend) >= 5:
+                cpu_trend = self.cpu_short_trend.slope()
 
                 if cpu_trend > 0.1 and cpu_usage > 60:  # Tendencia creciente
                     await self._generate_alert(
@@ -563,47 +562,45 @@ class ResourceMonitor:
             if len(self.metrics_history) < 10:
                 return  # Necesitamos historia suficiente
 
-            # Predicción de CPU
-            cpu_values = [m.cpu_percent for m in self.metrics_history[-10:]]
-            cpu_prediction = await self._predict_resource_usage(cpu_values, ResourceType.CPU)
-            if cpu_prediction:
-                self.predictions[ResourceType.CPU] = cpu_prediction
-                resource_predictions_gauge.labels("cpu", "15min").set(cpu_prediction.predicted_value)
-
-            # Predicción de memoria
-            memory_values = [m.memory_percent for m in self.metrics_history[-10:]]
-            memory_prediction = await self._predict_resource_usage(memory_values, ResourceType.MEMORY)
-            if memory_prediction:
-                self.predictions[ResourceType.MEMORY] = memory_prediction
-                resource_predictions_gauge.labels("memory", "15min").set(memory_prediction.predicted_value)
-
-            # Predicción de disco
-            disk_values = [m.disk_percent for m in self.metrics_history[-10:]]
-            disk_prediction = await self._predict_resource_usage(disk_values, ResourceType.DISK)
-            if disk_prediction:
-                self.predictions[ResourceType.DISK] = disk_prediction
-                resource_predictions_gauge.labels("disk", "15min").set(disk_prediction.predicted_value)
+            for resource_type, label in (
+                (ResourceType.CPU, "cpu"),
+                (ResourceType.MEMORY, "memory"),
+                (ResourceType.DISK, "disk"),
+            ):
+                trend = self.trends[resource_type]
+                prediction = await self._predict_resource_usage(
+                    trend.values(), resource_type, trend_value=trend.slope()
+                )
+                if prediction:
+                    self.predictions[resource_type] = prediction
+                    resource_predictions_gauge.labels(label, "15min").set(prediction.predicted_value)
 
         except Exception as e:
             logger.warning(f"Error generando predicciones: {e}")
 
     async def _predict_resource_usage(
-        self, values: List[float], resource_type: ResourceType, timeframe_minutes: int = 15
+        self,
+        values: List[float],
+        resource_type: ResourceType,
+        timeframe_minutes: int = 15,
+        trend_value: Optional[float] = None,
     ) -> Optional[ResourcePrediction]:
         """Predecir uso de recurso usando regresión lineal simple"""
         try:
             if len(values) < 3:
                 return None
 
-            # Calcular tendencia
-            trend_value = self._calculate_trend(values)
+            # Calcular tendencia (si no viene ya calculada de forma incremental)
+            if trend_value is None:
+                trend_value = self._calculate_trend(values)
 
             # Predecir valor futuro
             current_value = values[-1]
             predicted_value = current_value + (trend_value * timeframe_minutes)
 
             # Calcular confianza basada en variabilidad
-            variance = sum((v - sum(values) / len(values)) ** 2 for v in values) / len(values)
+            mean = sum(values) / len(values)
+            variance = sum((v - mean) ** 2 for v in values) / len(values)
             confidence = max(0.1, 1.0 - (variance / 100))  # Normalizar varianza
 
             # Determinar tendencia
@@ -19,7 +19,8 @@ import structlog
 from app.core.settings import settings
 from app.services.session_manager import SessionManager
 from app.services.template_service import TemplateService
-from app.services.whatsapp_client import WhatsAppMetaClient as WhatsAppClient
+from app.services.whatsapp_client import get_whatsapp_client
+from app.services.whatsapp_sender import SendPriority, send_priority
 
 logger = structlog.get_logger(__name__)
 
@@ -100,7 +101,7 @@ class ReviewService:
 
         self.session_manager = SessionManager()
         self.template_service = TemplateService()
-        self.whatsapp_client = WhatsAppClient()
+        self.whatsapp_client = get_whatsapp_client()
 
         # Configuration
         self.max_reminders = getattr(settings, "review_max_reminders", 3)
@@ -236,8 +237,9 @@ class ReviewService:
             # Generate personalized message
             message_content = await self._generate_review_message(request)
 
-            # Send via WhatsApp
-            result = await self.whatsapp_client.send_message(to=guest_id, text=message_content["text"])
+            # Send via WhatsApp (carril BULK: no compite con respuestas interactivas)
+            with send_priority(SendPriority.BULK):
+                result = await self.whatsapp_client.send_message(to=guest_id, text=message_content["text"])
 
             if result.get("success"):
                 # Update request tracking
@@ -0,0 +1,228 @@
+# app/services/room_type_catalog.py
+# Catálogo de tipos de habitación del PMS con índice de alias precomputado
+
+"""
+Catálogo dinámico de tipos de habitación (por hotel/tenant).
+
+Se carga desde `QloAppsClient.get_room_types()` al arrancar y se refresca
+periódicamente. Al cargarlo se precomputa un índice de alias — el nombre del
+PMS más sinónimos en español, inglés y portugués de cada concepto (simple,
+doble, suite, ...) — normalizados sin acentos ni plurales. Resolver la frase
+de un huésped a `id_product` es una búsqueda en un dict; los errores de tipeo
+de una letra se resuelven con un segundo índice de borrados (estilo SymSpell),
+también O(1) por consulta.
+
+Un alias que apunta a dos tipos distintos se descarta: preferimos no filtrar
+por tipo antes que consultar al PMS por la habitación equivocada.
+"""
+
+import asyncio
+import time
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ..core.logging import logger
+from ..core.settings import settings
+
+# Sinónimos multilingües por concepto; el concepto se asigna al tipo del PMS cuyo nombre lo menciona
+ROOM_TYPE_SYNONYMS: Dict[str, List[str]] = {
+    "single": ["single", "simple", "individual", "sencilla", "solteiro", "one bed", "una persona"],
+    "double": ["double", "doble", "matrimonial", "casal", "duplo", "queen", "king"],
+    "twin": ["twin", "dos camas", "two beds", "duas camas", "camas separadas"],
+    "triple": ["triple", "triplo", "tres personas", "three beds"],
+    "family": ["family", "familiar", "familia", "cuadruple", "quadruple"],
+    "suite": ["suite", "junior suite", "master suite", "suite junior"],
+    "deluxe": ["deluxe", "de luxe", "lujo"],
+    "superior": ["superior"],
+    "executive": ["executive", "ejecutiva", "ejecutivo", "business", "executiva"],
+}
+
+# Catálogo previo a la primera carga (mismos IDs que el mapeo histórico del adaptador)
+DEFAULT_ROOM_TYPES: List[Dict[str, Any]] = [
+    {"id": 1, "name": "Single"},
+    {"id": 2, "name": "Doble"},
+    {"id": 3, "name": "Twin"},
+    {"id": 4, "name": "Suite"},
+    {"id": 5, "name": "Deluxe"},
+    {"id": 6, "name": "Superior"},
+]
+
+_STOPWORDS = {"habitacion", "cuarto", "room", "quarto", "la", "the"}
+
+
+def _singular(token: str) -> str:
+    """
+    Raíz sin plural (es/en/pt): "dobles"/"doble" → "dobl", "individuales" → "individual".
+    No es gramática: basta con que singular y plural caigan en la misma clave.
+    """
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        token = token[:-1]
+    if len(token) > 4 and token.endswith("e") and token[-2] in "lrndz":
+        token = token[:-1]
+    return token
+
+
+def alias_key(text: Any) -> str:
+    """Clave de búsqueda: minúsculas, sin acentos, sin plurales ni palabras de relleno."""
+    folded = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode().lower()
+    tokens = "".join(c if c.isalnum() else " " for c in folded).split()
+    singular = (_singular(t) for t in tokens)
+    return " ".join(t for t in singular if t not in _STOPWORDS)
+
+
+def _deletes(key: str) -> Set[str]:
+    return {key[:i] + key[i + 1 :] for i in range(len(key))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Distancia de edición ≤ 1 (inserción, borrado, sustitución o transposición adyacente)."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        return len(diff) == 1 or (
+            len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+        )
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    return any(long_[:i] + long_[i + 1 :] == short for i in range(len(long_)))
+
+
+class RoomTypeCatalog:
+    """Tipos de habitación de un hotel y su índice alias → `id_product`."""
+
+    # Frases cortas para fuzzy: "sute" → suite sí, "sol" → single no
+    MIN_FUZZY_LENGTH = 4
+
+    def __init__(self, room_types: Optional[Iterable[Dict[str, Any]]] = None):
+        self.room_types: Dict[int, Dict[str, Any]] = {}
+        self._aliases: Dict[str, int] = {}
+        self._fuzzy: Dict[str, Set[str]] = {}
+        self.loaded_at: Optional[float] = None
+        self.build(room_types if room_types is not None else DEFAULT_ROOM_TYPES)
+
+    def build(self, room_types: Iterable[Dict[str, Any]]) -> bool:
+        """Reemplaza el catálogo y recalcula los índices; sin tipos válidos conserva el anterior."""
+        types: Dict[int, Dict[str, Any]] = {}
+        for rt in room_types:
+            if not isinstance(rt, dict):
+                continue
+            type_id = rt.get("id", rt.get("id_product"))
+            if type_id in (None, "") or not rt.get("name"):
+                continue
+            types[int(type_id)] = dict(rt, id=int(type_id))
+        if not types:
+            return False
+
+        # Prioridad: nombre exacto del PMS > sinónimos del concepto que menciona
+        aliases: Dict[str, Optional[int]] = {}
+        for type_id, rt in types.items():
+            aliases.setdefault(alias_key(rt["name"]), type_id)
+            aliases.setdefault(str(type_id), type_id)
+
+        concept_aliases: Dict[str, Optional[int]] = {}
+        for type_id, rt in types.items():
+            name = f" {alias_key(rt['name'])} "
+            for synonyms in ROOM_TYPE_SYNONYMS.values():
+                keys = [alias_key(s) for s in synonyms]
+                if not any(f" {k} " in name for k in keys):
+                    continue
+                for key in keys:
+                    if key in concept_aliases and concept_aliases[key] != type_id:
+                        concept_aliases[key] = None  # ambiguo: "doble" con "Doble" y "Doble Superior"
+                    else:
+                        concept_aliases[key] = type_id
+        for key, type_id in concept_aliases.items():
+            aliases.setdefault(key, type_id)
+
+        index = {key: type_id for key, type_id in aliases.items() if type_id is not None}
+        fuzzy: Dict[str, Set[str]] = {}
+        for key in index:
+            if len(key) >= self.MIN_FUZZY_LENGTH:
+                for variant in _deletes(key) | {key}:
+                    fuzzy.setdefault(variant, set()).add(key)
+
+        # Reemplazo atómico para lectores concurrentes
+        self.room_types, self._aliases, self._fuzzy = types, index, fuzzy
+        self.loaded_at = time.time()
+        return True
+
+    def resolve(self, phrase: Optional[str]) -> Optional[int]:
+        """`id_product` para la frase del huésped, o None si no hay una coincidencia única."""
+        key = alias_key(phrase)
+        if not key:
+            return None
+        type_id = self._lookup(key)
+        if type_id is not None or " " not in key:
+            return type_id
+        # Frase libre ("suites de lujo"): vale si todas las palabras reconocidas coinciden en un tipo
+        ids = {self._lookup(token) for token in key.split()} - {None}
+        return ids.pop() if len(ids) == 1 else None
+
+    def _lookup(self, key: str) -> Optional[int]:
+        if key in self._aliases:
+            return self._aliases[key]
+        if len(key) < self.MIN_FUZZY_LENGTH:
+            return None
+        candidates: Set[str] = set()
+        for variant in _deletes(key) | {key}:
+            candidates |= self._fuzzy.get(variant, set())
+        ids = {self._aliases[c] for c in candidates if _within_one_edit(key, c)}
+        return ids.pop() if len(ids) == 1 else None
+
+    def name_for(self, type_id: Optional[int]) -> Optional[str]:
+        rt = self.room_types.get(type_id) if type_id is not None else None
+        return rt.get("name") if rt else None
+
+    async def refresh(self, client: Any) -> bool:
+        """Recarga desde el PMS; ante un error se conserva el catálogo anterior."""
+        try:
+            room_types = await client.get_room_types()
+        except Exception as e:
+            logger.warning("room_type_catalog.refresh_failed", error=str(e))
+            return False
+        if not room_types or not self.build(room_types):
+            logger.warning("room_type_catalog.empty_response")
+            return False
+        logger.info("room_type_catalog.loaded", room_types=len(self.room_types), aliases=len(self._aliases))
+        return True
+
+
+_catalogs: Dict[str, RoomTypeCatalog] = {}
+
+
+def get_room_type_catalog(hotel_id: Any = None) -> RoomTypeCatalog:
+    """Catálogo del hotel/tenant (uno por `hotel_id`, compartido en el proceso)."""
+    key = str(hotel_id if hotel_id is not None else getattr(settings, "pms_hotel_id", 1))
+    if key not in _catalogs:
+        _catalogs[key] = RoomTypeCatalog()
+    return _catalogs[key]
+
+
+class RoomTypeCatalogRefresher:
+    """Refresca periódicamente el catálogo de un `QloAppsAdapter` desde el PMS."""
+
+    def __init__(self, adapter: Any, interval: Optional[float] = None):
+        self.adapter = adapter
+        self.catalog: RoomTypeCatalog = adapter.room_types
+        self.interval = float(interval if interval is not None else settings.pms_room_type_refresh_seconds)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        # La primera carga corre en segundo plano: el arranque no espera al PMS
+        self._task = asyncio.create_task(self._loop())
+        logger.info("RoomTypeCatalogRefresher started", interval=self.interval)
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):  # pragma: no cover
+                pass
+
+    async def _loop(self):  # pragma: no cover (timing)
+        while True:
+            await self.catalog.refresh(self.adapter.qloapps)
+            await asyncio.sleep(self.interval)
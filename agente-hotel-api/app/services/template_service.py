@@ -1,6 +1,13 @@
 # [PROMPT 2.7] app/services/template_service.py
 
-from typing import Dict, Any
+import asyncio
+import json
+import os
+import string
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, Optional
+
+from ..core.logging import logger
 
 """
 Servicio de plantillas con soporte básico de i18n.
@@ -8,6 +15,9 @@ Servicio de plantillas con soporte básico de i18n.
 - Idioma por defecto: 'es'
 - Fallback: si una clave no existe en el idioma actual, usa 'es'
 - Compatibilidad retro: si no se configura idioma, retorna en español
+- Reentrante: el idioma (y el tenant) se pasan por llamada; las plantillas se
+  precompilan una sola vez al cargar el módulo y se comparten entre instancias.
+- Packs por tenant: overrides de textos recargables en caliente (JSON por tenant).
 """
 
 
@@ -16,6 +26,9 @@ TEXT_TEMPLATES_ES = {
     "availability_found": "Para {checkin}-{checkout}, {room_type} para {guests}: ${price}/noche. Total ${total}. ¿Querés reservar? 🏨",
     "reservation_instructions": "Perfecto! Reservé temporalmente la habitación.\n\nPara confirmar, enviá seña del 30%: ${deposit}\n\nDatos bancarios:\n🏦 {bank_info}\n\nEnviame el comprobante por acá 📄",
     "no_availability": "Lo siento, no hay disponibilidad para esas fechas. ¿Te sirven estas alternativas?\n\n{alternatives}",
+    "reservation_processing": "¡Recibido! Estoy registrando tu reserva en el sistema del hotel ⏳ Te aviso por acá apenas esté confirmada.",
+    "reservation_saga_confirmed": "✅ ¡Reserva confirmada! Código: {booking_reference}.",
+    "reservation_saga_failed": "Lo siento, no pudimos registrar tu reserva y liberamos la habitación. Un agente te va a contactar para ayudarte.",
     "confirmation_received": "¡Excelente! Hemos recibido tu confirmación. Tu reserva está completa.",
     "help_message": "Puedo ayudarte con lo siguiente:",
     "guest_services": "Nuestros servicios para huéspedes incluyen: WiFi gratuito, desayuno continental de 7:00 a 10:00, servicio de limpieza diario, recepción 24 horas, y servicio de lavandería. ¿Necesitas información específica sobre algún servicio?",
@@ -65,6 +78,9 @@ TEXT_TEMPLATES_EN = {
     "availability_found": "For {checkin}-{checkout}, {room_type} for {guests}: ${price}/night. Total ${total}. Would you like to book? 🏨",
     "reservation_instructions": "Great! I've held the room temporarily.\n\nTo confirm, please send a 30% deposit: ${deposit}\n\nBank details:\n🏦 {bank_info}\n\nSend me the receipt here 📄",
     "no_availability": "Sorry, there's no availability for those dates. Do these alternatives work?\n\n{alternatives}",
+    "reservation_processing": "Got it! I'm registering your booking with the hotel system ⏳ I'll let you know here as soon as it's confirmed.",
+    "reservation_saga_confirmed": "✅ Booking confirmed! Reference: {booking_reference}.",
+    "reservation_saga_failed": "Sorry, we couldn't register your booking and have released the room. An agent will contact you to help.",
     "confirmation_received": "Excellent! We've received your confirmation. Your reservation is complete.",
     "help_message": "I can help you with the following:",
     "guest_services": "Our guest services include: Free WiFi, continental breakfast from 7:00 to 10:00, daily housekeeping, 24-hour reception, and laundry service. Do you need details about any service?",
@@ -233,84 +249,246 @@ LOCATION_TEMPLATES = {
 REACTION_TEMPLATES = {"payment_received": "👍", "reservation_confirmed": "✅", "message_understood": "👌"}
 
 
+DEFAULT_LANGUAGE = "es"
+
+# Claves de texto formateables dentro de plantillas interactivas
+_INTERACTIVE_TEXT_KEYS = ("header_text", "body_text", "footer_text")
+
+_FORMATTER = string.Formatter()
+
+
+class CompiledTemplate:
+    """Plantilla de texto precompilada.
+
+    Los campos ``{nombre}`` se traducen una única vez a ``%(nombre)s`` para renderizar
+    con el operador ``%`` en lugar de re-parsear la cadena con ``str.format`` en cada
+    mensaje. Plantillas con especificadores de formato, conversiones o acceso a
+    atributos/índices mantienen ``str.format`` como ruta de render.
+
+    Un placeholder faltante lanza ``KeyError`` igual que ``str.format``.
+    """
+
+    __slots__ = ("source", "fields", "_percent", "_constant")
+
+    def __init__(self, source: str):
+        self.source = source
+        fields: set[str] = set()
+        literals: list[str] = []
+        parts: list[str] = []
+        simple = True
+        # parse() lanza ValueError con llaves desbalanceadas: la plantilla se valida al cargar
+        for literal, field_name, format_spec, conversion in _FORMATTER.parse(source):
+            literals.append(literal)
+            parts.append(literal.replace("%", "%%"))
+            if field_name is None:
+                continue
+            root = field_name.split(".", 1)[0].split("[", 1)[0]
+            if not root.isidentifier() or root != field_name or format_spec or conversion:
+                simple = False
+            if root:
+                fields.add(root)
+            parts.append(f"%({field_name})s")
+        self.fields = frozenset(fields)
+        self._constant = "".join(literals) if not fields and simple else None
+        self._percent = "".join(parts) if simple else None
+
+    def render(self, params: Mapping[str, Any]) -> str:
+        if self._constant is not None:
+            return self._constant
+        if self._percent is not None:
+            return self._percent % params
+        return self.source.format(**params)
+
+
+class CompiledInteractive:
+    """Plantilla interactiva (botones o lista) precompilada.
+
+    Solo ``header_text``/``body_text``/``footer_text`` se formatean. El resto de la
+    estructura (``action_buttons``, ``list_sections``, ...) se comparte entre renders
+    sin copiarse, por lo que los consumidores deben tratarla como de solo lectura.
+    """
+
+    __slots__ = ("_static", "_texts", "fields")
+
+    def __init__(self, template: Mapping[str, Any]):
+        self._texts = tuple(
+            (key, CompiledTemplate(template[key]))
+            for key in _INTERACTIVE_TEXT_KEYS
+            if isinstance(template.get(key), str)
+        )
+        text_keys = {key for key, _ in self._texts}
+        self._static = MappingProxyType({k: v for k, v in template.items() if k not in text_keys})
+        self.fields = frozenset().union(*(tpl.fields for _, tpl in self._texts))
+
+    def render(self, params: Mapping[str, Any]) -> Dict[str, Any]:
+        result = dict(self._static)
+        for key, tpl in self._texts:
+            result[key] = tpl.render(params)
+        return result
+
+
+def _compile_text_table(templates: Mapping[str, str]) -> Dict[str, CompiledTemplate]:
+    return {name: CompiledTemplate(text) for name, text in templates.items()}
+
+
+def _warn_placeholder_mismatch(language: str, table: Mapping[str, Any], reference: Mapping[str, Any]) -> None:
+    """Registra traducciones cuyos placeholders no coinciden con la plantilla base (es)."""
+    for name, tpl in table.items():
+        ref = reference.get(name)
+        if ref is not None and tpl.fields != ref.fields:
+            logger.warning(
+                "template_service.placeholder_mismatch",
+                template=name,
+                language=language,
+                expected=sorted(ref.fields),
+                found=sorted(tpl.fields),
+            )
+
+
+def _build_lookup_tables(compiled_by_lang: Mapping[str, Mapping[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Aplana el fallback a español: una sola búsqueda de dict por render."""
+    base = compiled_by_lang.get(DEFAULT_LANGUAGE, {})
+    for lang, table in compiled_by_lang.items():
+        if lang != DEFAULT_LANGUAGE:
+            _warn_placeholder_mismatch(lang, table, base)
+    return {lang: {**base, **table} for lang, table in compiled_by_lang.items()}
+
+
+# Plantillas compiladas por idioma (sin fallback) y tablas de búsqueda (con fallback a 'es')
+_BASE_TEXT: Dict[str, Dict[str, CompiledTemplate]] = {
+    lang: _compile_text_table(templates) for lang, templates in _TEXT_TEMPLATES_BY_LANG.items()
+}
+_TEXT_TABLES: Dict[str, Dict[str, CompiledTemplate]] = _build_lookup_tables(_BASE_TEXT)
+_BUTTON_TABLES: Dict[str, Dict[str, CompiledInteractive]] = _build_lookup_tables(
+    {
+        lang: {name: CompiledInteractive(t) for name, t in templates.items()}
+        for lang, templates in {"es": INTERACTIVE_BUTTON_TEMPLATES_ES, "en": INTERACTIVE_BUTTON_TEMPLATES_EN}.items()
+    }
+)
+_LIST_TABLES: Dict[str, Dict[str, CompiledInteractive]] = _build_lookup_tables(
+    {
+        lang: {name: CompiledInteractive(t) for name, t in templates.items()}
+        for lang, templates in {"es": INTERACTIVE_LIST_TEMPLATES_ES, "en": INTERACTIVE_LIST_TEMPLATES_EN}.items()
+    }
+)
+
+# Packs por tenant: tenant_id -> idioma -> tabla de búsqueda ya combinada.
+# Se reemplaza por copia completa (copy-on-write), nunca se muta in-place.
+_TENANT_TEXT_TABLES: Dict[str, Dict[str, Dict[str, CompiledTemplate]]] = {}
+
+
+def register_tenant_pack(tenant_id: str, pack: Mapping[str, Mapping[str, str]]) -> None:
+    """Registra (o reemplaza) el pack de textos de un tenant.
+
+    ``pack`` tiene la forma ``{"es": {"check_in_info": "..."}, "pt": {...}}``. Puede
+    sobrescribir plantillas existentes o agregar idiomas nuevos. Precedencia al
+    renderizar: tenant[idioma] > global[idioma] > tenant[es] > global[es].
+
+    Raises:
+        ValueError: si una plantilla está mal formada o usa placeholders que la
+            plantilla global equivalente no recibe.
+    """
+    global _TENANT_TEXT_TABLES
+    compiled: Dict[str, Dict[str, CompiledTemplate]] = {}
+    reference = _BASE_TEXT[DEFAULT_LANGUAGE]
+    for lang, templates in pack.items():
+        table = _compile_text_table(templates)
+        for name, tpl in table.items():
+            ref = _BASE_TEXT.get(lang, {}).get(name) or reference.get(name)
+            if ref is not None and not tpl.fields <= ref.fields:
+                raise ValueError(
+                    f"Template '{name}' ({lang}) for tenant '{tenant_id}' uses unknown placeholders: "
+                    f"{sorted(tpl.fields - ref.fields)}"
+                )
+        compiled[lang] = table
+
+    tenant_default = compiled.get(DEFAULT_LANGUAGE, {})
+    merged = {
+        lang: {**reference, **tenant_default, **_BASE_TEXT.get(lang, {}), **compiled.get(lang, {})}
+        for lang in set(_BASE_TEXT) | set(compiled)
+    }
+    _TENANT_TEXT_TABLES = {**_TENANT_TEXT_TABLES, tenant_id: merged}
+    logger.info("template_service.tenant_pack_registered", tenant_id=tenant_id, languages=sorted(compiled))
+
+
+def unregister_tenant_pack(tenant_id: str) -> bool:
+    """Elimina el pack de un tenant. Devuelve True si existía."""
+    global _TENANT_TEXT_TABLES
+    if tenant_id not in _TENANT_TEXT_TABLES:
+        return False
+    _TENANT_TEXT_TABLES = {tid: tables for tid, tables in _TENANT_TEXT_TABLES.items() if tid != tenant_id}
+    return True
+
+
 class TemplateService:
-    def __init__(self, default_language: str = "es"):
-        self._language = default_language if default_language in _TEXT_TEMPLATES_BY_LANG else "es"
+    """Renderizador de plantillas sin estado por mensaje.
+
+    El idioma y el tenant se pasan en cada llamada, por lo que una misma instancia
+    puede atender mensajes concurrentes en distintos idiomas. ``set_language`` se
+    conserva solo como idioma por defecto para llamadas que no indican ``language``.
+    """
+
+    def __init__(self, default_language: str = DEFAULT_LANGUAGE):
+        self._language = default_language or DEFAULT_LANGUAGE
 
     def set_language(self, language: str) -> None:
-        """Define el idioma por defecto para las respuestas."""
-        self._language = language if language in _TEXT_TEMPLATES_BY_LANG else "es"
+        """Define el idioma por defecto (usado cuando una llamada no pasa ``language``)."""
+        self._language = language or DEFAULT_LANGUAGE
+
+    def _text_table(self, language: Optional[str], tenant_id: Optional[str]) -> Dict[str, CompiledTemplate]:
+        tables = (_TENANT_TEXT_TABLES.get(tenant_id) if tenant_id else None) or _TEXT_TABLES
+        return tables.get(language or self._language) or tables[DEFAULT_LANGUAGE]
 
-    def get_response(self, template_name: str, **kwargs) -> str:
+    def get_response(
+        self, template_name: str, language: Optional[str] = None, tenant_id: Optional[str] = None, **kwargs
+    ) -> str:
         """Obtiene respuestas de texto simple con i18n y fallback a 'es'."""
-        lang = self._language
-        # 1) Intentar idioma actual
-        template = _TEXT_TEMPLATES_BY_LANG.get(lang, {}).get(template_name)
-        # 2) Fallback a español
+        template = self._text_table(language, tenant_id).get(template_name)
         if template is None:
-            template = _TEXT_TEMPLATES_BY_LANG.get("es", {}).get(template_name, "")
-        return template.format(**kwargs)
-
-    def get_template(self, template_name: str, data: Dict[str, Any] | None = None) -> str:
+            return ""
+        return template.render(kwargs)
+
+    def get_template(
+        self,
+        template_name: str,
+        data: Dict[str, Any] | None = None,
+        language: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> str:
         """Compatibilidad: retorna texto formateado (sincrónico).
 
         Tests e integraciones existentes llaman a get_template y esperan un string.
         """
         params = data or {}
-        return self.get_response(template_name, **params)
-
-    async def get_template_dict(self, template_name: str, data: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        return self.get_response(template_name, language=language, tenant_id=tenant_id, **params)
+
+    async def get_template_dict(
+        self,
+        template_name: str,
+        data: Dict[str, Any] | None = None,
+        language: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """Versión asíncrona que retorna un dict {'text': ...} para servicios que lo requieren."""
         params = data or {}
-        text = self.get_response(template_name, **params)
+        text = self.get_response(template_name, language=language, tenant_id=tenant_id, **params)
         return {"text": text}
 
-    def get_interactive_buttons(self, template_name: str, **kwargs) -> Dict[str, Any]:
+    def get_interactive_buttons(self, template_name: str, language: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """Obtiene una plantilla para mensaje interactivo con botones (i18n con fallback)."""
-        lang = self._language
-        lang_map = {"es": INTERACTIVE_BUTTON_TEMPLATES_ES, "en": INTERACTIVE_BUTTON_TEMPLATES_EN}
-        template = lang_map.get(lang, {}).get(template_name) or INTERACTIVE_BUTTON_TEMPLATES_ES.get(template_name)
-        if not template:
+        table = _BUTTON_TABLES.get(language or self._language) or _BUTTON_TABLES[DEFAULT_LANGUAGE]
+        template = table.get(template_name)
+        if template is None:
             return {}
+        return template.render(kwargs)
 
-        result = {k: (v.copy() if isinstance(v, list) else v) for k, v in template.items()}
-
-        # Formatear textos con los parámetros
-        body = result.get("body_text")
-        if isinstance(body, str):
-            result["body_text"] = body.format(**kwargs)
-        header = result.get("header_text")
-        if isinstance(header, str):
-            result["header_text"] = header.format(**kwargs)
-        footer = result.get("footer_text")
-        if isinstance(footer, str):
-            result["footer_text"] = footer.format(**kwargs)
-
-        return result
-
-    def get_interactive_list(self, template_name: str, **kwargs) -> Dict[str, Any]:
+    def get_interactive_list(self, template_name: str, language: Optional[str] = None, **kwargs) -> Dict[str, Any]:
         """Obtiene una plantilla para mensaje interactivo con lista (i18n con fallback)."""
-        lang = self._language
-        lang_map = {"es": INTERACTIVE_LIST_TEMPLATES_ES, "en": INTERACTIVE_LIST_TEMPLATES_EN}
-        template = lang_map.get(lang, {}).get(template_name) or INTERACTIVE_LIST_TEMPLATES_ES.get(template_name)
-        if not template:
+        table = _LIST_TABLES.get(language or self._language) or _LIST_TABLES[DEFAULT_LANGUAGE]
+        template = table.get(template_name)
+        if template is None:
             return {}
-
-        # Copia superficial con manejo de listas/estructuras
-        result = {k: (v.copy() if isinstance(v, list) else v) for k, v in template.items()}
-
-        # Formatear textos con los parámetros
-        body = result.get("body_text")
-        if isinstance(body, str):
-            result["body_text"] = body.format(**kwargs)
-        header = result.get("header_text")
-        if isinstance(header, str):
-            result["header_text"] = header.format(**kwargs)
-        footer = result.get("footer_text")
-        if isinstance(footer, str):
-            result["footer_text"] = footer.format(**kwargs)
-
-        return result
+        return template.render(kwargs)
 
     def get_location(self, template_name: str, **kwargs) -> Dict[str, Any]:
         """Obtiene una plantilla de ubicación."""
@@ -351,6 +529,73 @@ class TemplateService:
         return {"text": text, "audio_data": audio_data, "location": location_data}
 
 
+class TemplatePackWatcher:
+    """Recarga en caliente packs de plantillas por tenant desde un directorio.
+
+    Cada archivo ``<tenant_id>.json`` contiene ``{"<idioma>": {"<plantilla>": "<texto>"}}``.
+    Solo se recompilan archivos cuyo mtime cambió; un archivo inválido se registra y se
+    conserva el pack anterior. Borrar el archivo elimina el pack del tenant.
+    """
+
+    def __init__(self, directory: str, refresh_interval: int = 60):
+        self.directory = directory
+        self.refresh_interval = refresh_interval
+        self._mtimes: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def reload(self) -> int:
+        """Escanea el directorio y aplica cambios. Devuelve la cantidad de packs modificados."""
+        try:
+            entries = {
+                name[: -len(".json")]: os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".json")
+            }
+        except OSError as e:
+            logger.warning("template_service.pack_dir_unreadable", directory=self.directory, error=str(e))
+            return 0
+
+        changed = 0
+        for tenant_id in set(self._mtimes) - set(entries):
+            unregister_tenant_pack(tenant_id)
+            del self._mtimes[tenant_id]
+            changed += 1
+
+        for tenant_id, path in entries.items():
+            try:
+                mtime = os.stat(path).st_mtime
+                if self._mtimes.get(tenant_id) == mtime:
+                    continue
+                with open(path, encoding="utf-8") as fh:
+                    register_tenant_pack(tenant_id, json.load(fh))
+                self._mtimes[tenant_id] = mtime
+                changed += 1
+            except (OSError, ValueError) as e:
+                logger.warning("template_service.pack_reload_failed", tenant_id=tenant_id, path=path, error=str(e))
+        return changed
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self.reload)
+        self._task = asyncio.create_task(self._auto_reload_loop())
+        logger.info("TemplatePackWatcher started", directory=self.directory, packs=len(self._mtimes))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):  # pragma: no cover
+                pass
+
+    async def _auto_reload_loop(self):  # pragma: no cover (timing)
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                logger.warning("template_service.pack_auto_reload_failed", error=str(e))
+
+
 # Singleton y factory para compatibilidad con dependencias existentes
 _TEMPLATE_SERVICE_SINGLETON: TemplateService | None = None
 
@@ -23,10 +23,13 @@ from ..exceptions.audio_exceptions import AudioDownloadError
 from ..services.audio_processor import AudioProcessor
 from ..core.correlation import correlation_headers
 from .feature_flag_service import get_feature_flag_service
+from .whatsapp_media_cache import get_media_cache, is_media_id_error, is_media_id_rejection
+from .whatsapp_sender import GRAPH_API_LIMITS, GRAPH_API_TIMEOUT, close_outbound_sender, get_outbound_sender
 import asyncio
 import inspect
 import os
 import random
+import time
 
 logger = structlog.get_logger(__name__)
 
@@ -97,6 +100,26 @@ whatsapp_rate_limit_remaining: Gauge = _safe_gauge(
 )
 
 
+# Flag de delay humano cacheado: evita una consulta al FeatureFlagService por envío
+_HUMANIZE_FLAG_TTL = 30.0
+_humanize_flag_cache: Tuple[float, bool] = (0.0, False)
+
+
+async def _humanize_delay_enabled() -> bool:
+    global _humanize_flag_cache
+    expires_at, enabled = _humanize_flag_cache
+    now = time.monotonic()
+    if now < expires_at:
+        return enabled
+    try:
+        ff = await get_feature_flag_service()
+        enabled = bool(await ff.is_enabled("humanize.delay.enabled", default=False))
+    except Exception:
+        enabled = False
+    _humanize_flag_cache = (now + _HUMANIZE_FLAG_TTL, enabled)
+    return enabled
+
+
 # --- Module-level helper for tests ---
 def convert_audio_format(audio_bytes: bytes) -> Tuple[bytes, str]:
     """
@@ -120,7 +143,7 @@ class WhatsAppMetaClient:
     - Prometheus metrics
     """
 
-    def __init__(self):
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
         self.base_url = "https://graph.facebook.com/v18.0"
         self.access_token = settings.whatsapp_access_token.get_secret_value()
         self.phone_number_id = settings.whatsapp_phone_number_id
@@ -129,23 +152,11 @@ class WhatsAppMetaClient:
         # Compat: Algunas pruebas esperan este atributo
         self._api_url = self.base_url
 
-        # Configuración de timeouts explícitos
-        timeout_config = httpx.Timeout(
-            connect=5.0,  # Timeout para establecer conexión
-            read=30.0,  # Timeout para leer respuesta (permite mensajes largos)
-            write=10.0,  # Timeout para enviar datos
-            pool=30.0,  # Timeout para obtener conexión del pool
-        )
-
-        # Límites de conexión
-        limits = httpx.Limits(
-            max_keepalive_connections=20,  # Conexiones keepalive máximas
-            max_connections=100,  # Conexiones totales máximas
-            keepalive_expiry=30.0,  # Expiración de keepalive en segundos
-        )
-
-        self.client = httpx.AsyncClient(timeout=timeout_config, limits=limits)
-        self.audio_processor = AudioProcessor()
+        # Con http_client (pool compartido del WhatsAppOutboundSender) el cliente no
+        # es dueño de la conexión y close() no la cierra.
+        self._owns_http_client = http_client is None
+        self.client = http_client or httpx.AsyncClient(timeout=GRAPH_API_TIMEOUT, limits=GRAPH_API_LIMITS)
+        self._audio_processor: Optional[AudioProcessor] = None
 
         # PERFORMANCE FIX: Persistent aiohttp session for media downloads
         # Reuses TCP connections (keep-alive) instead of creating new session per request
@@ -154,6 +165,17 @@ class WhatsAppMetaClient:
 
         logger.info("whatsapp.client.initialized", phone_number_id=self.phone_number_id)
 
+    @property
+    def audio_processor(self) -> AudioProcessor:
+        """AudioProcessor perezoso: solo los mensajes de audio entrantes lo necesitan."""
+        if self._audio_processor is None:
+            self._audio_processor = AudioProcessor()
+        return self._audio_processor
+
+    @audio_processor.setter
+    def audio_processor(self, value: AudioProcessor) -> None:
+        self._audio_processor = value
+
     async def __aenter__(self):
         """Allow usage as an async context manager (tests/leaks-friendly)."""
         return self
@@ -317,7 +339,8 @@ class WhatsAppMetaClient:
         if self._aiohttp_connector:
             await self._aiohttp_connector.close()
 
-        await self.client.aclose()
+        if self._owns_http_client:
+            await self.client.aclose()
         logger.info("whatsapp.client.closed")
 
     def _auth_headers(self) -> Dict[str, str]:
@@ -356,13 +379,8 @@ class WhatsAppMetaClient:
 
         try:
             # Delay humano opcional (no aplicar en tests)
-            try:
-                if "PYTEST_CURRENT_TEST" not in os.environ:
-                    ff = await get_feature_flag_service()
-                    if await ff.is_enabled("humanize.delay.enabled", default=False):
-                        await asyncio.sleep(random.uniform(1.0, 2.5))
-            except Exception:
-                pass
+            if "PYTEST_CURRENT_TEST" not in os.environ and await _humanize_delay_enabled():
+                await asyncio.sleep(random.uniform(1.0, 2.5))
 
             with whatsapp_api_latency.labels(endpoint="messages", method="POST").time():
                 resp_obj = self.client.post(endpoint, json=payload, headers=headers)
@@ -554,7 +572,9 @@ class WhatsAppClient(WhatsAppMetaClient):
         """
         endpoint = f"{self.base_url}/{self.phone_number_id}/messages"
 
-        image_payload = {"link": image_url}
+        # Imagen precargada: referenciar el media id en vez de que Meta la descargue otra vez
+        cached_media_id = get_media_cache().lookup_url(self.phone_number_id, image_url)
+        image_payload = {"id": cached_media_id} if cached_media_id else {"link": image_url}
         if caption:
             image_payload["caption"] = caption
 
@@ -585,6 +605,12 @@ class WhatsAppClient(WhatsAppMetaClient):
             # Handle error responses
             error_data = response.json() if response.text else {}
 
+            # Media id caducado: invalidar y reenviar por link (otros 400 no se arreglan así)
+            if cached_media_id and is_media_id_rejection(response.status_code, error_data):
+                logger.warning("whatsapp.send_image.cached_media_rejected", media_id=cached_media_id)
+                get_media_cache().invalidate_media_id(self.phone_number_id, cached_media_id)
+                return await self.send_image(to, image_url, caption)
+
             # Media-specific error handling
             if response.status_code in (400, 404):
                 error_message = error_data.get("error", {}).get("message", "Image error")
@@ -1262,42 +1288,112 @@ class WhatsAppClient(WhatsAppMetaClient):
     async def _send_audio_production(
         self, to: str, audio_bytes: bytes, content_type: str, filename: str
     ) -> Dict[str, Any]:
-        """Send audio via production WhatsApp API."""
-        upload_url = f"{self._api_url}/{self.phone_number_id}/media"
-        form = aiohttp.FormData()
-        form.add_field("messaging_product", "whatsapp")
-        form.add_field("file", audio_bytes, filename=filename, content_type=content_type)
+        """Send audio via production WhatsApp API (media id reutilizado si ya se subió)."""
+        send_result = await self.send_cached_media(to, "audio", audio_bytes, content_type, filename=filename)
 
-        session = await self._get_aiohttp_session()
-        async with session.post(
-            upload_url, data=form, headers={"Authorization": f"Bearer {self.access_token}"}
-        ) as upload_resp:
-            if upload_resp.status != 200:
-                try:
-                    err_json = await upload_resp.json()
-                except Exception:
-                    err_json = {}
-                getattr(self, "_handle_error_response")(upload_resp.status, err_json, "upload_audio")
-            upload_json = await upload_resp.json()
-            media_id = upload_json.get("id")
+        whatsapp_messages_sent.labels(type="audio", status="success").inc()
+        logger.info("whatsapp.send_audio_message.success", to=to, message_id=send_result.get("message_id"))
+        return send_result
+
+    # =========================================================================
+    # MEDIA ID CACHE - subida única por contenido (ver whatsapp_media_cache.py)
+    # =========================================================================
+
+    async def upload_media(self, data: bytes, mime_type: str, filename: str = "media") -> str:
+        """Sube media a `/{phone_number_id}/media` y devuelve el media id."""
+        upload_url = f"{self._api_url}/{self.phone_number_id}/media"
+        with whatsapp_api_latency.labels(endpoint="media/upload", method="POST").time():
+            response = await self.client.post(
+                upload_url,
+                data={"messaging_product": "whatsapp", "type": mime_type},
+                files={"file": (filename, data, mime_type)},
+                headers=self._auth_headers(),
+            )
+        status, upload_json = await self._read_status_and_json(response)
+        if status != 200:
+            getattr(self, "_handle_error_response")(status, upload_json, "upload_media")
 
+        media_id = upload_json.get("id")
         if not media_id:
-            whatsapp_messages_sent.labels(type="audio", status="upload_failed").inc()
-            logger.error("whatsapp.send_audio_message.no_media_id", to=to)
+            whatsapp_messages_sent.labels(type=mime_type.split("/")[0], status="upload_failed").inc()
+            logger.error("whatsapp.upload_media.no_media_id", mime_type=mime_type)
             raise WhatsAppMediaError("No media ID in upload response")
+        return media_id
 
-        payload = {
-            "messaging_product": "whatsapp",
-            "recipient_type": "individual",
-            "to": to,
-            "type": "audio",
-            "audio": {"id": media_id},
-        }
-        send_result = await self._send_message(to, payload)
+    async def send_cached_media(
+        self,
+        to: str,
+        media_type: str,
+        data: bytes,
+        mime_type: str,
+        caption: Optional[str] = None,
+        filename: str = "media",
+    ) -> Dict[str, Any]:
+        """
+        Envía audio/imagen/documento por media id, subiendo el contenido solo la
+        primera vez. Si Meta rechaza un id caducado se invalida y se re-sube una vez.
+        """
+        cache = get_media_cache()
 
-        whatsapp_messages_sent.labels(type="audio", status="success").inc()
-        logger.info("whatsapp.send_audio_message.success", to=to, message_id=send_result.get("message_id"))
-        return send_result
+        async def _upload(payload_bytes: bytes, mtype: str) -> str:
+            return await self.upload_media(payload_bytes, mtype, filename)
+
+        media_id, digest = await cache.get_or_upload(self.phone_number_id, data, mime_type, _upload)
+
+        def _payload(mid: str) -> Dict[str, Any]:
+            media: Dict[str, Any] = {"id": mid}
+            if caption:
+                media["caption"] = caption
+            return {
+                "messaging_product": "whatsapp",
+                "recipient_type": "individual",
+                "to": to,
+                "type": media_type,
+                media_type: media,
+            }
+
+        try:
+            return await self._send_message(to, _payload(media_id))
+        except WhatsAppError as e:
+            if not is_media_id_error(e):
+                raise
+            logger.warning("whatsapp.media_cache.reupload", media_id=media_id, error_code=e.error_code)
+            cache.invalidate(self.phone_number_id, digest)
+            media_id, _ = await cache.get_or_upload(self.phone_number_id, data, mime_type, _upload, reason="reupload")
+            return await self._send_message(to, _payload(media_id))
+
+    async def preload_image(self, image_url: str) -> str:
+        """Descarga una imagen una vez y la deja subida (alias por URL para send_image)."""
+        cached = get_media_cache().lookup_url(self.phone_number_id, image_url)
+        if cached:
+            return cached
+        response = await self.client.get(image_url)
+        if response.status_code != 200:
+            raise WhatsAppMediaError(
+                f"Failed to fetch image: HTTP {response.status_code}", context={"image_url": image_url}
+            )
+        mime_type = response.headers.get("content-type", "image/jpeg").split(";")[0]
+        filename = image_url.rsplit("/", 1)[-1] or "image.jpg"
+
+        async def _upload(payload_bytes: bytes, mtype: str) -> str:
+            return await self.upload_media(payload_bytes, mtype, filename)
+
+        media_id, _ = await get_media_cache().get_or_upload(
+            self.phone_number_id, response.content, mime_type, _upload, reason="preload", url=image_url
+        )
+        return media_id
+
+    async def preload_audio(self, audio_data: bytes, filename: str = "audio.ogg") -> str:
+        """Sube audio TTS recurrente; los envíos con los mismos bytes reutilizan el id."""
+        audio_bytes, content_type = convert_audio_format(audio_data)
+
+        async def _upload(payload_bytes: bytes, mtype: str) -> str:
+            return await self.upload_media(payload_bytes, mtype, filename)
+
+        media_id, _ = await get_media_cache().get_or_upload(
+            self.phone_number_id, audio_bytes, content_type, _upload, reason="preload"
+        )
+        return media_id
 
     async def _send_audio_test_patched(
         self, to: str, audio_bytes: bytes, content_type: str, filename: str
@@ -1543,3 +1639,23 @@ class WhatsAppClient(WhatsAppMetaClient):
 # Some methods were historically defined on the compatibility alias.
 # Point the exported WhatsAppMetaClient name to the subclass that includes all methods.
 WhatsAppMetaClient = WhatsAppClient
+
+
+_shared_client: Optional[WhatsAppMetaClient] = None
+
+
+def get_whatsapp_client() -> WhatsAppMetaClient:
+    """Cliente de proceso sobre el pool compartido del WhatsAppOutboundSender."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = WhatsAppMetaClient(http_client=get_outbound_sender().client)
+    return _shared_client
+
+
+async def close_whatsapp_client() -> None:
+    """Cierra el cliente de proceso y el pool compartido (shutdown)."""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None:
+        await client.close()
+    await close_outbound_sender()
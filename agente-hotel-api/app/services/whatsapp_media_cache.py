@@ -0,0 +1,272 @@
+"""
+Caché de media ids salientes de WhatsApp.
+
+Meta devuelve un media id al subir un archivo a `/{phone_number_id}/media`; ese
+id se puede reutilizar en cualquier mensaje hasta que expira (30 días). Este
+módulo mapea hash de contenido → media id para no re-subir el mismo audio TTS
+o la misma foto de habitación por cada huésped:
+
+- Expiración por entrada (con margen) y re-subida si Meta rechaza un id caducado.
+- Single-flight: envíos concurrentes del mismo contenido comparten una subida.
+- Alias por URL para imágenes precargadas (`send_image(image_url=...)`).
+- Precarga de activos frecuentes: fotos de `utils/room_images.py` y audio de
+  las plantillas fijas (sin placeholders) del TemplateService.
+- Bytes subidos por hora (métrica Prometheus + ventana deslizante en `stats()`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import string
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import structlog
+from prometheus_client import Counter
+
+from ..core.prometheus import registry
+from ..core.settings import settings
+from ..exceptions.whatsapp_exceptions import WhatsAppError
+
+logger = structlog.get_logger(__name__)
+
+# Códigos de Graph API para media inaccesible (descarga/subida del media id)
+MEDIA_ID_ERROR_CODES = frozenset({"131052", "131053"})
+# "Invalid parameter": solo cuenta si el parámetro rechazado es el media id
+INVALID_PARAMETER_CODE = "100"
+
+whatsapp_media_upload_bytes = Counter(
+    "whatsapp_media_upload_bytes_total",
+    "Bytes subidos a la Graph API como media",
+    ["kind", "reason"],
+    registry=registry,
+)
+whatsapp_media_cache_lookups = Counter(
+    "whatsapp_media_cache_lookups_total",
+    "Búsquedas en la caché de media ids salientes",
+    ["result"],
+    registry=registry,
+)
+
+Uploader = Callable[[bytes, str], Awaitable[str]]
+
+
+def content_hash(data: bytes, mime_type: str) -> str:
+    return hashlib.sha256(mime_type.encode() + b"\0" + data).hexdigest()
+
+
+def is_media_id_rejection(status_code: Optional[int], error_data: Dict[str, Any]) -> bool:
+    """
+    True si la respuesta de la Graph API rechaza el media id (caducado, borrado o inválido).
+
+    Otros 400/404 (destinatario inválido, caption demasiado largo...) no se
+    arreglan volviendo a subir la media, así que no cuentan.
+    """
+    if status_code not in (400, 404):
+        return False
+    error = error_data.get("error") or {}
+    code = str(error.get("code"))
+    if code in MEDIA_ID_ERROR_CODES:
+        return True
+    if code != INVALID_PARAMETER_CODE:
+        return False
+    details = f"{error.get('message', '')} {(error.get('error_data') or {}).get('details', '')}".lower()
+    return "media" in details or "['id']" in details
+
+
+def is_media_id_error(error: BaseException) -> bool:
+    """`is_media_id_rejection` para un `WhatsAppError` ya levantado."""
+    if not isinstance(error, WhatsAppError):
+        return False
+    error_data = error.context if isinstance(error.context.get("error"), dict) else {}
+    if not error_data:
+        error_data = {"error": {"code": error.error_code, "message": error.message}}
+    return is_media_id_rejection(error.status_code, error_data)
+
+
+def _media_kind(mime_type: str) -> str:
+    return mime_type.split("/", 1)[0] or "other"
+
+
+@dataclass(frozen=True)
+class _Entry:
+    media_id: str
+    expires_at: float
+
+
+class MediaIdCache:
+    """Hash de contenido → media id, por phone_number_id."""
+
+    def __init__(self, ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.time):
+        self.ttl_seconds = float(ttl_seconds if ttl_seconds is not None else settings.whatsapp_media_id_ttl_seconds)
+        self._clock = clock
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._url_aliases: Dict[Tuple[str, str], str] = {}
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        self._uploads: Deque[Tuple[float, int]] = deque()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, phone_number_id: str, digest: str) -> Optional[str]:
+        entry = self._entries.get((phone_number_id, digest))
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            del self._entries[(phone_number_id, digest)]
+            whatsapp_media_cache_lookups.labels(result="expired").inc()
+            return None
+        return entry.media_id
+
+    def lookup_url(self, phone_number_id: str, url: str) -> Optional[str]:
+        digest = self._url_aliases.get((phone_number_id, url))
+        return self.lookup(phone_number_id, digest) if digest else None
+
+    def store(self, phone_number_id: str, digest: str, media_id: str, url: Optional[str] = None) -> None:
+        self._entries[(phone_number_id, digest)] = _Entry(media_id, self._clock() + self.ttl_seconds)
+        if url:
+            self._url_aliases[(phone_number_id, url)] = digest
+
+    def invalidate(self, phone_number_id: str, digest: str) -> None:
+        self._entries.pop((phone_number_id, digest), None)
+
+    def invalidate_media_id(self, phone_number_id: str, media_id: str) -> None:
+        for key, entry in list(self._entries.items()):
+            if key[0] == phone_number_id and entry.media_id == media_id:
+                del self._entries[key]
+
+    async def get_or_upload(
+        self,
+        phone_number_id: str,
+        data: bytes,
+        mime_type: str,
+        upload: Uploader,
+        *,
+        reason: str = "miss",
+        url: Optional[str] = None,
+    ) -> Tuple[str, str]:
+        """Devuelve (media_id, digest); sube el contenido solo si no hay id vigente."""
+        digest = content_hash(data, mime_type)
+        media_id = self.lookup(phone_number_id, digest)
+        if media_id is not None:
+            self.hits += 1
+            whatsapp_media_cache_lookups.labels(result="hit").inc()
+            if url:
+                self._url_aliases[(phone_number_id, url)] = digest
+            return media_id, digest
+
+        key = (phone_number_id, digest)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.hits += 1
+            whatsapp_media_cache_lookups.labels(result="coalesced").inc()
+            return await asyncio.shield(pending), digest
+
+        self.misses += 1
+        whatsapp_media_cache_lookups.labels(result="miss").inc()
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            media_id = await upload(data, mime_type)
+            self.record_upload(len(data), mime_type, reason)
+            self.store(phone_number_id, digest, media_id, url=url)
+            fut.set_result(media_id)
+            return media_id, digest
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as exc:
+            fut.set_exception(exc)
+            # Evitar "exception was never retrieved" si no había esperadores
+            fut.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def record_upload(self, size: int, mime_type: str, reason: str) -> None:
+        whatsapp_media_upload_bytes.labels(kind=_media_kind(mime_type), reason=reason).inc(size)
+        self._uploads.append((self._clock(), size))
+
+    def bytes_uploaded_last_hour(self) -> int:
+        cutoff = self._clock() - 3600
+        while self._uploads and self._uploads[0][0] < cutoff:
+            self._uploads.popleft()
+        return sum(size for _, size in self._uploads)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "url_aliases": len(self._url_aliases),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bytes_uploaded_last_hour": self.bytes_uploaded_last_hour(),
+        }
+
+
+_media_cache: Optional[MediaIdCache] = None
+
+
+def get_media_cache() -> MediaIdCache:
+    global _media_cache
+    if _media_cache is None:
+        _media_cache = MediaIdCache()
+    return _media_cache
+
+
+# ---------------------------------------------------------------------------
+# Precarga de activos frecuentes
+# ---------------------------------------------------------------------------
+
+
+def room_image_urls() -> List[str]:
+    """URLs únicas de fotos de habitación (varios alias comparten archivo)."""
+    from ..utils.room_images import DEFAULT_ROOM_IMAGE_MAPPING, get_room_image_url
+
+    urls: Dict[str, None] = {}
+    for room_type in DEFAULT_ROOM_IMAGE_MAPPING:
+        url = get_room_image_url(room_type)
+        if url:
+            urls.setdefault(url, None)
+    return list(urls)
+
+
+def phrase_bank(languages: Iterable[str] = ("es", "en")) -> List[str]:
+    """Textos fijos de plantillas: su audio TTS es idéntico en cada envío."""
+    from .template_service import _TEXT_TEMPLATES_BY_LANG
+
+    formatter = string.Formatter()
+    phrases: Dict[str, None] = {}
+    for lang in languages:
+        for text in _TEXT_TEMPLATES_BY_LANG.get(lang, {}).values():
+            if not any(field for _, field, _, _ in formatter.parse(text)):
+                phrases.setdefault(text, None)
+    return list(phrases)
+
+
+async def preload_media_assets(client: Any, audio_processor: Any = None) -> Dict[str, int]:
+    """Sube fotos de habitación y audio del phrase bank; errores no son críticos."""
+    results = {"images": 0, "audio": 0, "failed": 0}
+
+    for url in room_image_urls():
+        try:
+            await client.preload_image(url)
+            results["images"] += 1
+        except Exception as e:
+            results["failed"] += 1
+            logger.warning("whatsapp.media_preload.image_failed", url=url, error=str(e))
+
+    if audio_processor is not None:
+        for text in phrase_bank():
+            try:
+                audio = await audio_processor.generate_audio_response(text, content_type="common_responses")
+                if audio:
+                    await client.preload_audio(audio)
+                    results["audio"] += 1
+            except Exception as e:
+                results["failed"] += 1
+                logger.warning("whatsapp.media_preload.audio_failed", error=str(e))
+
+    logger.info("whatsapp.media_preload.completed", **results)
+    return results
@@ -0,0 +1,291 @@
+"""
+Envío saliente de WhatsApp compartido por proceso.
+
+Un único `httpx.AsyncClient` (HTTP/2 si `h2` está instalado) hacia la Graph API
+con un transporte que aplica, por cada POST a `/{phone_number_id}/messages`:
+
+- Token bucket por phone_number_id ajustado al tier de throughput de Meta.
+- Carriles de prioridad: cuando no hay tokens, las respuestas interactivas se
+  atienden antes que notificaciones y recordatorios (ver `send_priority`).
+- Reintentos con jitter ante 429/5xx, respetando `Retry-After`.
+
+La prioridad viaja en un ContextVar (igual que el correlation id), así los
+métodos de `WhatsAppMetaClient` no cambian de firma:
+
+    with send_priority(SendPriority.BULK):
+        await client.send_message(to=guest, text=reminder)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import importlib.util
+import itertools
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, Awaitable, Iterator, Optional
+
+import httpx
+import structlog
+from prometheus_client import Counter, Histogram
+
+from ..core.prometheus import registry
+from ..core.settings import settings
+
+logger = structlog.get_logger(__name__)
+
+# Timeouts y límites del pool hacia la Graph API (compartidos con WhatsAppMetaClient)
+GRAPH_API_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=30.0)
+GRAPH_API_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30.0)
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+_MESSAGES_PATH = re.compile(r"/(?P<phone_number_id>[^/]+)/messages$")
+
+whatsapp_send_queue_wait = Histogram(
+    "whatsapp_send_queue_wait_seconds",
+    "Espera por token del rate shaper antes de enviar a la Graph API",
+    ["priority"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+    registry=registry,
+)
+whatsapp_send_retries = Counter(
+    "whatsapp_send_retries_total",
+    "Reintentos de envíos a la Graph API por status",
+    ["status"],
+    registry=registry,
+)
+
+
+class SendPriority(IntEnum):
+    """Carriles de envío; menor valor = mayor prioridad."""
+
+    INTERACTIVE = 0  # Respuestas a un mensaje entrante del huésped
+    NOTIFICATION = 1  # Confirmaciones y avisos transaccionales
+    BULK = 2  # Recordatorios de reseñas y envíos programados
+
+
+_send_priority_var: ContextVar[SendPriority] = ContextVar("whatsapp_send_priority", default=SendPriority.INTERACTIVE)
+
+
+@contextmanager
+def send_priority(priority: SendPriority) -> Iterator[None]:
+    """Fija la prioridad de los envíos realizados dentro del bloque."""
+    token = _send_priority_var.set(priority)
+    try:
+        yield
+    finally:
+        _send_priority_var.reset(token)
+
+
+def get_send_priority() -> SendPriority:
+    return _send_priority_var.get()
+
+
+def http2_available() -> bool:
+    """True si el extra `h2` de httpx está instalado."""
+    return importlib.util.find_spec("h2") is not None
+
+
+class PriorityTokenBucket:
+    """Token bucket cuyos esperadores se despiertan por prioridad y luego FIFO."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = SendPriority.INTERACTIVE) -> float:
+        """Consume un token y devuelve los segundos esperados."""
+        self._refill()
+        if self._tokens >= 1 and not self._waiters:
+            self._tokens -= 1
+            return 0.0
+
+        started = time.monotonic()
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._seq), fut))
+        self._drain()
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # El token ya se había asignado: devolverlo
+                self._tokens = min(self.capacity, self._tokens + 1)
+                self._drain()
+            raise
+        return time.monotonic() - started
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._drain()
+
+    def _drain(self) -> None:
+        self._refill()
+        while self._waiters and self._tokens >= 1:
+            _, _, fut = heapq.heappop(self._waiters)
+            if fut.done():
+                continue
+            self._tokens -= 1
+            fut.set_result(None)
+        # Descartar cancelados en la cabeza antes de decidir si hay que esperar
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+        if self._waiters and self._timer is None:
+            delay = (1 - self._tokens) / self.rate
+            self._timer = asyncio.get_running_loop().call_later(max(delay, 0.0), self._on_timer)
+
+
+class ShapedGraphTransport(httpx.AsyncBaseTransport):
+    """Transporte httpx que aplica rate shaping y reintentos a los envíos de mensajes."""
+
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        *,
+        rate_per_second: float,
+        burst: Optional[int] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_cap: float = 8.0,
+    ):
+        self._inner = inner
+        self._rate = rate_per_second
+        self._burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._buckets: dict[str, PriorityTokenBucket] = {}
+
+    def bucket_for(self, phone_number_id: str) -> PriorityTokenBucket:
+        bucket = self._buckets.get(phone_number_id)
+        if bucket is None:
+            bucket = self._buckets[phone_number_id] = PriorityTokenBucket(self._rate, self._burst)
+        return bucket
+
+    def _retry_delay(self, response: httpx.Response, attempt: int) -> float:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(self.backoff_cap, max(0.0, float(retry_after)))
+            except ValueError:
+                pass
+        # Full jitter: evita que los reintentos de varios workers se sincronicen
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2**attempt)))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        match = _MESSAGES_PATH.search(request.url.path) if request.method == "POST" else None
+        if match is None:
+            return await self._inner.handle_async_request(request)
+
+        bucket = self.bucket_for(match.group("phone_number_id"))
+        priority = _send_priority_var.get()
+        attempt = 0
+        while True:
+            waited = await bucket.acquire(priority)
+            whatsapp_send_queue_wait.labels(priority=priority.name.lower()).observe(waited)
+
+            response = await self._inner.handle_async_request(request)
+            if response.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                return response
+
+            delay = self._retry_delay(response, attempt)
+            await response.aread()
+            await response.aclose()
+            whatsapp_send_retries.labels(status=str(response.status_code)).inc()
+            logger.warning(
+                "whatsapp.sender.retry",
+                status=response.status_code,
+                attempt=attempt + 1,
+                delay=round(delay, 3),
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+class WhatsAppOutboundSender:
+    """Dueño del pool de conexiones compartido hacia la Graph API."""
+
+    def __init__(
+        self,
+        *,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        use_http2 = settings.whatsapp_http2_enabled if http2 is None else http2
+        if use_http2 and transport is None and not http2_available():
+            logger.warning("whatsapp.sender.http2_unavailable", hint="pip install 'httpx[http2]'")
+            use_http2 = False
+
+        inner = transport or httpx.AsyncHTTPTransport(http2=use_http2, limits=GRAPH_API_LIMITS)
+        self.transport = ShapedGraphTransport(
+            inner,
+            rate_per_second=rate_per_second or settings.whatsapp_messages_per_second,
+            burst=burst if burst is not None else settings.whatsapp_send_burst,
+            max_retries=settings.whatsapp_send_max_retries if max_retries is None else max_retries,
+        )
+        self.client = httpx.AsyncClient(transport=self.transport, timeout=GRAPH_API_TIMEOUT)
+        self.http2 = use_http2
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+async def send_concurrently(*sends: Awaitable[Any]) -> list[Any]:
+    """Despacha partes independientes de una respuesta (p.ej. imagen + texto) en paralelo.
+
+    Un fallo en una parte no cancela las demás; se registra y se relanza el
+    primer error una vez terminadas todas.
+    """
+    results = await asyncio.gather(*sends, return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    for err in errors:
+        logger.error("whatsapp.sender.part_failed", error=str(err))
+    if errors:
+        raise errors[0]
+    return results
+
+
+_sender: Optional[WhatsAppOutboundSender] = None
+
+
+def get_outbound_sender() -> WhatsAppOutboundSender:
+    """Sender de proceso (se crea en el primer uso)."""
+    global _sender
+    if _sender is None:
+        _sender = WhatsAppOutboundSender()
+        logger.info(
+            "whatsapp.sender.initialized",
+            http2=_sender.http2,
+            rate_per_second=_sender.transport._rate,
+        )
+    return _sender
+
+
+async def close_outbound_sender() -> None:
+    global _sender
+    sender, _sender = _sender, None
+    if sender is not None:
+        await sender.aclose()
@@ -0,0 +1,90 @@
+"""Throughput de un endpoint admin autenticado con JWT antes y después del fast path local.
+
+Antes: cada request verifica la firma HS256 y hace `GET revoked_token:{jti}` en
+Redis. Después: claims verificados en LRU por hash del token y revocaciones en
+un set local sincronizado por pub/sub; el camino común no sale del proceso.
+Redis es fakeredis con 0.3 ms de RTT simulado por comando.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import time
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.security.advanced_jwt_auth import AdvancedJWTAuth, TokenType
+
+REQUESTS = 2000
+CONCURRENCY = 16
+RTT_SECONDS = 0.0003
+
+
+class _NetworkRedis(fakeredis.aioredis.FakeRedis):
+    async def execute_command(self, *args, **kwargs):
+        await asyncio.sleep(RTT_SECONDS)
+        return await super().execute_command(*args, **kwargs)
+
+
+def _app(auth: AdvancedJWTAuth) -> FastAPI:
+    app = FastAPI()
+    bearer = HTTPBearer()
+
+    @app.get("/admin/stats")
+    async def stats(credentials: HTTPAuthorizationCredentials = Depends(bearer)):
+        result = await auth.verify_token(credentials.credentials)
+        if not result["valid"] or result["user"]["role"] not in ["admin", "system"]:
+            raise HTTPException(status_code=403)
+        return {"ok": True}
+
+    return app
+
+
+def _load(fast_path: bool) -> float:
+    async def main():
+        auth = AdvancedJWTAuth()
+        auth.redis_client = _NetworkRedis()
+        if fast_path:
+            await auth.start_revocation_sync()
+        else:
+            auth.claims_cache.max_entries = 0
+        tokens = [
+            auth.create_jwt_token(f"admin-{i}", TokenType.ACCESS, extra_claims={"role": "admin"}).token
+            for i in range(20)
+        ]
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        transport = httpx.ASGITransport(app=_app(auth))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+            async def one(i: int):
+                async with semaphore:
+                    headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+                    response = await client.get("/admin/stats", headers=headers)
+                    assert response.status_code == 200
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+            elapsed = time.perf_counter() - started
+        await auth.close()
+        return REQUESTS / elapsed
+
+    return asyncio.run(main())
+
+
+@pytest.mark.benchmark(group="admin_auth")
+def test_admin_api_throughput_with_local_token_validation(benchmark):
+    before = max(_load(fast_path=False) for _ in range(3))
+    after = benchmark.pedantic(lambda: _load(fast_path=True), rounds=3, iterations=1)
+
+    benchmark.extra_info.update(rps_before=round(before), rps_after=round(after))
+    assert after > before
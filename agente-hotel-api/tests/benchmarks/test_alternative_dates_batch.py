@@ -0,0 +1,81 @@
+"""Búsqueda de fechas alternativas (±3 días): consultas secuenciales vs lote.
+
+Un huésped pide 2 noches y no hay lugar; el flujo de alternativas prueba la
+misma estadía corrida de -3 a +3 días para tres tipos de habitación (21
+consultas). Secuencialmente cada consulta espera a la anterior y cada tipo
+pide sus propias noches; el lote deduplica y pide las 8 noches una sola vez,
+para todos los tipos, en un único rango.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.pms_adapter import AvailabilityQuery, QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+CHECK_IN = date(2030, 7, 12)
+LATENCY = 0.01  # por llamada a QloApps
+
+
+def _alternatives():
+    return [
+        AvailabilityQuery(CHECK_IN + timedelta(days=d), CHECK_IN + timedelta(days=d + 2), 2, room_type)
+        for d in range(-3, 4)
+        for room_type in ("single", "doble", "suite")
+    ]
+
+
+async def _no_wait(*args, **kwargs):
+    return None
+
+
+def _run(batched: bool) -> dict:
+    stub = QloAppsStub(latency=LATENCY)
+
+    async def main():
+        adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis())
+        adapter.qloapps.client = stub.client()
+        adapter.rate_limiter.wait_if_needed = _no_wait
+        started = time.perf_counter()
+        try:
+            if batched:
+                await adapter.check_availability_batch(_alternatives())
+            else:
+                for query in _alternatives():
+                    await adapter.check_availability(*query)
+            return time.perf_counter() - started
+        finally:
+            await adapter.close()
+
+    elapsed = asyncio.run(main())
+    return {"calls": stub.calls["/hotel_booking"], "seconds": elapsed}
+
+
+@pytest.mark.benchmark(group="pms_availability_batch")
+def test_sequential_alternatives(benchmark):
+    result = benchmark.pedantic(_run, args=(False,), rounds=3, iterations=1)
+    benchmark.extra_info.update(result)
+    assert result["calls"] == 7 * 3  # por tipo: un rango y luego la noche nueva de cada corrimiento
+
+
+@pytest.mark.benchmark(group="pms_availability_batch")
+def test_batched_alternatives(benchmark):
+    result = benchmark.pedantic(_run, args=(True,), rounds=3, iterations=1)
+    benchmark.extra_info.update(result)
+    sequential = _run(False)
+    benchmark.extra_info["sequential_calls"] = sequential["calls"]
+    benchmark.extra_info["sequential_seconds"] = sequential["seconds"]
+    assert result["calls"] == 1
+    assert result["seconds"] < sequential["seconds"]
@@ -0,0 +1,88 @@
+"""Búsqueda de alternativas sobre un año de disponibilidad con 30 tipos de habitación.
+
+El índice (prefijos de tarifa + sparse table de cupo) se arma una vez por
+horizonte; cada búsqueda evalúa ventanas de ±7 días, ±2 noches y los 30 tipos
+(~2.200 candidatos) en O(1) cada una. Los cupos y precios se verifican contra
+recorrer las noches de cada candidato.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import random
+import time
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.alternatives_engine import AlternativesEngine, AvailabilityIndex
+
+START = date(2030, 1, 1)
+HORIZON = 365
+ROOM_TYPES = 30
+
+
+def _year(seed: int = 11):
+    rng = random.Random(seed)
+    return [
+        [
+            {
+                "room_type_id": t,
+                "room_type_name": f"Tipo {t}",
+                "available_rooms": rng.choice([0, 0, 1, 2, 5]),
+                "price_per_night": 80.0 + 10 * t + rng.randint(0, 40),
+                "max_occupancy": 2 + t % 3,
+            }
+            for t in range(ROOM_TYPES)
+        ]
+        for _ in range(HORIZON)
+    ]
+
+
+def _requests(count: int = 50, seed: int = 5):
+    rng = random.Random(seed)
+    for _ in range(count):
+        check_in = START + timedelta(days=rng.randrange(14, HORIZON - 21))
+        yield check_in, check_in + timedelta(days=rng.randint(1, 6)), rng.randint(1, 4), rng.randrange(ROOM_TYPES)
+
+
+def _naive_window(nights, type_id, start, length):
+    span = [next(r for r in nights[i] if r["room_type_id"] == type_id) for i in range(start, start + length)]
+    return min(r["available_rooms"] for r in span), sum(r["price_per_night"] for r in span)
+
+
+@pytest.fixture(scope="module")
+def year():
+    nights = _year()
+    started = time.perf_counter()
+    index = AvailabilityIndex(START, nights)
+    return nights, index, time.perf_counter() - started
+
+
+@pytest.mark.benchmark(group="alternatives_search")
+def test_alternatives_search_one_year_30_types(benchmark, year):
+    nights, index, build_seconds = year
+    engine = AlternativesEngine(max_shift_days=7, max_length_delta=2)
+    requests = list(_requests())
+
+    def run():
+        return [engine.search(index, ci, co, guests, type_id, limit=5) for ci, co, guests, type_id in requests]
+
+    results = benchmark(run)
+    benchmark.extra_info["index_build_ms"] = round(build_seconds * 1000, 1)
+    benchmark.extra_info["searches_per_round"] = len(requests)
+    assert all(len(r) == 5 for r in results)
+
+    # Mismos cupos y precios que recorriendo noche a noche
+    for alt in results[0]:
+        start = (alt.check_in - START).days
+        length = (alt.check_out - alt.check_in).days
+        available, total = _naive_window(nights, alt.room_type_id, start, length)
+        assert alt.available_rooms == available and alt.total_price == round(total, 2)
+    # "En milisegundos": cada búsqueda muy por debajo de 50 ms
+    assert benchmark.stats.stats.mean / len(requests) < 0.05
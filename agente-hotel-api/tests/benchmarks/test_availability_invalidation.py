@@ -0,0 +1,92 @@
+"""Invalidación de disponibilidad tras una reserva con 1M de claves ajenas en Redis.
+
+Sesiones, audio y demás cachés comparten el Redis del PMS. La invalidación
+por SCAN + patrón recorre todo el keyspace (10.000 round-trips de SCAN con
+count=100 para 1M de claves); con el índice por noche es un SMEMBERS por
+noche reservada + un UNLINK de exactamente las claves afectadas, y su costo
+no depende de cuántas claves ajenas haya.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.pms_adapter import QloAppsAdapter
+
+UNRELATED_KEYS = 1_000_000
+START = date(2030, 7, 1)
+HORIZON = 30
+BOOKING = (START + timedelta(days=10), START + timedelta(days=12), 2)
+ROOMS = [{"room_type_id": 2, "room_type_name": "Doble", "available_rooms": 3, "price_per_night": 120.0}]
+
+
+async def _seed_availability(adapter: QloAppsAdapter) -> None:
+    """Noches de 30 días (todos los tipos y doble) y estadías de 1 a 4 noches para 1-2 huéspedes."""
+    for offset in range(HORIZON):
+        night = START + timedelta(days=offset)
+        for type_id in (None, 2):
+            await adapter._store_night(night, type_id, ROOMS)
+        for length in range(1, 5):
+            nights = [night + timedelta(days=i) for i in range(length)]
+            for guests in (1, 2):
+                key = f"availability:{night}:{night + timedelta(days=length)}:{guests}:any"
+                if await adapter._index_availability_key(key, nights):
+                    await adapter._set_cache(key, ROOMS, ttl=300)
+
+
+@pytest.fixture(scope="module")
+def env():
+    loop = asyncio.new_event_loop()
+    redis_client = fakeredis.aioredis.FakeRedis()
+
+    async def seed_unrelated():
+        for chunk in range(UNRELATED_KEYS // 10_000):
+            await redis_client.mset({f"session:{chunk}:{i}": b"x" for i in range(10_000)})
+
+    loop.run_until_complete(seed_unrelated())
+    adapter = QloAppsAdapter(redis_client=redis_client)
+    yield loop, redis_client, adapter
+    loop.run_until_complete(adapter.close())
+    loop.close()
+
+
+@pytest.mark.benchmark(group="availability_invalidation")
+def test_indexed_invalidation_with_1m_unrelated_keys(benchmark, env):
+    loop, redis_client, adapter = env
+    check_in, check_out, room_type_id = BOOKING
+
+    # Referencia: el camino anterior (SCAN del keyspace), medido una vez
+    loop.run_until_complete(_seed_availability(adapter))
+    adapter._availability_indexed = False
+    started = time.perf_counter()
+    loop.run_until_complete(adapter._invalidate_nights(check_in, check_out, room_type_id))
+    scan_seconds = time.perf_counter() - started
+    adapter._availability_indexed = True
+
+    def setup():
+        loop.run_until_complete(_seed_availability(adapter))
+
+    def run():
+        loop.run_until_complete(adapter._invalidate_nights(check_in, check_out, room_type_id))
+
+    benchmark.pedantic(run, setup=setup, rounds=15, iterations=1)
+
+    remaining = loop.run_until_complete(redis_client.dbsize())
+    benchmark.extra_info["scan_invalidation_ms"] = round(scan_seconds * 1000, 1)
+    benchmark.extra_info["indexed_invalidation_ms"] = round(benchmark.stats.stats.mean * 1000, 2)
+    # Las claves ajenas siguen ahí y las estadías que tocan el 11 o el 12 ya no
+    assert remaining > UNRELATED_KEYS
+    assert loop.run_until_complete(redis_client.get(f"availability:{check_in}:{check_out}:2:any")) is None
+    assert loop.run_until_complete(redis_client.get(f"availability:{START}:{START + timedelta(days=1)}:2:any"))
+    assert benchmark.stats.stats.mean * 20 < scan_seconds
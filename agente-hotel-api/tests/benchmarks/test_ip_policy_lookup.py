@@ -0,0 +1,166 @@
+"""Resolución de política + filtrado IP con 10k CIDRs bloqueados, antes y después.
+
+Antes (reproducido aquí tal cual estaba): `_get_security_policy` probaba
+`re.match` patrón por patrón, `_ip_matches` parseaba cada entrada de la lista
+con `ip_network` en cada request y `_is_suspicious_ip` recorría la lista de
+redes. Después: una regex combinada con LRU por path y un trie CIDR por
+bytes (IPv4/IPv6).
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import ipaddress
+import random
+import re
+import time
+
+import pytest
+
+from app.security import ip_access
+from app.security.audit_logger import SecurityAuditLogger
+from app.security.ip_access import CIDRTrie, IPAccessLists
+from app.security.rate_limiter import RateLimitRule
+from app.security.security_middleware import (
+    EndpointPolicyRouter,
+    SecurityLevel,
+    SecurityMiddleware,
+    SecurityPolicy,
+)
+
+BLOCKED = 10_000
+LOOKUPS = 2_000
+PATHS = ["/api/reservations/123", "/api/guests/9", "/webhooks/whatsapp", "/health/live", "/other/path"]
+
+
+def _blocked_cidrs(rng: random.Random) -> list:
+    cidrs = []
+    for _ in range(BLOCKED):
+        if rng.random() < 0.8:
+            cidrs.append(str(ipaddress.ip_network((rng.getrandbits(32), rng.randint(16, 32)), strict=False)))
+        else:
+            cidrs.append(str(ipaddress.ip_network((rng.getrandbits(128), rng.randint(32, 64)), strict=False)))
+    return cidrs
+
+
+def _client_ips(rng: random.Random) -> list:
+    return [str(ipaddress.ip_address(rng.getrandbits(32))) for _ in range(LOOKUPS)]
+
+
+@pytest.fixture(scope="module")
+def env():
+    rng = random.Random(47)
+    cidrs = _blocked_cidrs(rng)
+    lists = IPAccessLists()
+    lists.blacklist = CIDRTrie(cidrs)
+    previous, ip_access._ip_access_lists = ip_access._ip_access_lists, lists
+    middleware = SecurityMiddleware(app=None)
+    # Política con la blacklist completa, como la configuraría un operador
+    middleware.security_policies[r"/api/guests.*"] = SecurityPolicy(
+        endpoint_pattern=r"/api/guests.*",
+        security_level=SecurityLevel.PUBLIC,
+        allowed_roles=[],
+        rate_limit_rules=[RateLimitRule.API_REQUESTS],
+        ip_blacklist=cidrs,
+    )
+    middleware.policy_router = EndpointPolicyRouter(middleware.security_policies)
+    yield middleware, cidrs, _client_ips(rng)
+    ip_access._ip_access_lists = previous
+
+
+def _legacy_policy(middleware, endpoint):
+    for pattern, policy in middleware.security_policies.items():
+        if re.match(pattern, endpoint):
+            return policy
+    return middleware.policy_router.default
+
+
+def _legacy_ip_matches(client_ip, filter_ip):
+    try:
+        if "/" in filter_ip:
+            return ipaddress.ip_address(client_ip) in ipaddress.ip_network(filter_ip, strict=False)
+        return client_ip == filter_ip
+    except Exception:
+        return False
+
+
+def _legacy_filter(policy, client_ip):
+    if policy.ip_blacklist:
+        for blacklisted_ip in policy.ip_blacklist:
+            if _legacy_ip_matches(client_ip, blacklisted_ip):
+                return {"allowed": False, "reason": "IP blacklisted"}
+    if policy.ip_whitelist:
+        for whitelisted_ip in policy.ip_whitelist:
+            if _legacy_ip_matches(client_ip, whitelisted_ip):
+                return {"allowed": True, "reason": "IP whitelisted"}
+        return {"allowed": False, "reason": "IP not whitelisted"}
+    return {"allowed": True, "reason": "No IP restrictions"}
+
+
+@pytest.mark.benchmark(group="ip_policy_lookup")
+def test_policy_and_ip_filtering_with_10k_blocked_cidrs(benchmark, env):
+    middleware, _, client_ips = env
+    guests = _legacy_policy(middleware, "/api/guests/9")
+    requests = [(PATHS[i % len(PATHS)], ip) for i, ip in enumerate(client_ips)]
+
+    # La versión anterior parsea 10k redes por request: se mide sobre una muestra
+    sample = requests[:100]
+    started = time.perf_counter()
+    legacy = [_legacy_filter(_legacy_policy(middleware, path), ip)["allowed"] for path, ip in sample]
+    before_per_request = (time.perf_counter() - started) / len(sample)
+
+    loop = asyncio.new_event_loop()
+
+    def current():
+        return [
+            loop.run_until_complete(middleware._check_ip_filtering(ip, middleware._get_security_policy(path)))[
+                "allowed"
+            ]
+            for path, ip in requests
+        ]
+
+    allowed = benchmark.pedantic(current, rounds=3, iterations=1)
+    loop.close()
+    after_per_request = benchmark.stats.stats.mean / len(requests)
+
+    benchmark.extra_info.update(
+        before_us_per_request=round(before_per_request * 1e6, 1),
+        after_us_per_request=round(after_per_request * 1e6, 1),
+    )
+    # Mismas decisiones donde aplica la blacklist de la política (la global es nueva)
+    for i, decision in enumerate(legacy):
+        if _legacy_policy(middleware, sample[i][0]) is guests:
+            assert allowed[i] == decision
+    assert after_per_request * 50 < before_per_request
+
+
+@pytest.mark.benchmark(group="ip_policy_lookup")
+def test_audit_suspicious_ip_with_10k_blocked_cidrs(benchmark, env):
+    _, cidrs, client_ips = env
+    networks = [ipaddress.ip_network(c) for c in cidrs]
+    audit = SecurityAuditLogger()
+
+    def legacy(ip_str):
+        ip = ipaddress.ip_address(ip_str)
+        return any(ip in network for network in networks)
+
+    sample = client_ips[:200]
+    started = time.perf_counter()
+    expected = [legacy(ip) for ip in sample]
+    before_per_lookup = (time.perf_counter() - started) / len(sample)
+
+    result = benchmark(lambda: [audit._is_suspicious_ip(ip) for ip in client_ips])
+    after_per_lookup = benchmark.stats.stats.mean / len(client_ips)
+
+    benchmark.extra_info.update(
+        before_us_per_lookup=round(before_per_lookup * 1e6, 1),
+        after_us_per_lookup=round(after_per_lookup * 1e6, 2),
+    )
+    assert result[: len(sample)] == expected
+    assert after_per_lookup * 100 < before_per_lookup
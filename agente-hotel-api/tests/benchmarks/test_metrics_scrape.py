@@ -0,0 +1,137 @@
+"""Latencia de scrape de /metrics con 4 workers en modo multiproceso y el set completo de métricas.
+
+Cada worker importa la app (todos los collectors de core/prometheus, monitoring,
+servicios...) y puebla 20 series por métrica con labels. Antes: cada scrape
+consolidaba los archivos mmap dentro del event loop, uno por scraper. Después:
+`MetricsExposition` renderiza en un thread y los scrapes concurrentes (o dentro
+de `metrics_cache_seconds`) comparten el render.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import pytest
+
+from app.core.prometheus import MetricsExposition
+
+WORKERS = 4
+SCRAPERS = 4  # réplicas HA de Prometheus + federación
+ROUNDS = 10
+SCRAPE_SPACING = 0.5  # intervalo de scrape comprimido; el TTL de caché es 1 s
+WORKER = """
+import app.main  # noqa: F401
+import app.monitoring.business_metrics  # noqa: F401
+from prometheus_client import REGISTRY
+from prometheus_client.metrics import MetricWrapperBase
+
+for metric in list(REGISTRY._collector_to_names):
+    if not isinstance(metric, MetricWrapperBase) or metric._type not in ("counter", "gauge", "histogram", "summary"):
+        continue
+    children = [metric.labels(*(f"v{i}" for _ in metric._labelnames)) for i in range(20)] if metric._labelnames else [metric]
+    for child in children:
+        if metric._type == "counter":
+            child.inc()
+        elif metric._type == "gauge":
+            child.set(1)
+        else:
+            child.observe(0.2)
+"""
+
+
+@pytest.fixture(scope="module")
+def multiproc_dir(tmp_path_factory):
+    path = tmp_path_factory.mktemp("prometheus_multiproc")
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(path)}
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(WORKERS)
+    ]
+    assert all(worker.wait(timeout=120) == 0 for worker in workers)
+    previous = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(path)
+    yield path
+    if previous is None:
+        os.environ.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    else:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = previous
+
+
+def _scrape_load(scrape) -> dict:
+    async def main():
+        latencies = []
+        stalls = [0.0]
+
+        async def watch_loop():
+            # Mayor bloqueo del event loop visto por un tick de 5 ms
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                stalls[0] = max(stalls[0], time.perf_counter() - started - 0.005)
+
+        watcher = asyncio.create_task(watch_loop())
+
+        async def one(arrived: float):
+            payload = await scrape()
+            latencies.append(time.perf_counter() - arrived)
+            return payload
+
+        payloads = []
+        for _ in range(ROUNDS):
+            # Los scrapers llegan juntos: la latencia se mide desde la llegada
+            arrived = time.perf_counter()
+            payloads += await asyncio.gather(*(one(arrived) for _ in range(SCRAPERS)))
+            await asyncio.sleep(SCRAPE_SPACING)
+        watcher.cancel()
+        return {
+            "p99_ms": statistics.quantiles(latencies, n=100)[98] * 1000,
+            "loop_stall_ms": stalls[0] * 1000,
+            "size": len(payloads[-1]),
+        }
+
+    return asyncio.run(main())
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(
+    not os.environ.get("RUN_SLOW_BENCHMARKS"),
+    reason="~45 s con 4 workers en subprocesos; RUN_SLOW_BENCHMARKS=1 para correrlo",
+)
+@pytest.mark.benchmark(group="metrics_scrape")
+def test_scrape_latency_with_4_workers(benchmark, multiproc_dir):
+    uncached = MetricsExposition()
+
+    async def render_on_loop():
+        return uncached.render_now()
+
+    before = _scrape_load(render_on_loop)
+
+    def after_run():
+        exposition = MetricsExposition(ttl_seconds=1.0)
+        return _scrape_load(exposition.render)
+
+    after = benchmark.pedantic(after_run, rounds=3, iterations=1)
+
+    benchmark.extra_info.update(
+        files=len(os.listdir(multiproc_dir)),
+        payload_bytes=after["size"],
+        p99_ms_before=round(before["p99_ms"], 1),
+        p99_ms_after=round(after["p99_ms"], 1),
+        loop_stall_ms_before=round(before["loop_stall_ms"], 1),
+        loop_stall_ms_after=round(after["loop_stall_ms"], 1),
+    )
+    # Solo el orden relativo: con la máquina cargada las proporciones exactas varían
+    assert after["size"] == before["size"]
+    assert after["p99_ms"] < before["p99_ms"]
+    assert after["loop_stall_ms"] < before["loop_stall_ms"]
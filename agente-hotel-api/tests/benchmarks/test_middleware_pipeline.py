@@ -0,0 +1,97 @@
+"""Requests/s y p99 de un webhook con la pila de middlewares anterior vs el pipeline ASGI.
+
+Antes: 3 `BaseHTTPMiddleware` (tamaño, seguridad, tenant) + 3 `@app.middleware("http")`
+(correlación, tracing, logging/métricas); cada capa crea su tarea y stream de
+respuesta. Después: `RequestPipelineMiddleware`, una sola capa sin wrappers. La
+app, el endpoint y el cliente (httpx + ASGITransport) son los mismos.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import statistics
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.middleware import (
+    RequestPipelineMiddleware,
+    RequestSizeLimitMiddleware,
+    SecurityHeadersMiddleware,
+    TenantMiddleware,
+    correlation_id_middleware,
+    logging_and_metrics_middleware,
+    tracing_enrichment_middleware,
+)
+
+REQUESTS = 400
+CONCURRENCY = 8
+PAYLOAD = b'{"entry": [{"changes": [{"value": {"messages": [{"from": "5491100000000", "text": {"body": "hola"}}]}}]}]}'
+
+
+def _app(pipeline: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/api/webhooks/whatsapp")
+    async def webhook(request: Request):
+        await request.body()
+        return {"status": "ok"}
+
+    if pipeline:
+        app.add_middleware(RequestPipelineMiddleware, max_size=1_000_000, max_media_size=10_000_000)
+    else:
+        app.add_middleware(RequestSizeLimitMiddleware, max_size=1_000_000, max_media_size=10_000_000)
+        app.add_middleware(SecurityHeadersMiddleware)
+        app.add_middleware(TenantMiddleware, default_tenant="default")
+        app.middleware("http")(correlation_id_middleware)
+        app.middleware("http")(tracing_enrichment_middleware)
+        app.middleware("http")(logging_and_metrics_middleware)
+    return app
+
+
+def _load(app: FastAPI) -> dict:
+    async def main():
+        latencies = []
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            semaphore = asyncio.Semaphore(CONCURRENCY)
+
+            async def one():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.post("/api/webhooks/whatsapp", content=PAYLOAD)
+                    latencies.append(time.perf_counter() - started)
+                    assert response.status_code == 200 and response.headers["X-Request-ID"]
+
+            await one()  # warm-up (routing, logging)
+            latencies.clear()
+            started = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(REQUESTS)))
+            elapsed = time.perf_counter() - started
+        return {
+            "rps": REQUESTS / elapsed,
+            "p99_ms": statistics.quantiles(latencies, n=100)[98] * 1000,
+        }
+
+    return asyncio.run(main())
+
+
+@pytest.mark.benchmark(group="middleware_pipeline")
+def test_pipeline_vs_stacked_middlewares(benchmark):
+    before = min((_load(_app(pipeline=False)) for _ in range(3)), key=lambda r: r["p99_ms"])
+    after = benchmark.pedantic(lambda: _load(_app(pipeline=True)), rounds=3, iterations=1)
+
+    benchmark.extra_info.update(
+        rps_before=round(before["rps"]),
+        rps_after=round(after["rps"]),
+        p99_ms_before=round(before["p99_ms"], 2),
+        p99_ms_after=round(after["p99_ms"], 2),
+    )
+    assert after["rps"] > before["rps"]
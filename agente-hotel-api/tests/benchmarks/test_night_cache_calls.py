@@ -0,0 +1,72 @@
+"""Llamadas a QloApps en una traza sintética: caché por rango vs caché por noche.
+
+La traza imita consultas de huéspedes durante un fin de semana largo: check-in
+en las próximas 3 semanas, estadías de 1 a 5 noches, 1 a 3 huéspedes y
+algunos filtros por tipo. La caché por rango (clave exacta) paga una llamada
+por tupla distinta; la caché por noche pide en un rango cada tramo de noches
+que le faltan y compone cualquier estadía a partir de ellas.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import random
+from datetime import date, timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.pms_adapter import QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+QUERIES = 400
+START = date(2030, 7, 1)
+
+
+def _trace(seed: int = 7):
+    rng = random.Random(seed)
+    for _ in range(QUERIES):
+        check_in = START + timedelta(days=rng.randrange(21))
+        check_out = check_in + timedelta(days=rng.randint(1, 5))
+        room_type = rng.choice([None, None, None, "doble", "suite"])
+        yield check_in, check_out, rng.randint(1, 3), room_type
+
+
+async def _no_wait(*args, **kwargs):
+    return None
+
+
+def _replay() -> dict:
+    stub = QloAppsStub()
+
+    async def main():
+        adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis())
+        adapter.qloapps.client = stub.client()
+        adapter.rate_limiter.wait_if_needed = _no_wait
+        try:
+            for check_in, check_out, guests, room_type in _trace():
+                await adapter.check_availability(check_in, check_out, guests, room_type)
+        finally:
+            await adapter.close()
+
+    asyncio.run(main())
+    return {
+        "range_cache_calls": len(set(_trace())),
+        "night_cache_calls": stub.calls["/hotel_booking"],
+    }
+
+
+@pytest.mark.benchmark(group="pms_night_cache")
+def test_night_cache_reduces_pms_calls(benchmark):
+    result = benchmark.pedantic(_replay, rounds=3, iterations=1)
+    benchmark.extra_info.update(result)
+    benchmark.extra_info["reduction"] = 1 - result["night_cache_calls"] / result["range_cache_calls"]
+    # 25 noches × (todos los tipos + 2 tipos filtrados) como máximo
+    assert result["night_cache_calls"] <= 25 * 3
+    assert result["night_cache_calls"] * 4 < result["range_cache_calls"]
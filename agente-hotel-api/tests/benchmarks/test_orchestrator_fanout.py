@@ -0,0 +1,108 @@
+"""Latencia extremo a extremo del orquestador: pipeline secuencial vs fan-out.
+
+Simula un RTT de Redis de 5 ms (sesión = GET + SET, feature flag = GET) y un
+NLP de 10 ms. La referencia reproduce el orden previo (NLP → sesión → flags →
+horario → handler); la variante actual obtiene NLP, sesión y flags con
+`_gather_message_context`, que los solapa mediante `asyncio.TaskGroup`, y
+sigue con los mismos pasos.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.unified_message import UnifiedMessage
+from app.services.orchestrator import Orchestrator
+
+REDIS_RTT = 0.005
+NLP_TIME = 0.010
+MESSAGES = 20
+
+
+class FakeSessionManager:
+    async def get_or_create_session(self, user_id, canal, tenant_id=None):
+        await asyncio.sleep(REDIS_RTT)  # GET
+        await asyncio.sleep(REDIS_RTT)  # SET con TTL
+        return {"user_id": user_id, "canal": canal}
+
+
+class FakeFlags:
+    async def is_enabled(self, flag, default=False):
+        await asyncio.sleep(REDIS_RTT)
+        return default
+
+
+class FakeNLP:
+    async def detect_language(self, text):
+        return "es"
+
+    async def process_text(self, text, language=None):
+        await asyncio.sleep(NLP_TIME)
+        return {"intent": {"name": "make_reservation", "confidence": 0.95}, "language": "es"}
+
+
+def _orchestrator() -> Orchestrator:
+    orch = Orchestrator(pms_adapter=AsyncMock(), session_manager=FakeSessionManager(), lock_service=AsyncMock())
+    orch.nlp_engine = FakeNLP()
+    orch._intent_handlers["make_reservation"] = AsyncMock(return_value={"response_type": "text", "content": "ok"})
+    return orch
+
+
+async def _sequential(orch: Orchestrator, message: UnifiedMessage) -> dict:
+    """Orden previo al fan-out, paso a paso."""
+    nlp_result, intent_name = await orch._process_nlp(message, None)
+    await orch._record_intent_metrics(nlp_result, intent_name)
+    session = await orch._load_session(message)
+    enhanced_fallback = await orch._load_enhanced_fallback_flag()
+    return await _finish(orch, message, nlp_result, intent_name, session, enhanced_fallback)
+
+
+async def _fanout(orch: Orchestrator, message: UnifiedMessage) -> dict:
+    """NLP, sesión y flags en paralelo, como `handle_unified_message`."""
+    nlp_result, intent_name, session, enhanced_fallback = await orch._gather_message_context(message, None)
+    await orch._record_intent_metrics(nlp_result, intent_name)
+    return await _finish(orch, message, nlp_result, intent_name, session, enhanced_fallback)
+
+
+async def _finish(orch, message, nlp_result, intent_name, session, enhanced_fallback) -> dict:
+    language = orch._response_language(message, nlp_result)
+    await orch._handle_business_hours(nlp_result, session, message)
+    await orch._handle_low_confidence_check(message, nlp_result, enhanced_fallback, language)
+    return await orch._execute_intent_handler(nlp_result, session, message, intent_name)
+
+
+def _run(pipeline) -> None:
+    orch = _orchestrator()
+
+    async def main():
+        for i in range(MESSAGES):
+            message = UnifiedMessage(user_id=f"u{i}", canal="whatsapp", texto="Quiero reservar", tipo="text")
+            result = await pipeline(orch, message)
+            assert result["content"] == "ok"
+
+    with (
+        patch("app.services.orchestrator.get_feature_flag_service", AsyncMock(return_value=FakeFlags())),
+        patch("app.services.orchestrator.is_business_hours", return_value=True, create=True),
+    ):
+        asyncio.run(main())
+
+
+@pytest.mark.benchmark(group="orchestrator_fanout")
+def test_pipeline_sequential(benchmark):
+    benchmark.pedantic(_run, args=(_sequential,), rounds=5, iterations=1)
+
+
+@pytest.mark.benchmark(group="orchestrator_fanout")
+def test_pipeline_fanout(benchmark):
+    benchmark.pedantic(_run, args=(_fanout,), rounds=5, iterations=1)
+    # Camino crítico: max(NLP, sesión, flags) ≈ 10 ms por mensaje en vez de ~25 ms
+    assert benchmark.stats.stats.mean < MESSAGES * (NLP_TIME + 3 * REDIS_RTT)
@@ -0,0 +1,110 @@
+"""Cifrado de PII de 10k huéspedes: camino por campo anterior vs API bulk con envelope.
+
+Antes (reproducido aquí tal cual estaba): `encrypt_pii_data` por registro, que
+por cada valor hacía `encrypt_data` → búsqueda lineal de la clave y un
+`Cipher(AES, GCM)` nuevo. Después: `encrypt_pii_records` con una data key por
+lote, `AESGCM` reutilizado y el lote sellado en un thread.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import secrets
+import time
+
+import pytest
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from app.security.data_encryption import (
+    PII_FIELDS,
+    DataClassification,
+    DataEncryptionService,
+    EncryptedData,
+    EncryptionAlgorithm,
+)
+
+RECORDS = 10_000
+
+
+def _guests():
+    return [
+        {
+            "guest_id": f"G-{i}",
+            "name": f"Huésped {i}",
+            "email": f"guest{i}@example.com",
+            "phone": f"+54911{i:07d}",
+            "passport_number": f"AR{i:08d}",
+            "address": f"Calle {i}, Buenos Aires",
+            "date_of_birth": "1990-01-01",
+        }
+        for i in range(RECORDS)
+    ]
+
+
+async def _legacy_encrypt_pii(service: DataEncryptionService, pii_data: dict) -> dict:
+    """Camino anterior: clave por búsqueda lineal y Cipher nuevo por valor."""
+    encrypted_pii = {}
+    for field_name, value in pii_data.items():
+        if field_name in PII_FIELDS and value:
+            key_id = next(
+                k
+                for k, key in service.encryption_keys.items()
+                if key.classification == DataClassification.RESTRICTED
+                and key.algorithm == EncryptionAlgorithm.AES_256_GCM
+                and key.is_active
+            )
+            nonce = secrets.token_bytes(12)
+            cipher = Cipher(
+                algorithms.AES(service.encryption_keys[key_id].key_data), modes.GCM(nonce), backend=default_backend()
+            )
+            encryptor = cipher.encryptor()
+            ciphertext = encryptor.update(str(value).encode("utf-8")) + encryptor.finalize()
+            encrypted_pii[field_name] = EncryptedData(
+                encrypted_data=ciphertext,
+                algorithm=EncryptionAlgorithm.AES_256_GCM,
+                key_id=key_id,
+                nonce=nonce,
+                tag=encryptor.tag,
+            ).to_dict()
+        else:
+            encrypted_pii[field_name] = value
+    return encrypted_pii
+
+
+@pytest.fixture(scope="module")
+def env():
+    loop = asyncio.new_event_loop()
+    service = DataEncryptionService()
+    loop.run_until_complete(service.initialize())
+    yield loop, service, _guests()
+    loop.close()
+
+
+@pytest.mark.benchmark(group="pii_encryption")
+def test_encrypt_10k_guest_records(benchmark, env):
+    loop, service, guests = env
+
+    async def legacy():
+        return [await _legacy_encrypt_pii(service, guest) for guest in guests]
+
+    started = time.perf_counter()
+    loop.run_until_complete(legacy())
+    before = time.perf_counter() - started
+
+    sealed = benchmark.pedantic(
+        lambda: loop.run_until_complete(service.encrypt_pii_records(guests)), rounds=5, iterations=1
+    )
+
+    benchmark.extra_info.update(
+        before_ms=round(before * 1000),
+        after_ms=round(benchmark.stats.stats.mean * 1000),
+    )
+    assert loop.run_until_complete(service.decrypt_pii_records(sealed[:10])) == guests[:10]
+    assert benchmark.stats.stats.mean * 2 < before
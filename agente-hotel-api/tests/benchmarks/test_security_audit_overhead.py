@@ -0,0 +1,131 @@
+"""Overhead de la auditoría de seguridad por request antes y después del buffer.
+
+Antes (reproducido aquí tal cual estaba): `SecurityMiddleware.dispatch` esperaba
+`log_security_event(ACCESS_GRANTED)` y `_store_security_event` hacía SETEX +
+ZADD/EXPIRE de timeline, usuario e IP, un round trip por comando. Después: el
+evento se encola sin esperar y el flusher lo escribe en lotes con pipeline.
+Redis es fakeredis con 0.3 ms de RTT simulado por round trip.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+import json
+import statistics
+import time
+from datetime import datetime
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.security import audit_logger as audit_module
+from app.security.audit_logger import SecurityAuditLogger, SecurityEvent
+from app.security.security_middleware import SecurityMiddleware
+
+REQUESTS = 400
+RTT_SECONDS = 0.0003
+
+
+class _NetworkRedis(fakeredis.aioredis.FakeRedis):
+    async def execute_command(self, *args, **kwargs):
+        await asyncio.sleep(RTT_SECONDS)
+        return await super().execute_command(*args, **kwargs)
+
+    def pipeline(self, *args, **kwargs):
+        pipe = super().pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def one_round_trip(*a, **kw):
+            await asyncio.sleep(RTT_SECONDS)
+            return await execute(*a, **kw)
+
+        pipe.execute = one_round_trip
+        return pipe
+
+
+class _LegacyAuditLogger(SecurityAuditLogger):
+    async def _increment_windows(self, windows: list) -> list:
+        counts = []
+        for _, key, window_seconds, _, _ in windows:
+            counts.append(await self.redis_client.incr(key))
+            await self.redis_client.expire(key, window_seconds)
+        return counts
+
+    async def _store_security_event(self, event: SecurityEvent):
+        event_key = f"security_event:{event.event_id}"
+        await self.redis_client.setex(event_key, 86400 * 30, json.dumps(event.to_dict()))
+        timeline_key = f"security_timeline:{datetime.now().strftime('%Y%m%d')}"
+        await self.redis_client.zadd(timeline_key, {event.event_id: event.timestamp.timestamp()})
+        await self.redis_client.expire(timeline_key, 86400 * 90)
+        if event.user_id:
+            user_key = f"user_events:{event.user_id}"
+            await self.redis_client.zadd(user_key, {event.event_id: event.timestamp.timestamp()})
+            await self.redis_client.expire(user_key, 86400 * 90)
+        if event.ip_address:
+            ip_key = f"ip_events:{event.ip_address}"
+            await self.redis_client.zadd(ip_key, {event.event_id: event.timestamp.timestamp()})
+            await self.redis_client.expire(ip_key, 86400 * 30)
+
+
+class _LegacyMiddleware(SecurityMiddleware):
+    def _submit_security_event(self, request, event_type, threat_level, details):
+        request.state.access_audit = self._log_security_event(request, event_type, threat_level, details)
+
+    async def dispatch(self, request, call_next):
+        async def audited_call_next(request):
+            # Antes: el handler esperaba el evento ACCESS_GRANTED completo
+            await request.state.access_audit
+            return await call_next(request)
+
+        return await super().dispatch(request, audited_call_next)
+
+
+def _latencies(buffered: bool) -> list:
+    async def main():
+        audit = SecurityAuditLogger() if buffered else _LegacyAuditLogger()
+        audit.redis_client = _NetworkRedis()
+        audit_module._audit_logger = audit
+
+        app = FastAPI()
+        app.add_middleware(SecurityMiddleware if buffered else _LegacyMiddleware)
+
+        @app.get("/health/live")
+        async def live():
+            return {"ok": True}
+
+        samples = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            for i in range(REQUESTS):
+                headers = {"X-Forwarded-For": f"10.1.{i // 250}.{i % 250}"}
+                started = time.perf_counter()
+                response = await client.get("/health/live", headers=headers)
+                samples.append(time.perf_counter() - started)
+                assert response.status_code == 200
+        await audit.stop()
+        assert len(await audit.redis_client.keys("security_event:*")) == REQUESTS
+        return samples
+
+    try:
+        return asyncio.run(main())
+    finally:
+        audit_module._audit_logger = None
+
+
+@pytest.mark.benchmark(group="security_audit")
+def test_access_granted_audit_overhead(benchmark):
+    before = _latencies(buffered=False)
+    after = benchmark.pedantic(lambda: _latencies(buffered=True), rounds=1, iterations=1)
+
+    before_ms, after_ms = statistics.mean(before) * 1000, statistics.mean(after) * 1000
+    benchmark.extra_info.update(before_mean_ms=round(before_ms, 3), after_mean_ms=round(after_ms, 3))
+    # Antes: >= 7 round trips (INCR/EXPIRE + 5 de almacenamiento) en el camino del request
+    assert after_ms + 7 * RTT_SECONDS * 1000 * 0.5 < before_ms
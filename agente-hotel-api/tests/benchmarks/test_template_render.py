@@ -0,0 +1,118 @@
+"""Render de plantillas: `TemplateService` anterior vs plantillas precompiladas.
+
+Antes (reproducido aquí tal cual estaba): el servicio compartido guardaba el
+idioma en `set_language` y cada render buscaba la plantilla con fallback a
+"es" y la formateaba con `str.format` (los botones, además, copiando el dict
+y formateando cada texto). Después: `TemplateService` con el idioma por
+llamada y plantillas compiladas al importar. Ambos se miden por la API pública
+del servicio, como los llama el orquestador.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+from typing import Any, Dict
+
+import pytest
+
+from app.services.template_service import (
+    INTERACTIVE_BUTTON_TEMPLATES_EN,
+    INTERACTIVE_BUTTON_TEMPLATES_ES,
+    TEXT_TEMPLATES_EN,
+    TEXT_TEMPLATES_ES,
+    TemplateService,
+)
+
+AVAILABILITY_PARAMS = {
+    "checkin": "2025-10-20",
+    "checkout": "2025-10-22",
+    "room_type": "Double",
+    "guests": 2,
+    "price": "100.00",
+    "total": "200.00",
+}
+
+_LEGACY_TEXT_TEMPLATES_BY_LANG = {"es": TEXT_TEMPLATES_ES, "en": TEXT_TEMPLATES_EN}
+
+
+class _LegacyTemplateService:
+    """`TemplateService` previo: idioma como estado compartido y `str.format` por render."""
+
+    def __init__(self, default_language: str = "es"):
+        self._language = default_language if default_language in _LEGACY_TEXT_TEMPLATES_BY_LANG else "es"
+
+    def set_language(self, language: str) -> None:
+        self._language = language if language in _LEGACY_TEXT_TEMPLATES_BY_LANG else "es"
+
+    def get_response(self, template_name: str, **kwargs) -> str:
+        lang = self._language
+        template = _LEGACY_TEXT_TEMPLATES_BY_LANG.get(lang, {}).get(template_name)
+        if template is None:
+            template = _LEGACY_TEXT_TEMPLATES_BY_LANG.get("es", {}).get(template_name, "")
+        return template.format(**kwargs)
+
+    def get_interactive_buttons(self, template_name: str, **kwargs) -> Dict[str, Any]:
+        lang = self._language
+        lang_map = {"es": INTERACTIVE_BUTTON_TEMPLATES_ES, "en": INTERACTIVE_BUTTON_TEMPLATES_EN}
+        template = lang_map.get(lang, {}).get(template_name) or INTERACTIVE_BUTTON_TEMPLATES_ES.get(template_name)
+        if not template:
+            return {}
+
+        result = {k: (v.copy() if isinstance(v, list) else v) for k, v in template.items()}
+        for key in ("body_text", "header_text", "footer_text"):
+            text = result.get(key)
+            if isinstance(text, str):
+                result[key] = text.format(**kwargs)
+        return result
+
+
+def _legacy_text(svc: _LegacyTemplateService) -> str:
+    # El orquestador fijaba el idioma del huésped antes de cada respuesta
+    svc.set_language("en")
+    return svc.get_response("availability_found", **AVAILABILITY_PARAMS)
+
+
+def _legacy_buttons(svc: _LegacyTemplateService) -> Dict[str, Any]:
+    svc.set_language("en")
+    return svc.get_interactive_buttons("availability_confirmation", **AVAILABILITY_PARAMS)
+
+
+def test_legacy_and_current_services_render_the_same():
+    legacy, current = _LegacyTemplateService(), TemplateService()
+    assert _legacy_text(legacy) == current.get_response("availability_found", language="en", **AVAILABILITY_PARAMS)
+    assert _legacy_buttons(legacy) == current.get_interactive_buttons(
+        "availability_confirmation", language="en", **AVAILABILITY_PARAMS
+    )
+
+
+@pytest.mark.benchmark(group="templates-text")
+def test_render_text_legacy_service(benchmark):
+    svc = _LegacyTemplateService()
+    assert "Would you like to book?" in benchmark(_legacy_text, svc)
+
+
+@pytest.mark.benchmark(group="templates-text")
+def test_render_text_precompiled(benchmark):
+    svc = TemplateService()
+    result = benchmark(lambda: svc.get_response("availability_found", language="en", **AVAILABILITY_PARAMS))
+    assert "Would you like to book?" in result
+
+
+@pytest.mark.benchmark(group="templates-buttons")
+def test_render_interactive_buttons_legacy_service(benchmark):
+    svc = _LegacyTemplateService()
+    assert benchmark(_legacy_buttons, svc)["header_text"] == "Availability found"
+
+
+@pytest.mark.benchmark(group="templates-buttons")
+def test_render_interactive_buttons_precompiled(benchmark):
+    svc = TemplateService()
+    result = benchmark(
+        lambda: svc.get_interactive_buttons("availability_confirmation", language="en", **AVAILABILITY_PARAMS)
+    )
+    assert result["header_text"] == "Availability found"
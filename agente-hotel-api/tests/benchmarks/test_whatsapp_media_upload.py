@@ -0,0 +1,69 @@
+"""Bytes subidos a Meta por hora de tráfico: subida por mensaje vs caché de media ids.
+
+Simula una hora con 200 respuestas de audio sobre un phrase bank de 10 frases
+y compara los bytes que llegan a `/media` del stub de la Graph API.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import whatsapp_media_cache as wmc
+from app.services.whatsapp_client import WhatsAppMetaClient
+from app.services.whatsapp_media_cache import MediaIdCache
+from tests.mocks.graph_api_stub import GraphAPIStub
+
+PHRASES = [b"OggS" + bytes([i]) * 24_000 for i in range(10)]
+RESPONSES = 200
+
+
+def _traffic():
+    return [PHRASES[i % len(PHRASES)] for i in range(RESPONSES)]
+
+
+async def _send_hour(stub: GraphAPIStub, send) -> None:
+    client = WhatsAppMetaClient(http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app)))
+    try:
+        for i, audio in enumerate(_traffic()):
+            await send(client, f"34600{i:06d}", audio)
+    finally:
+        await client.client.aclose()
+
+
+@pytest.mark.benchmark(group="whatsapp_media_upload")
+def test_upload_bytes_per_hour_without_cache(benchmark):
+    """Referencia: subir el audio en cada mensaje (comportamiento previo)."""
+    stub = GraphAPIStub()
+
+    async def send(client, to, audio):
+        media_id = await client.upload_media(audio, "audio/ogg", "audio.ogg")
+        await client._send_message(
+            to, {"messaging_product": "whatsapp", "to": to, "type": "audio", "audio": {"id": media_id}}
+        )
+
+    benchmark.pedantic(lambda: asyncio.run(_send_hour(stub, send)), rounds=1, iterations=1)
+    benchmark.extra_info["uploaded_bytes_per_hour"] = stub.uploaded_bytes
+    assert len(stub.uploads) == RESPONSES
+
+
+@pytest.mark.benchmark(group="whatsapp_media_upload")
+def test_upload_bytes_per_hour_with_media_cache(benchmark, monkeypatch):
+    stub = GraphAPIStub()
+    monkeypatch.setattr(wmc, "_media_cache", MediaIdCache())
+
+    async def send(client, to, audio):
+        await client.send_cached_media(to, "audio", audio, "audio/ogg", filename="audio.ogg")
+
+    benchmark.pedantic(lambda: asyncio.run(_send_hour(stub, send)), rounds=1, iterations=1)
+    benchmark.extra_info["uploaded_bytes_per_hour"] = stub.uploaded_bytes
+    benchmark.extra_info["cache_bytes_last_hour"] = wmc.get_media_cache().bytes_uploaded_last_hour()
+    assert len(stub.uploads) == len(PHRASES)
@@ -0,0 +1,94 @@
+"""Throughput del envío saliente contra el stub local de la Graph API.
+
+Compara el patrón previo (un WhatsAppMetaClient con su propio pool por webhook)
+con el cliente de proceso sobre el WhatsAppOutboundSender compartido.
+"""
+
+# Skip completo si el plugin de benchmark no está disponible en el entorno
+try:  # pragma: no cover
+    import pytest_benchmark  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    import pytest
+
+    pytest.skip("pytest-benchmark no instalado", allow_module_level=True)
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.whatsapp_client import WhatsAppMetaClient
+from app.services.whatsapp_sender import WhatsAppOutboundSender
+from tests.mocks.graph_api_stub import GraphAPIStub
+
+MESSAGES = 200
+CONCURRENCY = 20
+
+
+async def _fan_out(send_one) -> None:
+    sem = asyncio.Semaphore(CONCURRENCY)
+
+    async def run(i: int):
+        async with sem:
+            await send_one(i)
+
+    await asyncio.gather(*(run(i) for i in range(MESSAGES)))
+
+
+@pytest.mark.benchmark(group="whatsapp_sender")
+def test_throughput_client_per_webhook(benchmark):
+    """Referencia: un cliente (y pool) nuevo por cada mensaje."""
+    stub = GraphAPIStub()
+
+    async def send_one(i: int):
+        client = WhatsAppMetaClient(http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app)))
+        client._owns_http_client = True
+        try:
+            await client.send_message(to=f"34600{i:06d}", text="hola")
+        finally:
+            await client.close()
+
+    benchmark.pedantic(lambda: asyncio.run(_fan_out(send_one)), rounds=5, iterations=1)
+    benchmark.extra_info["messages_per_round"] = MESSAGES
+    assert len(stub.messages) == MESSAGES * 5
+
+
+@pytest.mark.benchmark(group="whatsapp_sender")
+def test_throughput_shared_sender(benchmark):
+    stub = GraphAPIStub()
+
+    async def run_round():
+        sender = WhatsAppOutboundSender(
+            rate_per_second=100_000, burst=1_000, transport=httpx.ASGITransport(app=stub.app)
+        )
+        client = WhatsAppMetaClient(http_client=sender.client)
+        try:
+            await _fan_out(lambda i: client.send_message(to=f"34600{i:06d}", text="hola"))
+        finally:
+            await sender.aclose()
+
+    benchmark.pedantic(lambda: asyncio.run(run_round()), rounds=5, iterations=1)
+    benchmark.extra_info["messages_per_round"] = MESSAGES
+    assert len(stub.messages) == MESSAGES * 5
+
+
+@pytest.mark.benchmark(group="whatsapp_sender")
+def test_throughput_shaped_to_tier(benchmark):
+    """Con el bucket al tier por defecto (80 msg/s) el envío sostenido no lo supera."""
+    stub = GraphAPIStub()
+    rate = 80
+
+    async def run_round():
+        sender = WhatsAppOutboundSender(rate_per_second=rate, burst=1, transport=httpx.ASGITransport(app=stub.app))
+        client = WhatsAppMetaClient(http_client=sender.client)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await asyncio.gather(*(client.send_message(to=f"34600{i:06d}", text="hola") for i in range(40)))
+        finally:
+            await sender.aclose()
+        return 40 / (loop.time() - start)
+
+    achieved = benchmark.pedantic(lambda: asyncio.run(run_round()), rounds=1, iterations=1)
+    benchmark.extra_info["achieved_mps"] = round(achieved, 1)
+    assert achieved <= rate * 1.1
@@ -63,6 +63,12 @@ async def _reset_prometheus_registry() -> Any:
     except Exception:
         # If prometheus_client not present or API changes, ignore silently
         pass
+    try:
+        # El render cacheado de /metrics no debe sobrevivir entre tests
+        from app.core.prometheus import metrics_exposition
+        metrics_exposition.invalidate()
+    except Exception:
+        pass
     yield
 
 
@@ -71,7 +71,7 @@ async def test_create_reservation_invalidates_availability_cache(mocker):
         ),
     )
 
-    # Create reservation (should trigger availability:* invalidation)
+    # Create reservation (should invalidate the booked nights)
     payload = {
         "checkin": "2025-11-01",
         "checkout": "2025-11-03",
@@ -86,9 +86,9 @@ async def test_create_reservation_invalidates_availability_cache(mocker):
 
     result = await adapter.create_reservation(payload)
 
-    # Both availability keys should be gone
+    # Solo se invalida la estadía que se solapa con las noches reservadas
     assert "availability:2025-11-01:2025-11-03:2:any" not in redis.store
-    assert "availability:2025-12-20:2025-12-25:2:su ite" not in redis.store
+    assert "availability:2025-12-20:2025-12-25:2:su ite" in redis.store
     assert result.get("status") == "confirmed"
 
 
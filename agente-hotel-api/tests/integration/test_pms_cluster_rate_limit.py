@@ -0,0 +1,159 @@
+"""Cuota PMS compartida entre procesos reales.
+
+Varios procesos (como los workers de Uvicorn) llaman a un stub de QloApps que
+responde 429 por encima de su límite. Con limiters locales cada proceso cree
+tener la cuota entera y el stub rechaza; con el GCRA compartido en Redis el
+clúster completo se mantiene bajo el límite.
+"""
+
+import json
+import socket
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from pathlib import Path
+
+import pytest
+import redis
+
+try:  # pragma: no cover
+    import lupa  # type: ignore  # noqa: F401
+    from fakeredis import TcpFakeServer
+except Exception:  # pragma: no cover
+    pytest.skip("fakeredis con Lua y servidor TCP no disponible", allow_module_level=True)
+
+import uvicorn
+
+from app.core.rate_limiter import _GCRA_SCRIPT
+from tests.mocks.pms_mock_server import QloAppsStub
+
+PROCESSES = 3
+CALLS_PER_PROCESS = 20
+RATE = 10  # requests/s por clúster
+BURST = 2
+# QloApps (stub) admite RATE + BURST + 2 por segundo: ~200 ms de margen para el
+# jitter entre la concesión del token y la llegada de la request (CI cargado)
+STUB_LIMIT = RATE + BURST + 2
+
+ROOT = Path(__file__).resolve().parents[2]
+
+WORKER = textwrap.dedent(
+    """
+    import asyncio, json, sys
+    from collections import Counter
+
+    import httpx
+    import redis.asyncio as redis
+
+    from app.core.rate_limiter import RedisGCRARateLimiter, SlidingWindowRateLimiter
+
+    async def main(mode, redis_port, pms_url, calls, rate, burst):
+        client = redis.Redis(port=redis_port)
+        if mode == "cluster":
+            limiter = RedisGCRARateLimiter(client, "pms", max_requests=rate, window_seconds=1, burst=burst)
+        else:
+            limiter = SlidingWindowRateLimiter(max_requests=rate, window_seconds=1)
+        async with httpx.AsyncClient(base_url=pms_url) as http:
+            async def one():
+                await limiter.wait_if_needed("check_availability", max_wait=30)
+                resp = await http.get(
+                    "/api/hotel_booking", params={"date_from": "2030-07-12", "date_to": "2030-07-14"}
+                )
+                return resp.status_code
+
+            print("ready", flush=True)
+            sys.stdin.readline()
+            codes = await asyncio.gather(*(one() for _ in range(calls)))
+        await client.aclose()
+        print(json.dumps(Counter(codes)), flush=True)
+
+    mode, redis_port, pms_url, calls, rate, burst = sys.argv[1:]
+    asyncio.run(main(mode, int(redis_port), pms_url, int(calls), int(rate), int(burst)))
+    """
+)
+
+
+def _free_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    return sock
+
+
+@pytest.fixture
+def redis_port():
+    server = TcpFakeServer(("127.0.0.1", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_pms():
+    stub = QloAppsStub(rate_limit=STUB_LIMIT, rate_window=1.0)
+    sock = _free_socket()
+    server = uvicorn.Server(uvicorn.Config(stub.app, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    yield stub, f"http://127.0.0.1:{sock.getsockname()[1]}"
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+def _run_workers(mode: str, redis_port: int, pms_url: str) -> dict:
+    args = [mode, str(redis_port), pms_url, str(CALLS_PER_PROCESS), str(RATE), str(BURST)]
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, *args],
+            cwd=ROOT,
+            env={"PYTHONPATH": str(ROOT), "PATH": "/usr/bin:/bin"},
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(PROCESSES)
+    ]
+    try:
+        # Arranque sincronizado: todos los procesos empiezan a la vez
+        for proc in procs:
+            while proc.stdout.readline().strip() != "ready":
+                assert proc.poll() is None, "worker terminó antes de estar listo"
+        for proc in procs:
+            proc.stdin.write("go\n")
+            proc.stdin.flush()
+        totals: dict = {}
+        for proc in procs:
+            out, _ = proc.communicate(timeout=60)
+            for status, count in json.loads(out.strip().splitlines()[-1]).items():
+                totals[status] = totals.get(status, 0) + count
+        return totals
+    finally:
+        for proc in procs:
+            if proc.poll() is None:
+                proc.kill()
+
+
+def test_per_process_limiters_exceed_pms_quota(redis_port, stub_pms):
+    stub, url = stub_pms
+    totals = _run_workers("local", redis_port, url)
+    # Cada proceso gasta la cuota completa: el PMS rechaza
+    assert totals.get("429", 0) > 0
+    assert stub.throttled == totals["429"]
+
+
+def test_cluster_limiter_keeps_all_processes_under_pms_quota(redis_port, stub_pms):
+    stub, url = stub_pms
+    # El servidor TCP de fakeredis cierra la conexión tras una respuesta de error,
+    # así que el NOSCRIPT → SCRIPT LOAD de redis-py no llega a recargar el script:
+    # se carga antes, como quedaría en Redis tras la primera llamada
+    with redis.Redis(port=redis_port) as client:
+        client.script_load(_GCRA_SCRIPT)
+    totals = _run_workers("cluster", redis_port, url)
+    assert totals == {"200": PROCESSES * CALLS_PER_PROCESS}
+    assert stub.throttled == 0
@@ -0,0 +1,111 @@
+"""Stub local de la Graph API de WhatsApp.
+
+App ASGI que imita los endpoints que usa `WhatsAppMetaClient`: envío de
+mensajes, subida de media y resolución de URL de media, además de servir
+imágenes bajo `/images/...` (p.ej. fotos de habitación). Permite inyectar
+fallos (429/5xx con `Retry-After`), caducar media ids y añadir latencia.
+
+Uso en tests (sin red):
+
+    stub = GraphAPIStub()
+    transport = httpx.ASGITransport(app=stub.app)
+
+Uso manual como servidor local:
+
+    python -m tests.mocks.graph_api_stub  # escucha en 127.0.0.1:8089
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+
+@dataclass
+class _Failure:
+    status: int
+    retry_after: Optional[float] = None
+
+
+@dataclass
+class GraphAPIStub:
+    latency: float = 0.0
+    messages: List[Dict[str, Any]] = field(default_factory=list)
+    uploads: List[Dict[str, Any]] = field(default_factory=list)
+    attempts: int = 0
+
+    def __post_init__(self) -> None:
+        self._ids = itertools.count(1)
+        self._failures: List[_Failure] = []
+        self.expired_media: Set[str] = set()
+        self.app = self._build_app()
+
+    @property
+    def uploaded_bytes(self) -> int:
+        return sum(u["size"] for u in self.uploads)
+
+    def expire_media(self, media_id: str) -> None:
+        """Los mensajes que referencien `media_id` fallan como un id caducado."""
+        self.expired_media.add(media_id)
+
+    def fail_next(self, status: int = 429, times: int = 1, retry_after: Optional[float] = None) -> None:
+        """Las próximas `times` llamadas a /messages responden `status`."""
+        self._failures.extend(_Failure(status, retry_after) for _ in range(times))
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/{version}/{phone_number_id}/messages")
+        async def send_message(version: str, phone_number_id: str, request: Request):
+            self.attempts += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self._failures:
+                failure = self._failures.pop(0)
+                headers = {"Retry-After": str(failure.retry_after)} if failure.retry_after is not None else {}
+                return JSONResponse(
+                    {"error": {"message": "stub failure", "code": 130429 if failure.status == 429 else 2}},
+                    status_code=failure.status,
+                    headers=headers,
+                )
+            body = await request.json()
+            media = body.get(body.get("type"), {})
+            if isinstance(media, dict) and media.get("id") in self.expired_media:
+                return JSONResponse(
+                    {"error": {"message": "(#100) Invalid media id", "code": 100}},
+                    status_code=400,
+                )
+            self.messages.append({"phone_number_id": phone_number_id, **body})
+            return {
+                "messaging_product": "whatsapp",
+                "contacts": [{"input": body.get("to"), "wa_id": body.get("to")}],
+                "messages": [{"id": f"wamid.stub{next(self._ids)}"}],
+            }
+
+        @app.post("/{version}/{phone_number_id}/media")
+        async def upload_media(version: str, phone_number_id: str, request: Request):
+            payload = await request.body()
+            media_id = f"media-{next(self._ids)}"
+            self.uploads.append({"phone_number_id": phone_number_id, "id": media_id, "size": len(payload)})
+            return {"id": media_id}
+
+        @app.get("/images/{path:path}")
+        async def image(path: str):
+            return Response(content=f"jpeg:{path}".encode() * 512, media_type="image/jpeg")
+
+        @app.get("/{version}/{media_id}")
+        async def media_url(version: str, media_id: str):
+            return {"url": f"https://stub.local/media/{media_id}", "id": media_id}
+
+        return app
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import uvicorn
+
+    uvicorn.run(GraphAPIStub().app, host="127.0.0.1", port=8089)
@@ -1 +1,243 @@
-# Placeholder para mock server del PMS
+"""Stub local de la API REST de QloApps.
+
+App ASGI que imita los endpoints que usa `QloAppsClient` (bajo `/api`):
+disponibilidad (`/hotel_booking`), reservas (`/hotel_bookings`, con los filtros
+`date_upd` del feed de cambios y `external_reference`, y alta idempotente por
+`Idempotency-Key`), tipos
+de habitación y hoteles. Cuenta las llamadas por endpoint y permite añadir
+latencia para reproducir misses concurrentes, imponer un límite de requests
+por ventana deslizante (429 por encima, como QloApps) y forzar un código de
+error (`fail_with`).
+
+Uso en tests (sin red):
+
+    stub = QloAppsStub(latency=0.05)
+    adapter.qloapps.client = stub.client()
+
+Uso manual como servidor local:
+
+    python -m tests.mocks.pms_mock_server  # escucha en 127.0.0.1:8088
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+DEFAULT_ROOM_TYPES: List[Dict[str, Any]] = [
+    {"id_product": 1, "name": "Single", "price": 80.0, "max_occupancy": 1, "inventory": 4},
+    {"id_product": 2, "name": "Doble", "price": 120.0, "max_occupancy": 2, "inventory": 10},
+    {"id_product": 4, "name": "Suite", "price": 250.0, "max_occupancy": 4, "inventory": 2},
+]
+
+
+@dataclass
+class QloAppsStub:
+    latency: float = 0.0
+    room_types: List[Dict[str, Any]] = field(default_factory=lambda: [dict(rt) for rt in DEFAULT_ROOM_TYPES])
+    calls: Counter = field(default_factory=Counter)
+    # Límite tipo QloApps: más de `rate_limit` requests en `rate_window` segundos → 429
+    rate_limit: Optional[int] = None
+    rate_window: float = 60.0
+    throttled: int = 0
+    bookings: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    # Noches agotadas por tipo: {noche: {id_product, ...}}
+    sold_out: Dict[date, set] = field(default_factory=dict)
+    # Reloj del PMS (date_upd); avanza un segundo por modificación
+    clock: datetime = field(default_factory=lambda: datetime(2030, 7, 1, 9, 0, 0))
+
+    def __post_init__(self) -> None:
+        self._arrivals: Deque[float] = deque()
+        self._fail_status: Optional[int] = None
+        self._idempotent: Dict[str, int] = {}
+        self.app = self._build_app()
+
+    def fail_with(self, status: Optional[int]) -> None:
+        """Todas las llamadas responden `status` hasta `fail_with(None)`."""
+        self._fail_status = status
+
+    def _tick(self) -> str:
+        self.clock += timedelta(seconds=1)
+        return self.clock.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _created(self, booking_id: int) -> Dict[str, Any]:
+        # El webservice de QloApps devuelve los IDs como string en JSON
+        return {**self.bookings[booking_id], "id_booking": str(booking_id)}
+
+    def add_booking(
+        self,
+        booking_id: int,
+        date_from: date,
+        date_to: date,
+        id_product: int = 2,
+        status: str = "confirmed",
+        **extra: Any,
+    ) -> Dict[str, Any]:
+        """Registra una reserva hecha "por otro canal" (visible solo vía feed de cambios)."""
+        stamp = self._tick()
+        booking = {
+            "id_booking": booking_id,
+            "booking_reference": f"QLO-{booking_id}",
+            "booking_status": status,
+            "id_hotel": 1,
+            "id_product": id_product,
+            "date_from": date_from.isoformat(),
+            "date_to": date_to.isoformat(),
+            "num_rooms": 1,
+            "num_adults": 2,
+            "num_children": 0,
+            "total_paid": 0.0,
+            "currency": "USD",
+            "date_add": stamp,
+            "date_upd": stamp,
+            **extra,
+        }
+        self.bookings[booking_id] = booking
+        return booking
+
+    def modify_booking(self, booking_id: int, **changes: Any) -> Dict[str, Any]:
+        """Modifica una reserva existente (`date_from`, `booking_status`, ...) y actualiza `date_upd`."""
+        booking = self.bookings[booking_id]
+        booking.update({k: v.isoformat() if isinstance(v, date) else v for k, v in changes.items()})
+        booking["date_upd"] = self._tick()
+        return booking
+
+    def _bookings_modified_since(self, filter_upd: Optional[str], limit: Optional[str]) -> List[Dict[str, Any]]:
+        since = filter_upd.strip(">[]") if filter_upd else ""
+        rows = sorted(
+            (b for b in self.bookings.values() if b["date_upd"] >= since),
+            key=lambda b: (b["date_upd"], b["id_booking"]),
+        )
+        if limit:
+            offset, _, count = limit.rpartition(",")
+            start = int(offset or 0)
+            rows = rows[start : start + int(count)]
+        return [dict(b) for b in rows]
+
+    def _over_limit(self) -> bool:
+        if self.rate_limit is None:
+            return False
+        now = time.monotonic()
+        while self._arrivals and self._arrivals[0] <= now - self.rate_window:
+            self._arrivals.popleft()
+        self._arrivals.append(now)
+        return len(self._arrivals) > self.rate_limit
+
+    def client(self) -> httpx.AsyncClient:
+        """Cliente httpx con la misma base que `QloAppsClient` pero sin red."""
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://qloapps.stub/api")
+
+    def sell_out(self, night: date, *room_type_ids: int) -> None:
+        """Deja sin cupo esos tipos (todos si no se indican) para la noche dada."""
+        self.sold_out.setdefault(night, set()).update(room_type_ids or [rt["id_product"] for rt in self.room_types])
+
+    def _is_sold_out(self, date_from: date, date_to: date, room_type_id: int) -> bool:
+        return any(
+            room_type_id in self.sold_out.get(date_from + timedelta(days=i), ())
+            for i in range(max(1, (date_to - date_from).days))
+        )
+
+    def availability(self, date_from: date, date_to: date, room_type_id: int | None = None) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id_product": rt["id_product"],
+                "room_type_name": rt["name"],
+                "available_num": 0 if self._is_sold_out(date_from, date_to, rt["id_product"]) else rt["inventory"],
+                "price_per_night": rt["price"],
+                "currency": "USD",
+                "max_occupancy": rt["max_occupancy"],
+            }
+            for rt in self.room_types
+            if room_type_id is None or rt["id_product"] == room_type_id
+        ]
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.middleware("http")
+        async def count_calls(request: Request, call_next):
+            self.calls[request.url.path.removeprefix("/api")] += 1
+            if self._over_limit():
+                self.throttled += 1
+                return JSONResponse({"error": "Too Many Requests"}, status_code=429)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self._fail_status is not None:
+                return JSONResponse({"error": "stub failure"}, status_code=self._fail_status)
+            return await call_next(request)
+
+        @app.get("/api/hotel_booking")
+        async def hotel_booking(date_from: date, date_to: date, id_product: int | None = None):
+            return {"available_rooms": self.availability(date_from, date_to, id_product)}
+
+        @app.get("/api/hotel_bookings")
+        async def hotel_bookings(request: Request):
+            params = request.query_params
+            reference = params.get("filter[external_reference]", "").strip("[]")
+            if reference:
+                matches = [b for b in self.bookings.values() if b.get("external_reference") == reference]
+                return {"bookings": [dict(b) for b in matches]}
+            return {"bookings": self._bookings_modified_since(params.get("filter[date_upd]"), params.get("limit"))}
+
+        @app.post("/api/hotel_bookings")
+        async def create_hotel_booking(request: Request):
+            key = request.headers.get("Idempotency-Key")
+            if key and key in self._idempotent:
+                return {"booking": self._created(self._idempotent[key])}
+            body = await request.json()
+            booking_id = max(self.bookings, default=1000) + 1
+            booking = self.add_booking(
+                booking_id,
+                date.fromisoformat(body["date_from"]),
+                date.fromisoformat(body["date_to"]),
+                id_product=int(body["id_product"]),
+                num_rooms=int(body.get("num_rooms", 1)),
+                booking_reference=f"QLO-{booking_id}",
+                external_reference=body.get("external_reference"),
+            )
+            if key:
+                self._idempotent[key] = booking_id
+            return {"booking": self._created(booking["id_booking"])}
+
+        @app.get("/api/hotel_bookings/{booking_id}")
+        async def hotel_booking_detail(booking_id: int):
+            if booking_id not in self.bookings:
+                return JSONResponse({"error": "Not Found"}, status_code=404)
+            return {"booking": dict(self.bookings[booking_id])}
+
+        @app.put("/api/hotel_bookings/{booking_id}")
+        async def update_hotel_booking(booking_id: int, request: Request):
+            if booking_id not in self.bookings:
+                return JSONResponse({"error": "Not Found"}, status_code=404)
+            changes = (await request.json()).get("booking", {})
+            changes.pop("id_booking", None)
+            return {"booking": self.modify_booking(booking_id, **changes)}
+
+        @app.get("/api/room_types")
+        async def room_types():
+            return {
+                "room_types": [
+                    {"id_product": rt["id_product"], "name": rt["name"], "max_guests": rt["max_occupancy"]}
+                    for rt in self.room_types
+                ]
+            }
+
+        @app.get("/api/hotels")
+        async def hotels():
+            return {"hotels": [{"id": 1, "name": "Hotel Stub"}]}
+
+        return app
+
+
+if __name__ == "__main__":  # pragma: no cover
+    import uvicorn
+
+    uvicorn.run(QloAppsStub().app, host="127.0.0.1", port=8088)
@@ -0,0 +1,96 @@
+import random
+from datetime import date, timedelta
+
+from app.services.alternatives_engine import AlternativesEngine, AvailabilityIndex
+
+START = date(2030, 7, 1)
+
+
+def _night(doble: int, suite: int = 1, doble_price: float = 100.0) -> list:
+    return [
+        {
+            "room_type_id": 2,
+            "room_type_name": "Doble",
+            "available_rooms": doble,
+            "price_per_night": doble_price,
+            "max_occupancy": 2,
+        },
+        {
+            "room_type_id": 4,
+            "room_type_name": "Suite",
+            "available_rooms": suite,
+            "price_per_night": 250.0,
+            "max_occupancy": 4,
+        },
+    ]
+
+
+def test_windows_match_brute_force():
+    rng = random.Random(3)
+    nights = [
+        [
+            {"room_type_id": t, "available_rooms": rng.randint(0, 3), "price_per_night": rng.randint(50, 300)}
+            for t in range(3)
+        ]
+        for _ in range(40)
+    ]
+    index = AvailabilityIndex(START, nights)
+
+    for _ in range(200):
+        t, start, length = rng.randrange(3), rng.randrange(40), rng.randint(1, 10)
+        window = index.window(t, START + timedelta(days=start), length)
+        if start + length > 40:
+            assert window is None
+            continue
+        span = [n[t] for n in nights[start : start + length]]
+        assert window == (min(r["available_rooms"] for r in span), sum(r["price_per_night"] for r in span))
+
+
+def test_shifted_stay_around_a_sold_out_night_ranks_first():
+    nights = [_night(3) for _ in range(14)]
+    nights[5] = _night(0)  # día 6 agotado para la doble
+    index = AvailabilityIndex(START, nights)
+
+    best = AlternativesEngine().search(
+        index, START + timedelta(days=4), START + timedelta(days=6), 2, room_type_id=2, limit=3
+    )
+
+    first = best[0]
+    assert (first.room_type_id, first.check_out, first.shift_days) == (2, START + timedelta(days=5), -1)
+    assert all(a.available_rooms >= 1 for a in best)
+    assert all(
+        (a.check_in, a.check_out, a.room_type_id) != (START + timedelta(days=4), START + timedelta(days=6), 2)
+        for a in best
+    )
+
+
+def test_price_breaks_ties_and_can_outweigh_a_day_of_shift():
+    nights = [_night(3, doble_price=100.0) for _ in range(10)]
+    nights[4] = _night(0)
+    nights[3] = _night(3, doble_price=300.0)  # correrse hacia atrás es más caro
+    index = AvailabilityIndex(START, nights)
+
+    best = AlternativesEngine(max_length_delta=0).search(
+        index, START + timedelta(days=4), START + timedelta(days=5), 2, room_type_id=2, limit=2
+    )
+
+    # +1 y -1 están igual de cerca pero -1 cuesta el triple: pierde incluso contra -2
+    assert [a.shift_days for a in best] == [1, -2]
+
+
+def test_capacity_and_earliest_date_filter_candidates():
+    index = AvailabilityIndex(START, [_night(0, suite=2) for _ in range(7)])
+
+    # 4 huéspedes: solo la suite tiene capacidad; nada antes de `earliest`
+    best = AlternativesEngine().search(
+        index,
+        START + timedelta(days=1),
+        START + timedelta(days=3),
+        4,
+        room_type_id=2,
+        limit=10,
+        earliest=START + timedelta(days=1),
+    )
+
+    assert best and {a.room_type for a in best} == {"Suite"}
+    assert min(a.check_in for a in best) >= START + timedelta(days=1)
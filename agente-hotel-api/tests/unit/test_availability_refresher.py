@@ -0,0 +1,208 @@
+import asyncio
+import json
+import time
+from datetime import date, timedelta
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.services.availability_refresher import (
+    AvailabilityRefresher,
+    NightPopularity,
+    availability_queries_total,
+)
+from app.services.pms_adapter import QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+TODAY = date(2030, 7, 10)  # miércoles
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def stub():
+    return QloAppsStub()
+
+
+@pytest.fixture
+async def make_adapter(server, stub):
+    adapters = []
+
+    def factory() -> QloAppsAdapter:
+        adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis(server=server))
+        adapter.qloapps.client = stub.client()
+        adapters.append(adapter)
+        return adapter
+
+    yield factory
+    for adapter in adapters:
+        await adapter.close()
+
+
+def _refresher(adapter, **kwargs) -> AvailabilityRefresher:
+    params = {
+        "interval": 60,
+        "horizon_days": 3,
+        "weekends_ahead": 2,
+        "holidays": [],
+        "popular_nights": 5,
+        "max_per_cycle": 50,
+        "budget_ratio": 1.0,
+        "popularity": NightPopularity(),
+    }
+    params.update(kwargs)
+    return AvailabilityRefresher(adapter, **params)
+
+
+async def _age_night(adapter: QloAppsAdapter, night: date, seconds: float) -> None:
+    key = adapter._night_key(night, None)
+    entry = json.loads(await adapter.redis.get(key))
+    entry["fetched_at"] = time.time() - seconds
+    await adapter.redis.set(key, json.dumps(entry))
+
+
+def _queries(source: str) -> float:
+    return availability_queries_total.labels(source=source)._value.get()
+
+
+async def test_candidates_cover_horizon_weekends_holidays_and_popular_nights(make_adapter):
+    popularity = NightPopularity()
+    popularity.record([date(2030, 8, 20)] * 3 + [date(2030, 7, 1)])  # la pasada se descarta
+    refresher = _refresher(make_adapter(), holidays=["2030-12-25", "2029-12-25"], popularity=popularity)
+
+    nights = await refresher.candidate_nights(TODAY)
+
+    assert nights == [
+        TODAY,
+        TODAY + timedelta(days=1),
+        TODAY + timedelta(days=2),  # viernes 12 (también fin de semana: sin repetir)
+        date(2030, 8, 20),
+        date(2030, 7, 13),
+        date(2030, 7, 19),
+        date(2030, 7, 20),
+        date(2030, 12, 25),
+    ]
+
+
+async def test_cycle_refreshes_only_nights_about_to_expire(make_adapter, stub):
+    adapter = make_adapter()
+    refresher = _refresher(adapter, horizon_days=4, weekends_ahead=0)
+
+    assert await refresher.run_cycle(TODAY) == 4
+    assert stub.calls["/hotel_booking"] == 1  # noches consecutivas: un rango
+
+    # Una noche vencería antes del próximo ciclo; el resto sigue fresca
+    await _age_night(adapter, TODAY, adapter.night_cache_ttl - 30)
+    await adapter.redis.delete("pms:availability:prefetch_lease")
+    assert await refresher.run_cycle(TODAY) == 1
+    assert stub.calls["/hotel_booking"] == 2
+
+
+async def test_prefetched_nights_serve_guests_without_pms_calls(make_adapter, stub):
+    adapter = make_adapter()
+    await _refresher(adapter, horizon_days=3, weekends_ahead=0).run_cycle(TODAY)
+    calls, cached = stub.calls["/hotel_booking"], _queries("cache")
+
+    rooms = await adapter.check_availability(TODAY, TODAY + timedelta(days=3), 2)
+
+    assert rooms and stub.calls["/hotel_booking"] == calls
+    assert _queries("cache") - cached == 1
+
+
+async def test_only_one_worker_refreshes_per_interval(make_adapter, stub):
+    first, second = _refresher(make_adapter()), _refresher(make_adapter())
+    assert await first.run_cycle(TODAY) > 0
+    calls = stub.calls["/hotel_booking"]
+
+    assert await second.run_cycle(TODAY) == 0
+    assert stub.calls["/hotel_booking"] == calls
+
+
+async def test_prefetch_stops_at_its_share_of_the_pms_quota(make_adapter, stub):
+    adapter = make_adapter()
+    adapter.rate_limiter.global_used = adapter.rate_limiter.max_requests  # clúster ya en el límite
+
+    assert await _refresher(adapter, budget_ratio=0.5).run_cycle(TODAY) == 0
+    assert stub.calls["/hotel_booking"] == 0
+
+
+async def test_stale_night_is_served_marked_and_revalidated_in_background(make_adapter, stub):
+    adapter = make_adapter()
+    stay = (TODAY, TODAY + timedelta(days=1))
+    await adapter.check_availability(*stay, 2)
+    await adapter.redis.delete(f"availability:{stay[0]}:{stay[1]}:2:any")
+    await _age_night(adapter, TODAY, adapter.night_cache_ttl + 10)
+    stale_before = _queries("stale")
+
+    rooms = await adapter.check_availability(*stay, 2)
+
+    # Respuesta inmediata desde la caché vencida, marcada como en el fallback
+    assert rooms and all(room["potentially_stale"] for room in rooms)
+    assert _queries("stale") - stale_before == 1
+    assert await adapter.redis.get(f"availability:{stay[0]}:{stay[1]}:2:any:stale") == b"true"
+
+    await asyncio.gather(*adapter._background)
+    assert stub.calls["/hotel_booking"] == 2
+    fresh = await adapter.check_availability(*stay, 2)
+    assert not any(room["potentially_stale"] for room in fresh)
+
+
+async def test_nights_beyond_staleness_window_are_fetched_synchronously(make_adapter, stub):
+    adapter = make_adapter()
+    stay = (TODAY, TODAY + timedelta(days=1))
+    await adapter.check_availability(*stay, 2)
+    await adapter.redis.delete(f"availability:{stay[0]}:{stay[1]}:2:any")
+    await _age_night(adapter, TODAY, adapter.night_cache_ttl + adapter.night_max_stale + 1)
+
+    rooms = await adapter.check_availability(*stay, 2)
+
+    assert stub.calls["/hotel_booking"] == 2
+    assert not any(room["potentially_stale"] for room in rooms)
+
+
+async def test_guest_queries_feed_cluster_popularity(make_adapter, stub):
+    popularity = NightPopularity()
+    adapter = make_adapter()
+    popularity.record([date(2030, 9, 5)] * 4)
+    await _refresher(adapter, popularity=popularity).run_cycle(TODAY)
+
+    other = _refresher(make_adapter(), popularity=NightPopularity())
+    assert date(2030, 9, 5) in await other.candidate_nights(TODAY)
+
+
+async def test_cluster_popularity_drops_past_nights_and_decays(make_adapter):
+    popularity = NightPopularity()
+    adapter = make_adapter()
+    popularity.record([date(2030, 7, 5)] * 9 + [date(2030, 9, 5)] * 4 + [date(2030, 9, 6)])
+    refresher = _refresher(adapter, popularity=popularity)
+    key = "pms:availability:popularity"
+
+    await refresher._publish_popularity()
+    assert await refresher._popular_nights(TODAY) == [date(2030, 9, 5), date(2030, 9, 6)]
+    assert await adapter.redis.zscore(key, "2030-07-05") is None
+    assert await adapter.redis.zscore(key, "2030-09-05") == 2.0
+
+    # Sin consultas nuevas el score se reduce a la mitad por ciclo hasta desaparecer
+    for _ in range(3):
+        await refresher._popular_nights(TODAY)
+    assert await adapter.redis.zscore(key, "2030-09-05") == 0.25
+    assert await adapter.redis.zscore(key, "2030-09-06") is None
+    assert await refresher._popular_nights(date(2030, 9, 6)) == []
+
+
+async def test_workers_without_the_lease_still_publish_and_age_popularity(make_adapter, stub):
+    leader, follower = NightPopularity(), NightPopularity()
+    assert await _refresher(make_adapter(), popularity=leader).run_cycle(TODAY) > 0
+
+    follower.record([date(2030, 9, 5)] * 4)
+    assert await _refresher(make_adapter(), popularity=follower).run_cycle(TODAY) == 0
+
+    # Lo consultado en el worker sin lease llega al ZSET y su conteo local no crece
+    assert await make_adapter().redis.zscore("pms:availability:popularity", "2030-09-05") == 4.0
+    assert follower.drain_pending() == {}
+    assert follower.top(5, TODAY) == [date(2030, 9, 5)]
+    assert follower._counts[date(2030, 9, 5)] == 2.0
@@ -0,0 +1,108 @@
+import pytest
+
+from app.security import data_encryption
+from app.security.data_encryption import (
+    DataClassification,
+    DataEncryptionService,
+    EncryptionAlgorithm,
+)
+
+
+def _guest(i: int) -> dict:
+    return {
+        "guest_id": f"G-{i}",
+        "name": f"Huésped {i}",
+        "email": f"guest{i}@example.com",
+        "phone": f"+54911{i:07d}",
+        "passport_number": f"AR{i:08d}",
+        "address": None,
+    }
+
+
+@pytest.fixture
+async def service():
+    service = DataEncryptionService()
+    await service.initialize()
+    return service
+
+
+async def test_records_roundtrip_under_one_data_key(service):
+    records = [_guest(i) for i in range(3)]
+
+    sealed = await service.encrypt_pii_records(records)
+
+    assert sealed[0]["guest_id"] == "G-0" and sealed[0]["address"] is None
+    assert "guest0@" not in str(sealed)
+    envelopes = {r[f]["metadata"]["envelope"]["wrapped_key"] for r in sealed for f in ("email", "phone")}
+    assert len(envelopes) == 1
+    assert await service.decrypt_pii_records(sealed) == records
+    assert await service.decrypt_pii_data(sealed[1]) == records[1]
+
+
+async def test_ciphertext_is_bound_to_its_field(service):
+    sealed = (await service.encrypt_pii_records([_guest(1)]))[0]
+    sealed["email"], sealed["phone"] = {**sealed["phone"], "metadata": sealed["email"]["metadata"]}, sealed["email"]
+
+    with pytest.raises(Exception):
+        await service.decrypt_pii_data(sealed)
+
+
+async def test_ciphertext_is_bound_to_its_record(service):
+    ids = ["G-0", "G-1"]
+    sealed = await service.encrypt_pii_records([_guest(0), _guest(1)], ids)
+    assert await service.decrypt_pii_records(sealed, ids) == [_guest(0), _guest(1)]
+
+    # Same data key for the whole batch: only the record id tells the rows apart
+    for target in ("email", "phone"):
+        tampered = {**sealed[1], target: sealed[0]["email"]}
+        with pytest.raises(Exception):
+            await service.decrypt_pii_data(tampered, "G-1")
+    with pytest.raises(Exception):
+        await service.decrypt_pii_data(sealed[1], "G-0")
+
+
+async def test_rotation_rewraps_without_reencrypting(service):
+    old_kek = service._get_default_key_id(DataClassification.RESTRICTED, EncryptionAlgorithm.AES_256_GCM)
+    sealed = await service.encrypt_pii_records([_guest(i) for i in range(2)])
+
+    new_kek = await service.rotate_key(old_kek)
+    rewrapped = await service.rewrap_pii_records(sealed)
+
+    assert service._get_default_key_id(DataClassification.RESTRICTED, EncryptionAlgorithm.AES_256_GCM) == new_kek
+    assert rewrapped[0]["email"]["encrypted_data"] == sealed[0]["email"]["encrypted_data"]
+    assert rewrapped[0]["email"]["metadata"]["envelope"]["kek_id"] == new_kek
+    del service.encryption_keys[old_kek]
+    service._data_keys.clear()
+    assert await service.decrypt_pii_records(rewrapped) == [_guest(0), _guest(1)]
+
+
+async def test_large_batches_run_in_a_thread(service, monkeypatch):
+    calls = []
+    to_thread = data_encryption.asyncio.to_thread
+
+    async def spy(func, *args):
+        calls.append(func.__name__)
+        return await to_thread(func, *args)
+
+    monkeypatch.setattr(data_encryption.asyncio, "to_thread", spy)
+    records = [_guest(i) for i in range(data_encryption.BULK_THREAD_THRESHOLD)]
+
+    assert await service.decrypt_pii_records(await service.encrypt_pii_records(records)) == records
+    assert calls == ["_seal_records", "_open_records"]
+    await service.encrypt_pii_data(_guest(1))
+    assert len(calls) == 2
+
+
+async def test_single_values_decrypt_and_legacy_fields_still_open(service):
+    encrypted = await service.encrypt_data("secreto", DataClassification.RESTRICTED)
+    assert encrypted.key_id
+    assert await service.decrypt_data(encrypted) == b"secreto"
+
+    legacy_record = {"email": encrypted.to_dict(), "name": "Ana"}
+    assert await service.decrypt_pii_data(legacy_record) == {"email": "secreto", "name": "Ana"}
+
+    envelope_field = (await service.encrypt_pii_records([{"email": "a@b.c"}]))[0]["email"]
+    encrypted_field = data_encryption.EncryptedData.from_dict(envelope_field)
+    assert await service.decrypt_data(encrypted_field, field_name="email") == b"a@b.c"
+    with pytest.raises(ValueError):
+        await service.decrypt_data(encrypted_field)
@@ -0,0 +1,104 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import fakeredis.aioredis
+import pytest
+
+from app.monitoring.business_metrics import AdvancedBusinessMetrics, BusinessMetric, MetricCategory
+from app.monitoring.dashboard_service import CustomDashboardService, DashboardRole
+
+WIDGET_DELAY = 0.05
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def handlers(self):
+        async def slow(source):
+            calls.append(source)
+            if source == "arrivals_by_hour":
+                await asyncio.sleep(3600)
+            await asyncio.sleep(WIDGET_DELAY)
+            return {"value": source}
+
+        sources = {w.data_source for d in self.dashboards.values() for w in d.widgets}
+        return {source: (lambda source=source: slow(source)) for source in sources}
+
+    monkeypatch.setattr(CustomDashboardService, "_get_data_source_handlers", handlers)
+    return calls
+
+
+async def test_stale_widgets_are_computed_concurrently_with_per_widget_timeout(calls):
+    service = CustomDashboardService(None, None)
+    service.widget_timeout = 0.2
+    widgets = service.dashboards[DashboardRole.FRONT_DESK].widgets
+
+    started = time.perf_counter()
+    dashboard = await service.get_dashboard(DashboardRole.FRONT_DESK)
+    elapsed = time.perf_counter() - started
+
+    assert len(calls) == len(widgets) > 3
+    assert elapsed < 0.2 + WIDGET_DELAY  # concurrent, not the sum of widgets nor the hang
+    sources = {w.id: w.data_source for w in widgets}
+    data = {sources[w["id"]]: w["data"] for w in dashboard["widgets"]}
+    assert data["arrivals_by_hour"] == {"error": "Widget data timeout"}
+    assert data["pending_checkins"] == {"value": "pending_checkins"}
+
+    calls.clear()
+    await service.get_dashboard(DashboardRole.FRONT_DESK)
+    assert calls == ["arrivals_by_hour"]  # only the widget without data is retried
+
+
+async def test_materialized_snapshot_is_served_with_a_single_read(calls):
+    redis = fakeredis.aioredis.FakeRedis()
+    service = CustomDashboardService(None, redis)
+    service.widget_timeout = 0.1
+    await service.materialize()
+    assert len(await redis.keys("dashboard_snapshot:*")) == len(service.dashboards)
+
+    # Another worker that has not materialized yet reads the shared snapshot
+    calls.clear()
+    other = CustomDashboardService(None, redis)
+    dashboard = await other.get_dashboard(DashboardRole.EXECUTIVE)
+    assert calls == []
+    assert dashboard["widgets"][0]["data"] == {"value": "daily_revenue"}
+
+    # Widgets past their refresh interval are recomputed on the next materialization
+    snapshot = service.snapshots[DashboardRole.EXECUTIVE]["widgets"]
+    snapshot["revenue_kpi"]["computed_at"] -= 3600
+    calls.clear()
+    await service.materialize()
+    assert "daily_revenue" in calls and "occupancy_rate" not in calls
+
+
+async def test_business_metrics_roll_up_per_minute():
+    redis = fakeredis.aioredis.FakeRedis()
+    metrics = AdvancedBusinessMetrics(redis, None)
+    metrics.rollup_minutes = 3
+    metrics.time_series_data.clear()
+    start = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+    for minute in range(5):
+        for value in (1.0, 2.0, 6.0):
+            await metrics._store_metric(
+                BusinessMetric(
+                    name="message_processed",
+                    category=MetricCategory.COMMUNICATION,
+                    value=value,
+                    timestamp=start + timedelta(minutes=minute, seconds=value),
+                    labels={},
+                )
+            )
+
+    rollups = metrics.get_rollups(MetricCategory.COMMUNICATION, "message_processed")
+    assert [r.minute for r in rollups] == ["2026-01-01-12-02", "2026-01-01-12-03", "2026-01-01-12-04"]
+    assert (rollups[-1].count, rollups[-1].average, rollups[-1].min, rollups[-1].max) == (3, 3.0, 1.0, 6.0)
+
+    await metrics.stop()
+    keys = await redis.keys("metric_rollup:*")
+    assert len(keys) == 5 and not await redis.keys("metric:*")
+    stored = json.loads(await redis.get("metric_rollup:communication:message_processed:2026-01-01-12-04"))
+    assert stored["count"] == 3 and stored["total"] == 9.0
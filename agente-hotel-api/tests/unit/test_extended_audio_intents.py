@@ -47,7 +47,7 @@ async def test_guest_services_with_audio():
     assert "audio_data" in result["content"]
 
     # Verificar que se llamó al template service con el template correcto
-    orchestrator.template_service.get_response.assert_called_once_with("guest_services")
+    orchestrator.template_service.get_response.assert_called_once_with("guest_services", language="es", tenant_id=None)
 
     # Verificar que se generó audio
     audio_processor.generate_audio_response.assert_called_once()
@@ -101,7 +101,7 @@ async def test_hotel_amenities_with_audio():
     assert "audio_data" in result["content"]
 
     # Verificar que se llamó al template service con el template correcto
-    orchestrator.template_service.get_response.assert_called_once_with("hotel_amenities")
+    orchestrator.template_service.get_response.assert_called_once_with("hotel_amenities", language="es", tenant_id=None)
 
 
 @pytest.mark.asyncio
@@ -147,7 +147,7 @@ async def test_check_in_info_with_audio():
     assert "audio_data" in result["content"]
 
     # Verificar que se llamó al template service con el template correcto
-    orchestrator.template_service.get_response.assert_called_once_with("check_in_info")
+    orchestrator.template_service.get_response.assert_called_once_with("check_in_info", language="es", tenant_id=None)
 
 
 @pytest.mark.asyncio
@@ -193,7 +193,7 @@ async def test_check_out_info_with_audio():
     assert "audio_data" in result["content"]
 
     # Verificar que se llamó al template service con el template correcto
-    orchestrator.template_service.get_response.assert_called_once_with("check_out_info")
+    orchestrator.template_service.get_response.assert_called_once_with("check_out_info", language="es", tenant_id=None)
 
 
 @pytest.mark.asyncio
@@ -239,7 +239,9 @@ async def test_cancellation_policy_with_audio():
     assert "audio_data" in result["content"]
 
     # Verificar que se llamó al template service con el template correcto
-    orchestrator.template_service.get_response.assert_called_once_with("cancellation_policy")
+    orchestrator.template_service.get_response.assert_called_once_with(
+        "cancellation_policy", language="es", tenant_id=None
+    )
 
 
 @pytest.mark.asyncio
@@ -295,7 +297,7 @@ async def test_new_intents_with_text_messages():
         assert "content" in result, f"Failed for intent {intent_name}"
 
         # Verificar que se llamó al template service con el template correcto
-        orchestrator.template_service.get_response.assert_called_once_with(intent_name)
+        orchestrator.template_service.get_response.assert_called_once_with(intent_name, language="es", tenant_id=None)
 
         # Verificar que NO se generó audio
         audio_processor.generate_audio_response.assert_not_called()
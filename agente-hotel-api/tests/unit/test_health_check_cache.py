@@ -0,0 +1,110 @@
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.monitoring.health_cache import HealthCheckCache
+from app.monitoring.health_service import AdvancedHealthService, DependencyType, HealthStatus
+from app.routers import health
+
+HANG_TIMEOUT = 0.3
+
+
+async def _hang(*_):
+    await asyncio.sleep(3600)
+
+
+async def _timed(coro_fn, samples=10):
+    durations, result = [], None
+    for _ in range(samples):
+        started = time.perf_counter()
+        result = await coro_fn()
+        durations.append(time.perf_counter() - started)
+    return result, durations
+
+
+async def test_refresh_runs_concurrently_single_flight_under_deadline():
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return True
+
+    cache = HealthCheckCache("test", deadline_seconds=0.2)
+    cache.register("a", slow, max_age_seconds=60, timeout_seconds=1)
+    cache.register("b", slow, max_age_seconds=60, timeout_seconds=1)
+    cache.register("hung", _hang, max_age_seconds=60, timeout_seconds=HANG_TIMEOUT)
+
+    started = time.perf_counter()
+    entries, _ = await asyncio.gather(cache.collect(["a", "b", "hung"]), cache.collect(["a"]))
+    elapsed = time.perf_counter() - started
+
+    assert 0.1 <= elapsed < 0.29  # concurrent, bounded by the deadline rather than the hang
+    assert len(calls) == 2  # "a" ran once for both callers
+    assert entries["a"].value is True and entries["hung"].checked_at is None
+
+    await asyncio.sleep(HANG_TIMEOUT)
+    assert cache.checks["hung"].value is None and "timeout" in cache.checks["hung"].error
+    await cache.stop()
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    monkeypatch.setenv("CHECK_DB_IN_READINESS", "true")
+    monkeypatch.setenv("CHECK_REDIS_IN_READINESS", "true")
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=AsyncMock())
+    session.__aexit__ = AsyncMock(return_value=False)
+    redis_client = AsyncMock()
+    monkeypatch.setattr(health, "AsyncSessionFactory", MagicMock(return_value=session))
+    monkeypatch.setattr(health, "get_redis", AsyncMock(return_value=redis_client))
+    for check in health.readiness_checks.checks.values():
+        monkeypatch.setattr(check, "max_age_seconds", 0.05)
+        monkeypatch.setattr(check, "timeout_seconds", HANG_TIMEOUT)
+    health.readiness_checks.clear()
+    yield redis_client
+    health.readiness_checks.clear()
+
+
+async def test_readiness_answers_from_memory_while_redis_hangs(readiness):
+    with patch("app.routers.health.settings") as mock_settings:
+        mock_settings.check_pms_in_readiness = False
+        assert (await health.readiness_check()).status_code == 200
+
+        readiness.ping.side_effect = _hang
+        await asyncio.sleep(0.06)  # cached results are now stale
+        response, durations = await _timed(health.readiness_check)
+
+        assert response.status_code == 200  # last known result while the refresh is in flight
+        assert min(durations) < 0.005 and max(durations) < HANG_TIMEOUT
+        await asyncio.sleep(0.01)
+        assert readiness.ping.await_count == 2  # one refresh for all the probes
+
+        await asyncio.sleep(HANG_TIMEOUT + 0.05)
+        response = await health.readiness_check()
+        assert response.status_code == 503
+        assert json.loads(response.body)["checks"] == {"database": True, "redis": False, "pms": True}
+    await health.readiness_checks.stop()
+
+
+async def test_health_service_runs_checks_concurrently_and_serves_readiness_from_memory(monkeypatch):
+    monkeypatch.setattr(AdvancedHealthService, "_start_health_monitoring", lambda self: None)
+    service = AdvancedHealthService(None, None, None)
+    service.results_cache.deadline_seconds = 0.2
+    service.register_dependency(
+        "redis_cache", DependencyType.CACHE, "redis://", _hang, interval_seconds=0, timeout_seconds=HANG_TIMEOUT
+    )
+
+    started = time.perf_counter()
+    report = await service.check_health()
+    assert time.perf_counter() - started < 0.3
+    assert report.dependencies["redis_cache"].status == HealthStatus.CRITICAL
+    assert report.components["reservation_system"].status == HealthStatus.HEALTHY
+
+    result, durations = await _timed(service.check_readiness)
+    assert min(durations) < 0.005 and max(durations) < HANG_TIMEOUT
+    assert result.status == HealthStatus.UNHEALTHY and result.details["failed_dependencies"] == ["redis_cache"]
+    await service.results_cache.stop()
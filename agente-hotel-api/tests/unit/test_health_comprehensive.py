@@ -35,6 +35,19 @@ def mock_redis():
     return redis_mock
 
 
+async def _readiness(db, redis_client):
+    """Run /health/ready on an empty cache against the given DB session and Redis mocks."""
+    from app.routers import health
+
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=db)
+    session.__aexit__ = AsyncMock(return_value=False)
+    health.readiness_checks.clear()
+    with patch("app.routers.health.AsyncSessionFactory", return_value=session):
+        with patch("app.routers.health.get_redis", AsyncMock(return_value=redis_client)):
+            return await health.readiness_check()
+
+
 # ============================================================================
 # 1. Liveness Check (3 tests)
 # ============================================================================
@@ -81,14 +94,13 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_all_healthy(self, mock_db, mock_redis):
         """Test readiness when all dependencies are healthy."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         # JSONResponse has body attribute
         import json
@@ -100,7 +112,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_database_down(self, mock_redis):
         """Test readiness returns 503 when database is down."""
-        from app.routers.health import readiness_check
         
         mock_db = AsyncMock()
         mock_db.execute.side_effect = Exception("Connection refused")
@@ -110,7 +121,7 @@ class TestReadinessCheck:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         assert response.status_code == 503
         import json
@@ -121,7 +132,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_redis_down(self, mock_db):
         """Test readiness returns 503 when Redis is down."""
-        from app.routers.health import readiness_check
         
         mock_redis = AsyncMock()
         mock_redis.ping.side_effect = Exception("Connection refused")
@@ -131,7 +141,7 @@ class TestReadinessCheck:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         assert response.status_code == 503
         import json
@@ -142,7 +152,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_db_check_disabled(self, mock_redis):
         """Test readiness skips DB check when disabled."""
-        from app.routers.health import readiness_check
         
         mock_db = AsyncMock()
         mock_db.execute.side_effect = Exception("DB Error")  # Would fail if checked
@@ -152,7 +161,7 @@ class TestReadinessCheck:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         assert response.status_code == 200
         import json
@@ -162,7 +171,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_redis_check_disabled(self, mock_db):
         """Test readiness skips Redis check when disabled."""
-        from app.routers.health import readiness_check
         
         mock_redis = AsyncMock()
         mock_redis.ping.side_effect = Exception("Redis Error")  # Would fail if checked
@@ -172,7 +180,7 @@ class TestReadinessCheck:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         assert response.status_code == 200
         import json
@@ -182,7 +190,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_pms_check_mock_mode(self, mock_db, mock_redis):
         """Test PMS check is skipped in mock mode."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -191,7 +198,7 @@ class TestReadinessCheck:
                 mock_pms_type.value = "mock"
                 mock_settings.pms_type = mock_pms_type
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         import json
         data = json.loads(response.body)
@@ -200,14 +207,13 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_pms_check_disabled(self, mock_db, mock_redis):
         """Test PMS check skipped when not required."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         import json
         data = json.loads(response.body)
@@ -216,7 +222,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_pms_real_check_success(self, mock_db, mock_redis):
         """Test real PMS check when enabled and succeeds."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -226,12 +231,12 @@ class TestReadinessCheck:
                 mock_settings.pms_type = mock_pms_type
                 mock_settings.pms_base_url = "http://pms.example.com"
                 
-                with patch("app.routers.health.httpx.AsyncClient") as mock_client:
+                with patch("app.routers.health.get_health_http_client") as mock_client:
                     mock_response = MagicMock()
                     mock_response.status_code = 200
-                    mock_client.return_value.__aenter__.return_value.get = AsyncMock(return_value=mock_response)
+                    mock_client.return_value.get = AsyncMock(return_value=mock_response)
                     
-                    response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                    response = await _readiness(mock_db, mock_redis)
         
         import json
         data = json.loads(response.body)
@@ -240,7 +245,6 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_pms_real_check_failure(self, mock_db, mock_redis):
         """Test real PMS check when enabled and fails."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -250,10 +254,10 @@ class TestReadinessCheck:
                 mock_settings.pms_type = mock_pms_type
                 mock_settings.pms_base_url = "http://pms.example.com"
                 
-                with patch("app.routers.health.httpx.AsyncClient") as mock_client:
-                    mock_client.return_value.__aenter__.return_value.get = AsyncMock(side_effect=Exception("PMS unreachable"))
+                with patch("app.routers.health.get_health_http_client") as mock_client:
+                    mock_client.return_value.get = AsyncMock(side_effect=Exception("PMS unreachable"))
                     
-                    response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                    response = await _readiness(mock_db, mock_redis)
         
         assert response.status_code == 503
         import json
@@ -263,14 +267,13 @@ class TestReadinessCheck:
     @pytest.mark.asyncio
     async def test_readiness_returns_timestamp(self, mock_db, mock_redis):
         """Test readiness response includes timestamp."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
                 mock_settings.check_pms_in_readiness = False
                 mock_settings.pms_type = None
                 
-                response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                response = await _readiness(mock_db, mock_redis)
         
         import json
         data = json.loads(response.body)
@@ -325,7 +328,6 @@ class TestMetricsIntegration:
     @pytest.mark.asyncio
     async def test_readiness_updates_dependency_metrics(self, mock_db, mock_redis):
         """Test readiness updates dependency_up metric."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -333,7 +335,7 @@ class TestMetricsIntegration:
                 mock_settings.pms_type = None
                 
                 with patch("app.routers.health.dependency_up") as mock_dep:
-                    await readiness_check(db=mock_db, redis_client=mock_redis)
+                    await _readiness(mock_db, mock_redis)
                     
                     # Should have called labels for each dependency
                     assert mock_dep.labels.called
@@ -341,7 +343,6 @@ class TestMetricsIntegration:
     @pytest.mark.asyncio
     async def test_readiness_updates_readiness_up_metric(self, mock_db, mock_redis):
         """Test readiness updates readiness_up gauge."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -349,14 +350,13 @@ class TestMetricsIntegration:
                 mock_settings.pms_type = None
                 
                 with patch("app.routers.health.readiness_up") as mock_ready:
-                    await readiness_check(db=mock_db, redis_client=mock_redis)
+                    await _readiness(mock_db, mock_redis)
                     
                     mock_ready.set.assert_called_with(1)
 
     @pytest.mark.asyncio
     async def test_readiness_updates_timestamp_metric(self, mock_db, mock_redis):
         """Test readiness updates last check timestamp."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -364,7 +364,7 @@ class TestMetricsIntegration:
                 mock_settings.pms_type = None
                 
                 with patch("app.routers.health.readiness_last_check_timestamp") as mock_ts:
-                    await readiness_check(db=mock_db, redis_client=mock_redis)
+                    await _readiness(mock_db, mock_redis)
                     
                     # Should have called set with a timestamp
                     assert mock_ts.set.called
@@ -372,7 +372,6 @@ class TestMetricsIntegration:
     @pytest.mark.asyncio
     async def test_readiness_metrics_error_handling(self, mock_db, mock_redis):
         """Test readiness handles metrics update errors gracefully."""
-        from app.routers.health import readiness_check
         
         with patch.dict("os.environ", {"CHECK_DB_IN_READINESS": "true", "CHECK_REDIS_IN_READINESS": "true"}):
             with patch("app.routers.health.settings") as mock_settings:
@@ -383,7 +382,7 @@ class TestMetricsIntegration:
                     mock_dep.labels.side_effect = Exception("Metrics error")
                     
                     # Should not raise even if metrics fail
-                    response = await readiness_check(db=mock_db, redis_client=mock_redis)
+                    response = await _readiness(mock_db, mock_redis)
                     
                     # Response should still be valid
                     assert response.status_code == 200
@@ -0,0 +1,70 @@
+import asyncio
+import statistics
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.services import host_metrics
+from app.services.host_metrics import HostMetricsSampler, RingBuffer, SlidingTrend
+from app.services.resource_monitor import ResourceMonitor
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    sampler = HostMetricsSampler(interval_seconds=0.02, capacity=64)
+    monkeypatch.setattr(host_metrics, "_host_sampler", sampler)
+    yield sampler
+    sampler.stop()
+
+
+async def _loop_lags(duration_seconds: float, tick_seconds: float = 0.001) -> list:
+    lags = []
+    deadline = time.perf_counter() + duration_seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        await asyncio.sleep(tick_seconds)
+        lags.append(time.perf_counter() - started - tick_seconds)
+    return lags
+
+
+def test_sliding_trend_matches_full_regression():
+    values = [50.0, 52.5, 51.0, 58.0, 61.0, 59.5, 66.0, 70.0, 68.5, 75.0, 80.0, 79.0]
+    trend = SlidingTrend(5)
+    for i, value in enumerate(values):
+        trend.push(value)
+        window = values[max(0, i - 4) : i + 1]
+        assert trend.values() == window
+        assert trend.slope() == pytest.approx(ResourceMonitor()._calculate_trend(window) if len(window) > 1 else 0.0)
+
+
+def test_ring_buffer_keeps_the_latest_samples():
+    ring = RingBuffer(4)
+    assert ring.latest() is None and ring.last(3) == []
+    for i in range(10):
+        ring.append(i)
+    assert len(ring) == 4 and ring.latest() == 9
+    assert ring.last(3) == [7, 8, 9]
+
+
+async def test_event_loop_lag_stays_under_5ms_while_monitoring(sampler):
+    redis_client = AsyncMock(get=AsyncMock(return_value=None))
+    with patch("app.services.resource_monitor.get_redis_client", return_value=redis_client):
+        monitor = ResourceMonitor()
+        await monitor.start()
+    monitor.config["monitoring_interval"] = 0.01
+
+    task = asyncio.create_task(monitor.continuous_monitoring())
+    try:
+        lags = await _loop_lags(0.5)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await monitor.stop()
+
+    assert len(sampler.samples) >= 5  # the sampler thread kept running meanwhile
+    assert len(monitor.metrics_history) >= 10
+    assert statistics.median(lags) < 0.005
+    assert statistics.quantiles(lags, n=20)[-1] < 0.005  # p95
+    # A blocking cpu_percent(interval=1) used to stall the loop for a full second
+    assert max(lags) < 0.25
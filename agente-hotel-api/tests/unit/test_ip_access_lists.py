@@ -0,0 +1,98 @@
+import asyncio
+import re
+from ipaddress import ip_address, ip_network
+
+import fakeredis.aioredis
+import pytest
+
+from app.security import ip_access
+from app.security.audit_logger import SecurityAuditLogger
+from app.security.ip_access import BLACKLIST_KEY, CIDRTrie, IPAccessLists, update_ip_access_lists
+from app.security.security_middleware import SecurityMiddleware
+
+
+@pytest.fixture
+def lists(monkeypatch):
+    lists = IPAccessLists(refresh_interval=0.01)
+    monkeypatch.setattr(ip_access, "_ip_access_lists", lists)
+    return lists
+
+
+def test_trie_matches_ipaddress_semantics():
+    networks = ["10.0.0.0/8", "172.16.0.0/12", "192.0.2.128/25", "198.51.100.7", "2001:db8::/33", "::1"]
+    trie = CIDRTrie(networks)
+    candidates = [
+        "10.255.0.1",
+        "11.0.0.1",
+        "172.31.255.255",
+        "172.32.0.0",
+        "192.0.2.127",
+        "192.0.2.200",
+        "198.51.100.7",
+        "198.51.100.8",
+        "2001:db8:7fff::1",
+        "2001:db8:8000::1",
+        "::1",
+        "::2",
+    ]
+
+    for candidate in candidates:
+        expected = any(ip_address(candidate) in ip_network(n) for n in networks)
+        assert (candidate in trie) is expected, candidate
+    assert "::ffff:10.1.2.3" in trie
+    assert "1.2.3.4" in CIDRTrie(["0.0.0.0/0"]) and "::1" not in CIDRTrie(["0.0.0.0/0"])
+    with pytest.raises(ValueError):
+        _ = "unknown" in trie
+
+
+async def test_lists_hot_reload_when_the_version_changes(lists):
+    redis = fakeredis.aioredis.FakeRedis()
+    await redis.sadd(BLACKLIST_KEY, "not-a-network")
+    await lists.start(redis)
+    assert not lists.is_blacklisted("203.0.113.7")
+
+    await update_ip_access_lists(redis, blacklist_add=["203.0.113.0/24"], whitelist_add=["203.0.113.9"])
+    await asyncio.sleep(0.1)
+    assert lists.is_blacklisted("203.0.113.7") and lists.is_whitelisted("203.0.113.9")
+
+    await update_ip_access_lists(redis, blacklist_remove=["203.0.113.0/24"])
+    await asyncio.sleep(0.1)
+    assert not lists.is_blacklisted("203.0.113.7")
+    await lists.stop()
+
+    with pytest.raises(ValueError):
+        await update_ip_access_lists(redis, blacklist_add=["999.0.0.0/8"])
+
+
+def test_policy_router_keeps_first_match_order_and_memoizes(lists):
+    middleware = SecurityMiddleware(app=None)
+    paths = ["/health/live", "/docs", "/auth/login", "/auth/loginx", "/api/guests/1", "/admin/x", "/metrics", "/other"]
+
+    for path in paths:
+        expected = next((p for pattern, p in middleware.security_policies.items() if re.match(pattern, path)), None)
+        assert middleware._get_security_policy(path) is (expected or middleware.policy_router.default)
+    middleware._get_security_policy("/admin/x")
+    assert middleware.policy_router.resolve.cache_info().hits == 1
+
+
+async def test_middleware_ip_filtering_uses_global_and_policy_lists(lists):
+    lists.blacklist = CIDRTrie(["198.51.100.0/24"])
+    lists.whitelist = CIDRTrie(["198.51.100.10"])
+    middleware = SecurityMiddleware(app=None)
+    public = middleware._get_security_policy("/health/live")
+    metrics = middleware._get_security_policy("/metrics")
+
+    assert (await middleware._check_ip_filtering("198.51.100.1", public))["allowed"] is False
+    assert (await middleware._check_ip_filtering("198.51.100.10", public))["allowed"] is True
+    assert (await middleware._check_ip_filtering("unknown", public))["allowed"] is True
+    assert (await middleware._check_ip_filtering("::1", metrics))["allowed"] is True
+    assert (await middleware._check_ip_filtering("8.8.8.8", metrics))["reason"] == "IP not whitelisted"
+
+
+def test_audit_logger_scores_ips_against_shared_lists(lists):
+    lists.blacklist = CIDRTrie(["203.0.113.0/24"])
+    audit = SecurityAuditLogger()
+
+    assert audit._is_suspicious_ip("203.0.113.50") and not audit._is_suspicious_ip("8.8.8.8")
+    assert audit._is_suspicious_ip("not-an-ip")
+    assert audit._is_whitelisted_ip("192.168.1.1") and not audit._is_whitelisted_ip("8.8.8.8")
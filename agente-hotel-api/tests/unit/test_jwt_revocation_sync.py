@@ -0,0 +1,115 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.security.advanced_jwt_auth import AdvancedJWTAuth, TokenType
+from app.security.token_revocation import VerifiedClaimsCache
+
+PROPAGATION_BOUND_SECONDS = 0.5
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+async def processes(server):
+    """Dos "procesos": instancias independientes sobre el mismo Redis"""
+    instances = []
+    for _ in range(2):
+        auth = AdvancedJWTAuth()
+        auth.redis_client = fakeredis.aioredis.FakeRedis(server=server)
+        await auth.start_revocation_sync()
+        instances.append(auth)
+    yield instances
+    for auth in instances:
+        await auth.close()
+
+
+def _access_token(auth, **claims):
+    return auth.create_jwt_token("user-1", TokenType.ACCESS, extra_claims={"role": "admin", **claims}).token
+
+
+async def test_repeated_validation_skips_signature_and_redis(processes, monkeypatch):
+    auth = processes[0]
+    token = _access_token(auth)
+    decodes, gets = [], []
+    decode = auth.decode_jwt_token
+    get = auth.redis_client.get
+    monkeypatch.setattr(auth, "decode_jwt_token", lambda t: decodes.append(t) or decode(t))
+    monkeypatch.setattr(auth.redis_client, "get", lambda *a: gets.append(a) or get(*a))
+
+    for _ in range(5):
+        assert (await auth.validate_token(token))["sub"] == "user-1"
+        assert (await auth.verify_token(token))["user"]["role"] == "admin"
+
+    assert len(decodes) == 1
+    assert gets == []
+
+
+async def test_revocation_reaches_every_process_within_bound(processes, monkeypatch):
+    issuer, other = processes
+    token = _access_token(issuer)
+    assert await other.validate_token(token)  # queda cacheado en el otro proceso
+    gets = []
+    get = other.redis_client.get
+    monkeypatch.setattr(other.redis_client, "get", lambda *a: gets.append(a) or get(*a))
+
+    started = time.monotonic()
+    assert await issuer.revoke_token(token, TokenType.ACCESS)
+    assert await issuer.validate_token(token) is None
+    while await other.validate_token(token) is not None:
+        assert time.monotonic() - started < PROPAGATION_BOUND_SECONDS
+        await asyncio.sleep(0.005)
+
+    assert (await other.verify_token(token))["reason"] == "Token has been revoked"
+    assert gets == []
+
+
+async def test_new_process_loads_existing_revocations(processes, server):
+    token = _access_token(processes[0])
+    await processes[0].revoke_token(token, TokenType.ACCESS)
+
+    late = AdvancedJWTAuth()
+    late.redis_client = fakeredis.aioredis.FakeRedis(server=server)
+    await late.start_revocation_sync()
+    try:
+        assert late.revocations.synced
+        assert await late.validate_token(token) is None
+    finally:
+        await late.close()
+
+
+async def test_falls_back_to_redis_while_sync_is_down(processes):
+    issuer, other = processes
+    token = _access_token(issuer)
+    other.revocations.synced = False
+    await issuer.redis_client.setex(f"revoked_token:{(await issuer.validate_token(token))['jti']}", 60, "1")
+
+    assert await other.validate_token(token) is None
+
+
+def test_claims_cache_is_bounded_by_size_and_expiry():
+    cache = VerifiedClaimsCache(max_entries=2)
+    now = time.time()
+    cache.put("a", {"exp": now + 60})
+    cache.put("b", {"exp": now - 1})
+    cache.put("c", {"exp": now + 60})
+
+    assert len(cache) == 2 and cache.get("a") is None
+    assert cache.get("b") is None and cache.get("c") is not None
+
+
+async def test_expired_token_is_rejected_even_if_cached(processes):
+    auth = processes[0]
+    token = auth.create_jwt_token("user-1", TokenType.ACCESS, expires_delta=timedelta(seconds=1)).token
+    assert await auth.validate_token(token)
+
+    await asyncio.sleep(1.1)
+
+    assert (await auth.verify_token(token))["reason"] == "Token has expired"
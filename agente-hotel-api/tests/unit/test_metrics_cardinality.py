@@ -0,0 +1,125 @@
+from fastapi import APIRouter, FastAPI
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from app.core.middleware import UNMATCHED_ROUTE, RequestPipelineMiddleware, route_template
+from app.core.prometheus import OVERFLOW_LABEL, CardinalityGuard, http_requests_total
+
+
+def _series(metric) -> set:
+    return {
+        sample.labels.get("endpoint")
+        for family in metric.collect()
+        for sample in family.samples
+        if sample.name.endswith("_total")
+    }
+
+
+async def _get(app, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+class _QuietLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+async def test_10k_distinct_ids_produce_one_series_per_route(monkeypatch):
+    from app.core import middleware
+
+    # 10k líneas de log capturadas por pytest (y spans mock) dominan el tiempo del test
+    monkeypatch.setattr(middleware, "logger", _QuietLogger())
+    monkeypatch.setattr(middleware, "trace", None)
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware)
+
+    @app.get("/api/reservations/{reservation_id}")
+    async def reservation(reservation_id: str):
+        return {"id": reservation_id}
+
+    before = _series(http_requests_total)
+    for i in range(10_000):
+        await _get(app, f"/api/reservations/R-{i}")
+    await _get(app, "/does-not-exist/123")
+
+    new = _series(http_requests_total) - before
+    assert new <= {"/api/reservations/{reservation_id}", UNMATCHED_ROUTE}
+    assert "/api/reservations/{reservation_id}" in new
+
+
+def test_route_template_includes_mount_prefix():
+    sub = FastAPI()
+    router = APIRouter()
+
+    @router.get("/sessions/{session_id}")
+    async def session(session_id: str):
+        return {}
+
+    sub.include_router(router)
+    route = sub.router.routes[-1]
+
+    assert (
+        route_template({"route": route, "root_path": "/admin", "app_root_path": ""}) == "/admin/sessions/{session_id}"
+    )
+    assert route_template({"root_path": "/static", "app_root_path": ""}) == "/static/{path}"
+    assert route_template({"root_path": "/proxy"}) == UNMATCHED_ROUTE
+
+
+def test_guard_caps_series_and_counts_dropped_label_sets():
+    registry = CollectorRegistry()
+    guard = CardinalityGuard(registry, max_series=50)
+    requests = Counter("guarded_requests_total", "Contador con tope", ["id"], registry=registry)
+    latency = Histogram("guarded_latency_seconds", "Histograma con tope", ["session_id"], registry=registry)
+
+    for i in range(10_000):
+        guard.labels(requests, id=str(i)).inc()
+        guard.labels(latency, session_id=f"s-{i}").observe(0.1)
+
+    assert registry.get_sample_value("guarded_requests_total", {"id": OVERFLOW_LABEL}) == 10_000 - 50
+    assert registry.get_sample_value("guarded_latency_seconds_count", {"session_id": OVERFLOW_LABEL}) == 10_000 - 50
+    assert registry.get_sample_value("metrics_label_sets_dropped_total", {"metric": "guarded_latency_seconds"}) == 9_950
+    series = {s.labels["id"] for family in requests.collect() for s in family.samples if s.name.endswith("_total")}
+    assert len(series) == 51  # 50 + overflow
+    # Las series que ya existían siguen recibiendo datos
+    guard.labels(requests, id="7").inc()
+    assert registry.get_sample_value("guarded_requests_total", {"id": "7"}) == 2
+    # Sin el helper la métrica se comporta como cualquier otra de prometheus_client
+    requests.labels(id="sin-tope").inc()
+    assert registry.get_sample_value("guarded_requests_total", {"id": "sin-tope"}) == 1
+
+
+def test_guard_keeps_prometheus_label_errors():
+    registry = CollectorRegistry()
+    guard = CardinalityGuard(registry, max_series=5)
+    counter = Counter("errors_kept_total", "x", ["a"], registry=registry)
+
+    for bad in ({"b": 1}, {"a": 1, "b": 2}):
+        try:
+            guard.labels(counter, **bad)
+        except ValueError:
+            continue
+        raise AssertionError("labels inválidos deberían fallar")
+    # Los intentos inválidos no ocupan lugar en el tope
+    for i in range(5):
+        guard.labels(counter, a=i).inc()
+    assert registry.get_sample_value("errors_kept_total", {"a": OVERFLOW_LABEL}) is None
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from app.core.prometheus import MetricsExposition, cleanup_dead_worker_files
+
+WORKER = """
+import os, sys
+from prometheus_client import Counter, Gauge
+Counter("scrapes_demo_total", "demo", ["route"]).labels(route="/a").inc(int(sys.argv[1]))
+Gauge("workers_busy", "demo", multiprocess_mode="livesum").set(1)
+Gauge("worker_rss_bytes", "demo").set(100)
+"""
+
+
+def _run_worker(path, value: int) -> None:
+    env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": str(path)}
+    subprocess.run([sys.executable, "-c", WORKER, str(value)], env=env, check=True)
+
+
+async def test_concurrent_scrapes_share_one_threaded_render():
+    exposition = MetricsExposition(ttl_seconds=60)
+    renders = []
+
+    def slow_render():
+        renders.append(threading.current_thread() is threading.main_thread())
+        time.sleep(0.05)
+        return b"payload"
+
+    exposition.render_now = slow_render
+
+    results = await asyncio.gather(*(exposition.render() for _ in range(20)))
+    assert results == [b"payload"] * 20
+    assert renders == [False]  # un solo render, fuera del hilo del event loop
+
+    await exposition.render()
+    assert len(renders) == 1
+    exposition.invalidate()
+    await exposition.render()
+    assert len(renders) == 2
+
+
+async def test_failed_render_is_not_cached():
+    exposition = MetricsExposition(ttl_seconds=60)
+    calls = []
+
+    def render():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        return b"ok"
+
+    exposition.render_now = render
+    try:
+        await exposition.render()
+    except RuntimeError:
+        pass
+    assert await exposition.render() == b"ok"
+
+
+def test_multiprocess_render_consolidates_workers_and_drops_dead_gauges(tmp_path, monkeypatch):
+    _run_worker(tmp_path, 2)
+    _run_worker(tmp_path, 3)
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+
+    before = MetricsExposition().render_now().decode()
+    assert 'scrapes_demo_total{route="/a"} 5.0' in before
+    assert before.count("worker_rss_bytes{pid=") == 2
+
+    # Ambos workers terminaron: sus gauges se barren, los counters se conservan
+    assert cleanup_dead_worker_files() == 4
+    after = MetricsExposition().render_now().decode()
+    assert 'scrapes_demo_total{route="/a"} 5.0' in after
+    assert "worker_rss_bytes{" not in after
+    assert "workers_busy " not in after
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.models.unified_message import UnifiedMessage
+from app.services.orchestrator import Orchestrator, orchestrator_step_duration
+
+STEP_DELAY = 0.05
+
+
+class SlowFlags:
+    def __init__(self, delay: float = STEP_DELAY):
+        self.delay = delay
+
+    async def is_enabled(self, flag, default=False):
+        await asyncio.sleep(self.delay)
+        return default
+
+
+@pytest.fixture
+def orchestrator():
+    orch = Orchestrator(
+        pms_adapter=AsyncMock(), session_manager=AsyncMock(), lock_service=AsyncMock(), dlq_service=AsyncMock()
+    )
+    orch.nlp_engine = AsyncMock()
+    orch.template_service = AsyncMock()
+    orch.template_service.get_response = lambda *a, **k: "general_error"
+
+    async def slow_nlp(text, language=None):
+        await asyncio.sleep(STEP_DELAY)
+        return {"intent": {"name": "make_reservation", "confidence": 0.95}, "language": "es"}
+
+    async def slow_session(user_id, canal, tenant_id=None):
+        await asyncio.sleep(STEP_DELAY)
+        return {"user_id": user_id}
+
+    orch.nlp_engine.detect_language.return_value = "es"
+    orch.nlp_engine.process_text.side_effect = slow_nlp
+    orch.session_manager.get_or_create_session = AsyncMock(side_effect=slow_session)
+    orch._handle_make_reservation = AsyncMock(return_value={"response_type": "text", "content": "ok"})
+    orch._intent_handlers["make_reservation"] = orch._handle_make_reservation
+    return orch
+
+
+@pytest.fixture(autouse=True)
+def _flags_and_hours():
+    with (
+        patch("app.services.orchestrator.get_feature_flag_service", AsyncMock(return_value=SlowFlags())),
+        patch("app.services.orchestrator.is_business_hours", return_value=True, create=True),
+    ):
+        yield
+
+
+def _message(**kwargs):
+    return UnifiedMessage(user_id="u1", canal="whatsapp", texto="Quiero reservar", tipo="text", **kwargs)
+
+
+async def test_independent_steps_overlap(orchestrator):
+    start = time.perf_counter()
+    result = await orchestrator.handle_unified_message(_message())
+    elapsed = time.perf_counter() - start
+
+    assert result["content"] == "ok"
+    # NLP, sesión y flags duran STEP_DELAY cada uno: en serie serían ~3x
+    assert elapsed < STEP_DELAY * 2
+    orchestrator._handle_make_reservation.assert_awaited_once()
+    assert orchestrator._handle_make_reservation.await_args.args[1] == {"user_id": "u1"}
+
+
+async def test_audio_is_transcribed_before_nlp(orchestrator):
+    orchestrator.audio_processor = AsyncMock()
+    del orchestrator.audio_processor.transcribe_audio
+    orchestrator.audio_processor.transcribe_whatsapp_audio.return_value = {"text": "Quiero reservar"}
+    message = UnifiedMessage(user_id="u1", canal="whatsapp", texto="", tipo="audio", media_url="http://x/a.ogg")
+
+    await orchestrator.handle_unified_message(message)
+
+    assert orchestrator.nlp_engine.process_text.await_args.args[0] == "Quiero reservar"
+
+
+async def test_session_failure_keeps_global_error_semantics(orchestrator):
+    boom = RuntimeError("redis down")
+    orchestrator.session_manager.get_or_create_session = AsyncMock(side_effect=boom)
+
+    result = await orchestrator.handle_unified_message(_message())
+
+    assert result["content"] == "general_error"
+    kwargs = orchestrator.dlq_service.enqueue_failed_message.await_args.kwargs
+    # El manejador recibe la excepción original, no el ExceptionGroup del TaskGroup
+    assert kwargs["error"] is boom
+    assert kwargs["reason"] == "orchestrator_unhandled_exception"
+
+
+async def test_audio_failure_reaches_the_caller_instead_of_general_error(orchestrator):
+    boom = RuntimeError("dlq down")
+    orchestrator._process_audio_message = AsyncMock(side_effect=boom)
+
+    message = UnifiedMessage(user_id="u1", canal="whatsapp", texto="", tipo="audio", media_url="http://x/a.ogg")
+
+    with pytest.raises(RuntimeError) as excinfo:
+        await orchestrator.handle_unified_message(message)
+
+    # Igual que antes del fan-out: el paso de audio no se convierte en general_error
+    assert excinfo.value is boom
+    orchestrator.dlq_service.enqueue_failed_message.assert_not_awaited()
+
+
+async def test_step_durations_are_recorded(orchestrator):
+    # El registry global se vacía entre tests: leer directamente del collector
+    def sample(suffix, step):
+        for metric in orchestrator_step_duration.collect():
+            for s in metric.samples:
+                if s.name.endswith(suffix) and s.labels.get("step") == step:
+                    return s.value
+        return 0
+
+    def count(step):
+        return sample("_count", step)
+
+    steps = ("nlp", "session", "feature_flags", "business_hours", "intent_handler")
+    before = {step: count(step) for step in steps}
+
+    await orchestrator.handle_unified_message(_message())
+
+    assert {step: count(step) - before[step] for step in steps} == dict.fromkeys(steps, 1)
+    assert sample("_sum", "session") >= STEP_DELAY
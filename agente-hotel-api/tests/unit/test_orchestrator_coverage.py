@@ -243,7 +243,9 @@ async def test_escalate_to_staff_urgent(orchestrator, mock_template_service):
         assert response["escalated"] is True
         assert session["escalated"] is True
         mock_send_alert.assert_called()
-        mock_template_service.get_response.assert_called_with("escalated_to_staff", next_business_time=ANY)
+        mock_template_service.get_response.assert_called_with(
+            "escalated_to_staff", language="es", tenant_id=None, next_business_time=ANY
+        )
 
 @pytest.mark.asyncio
 async def test_handle_business_hours_urgent_after_hours(orchestrator):
@@ -296,4 +298,4 @@ async def test_handle_info_intent(orchestrator, mock_template_service):
     
     # Verify
     assert response["response_type"] == "text"
-    mock_template_service.get_response.assert_called_with("hotel_amenities")
+    mock_template_service.get_response.assert_called_with("hotel_amenities", language="es", tenant_id=None)
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from passlib.context import CryptContext
+
+from app.models.user import UserRole
+from app.security import hashing_pool
+from app.security.advanced_jwt_auth import AdvancedJWTAuth
+from app.security.data_encryption import DataEncryptionService
+from app.security.hashing_pool import HashingPoolSaturated, PasswordHashingPool
+
+PASSWORD = "Sup3r-Secret!pass"
+LOGINS = 50
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = PasswordHashingPool(max_workers=2, max_queue=LOGINS, per_ip_limit=2)
+    monkeypatch.setattr(hashing_pool, "_hashing_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+async def _max_loop_lag(until: asyncio.Future) -> float:
+    worst = 0.0
+    while not until.done():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - started - 0.001)
+    return worst
+
+
+async def test_event_loop_stays_responsive_during_50_concurrent_logins(pool):
+    # bcrypt con 8 rondas (~15 ms por verificación): en el loop serían ~1 s de bloqueo
+    hashed = CryptContext(schemes=["bcrypt"]).hash(PASSWORD, rounds=8)
+    user = SimpleNamespace(
+        id="u1",
+        is_active=True,
+        account_locked_until=None,
+        hashed_password=hashed,
+        mfa_enabled=False,
+        role=UserRole.ADMIN,
+        failed_login_attempts=0,
+    )
+    auth = AdvancedJWTAuth()
+    auth.user_repository = SimpleNamespace(get_by_username=AsyncMock(return_value=user), update_login_stats=AsyncMock())
+
+    logins = asyncio.gather(
+        *(auth.authenticate_user("admin", PASSWORD, ip_address=f"10.0.0.{i}") for i in range(LOGINS))
+    )
+    lag = await _max_loop_lag(logins)
+    sessions = await logins
+
+    assert all(sessions)
+    # Solo queda el scheduling de threads (1 CPU en CI), muy por debajo de ~1 s con bcrypt en el loop
+    assert lag < 0.05, f"loop bloqueado {lag * 1000:.1f} ms"
+    assert pool.inflight == 0
+
+
+async def test_per_ip_admission_rejects_floods_without_queueing(pool):
+    release = threading.Event()
+    jobs = [asyncio.ensure_future(pool.run(release.wait, client_ip="1.2.3.4")) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(HashingPoolSaturated) as exc:
+        await pool.run(release.wait, client_ip="1.2.3.4")
+    assert exc.value.reason == "per_ip_limit"
+    # Otra IP sigue entrando
+    other = asyncio.ensure_future(pool.run(lambda: "ok", client_ip="5.6.7.8"))
+
+    release.set()
+    assert await asyncio.gather(*jobs) == [True, True]
+    assert await other == "ok"
+
+
+async def test_queue_limit_rejects_when_pool_is_full():
+    pool = PasswordHashingPool(max_workers=1, max_queue=1, per_ip_limit=10)
+    release = threading.Event()
+    jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(HashingPoolSaturated) as exc:
+        await pool.run(release.wait)
+    assert exc.value.reason == "queue_full"
+
+    release.set()
+    await asyncio.gather(*jobs)
+    pool.shutdown()
+
+
+async def test_cancelled_callers_keep_their_slot_while_the_hash_runs():
+    pool = PasswordHashingPool(max_workers=1, max_queue=0, per_ip_limit=1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow_hash():
+        started.set()
+        release.wait()
+
+    job = asyncio.ensure_future(pool.run(slow_hash, client_ip="1.2.3.4"))
+    await asyncio.to_thread(started.wait)
+    job.cancel()
+    await asyncio.sleep(0)
+
+    # El cliente se fue pero el hash sigue ocupando el hilo: no entra otro
+    assert pool.inflight == 1
+    with pytest.raises(HashingPoolSaturated):
+        await pool.run(lambda: "ok", client_ip="5.6.7.8")
+
+    release.set()
+    for _ in range(100):
+        if pool.inflight == 0:
+            break
+        await asyncio.sleep(0.01)
+    assert pool.inflight == 0
+    assert await pool.run(lambda: "ok", client_ip="1.2.3.4") == "ok"
+    pool.shutdown()
+
+
+async def test_pbkdf2_helpers_run_in_the_pool(pool):
+    service = DataEncryptionService()
+    hashed, salt = await service.hash_password_async(PASSWORD)
+
+    assert await service.verify_password_async(PASSWORD, hashed, salt, client_ip="10.0.0.1")
+    assert not await service.verify_password_async("wrong", hashed, salt, client_ip="10.0.0.1")
@@ -63,6 +63,23 @@ async def test_password_history_fail_open_on_error():
     assert error is None
 
 
+@pytest.mark.asyncio
+async def test_password_history_fails_closed_when_hashing_pool_saturated(monkeypatch):
+    from app.security import password_policy
+    from app.security.hashing_pool import HashingPoolSaturated
+
+    class SaturatedPool:
+        async def run(self, *args, **kwargs):
+            raise HashingPoolSaturated("queue_full")
+
+    monkeypatch.setattr(password_policy, "get_hashing_pool", lambda: SaturatedPool())
+    policy = PasswordPolicy(history_size=5)
+    session = DummySession(hashes=["$2b$12$previous"])
+    valid, error = await policy.validate_password_history(session, user_id="u3", new_password="AnotherStrong1!")
+    assert not valid  # una avalancha de hashes no desactiva el control de reutilización
+    assert "try again" in error.lower()
+
+
 @pytest.mark.asyncio
 async def test_rotation_required_when_none_last_changed():
     policy = PasswordPolicy(rotation_days=90)
@@ -86,7 +86,7 @@ async def test_create_reservation_invalidates_availability_cache(monkeypatch, mo
     monkeypatch.setattr(adapter, "qloapps", mock_q)
 
     spy_invalidate = mocker.AsyncMock()
-    monkeypatch.setattr(adapter, "_invalidate_cache_pattern", spy_invalidate)
+    monkeypatch.setattr(adapter, "_invalidate_nights", spy_invalidate)
 
     payload = {
         "checkin": "2025-12-01T00:00:00Z",
@@ -99,8 +99,8 @@ async def test_create_reservation_invalidates_availability_cache(monkeypatch, mo
 
     result = await adapter.create_reservation(payload)
     assert result.get("booking_reference") == "BK-1"
-    spy_invalidate.assert_called_once()
-    assert spy_invalidate.call_args[0][0] == "availability:*"
+    # Solo las noches reservadas del tipo reservado
+    spy_invalidate.assert_called_once_with(date(2025, 12, 1), date(2025, 12, 3), 2)
 
 
 @pytest.mark.asyncio
@@ -2,7 +2,7 @@ import pytest
 import asyncio
 import json
 from datetime import date
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
 from app.services.pms_adapter import QloAppsAdapter
 from app.exceptions.pms_exceptions import PMSError, CircuitBreakerOpenError
 from app.models.pms_schemas import RoomAvailability
@@ -88,7 +88,9 @@ class TestPMSAdapterHardening:
         assert result[0]["room_type"] == "Deluxe"
         assert result[0]["price_per_night"] == 100.0
         pms_adapter.circuit_breaker.call.assert_called_once()
-        mock_redis.setex.assert_called_once()
+        # Se cachea la noche y la respuesta del rango
+        assert mock_redis.setex.call_count == 2
+        mock_redis.setex.assert_any_call("availability:2023-01-01:2023-01-02:1:any", 300, ANY)
 
     async def test_check_availability_validation_error(self, pms_adapter, mock_redis):
         """Test validation error on PMS response"""
@@ -0,0 +1,91 @@
+import asyncio
+from datetime import date, timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from app.exceptions.pms_exceptions import PMSError
+from app.services.pms_adapter import AvailabilityQuery, QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+D = date(2030, 7, 12)
+
+
+@pytest.fixture
+def stub():
+    return QloAppsStub()
+
+
+@pytest.fixture
+async def adapter(stub):
+    adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis())
+    adapter.qloapps.client = stub.client()
+    yield adapter
+    await adapter.close()
+
+
+def _shift(days: int, nights: int = 2, room_type=None) -> AvailabilityQuery:
+    return AvailabilityQuery(D + timedelta(days=days), D + timedelta(days=days + nights), 2, room_type)
+
+
+async def test_results_follow_input_order_and_duplicates_are_resolved_once(adapter, stub):
+    queries = [_shift(0), _shift(1, room_type="suite"), _shift(0), (D, D + timedelta(days=2), 2, None)]
+
+    results = await adapter.check_availability_batch(queries)
+
+    assert len(results) == 4
+    assert results[0] == results[2] == results[3]
+    assert [r["room_type"] for r in results[1]] == ["Suite"]
+    # Un rango 12-14 para todos los tipos y otro para la suite del 14; la suite
+    # del 13 sale de la entrada "todos los tipos"
+    assert stub.calls["/hotel_booking"] == 2
+
+
+async def test_alternative_dates_for_several_types_share_one_fetch_per_night(adapter, stub):
+    queries = [_shift(d, room_type=t) for d in range(-3, 4) for t in ("suite", "doble")]
+
+    results = await adapter.check_availability_batch(queries)
+
+    assert all(results)
+    assert stub.calls["/hotel_booking"] == 1  # noches del 9 al 16 en un solo rango
+
+
+async def test_cached_nights_are_not_fetched_again(adapter, stub):
+    await adapter.check_availability(D, D + timedelta(days=2), 2)
+
+    await adapter.check_availability_batch([_shift(0), _shift(1)])
+
+    assert stub.calls["/hotel_booking"] == 2  # solo la noche del 14 era nueva
+
+
+async def test_upstream_calls_run_concurrently_within_the_limit(adapter, monkeypatch):
+    adapter.batch_concurrency = 3
+    inflight = peak = 0
+    original = adapter.qloapps.check_availability
+
+    async def tracked(**kwargs):
+        nonlocal inflight, peak
+        inflight += 1
+        peak = max(peak, inflight)
+        await asyncio.sleep(0.01)
+        try:
+            return await original(**kwargs)
+        finally:
+            inflight -= 1
+
+    monkeypatch.setattr(adapter.qloapps, "check_availability", tracked)
+
+    # Noches no consecutivas: un rango por noche
+    await adapter.check_availability_batch([_shift(2 * d, nights=1) for d in range(8)])
+
+    assert peak == 3
+
+
+async def test_invalid_query_error_is_positional_with_return_exceptions(adapter):
+    queries = [_shift(0), AvailabilityQuery(D, D, 2)]
+
+    results = await adapter.check_availability_batch(queries, return_exceptions=True)
+
+    assert results[0] and isinstance(results[1], PMSError)
+    with pytest.raises(PMSError):
+        await adapter.check_availability_batch(queries)
@@ -0,0 +1,81 @@
+from datetime import date, timedelta
+
+import fakeredis.aioredis
+import pytest
+
+from app.services.pms_adapter import QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+D = date(2030, 7, 12)
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis(decode_responses=False)
+
+
+@pytest.fixture
+async def adapter(redis_client):
+    adapter = QloAppsAdapter(redis_client=redis_client)
+    adapter.qloapps.client = QloAppsStub().client()
+    yield adapter
+    await adapter.close()
+
+
+async def _keys(redis_client, pattern="availability:*"):
+    return {k.decode() async for k in redis_client.scan_iter(pattern) if b":index:" not in k}
+
+
+async def test_cached_entries_are_registered_under_each_night(adapter, redis_client):
+    await adapter.check_availability(D, D + timedelta(days=2), 2)
+
+    members = await redis_client.smembers(f"availability:index:1:{D.isoformat()}")
+    assert {m.decode() for m in members} == {
+        f"availability:night:1:{D.isoformat()}:any",
+        f"availability:{D}:{D + timedelta(days=2)}:2:any",
+    }
+    assert await redis_client.ttl(f"availability:index:1:{D.isoformat()}") > 900
+
+
+async def test_booking_invalidates_only_overlapping_entries_without_scan(adapter, redis_client, monkeypatch):
+    await adapter.check_availability(D, D + timedelta(days=2), 2)
+    await adapter.check_availability(D + timedelta(days=5), D + timedelta(days=6), 2)
+    await adapter.check_availability(D + timedelta(days=1), D + timedelta(days=3), 2, room_type="suite")
+    await redis_client.set("session:abc", "1")
+
+    async def no_scan(*args, **kwargs):
+        raise AssertionError("SCAN no debería usarse")
+
+    monkeypatch.setattr(redis_client, "scan", no_scan)
+    await adapter._invalidate_nights(D + timedelta(days=1), D + timedelta(days=2), room_type_id=2)
+
+    monkeypatch.undo()
+    remaining = await _keys(redis_client)
+    # Cae la estadía "any" que incluye la noche 13; la de suite (tipo 4) y la del 17 siguen
+    assert f"availability:{D}:{D + timedelta(days=2)}:2:any" not in remaining
+    assert f"availability:night:1:{(D + timedelta(days=1)).isoformat()}:any" not in remaining
+    assert f"availability:{D + timedelta(days=1)}:{D + timedelta(days=3)}:2:suite" in remaining
+    assert f"availability:{D + timedelta(days=5)}:{D + timedelta(days=6)}:2:any" in remaining
+    assert await redis_client.get("session:abc") == b"1"
+    members = await redis_client.smembers(f"availability:index:1:{(D + timedelta(days=1)).isoformat()}")
+    assert {m.decode() for m in members} == {f"availability:{D + timedelta(days=1)}:{D + timedelta(days=3)}:2:suite"}
+
+
+async def test_invalidate_all_clears_every_indexed_entry_and_index(adapter, redis_client):
+    await adapter.check_availability(D, D + timedelta(days=2), 2)
+    await adapter.check_availability(D + timedelta(days=9), D + timedelta(days=10), 1, room_type="doble")
+    await redis_client.set("audio:cache:x", "1")
+
+    await adapter._invalidate_all_availability()
+
+    assert [k async for k in redis_client.scan_iter("availability:*")] == []
+    assert await redis_client.get("audio:cache:x") == b"1"
+
+
+async def test_clients_without_sets_fall_back_to_pattern_scan(fake_redis, mocker):
+    adapter = QloAppsAdapter(redis_client=fake_redis)
+    spy = mocker.patch.object(adapter, "_invalidate_cache_pattern", new=mocker.AsyncMock())
+
+    await adapter._invalidate_all_availability()
+
+    spy.assert_awaited_once_with("availability:*")
@@ -0,0 +1,161 @@
+from datetime import date, datetime
+from unittest.mock import AsyncMock
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.services.pms_adapter import QloAppsAdapter
+from app.services.pms_change_feed import WATERMARK_KEY, PMSChangeFeed
+from tests.mocks.pms_mock_server import QloAppsStub
+
+FRI, SAT, SUN, MON, TUE = (date(2030, 7, d) for d in (12, 13, 14, 15, 16))
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def stub():
+    return QloAppsStub()
+
+
+@pytest.fixture
+async def adapter(server, stub):
+    adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis(server=server))
+    adapter.qloapps.client = stub.client()
+    yield adapter
+    await adapter.close()
+
+
+def _feed(adapter, **kwargs) -> PMSChangeFeed:
+    params = {"interval": 0.001, "page_size": 50, "overlap_seconds": 5, "backfill_days": 7}
+    params.update(kwargs)
+    return PMSChangeFeed(adapter, **params)
+
+
+async def _sync(feed: PMSChangeFeed) -> dict:
+    # Sin esperar al lease entre ejecuciones consecutivas del test
+    await feed.redis.delete("pms:change_feed:lease")
+    return await feed.sync()
+
+
+async def test_booking_from_another_channel_invalidates_only_its_nights(adapter, stub):
+    feed = _feed(adapter)
+    await _sync(feed)
+    await adapter.check_availability(FRI, TUE, 2)
+    assert stub.calls["/hotel_booking"] == 1
+
+    stub.add_booking(501, SAT, MON, id_product=2)
+    assert (await _sync(feed))["new"] == 1
+
+    await adapter.check_availability(FRI, TUE, 2)
+    # Solo sábado y domingo vuelven al PMS (un rango)
+    assert stub.calls["/hotel_booking"] == 2
+    assert await adapter.redis.get("pms:booking_nights:501") is not None
+
+
+async def test_date_change_invalidates_old_and_new_nights_and_refreshes_reservation(adapter, stub):
+    stub.add_booking(502, FRI, SAT)
+    feed = _feed(adapter)
+    await _sync(feed)
+    await adapter.check_availability(FRI, TUE, 2)
+    calls = stub.calls["/hotel_booking"]
+
+    stub.modify_booking(502, date_from=MON, date_to=TUE)
+    assert (await _sync(feed))["modified"] == 1
+
+    await adapter.check_availability(FRI, TUE, 2)
+    assert stub.calls["/hotel_booking"] == calls + 2  # viernes liberado, lunes ocupado
+    reservation = await adapter.get_reservation("502")
+    assert reservation["check_in"] == MON.isoformat()
+    assert stub.calls["/hotel_bookings/502"] == 0  # servido desde la caché que mantiene el feed
+
+
+async def test_cancellation_frees_nights_and_forgets_booking(adapter, stub):
+    stub.add_booking(503, SAT, SUN)
+    feed = _feed(adapter)
+    await _sync(feed)
+    await adapter.redis.set("late_checkout_check:503:2030-07-14", "{}")
+
+    stub.modify_booking(503, booking_status="cancelled")
+    counts = await _sync(feed)
+
+    assert counts["cancelled"] == 1
+    assert await adapter.redis.get("pms:booking_nights:503") is None
+    assert await adapter.redis.get("late_checkout_check:503:2030-07-14") is None
+
+
+async def test_moved_checkout_drops_late_checkout_keys_without_scanning(adapter, stub):
+    stub.add_booking(505, SAT, SUN)
+    feed = _feed(adapter)
+    await _sync(feed)
+    await adapter.redis.set("late_checkout_check:505:2030-07-14", "{}")
+    adapter._invalidate_cache_pattern = AsyncMock(side_effect=AssertionError("SCAN por reserva"))
+
+    stub.modify_booking(505, date_to=MON)
+    await adapter.redis.set("late_checkout_check:505:2030-07-15", "{}")
+    await _sync(feed)
+
+    assert await adapter.redis.get("late_checkout_check:505:2030-07-14") is None
+    assert await adapter.redis.get("late_checkout_check:505:2030-07-15") is None
+
+
+async def test_overlap_replay_is_a_noop_and_watermark_survives_restarts(adapter, stub):
+    stub.add_booking(504, FRI, SAT)
+    await _sync(_feed(adapter))
+    watermark = await adapter.redis.get(WATERMARK_KEY)
+    assert watermark.decode() == stub.bookings[504]["date_upd"]
+
+    await adapter.check_availability(FRI, SAT, 2)
+    calls = stub.calls["/hotel_booking"]
+
+    # Un worker nuevo retoma desde la marca persistida; el solape se re-lee sin efectos
+    counts = await _sync(_feed(adapter))
+    assert counts == {"new": 0, "modified": 0, "cancelled": 0, "unchanged": 1}
+    await adapter.check_availability(FRI, SAT, 2)
+    assert stub.calls["/hotel_booking"] == calls
+
+
+async def test_pages_through_changes_and_advances_watermark(adapter, stub):
+    for booking_id in range(600, 605):
+        stub.add_booking(booking_id, FRI, SAT)
+    feed = _feed(adapter, page_size=2)
+
+    counts = await _sync(feed)
+
+    assert counts["new"] == 5
+    assert stub.calls["/hotel_bookings"] == 3
+    assert await feed.get_watermark() == stub.bookings[604]["date_upd"]
+
+
+async def test_backfill_rebuilds_snapshot_after_redis_loss(adapter, stub, server):
+    stub.add_booking(701, SAT, SUN)
+    feed = _feed(adapter)
+    await _sync(feed)
+    await adapter.redis.flushall()
+    feed = _feed(adapter)  # sin snapshot local ni marca de agua
+
+    counts = await feed.backfill(datetime(2030, 7, 1))
+
+    assert counts["new"] == 1
+    assert await adapter.redis.get("pms:booking_nights:701") is not None
+    assert await feed.get_watermark() == stub.bookings[701]["date_upd"]
+
+
+async def test_pms_failure_keeps_watermark_for_retry(adapter, stub):
+    stub.add_booking(801, FRI, SAT)
+    feed = _feed(adapter)
+    await _sync(feed)
+    watermark = await feed.get_watermark()
+    stub.modify_booking(801, date_to=SUN)
+    stub.fail_with(503)
+
+    with pytest.raises(Exception):
+        await _sync(feed)
+    assert await feed.get_watermark() == watermark
+
+    stub.fail_with(None)
+    assert (await _sync(feed))["modified"] == 1
@@ -0,0 +1,214 @@
+import asyncio
+from datetime import date, timedelta
+
+import pytest
+
+# Los scripts Lua necesitan fakeredis con soporte Lua (extra `fakeredis[lua]`)
+try:  # pragma: no cover
+    import lupa  # type: ignore  # noqa: F401
+except Exception:  # pragma: no cover
+    pytest.skip("lupa no instalado (fakeredis sin Lua)", allow_module_level=True)
+
+import fakeredis
+import fakeredis.aioredis
+
+from app.core.circuit_breaker import CircuitBreakerOpenError, CircuitState, DistributedCircuitBreaker
+from app.core.rate_limiter import _GCRA_SCRIPT, RedisGCRARateLimiter
+from app.exceptions.pms_exceptions import PMSError, PMSNotFoundError
+from app.services.pms_adapter import QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+def _client(server):
+    return fakeredis.aioredis.FakeRedis(server=server)
+
+
+def _limiter(server, **kwargs):
+    params = {"max_requests": 10, "window_seconds": 1, "burst": 3}
+    params.update(kwargs)
+    return RedisGCRARateLimiter(_client(server), "pms-test", **params)
+
+
+async def test_gcra_allows_burst_then_throttles(server):
+    limiter = _limiter(server)
+    assert [await limiter.acquire() for _ in range(4)] == [True, True, True, False]
+    assert 0 < limiter.get_time_until_available() <= 0.1
+
+
+async def test_quota_is_shared_between_processes(server):
+    # Ventana larga: el TAT no debe drenarse entre acquires aunque el runner esté cargado
+    a, b = _limiter(server, window_seconds=60), _limiter(server, window_seconds=60)
+    assert await a.acquire() and await a.acquire() and await a.acquire()
+    assert await b.acquire() is False
+
+    usage = b.quota_usage()
+    assert usage["global_used"] == 3
+    assert usage["local_used"] == 0
+    assert a.quota_usage()["local_used"] == 3
+
+
+async def test_wait_if_needed_paces_to_rate(server):
+    limiter = _limiter(server, max_requests=50, burst=1)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(6):
+        await limiter.wait_if_needed(max_wait=2.0)
+    # 1 inmediato + 5 intervalos de 20 ms
+    assert loop.time() - start >= 0.09
+
+
+async def test_wait_if_needed_times_out_when_quota_exhausted(server):
+    limiter = _limiter(server, max_requests=1, window_seconds=60, burst=1)
+    await limiter.wait_if_needed()
+    with pytest.raises(TimeoutError):
+        await limiter.wait_if_needed(max_wait=0.1)
+
+
+async def test_concurrent_callers_share_one_redis_hop(server):
+    limiter = _limiter(server, max_requests=100, burst=10, prefetch=5)
+    await limiter.redis.script_load(_GCRA_SCRIPT)  # ya cargado: una sola ida por lote
+    calls = 0
+    evalsha = limiter.redis.evalsha
+
+    async def counting_evalsha(*args):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.002)  # RTT de red
+        return await evalsha(*args)
+
+    limiter.redis.evalsha = counting_evalsha
+    await asyncio.gather(*(limiter.wait_if_needed() for _ in range(5)))
+
+    assert calls == 1
+    assert limiter.quota_usage()["local_used"] == 5
+
+
+async def test_falls_back_to_local_limiter_without_redis_scripts(fake_redis):
+    limiter = RedisGCRARateLimiter(fake_redis, "pms-test", max_requests=2, window_seconds=60)
+    assert [await limiter.acquire() for _ in range(3)] == [True, True, False]
+
+
+def _breaker(server, **kwargs):
+    params = {"failure_threshold": 2, "recovery_timeout": 0.1, "expected_exception": ValueError}
+    params.update(kwargs)
+    return DistributedCircuitBreaker(_client(server), "pms-test", sync_interval=0.0, **params)
+
+
+async def _fail():
+    raise ValueError("pms down")
+
+
+async def test_failures_in_one_process_open_breaker_for_all(server):
+    a, b = _breaker(server), _breaker(server)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await a.call(_fail)
+
+    assert a.state == CircuitState.OPEN
+    with pytest.raises(CircuitBreakerOpenError):
+        await b.call(asyncio.sleep, 0)
+    assert b.state == CircuitState.OPEN
+
+
+async def test_only_one_process_probes_in_half_open(server):
+    breakers = [_breaker(server) for _ in range(4)]
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await breakers[0].call(_fail)
+    await asyncio.sleep(0.15)
+
+    probes = 0
+
+    async def slow_probe():
+        nonlocal probes
+        probes += 1
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    results = await asyncio.gather(*(b.call(slow_probe) for b in breakers), return_exceptions=True)
+
+    assert probes == 1
+    assert sum(r == "ok" for r in results) == 1
+    assert sum(isinstance(r, CircuitBreakerOpenError) for r in results) == 3
+    # La sonda cerró el breaker para todo el clúster
+    assert await breakers[3].call(slow_probe) == "ok"
+
+
+async def test_failed_probe_reopens_breaker(server):
+    a, b = _breaker(server), _breaker(server)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await a.call(_fail)
+    await asyncio.sleep(0.15)
+
+    with pytest.raises(ValueError):
+        await b.call(_fail)
+
+    with pytest.raises(CircuitBreakerOpenError):
+        await a.call(asyncio.sleep, 0)
+
+
+async def test_breaker_falls_back_to_local_state_without_redis(fake_redis):
+    breaker = DistributedCircuitBreaker(fake_redis, "pms-test", failure_threshold=1, expected_exception=ValueError)
+    with pytest.raises(ValueError):
+        await breaker.call(_fail)
+    assert breaker.state == CircuitState.OPEN
+    with pytest.raises(CircuitBreakerOpenError):
+        await breaker.call(asyncio.sleep, 0)
+
+
+async def test_pms_errors_through_adapter_open_breaker_for_all(server):
+    stub = QloAppsStub()
+    stub.fail_with(500)
+    a, b = QloAppsAdapter(_client(server)), QloAppsAdapter(_client(server))
+    a.qloapps.client = stub.client()
+    b.qloapps.client = stub.client()
+    check_in = date.today() + timedelta(days=30)
+    try:
+        for _ in range(a.circuit_breaker.failure_threshold):
+            with pytest.raises(PMSError):
+                await a.check_availability(check_in, check_in + timedelta(days=1))
+        assert a.circuit_breaker.state == CircuitState.OPEN
+
+        stub.fail_with(None)
+        calls = sum(stub.calls.values())
+        # La otra réplica rechaza sin llegar al PMS (sin caché que servir)
+        assert await b.check_availability(check_in, check_in + timedelta(days=1)) == []
+        assert sum(stub.calls.values()) == calls
+        assert b.circuit_breaker.state == CircuitState.OPEN
+    finally:
+        await a.close()
+        await b.close()
+
+
+async def test_not_found_does_not_count_as_failure(server):
+    breaker = _breaker(server, failure_threshold=1)
+
+    async def missing():
+        raise PMSNotFoundError("booking 42")
+
+    with pytest.raises(PMSNotFoundError):
+        await breaker.call(missing)
+    assert breaker.state == CircuitState.CLOSED
+
+
+async def test_probe_releases_lease_when_call_raises_unexpected_error(server):
+    a, b = _breaker(server), _breaker(server)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await a.call(_fail)
+    await asyncio.sleep(0.15)
+
+    async def crash():
+        raise KeyError("bug")
+
+    with pytest.raises(KeyError):
+        await a.call(crash)
+    # Sin lease colgado: otra réplica sondea enseguida y cierra el breaker
+    assert await b.call(asyncio.sleep, 0, "ok") == "ok"
+    assert b.state == CircuitState.CLOSED
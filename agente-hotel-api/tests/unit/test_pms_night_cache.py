@@ -0,0 +1,142 @@
+import asyncio
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import fakeredis.aioredis
+import pytest
+
+from app.exceptions.pms_exceptions import PMSError
+from app.services.pms_adapter import QloAppsAdapter, _compose_nights
+from tests.mocks.pms_mock_server import QloAppsStub
+
+FRI, SAT, SUN, MON = date(2030, 7, 12), date(2030, 7, 13), date(2030, 7, 14), date(2030, 7, 15)
+
+
+@pytest.fixture
+def stub():
+    return QloAppsStub()
+
+
+@pytest.fixture
+async def adapter(stub):
+    adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis())
+    adapter.qloapps.client = stub.client()
+    yield adapter
+    await adapter.close()
+
+
+def _booking(booking_id: str, check_in: date, check_out: date) -> dict:
+    return {
+        "booking_id": booking_id,
+        "booking_reference": f"REF-{booking_id}",
+        "status": "confirmed",
+        "total_amount": 240.0,
+        "currency": "USD",
+        "check_in": check_in.isoformat(),
+        "check_out": check_out.isoformat(),
+    }
+
+
+def test_compose_takes_min_availability_and_sums_rates():
+    nights = [
+        [
+            {"room_type_id": 2, "available_rooms": 5, "price_per_night": 100.0},
+            {"room_type_id": 4, "available_rooms": 1, "price_per_night": 250.0},
+        ],
+        [{"room_type_id": 2, "available_rooms": 2, "price_per_night": 140.0}],
+    ]
+    assert _compose_nights(nights) == [
+        {"room_type_id": 2, "available_rooms": 2, "price_per_night": 120.0, "total_price": 240.0}
+    ]
+
+
+async def test_overlapping_stays_only_fetch_missing_nights(adapter, stub):
+    await adapter.check_availability(FRI, SUN, 2)
+    assert stub.calls["/hotel_booking"] == 1  # un rango para las dos noches
+
+    rooms = await adapter.check_availability(SAT, MON, 2)
+    # Sábado sale de la caché; solo se pide el domingo
+    assert stub.calls["/hotel_booking"] == 2
+    doble = next(r for r in rooms if r["room_type"] == "Doble")
+    assert doble["total_price"] == 240.0 and doble["price_per_night"] == 120.0
+
+
+async def test_cold_stays_fetch_one_range_per_run_of_missing_nights(adapter, stub):
+    await adapter.check_availability(FRI, FRI + timedelta(days=14), 2)
+    assert stub.calls["/hotel_booking"] == 1
+
+    # Dos estadías frías concurrentes de 7 noches: un rango cada una, sin agotar la cuota
+    later = FRI + timedelta(days=30)
+    first, second = await asyncio.gather(
+        adapter.check_availability(later, later + timedelta(days=7), 2),
+        adapter.check_availability(later + timedelta(days=10), later + timedelta(days=17), 2),
+    )
+    assert first and second
+    assert stub.calls["/hotel_booking"] == 3
+
+    # Una estadía que cruza noches cacheadas pide solo el tramo que falta
+    await adapter.check_availability(later + timedelta(days=5), later + timedelta(days=12), 2)
+    assert stub.calls["/hotel_booking"] == 4
+
+
+async def test_sold_out_night_is_located_without_blocking_the_rest_of_the_run(adapter, stub):
+    stub.sell_out(SAT, 2)
+    start, end = FRI - timedelta(days=6), FRI + timedelta(days=8)
+
+    await adapter.check_availability(start, end, 2)
+    calls = stub.calls["/hotel_booking"]
+    assert 1 < calls <= (end - start).days  # nunca más de una llamada por noche
+
+    # Cada noche quedó cacheada con su cupo real: la doble solo falta el sábado
+    sunday = await adapter.check_availability(SUN, MON, 2, room_type="doble")
+    saturday = await adapter.check_availability(SAT, SUN, 2, room_type="doble")
+    assert [r["available_rooms"] for r in sunday + saturday] == [10, 0]
+    assert stub.calls["/hotel_booking"] == calls
+
+
+async def test_guest_count_and_room_type_reuse_cached_nights(adapter, stub):
+    await adapter.check_availability(FRI, SUN, 2)
+
+    suites = await adapter.check_availability(FRI, SUN, 4, room_type="suite")
+    singles = await adapter.check_availability(SAT, SUN, 1)
+
+    assert stub.calls["/hotel_booking"] == 1
+    assert [r["room_type"] for r in suites] == ["Suite"]
+    assert len(singles) == 3
+
+
+async def test_reservation_invalidates_only_booked_nights(adapter, stub):
+    await adapter.check_availability(FRI, MON, 2)
+    assert stub.calls["/hotel_booking"] == 1
+    adapter.qloapps.create_booking = AsyncMock(return_value=_booking("77", SAT, SUN))
+
+    await adapter.create_reservation(
+        {"checkin": SAT.isoformat(), "checkout": SUN.isoformat(), "room_type": "Doble", "guest_name": "Ana Díaz"}
+    )
+    await adapter.check_availability(FRI, MON, 2)
+
+    # Solo el sábado (reservado) vuelve al PMS
+    assert stub.calls["/hotel_booking"] == 2
+
+
+async def test_cancellation_invalidates_recorded_nights(adapter, stub):
+    adapter.qloapps.create_booking = AsyncMock(return_value=_booking("78", FRI, SUN))
+    adapter.qloapps.cancel_booking = AsyncMock(return_value=True)
+    await adapter.create_reservation(
+        {"checkin": FRI.isoformat(), "checkout": SUN.isoformat(), "room_type": "Doble", "guest_name": "Ana Díaz"}
+    )
+    await adapter.check_availability(FRI, MON, 2)
+    assert stub.calls["/hotel_booking"] == 1
+
+    assert await adapter.cancel_reservation("78") is True
+    await adapter.check_availability(FRI, MON, 2)
+
+    # Viernes y sábado liberados (un rango); el domingo sigue en caché
+    assert stub.calls["/hotel_booking"] == 2
+    assert await adapter.redis.get("pms:booking_nights:78") is None
+
+
+async def test_check_out_before_check_in_is_rejected(adapter, stub):
+    with pytest.raises(PMSError):
+        await adapter.check_availability(SUN, FRI, 2)
+    assert stub.calls["/hotel_booking"] == 0
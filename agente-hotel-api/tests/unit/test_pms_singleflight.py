@@ -0,0 +1,178 @@
+import asyncio
+from datetime import date
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.core.singleflight import RedisSingleFlight, SingleFlight, singleflight_coalesced_total
+from app.services.pms_adapter import QloAppsAdapter
+from tests.mocks.pms_mock_server import QloAppsStub
+
+CHECK_IN = date(2030, 7, 12)
+CHECK_OUT = date(2030, 7, 13)  # una noche: 1 llamada upstream por estadía
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def stub():
+    return QloAppsStub(latency=0.05)
+
+
+@pytest.fixture
+async def make_replica(server, stub):
+    adapters = []
+
+    def factory() -> QloAppsAdapter:
+        adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis(server=server))
+        adapter.qloapps.client = stub.client()
+        adapters.append(adapter)
+        return adapter
+
+    yield factory
+    for adapter in adapters:
+        await adapter.close()
+
+
+def _coalesced(scope: str) -> float:
+    return singleflight_coalesced_total.labels(name="pms_availability", scope=scope)._value.get()
+
+
+async def test_200_concurrent_identical_queries_make_one_upstream_call(make_replica, stub):
+    adapter = make_replica()
+    before = _coalesced("local")
+
+    results = await asyncio.gather(*(adapter.check_availability(CHECK_IN, CHECK_OUT, 2) for _ in range(200)))
+
+    assert stub.calls["/hotel_booking"] == 1
+    assert all(r == results[0] for r in results) and results[0]
+    assert _coalesced("local") - before == 199
+    # Cada llamante recibe su propia copia
+    assert results[0] is not results[1]
+
+
+async def test_replicas_share_one_upstream_call(make_replica, stub):
+    replicas = [make_replica() for _ in range(4)]
+    before = _coalesced("cluster")
+
+    results = await asyncio.gather(*(replicas[i % 4].check_availability(CHECK_IN, CHECK_OUT, 2) for i in range(200)))
+
+    assert stub.calls["/hotel_booking"] == 1
+    assert all(r == results[0] for r in results)
+    # Una espera por réplica no líder (el resto coalesce en proceso)
+    assert _coalesced("cluster") - before == 3
+
+
+async def test_different_keys_are_not_coalesced(make_replica, stub):
+    adapter = make_replica()
+    await asyncio.gather(
+        adapter.check_availability(CHECK_IN, CHECK_OUT, 2),
+        adapter.check_availability(CHECK_OUT, date(2030, 7, 14), 2),
+    )
+    assert stub.calls["/hotel_booking"] == 2
+
+
+async def test_without_lease_support_still_coalesces_in_process(fake_redis, stub):
+    # El FakeRedis de conftest no implementa SET NX ni pub/sub
+    adapter = QloAppsAdapter(redis_client=fake_redis)
+    adapter.qloapps.client = stub.client()
+    try:
+        await asyncio.gather(*(adapter.check_availability(CHECK_IN, CHECK_OUT, 2) for _ in range(50)))
+    finally:
+        await adapter.close()
+    assert stub.calls["/hotel_booking"] == 1
+
+
+async def test_cancelled_caller_does_not_cancel_shared_fetch():
+    flight = SingleFlight("test")
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    first = asyncio.create_task(flight.do("k", fetch))
+    second = asyncio.create_task(flight.do("k", fetch))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == "ok"
+    assert calls == 1
+    assert not flight.inflight("k")
+
+
+async def test_waiter_takes_over_when_leader_fails(server):
+    cache: dict = {}
+    leader = RedisSingleFlight("test", fakeredis.aioredis.FakeRedis(server=server), wait_timeout=2.0)
+    follower = RedisSingleFlight("test", fakeredis.aioredis.FakeRedis(server=server), wait_timeout=2.0)
+
+    async def failing_fetch():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("pms 500")
+
+    async def good_fetch():
+        cache["k"] = "fresh"
+        return "fresh"
+
+    async def read_cached():
+        return cache.get("k")
+
+    leading = asyncio.create_task(leader.do_cached("k", failing_fetch, read_cached))
+    await asyncio.sleep(0.01)
+    following = await asyncio.wait_for(follower.do_cached("k", good_fetch, read_cached), 1.0)
+
+    assert following == "fresh"
+    with pytest.raises(RuntimeError):
+        await leading
+
+
+async def test_waiter_fetches_itself_after_wait_timeout(server):
+    slow = RedisSingleFlight("test", fakeredis.aioredis.FakeRedis(server=server))
+    impatient = RedisSingleFlight("test", fakeredis.aioredis.FakeRedis(server=server), wait_timeout=0.1)
+
+    async def slow_fetch():
+        await asyncio.sleep(1.0)
+        return "slow"
+
+    async def fast_fetch():
+        return "fast"
+
+    async def read_cached():
+        return None
+
+    leading = asyncio.create_task(slow.do_cached("k", slow_fetch, read_cached))
+    await asyncio.sleep(0.01)
+
+    assert await impatient.do_cached("k", fast_fetch, read_cached) == "fast"
+    leading.cancel()
+
+
+async def test_leader_whose_lease_expired_does_not_release_the_next_one(server):
+    redis_client = fakeredis.aioredis.FakeRedis(server=server)
+    first = RedisSingleFlight("test", redis_client, lease_seconds=0.05)
+    second = RedisSingleFlight("test", fakeredis.aioredis.FakeRedis(server=server), lease_seconds=10.0)
+    lease_key = first._lease_key("k")
+
+    async def slow_fetch():
+        await asyncio.sleep(0.1)  # más que su lease
+        return "slow"
+
+    async def read_cached():
+        return None
+
+    leading = asyncio.create_task(first.do_cached("k", slow_fetch, read_cached))
+    await asyncio.sleep(0.07)
+    token = await second._acquire("k")
+    assert token
+
+    assert await leading == "slow"
+    # El primer líder terminó después de que su lease venciera: el del segundo sigue
+    assert (await redis_client.get(lease_key)).decode() == token
+    await second._release("k", token, "ok")
+    assert not await redis_client.exists(lease_key)
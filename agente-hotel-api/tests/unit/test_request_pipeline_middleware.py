@@ -0,0 +1,113 @@
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+
+from app.core.correlation import get_correlation_id
+from app.core.middleware import RequestPipelineMiddleware
+from app.core.tenant_context import get_tenant_id
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.add_middleware(RequestPipelineMiddleware, max_size=100, max_media_size=1000, default_tenant="hotel-default")
+
+    @app.get("/context")
+    async def context(request: Request):
+        return {
+            "tenant": get_tenant_id(),
+            "correlation": get_correlation_id(),
+            "state": [request.state.tenant_id, request.state.correlation_id],
+        }
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/media/upload")
+    async def media(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/raw")
+    async def raw(request: Request):
+        try:
+            body = await request.body()
+        except Exception:
+            body = b""
+        return {"size": len(body)}
+
+    return app
+
+
+@pytest.fixture
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def test_context_is_set_for_the_endpoint_and_echoed_in_headers(client):
+    response = await client.get("/context", headers={"X-Request-ID": "req-1", "X-Tenant-ID": "hotel-a"})
+
+    assert response.json() == {"tenant": "hotel-a", "correlation": "req-1", "state": ["hotel-a", "req-1"]}
+    assert response.headers["X-Request-ID"] == response.headers["X-Correlation-ID"] == "req-1"
+    assert response.headers["X-Tenant-ID"] == "hotel-a"
+    assert get_tenant_id() is None
+
+
+async def test_defaults_and_security_headers(client):
+    response = await client.get("/context")
+
+    assert response.json()["tenant"] == "hotel-default"
+    assert len(response.headers["X-Correlation-ID"]) == 36
+    assert response.headers["X-Frame-Options"] == "DENY"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+    assert response.headers["Content-Security-Policy"].startswith("default-src 'self'")
+    assert "Cache-Control" not in response.headers
+    assert (await client.post("/echo", content=b"x")).headers["Cache-Control"] == "no-store"
+
+
+async def test_declared_oversize_body_is_rejected_before_the_app(client):
+    response = await client.post("/echo", content=b"x" * 101)
+
+    assert response.status_code == 413
+    assert response.json() == {"error": "Request entity too large", "max_size_bytes": 100, "received_bytes": 101}
+    assert response.headers["X-Correlation-ID"]
+
+
+async def test_streamed_body_is_counted_without_content_length(client):
+    async def chunks():
+        for _ in range(5):
+            yield b"x" * 30
+
+    response = await client.post("/echo", content=chunks())
+
+    assert response.status_code == 413
+    assert response.json()["detail"]["max_size_bytes"] == 100
+    assert (await client.post("/echo", content=b"x" * 100)).json() == {"size": 100}
+
+
+async def test_limit_holds_even_if_the_endpoint_swallows_the_error(client):
+    async def chunks():
+        for _ in range(5):
+            yield b"x" * 30
+
+    response = await client.post("/raw", content=chunks())
+
+    # El endpoint respondió con el cuerpo vacío en vez de procesar más de 100 bytes
+    assert response.json() == {"size": 0}
+
+
+async def test_media_paths_use_the_larger_limit(client):
+    assert (await client.post("/media/upload", content=b"x" * 500)).json() == {"size": 500}
+
+
+async def test_request_is_logged_and_measured_once(client, monkeypatch):
+    from app.core import middleware
+
+    calls = []
+    monkeypatch.setattr(middleware.metrics_service, "record_request_latency", lambda **kw: calls.append(kw))
+
+    await client.get("/context")
+
+    assert len(calls) == 1
+    assert calls[0]["endpoint"] == "/context" and calls[0]["status_code"] == 200
@@ -0,0 +1,221 @@
+import asyncio
+import json
+from datetime import date, timedelta
+from unittest.mock import AsyncMock
+
+import fakeredis.aioredis
+import pytest
+
+from app.services import reservation_saga
+from app.services.lock_service import LockService
+from app.services.pms_adapter import QloAppsAdapter
+from app.services.reservation_saga import QUEUE_KEY, ReservationSagaService
+from tests.mocks.pms_mock_server import QloAppsStub
+
+CHECK_IN = date.today() + timedelta(days=30)
+
+
+def _reservation(**extra):
+    return {
+        "reservation_uuid": "saga-1",
+        "checkin": CHECK_IN.isoformat(),
+        "checkout": (CHECK_IN + timedelta(days=2)).isoformat(),
+        "room_type": "doble",
+        "guests": 2,
+        "guest_name": "Ana Pérez",
+        "guest_email": "ana@example.com",
+        "guest_phone": "+5491100000000",
+        **extra,
+    }
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.aioredis.FakeRedis()
+
+
+@pytest.fixture
+def stub():
+    return QloAppsStub()
+
+
+@pytest.fixture
+def locks(redis_client):
+    service = LockService(redis_client)
+    service._audit_lock_event = AsyncMock()
+    return service
+
+
+@pytest.fixture
+async def adapter(redis_client, stub):
+    adapter = QloAppsAdapter(redis_client=redis_client)
+    adapter.qloapps.client = stub.client()
+    yield adapter
+    await adapter.close()
+
+
+@pytest.fixture
+def notified():
+    return []
+
+
+@pytest.fixture
+def saga(redis_client, adapter, locks, notified):
+    async def notifier(record):
+        notified.append(record["state"])
+
+    return ReservationSagaService(
+        redis_client, adapter, locks, notifier=notifier, max_attempts=2, lease_seconds=0.2, retry_base_seconds=0
+    )
+
+
+async def _lock_keys(redis_client):
+    return [key async for key in redis_client.scan_iter("lock:room:*")]
+
+
+async def test_start_acknowledges_immediately_without_calling_the_pms(saga, stub, redis_client):
+    ack = await saga.start(_reservation(), session_id="s1", user_id="5491100000000")
+
+    assert ack["status"] == "processing" and ack["saga_id"] == "saga-1"
+    assert "registrando tu reserva" in ack["message"]
+    assert stub.bookings == {}
+    assert len(await _lock_keys(redis_client)) == 1
+    # Repetir el pedido devuelve la misma saga
+    assert (await saga.start(_reservation(), "s1", "5491100000000"))["saga_id"] == "saga-1"
+    assert await redis_client.zcard(QUEUE_KEY) == 1
+
+
+async def test_worker_confirms_releases_lock_and_notifies_once(saga, stub, redis_client, notified):
+    await saga.start(_reservation(), "s1", "5491100000000")
+
+    assert await saga.run_once()
+    assert not await saga.run_once()
+
+    record = await saga.get("saga-1")
+    assert record["state"] == "confirmed" and record["attempts"] == 1
+    assert record["booking"]["booking_reference"] in reservation_saga.guest_message(record)
+    assert len(stub.bookings) == 1
+    assert await _lock_keys(redis_client) == []
+    assert notified == ["confirmed"]
+
+
+async def test_pms_failure_is_retried_then_compensated(saga, stub, redis_client, notified):
+    stub.fail_with(500)
+    await saga.start(_reservation(), "s1", "5491100000000")
+
+    await saga.run_once()
+    record = await saga.get("saga-1")
+    assert (record["state"], record["attempts"]) == ("submitted", 1)
+    assert await redis_client.zcard(QUEUE_KEY) == 1
+
+    await saga.run_once()
+    record = await saga.get("saga-1")
+    assert record["state"] == "compensated" and record["error"]
+    assert await _lock_keys(redis_client) == []
+    assert await redis_client.zcard(QUEUE_KEY) == 0
+    assert notified == ["compensated"]
+
+
+async def test_conflicting_lock_compensates_without_touching_the_pms(saga, locks, stub):
+    await locks.acquire_lock("doble", _reservation()["checkin"], _reservation()["checkout"], "other", "other")
+
+    ack = await saga.start(_reservation(), "s1", "5491100000000")
+
+    assert ack["status"] == "compensated"
+    assert not await saga.run_once()
+    assert stub.calls["/hotel_bookings"] == 0
+
+
+async def test_worker_killed_mid_submit_is_recovered_without_duplicate_booking(
+    redis_client, adapter, locks, stub, monkeypatch
+):
+    first = ReservationSagaService(redis_client, adapter, locks, notifier=AsyncMock(), lease_seconds=1.0)
+    await first.start(_reservation(), "s1", "5491100000000")
+
+    # El PMS registra la reserva pero la respuesta nunca llega: el worker muere esperándola
+    create_booking = adapter.qloapps.create_booking
+
+    async def response_lost(**kwargs):
+        await create_booking(**kwargs)
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(adapter.qloapps, "create_booking", response_lost)
+    task = asyncio.create_task(first.run_once())
+    while not stub.bookings:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert json.loads(await redis_client.get("reservation_saga:saga-1"))["state"] == "submitted"
+
+    # Hasta que vence el lease nadie más la toma; después otro worker la retoma
+    resubmitted = AsyncMock(side_effect=create_booking)
+    monkeypatch.setattr(adapter.qloapps, "create_booking", resubmitted)
+    second = ReservationSagaService(redis_client, adapter, locks, notifier=AsyncMock(), lease_seconds=1.0)
+    assert not await second.run_once()
+    await asyncio.sleep(1.05)
+    assert await second.run_once()
+
+    record = await second.get("saga-1")
+    assert record["state"] == "confirmed" and record["attempts"] == 2
+    assert record["booking"]["booking_reference"] == stub.bookings[1001]["booking_reference"]
+    # La reserva se encontró por external_reference: no se reenvió el POST
+    resubmitted.assert_not_called()
+    assert len(stub.bookings) == 1
+    assert await _lock_keys(redis_client) == []
+
+
+async def test_resumed_saga_resubmits_when_the_pms_never_got_the_post(redis_client, adapter, locks, stub):
+    saga = ReservationSagaService(redis_client, adapter, locks, notifier=AsyncMock(), lease_seconds=0.2)
+    await saga.start(_reservation(), "s1", "5491100000000")
+    record = await saga.get("saga-1")
+    record["state"] = "submitted"  # el worker murió antes de que el POST saliera
+    await redis_client.set("reservation_saga:saga-1", json.dumps(record))
+
+    assert await saga.run_once()
+
+    assert (await saga.get("saga-1"))["state"] == "confirmed"
+    assert len(stub.bookings) == 1
+
+
+async def test_lease_is_renewed_while_the_pms_call_outlasts_it(redis_client, adapter, locks, stub, monkeypatch):
+    first = ReservationSagaService(redis_client, adapter, locks, notifier=AsyncMock(), lease_seconds=0.2)
+    second = ReservationSagaService(redis_client, adapter, locks, notifier=AsyncMock(), lease_seconds=0.2)
+    await first.start(_reservation(), "s1", "5491100000000")
+
+    # El POST tarda varias veces el lease: el otro worker no debe retomarla a mitad
+    create_booking = adapter.qloapps.create_booking
+
+    async def slow_pms(**kwargs):
+        await asyncio.sleep(0.7)
+        return await create_booking(**kwargs)
+
+    monkeypatch.setattr(adapter.qloapps, "create_booking", slow_pms)
+    task = asyncio.create_task(first.run_once())
+    for _ in range(6):
+        await asyncio.sleep(0.1)
+        assert not await second.run_once()
+    assert await task
+
+    assert (await first.get("saga-1"))["state"] == "confirmed"
+    assert len(stub.bookings) == 1
+    first.notifier.assert_awaited_once()
+    second.notifier.assert_not_called()
+
+
+async def test_worker_that_lost_its_lease_does_not_overwrite_or_notify(redis_client, adapter, locks, stub, monkeypatch):
+    saga = ReservationSagaService(redis_client, adapter, locks, notifier=AsyncMock(), lease_seconds=0.2)
+    await saga.start(_reservation(), "s1", "5491100000000")
+    create_booking = adapter.qloapps.create_booking
+
+    async def taken_over(**kwargs):
+        # Otro worker retomó la saga durante el POST (p. ej. tras una pausa larga de este)
+        await redis_client.hset(reservation_saga.OWNERS_KEY, "saga-1", "other-worker")
+        return await create_booking(**kwargs)
+
+    monkeypatch.setattr(adapter.qloapps, "create_booking", taken_over)
+    assert await saga.run_once()
+
+    assert (await saga.get("saga-1"))["state"] == "submitted"
+    saga.notifier.assert_not_called()
+    assert await redis_client.zscore(QUEUE_KEY, "saga-1") is not None
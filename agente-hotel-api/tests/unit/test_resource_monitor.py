@@ -18,6 +18,7 @@ try:
         AlertSeverity,
         get_resource_monitor,
     )
+    from app.services.host_metrics import get_host_sampler  # type: ignore
 except Exception:  # noqa: BLE001
     import pytest
 
@@ -86,6 +87,7 @@ async def test_cpu_alert_generation(resource_monitor):
     """Test de generación de alertas de CPU"""
     # Mock de métricas con CPU alto
     with patch("psutil.cpu_percent", return_value=90.0):
+        get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
         metrics = await resource_monitor.collect_system_metrics()
         await resource_monitor.analyze_resource_trends(metrics)
 
@@ -106,6 +108,7 @@ async def test_memory_alert_generation(resource_monitor):
     mock_memory.available = 2000000000
 
     with patch("psutil.virtual_memory", return_value=mock_memory):
+        get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
         metrics = await resource_monitor.collect_system_metrics()
         await resource_monitor.analyze_resource_trends(metrics)
 
@@ -125,6 +128,7 @@ async def test_disk_alert_generation(resource_monitor):
     mock_disk.free = 8000000000
 
     with patch("psutil.disk_usage", return_value=mock_disk):
+        get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
         metrics = await resource_monitor.collect_system_metrics()
         await resource_monitor.analyze_resource_trends(metrics)
 
@@ -139,6 +143,7 @@ async def test_alert_cooldown(resource_monitor):
     """Test de cooldown entre alertas"""
     # Mock de métricas con CPU alto
     with patch("psutil.cpu_percent", return_value=90.0):
+        get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
         metrics = await resource_monitor.collect_system_metrics()
 
         # Primera alerta
@@ -170,6 +175,7 @@ async def test_prediction_generation(resource_monitor):
     # Recopilar suficientes métricas para predicciones
     for i in range(12):
         with patch("psutil.cpu_percent", return_value=50.0 + i * 2):
+            get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
             metrics = await resource_monitor.collect_system_metrics()
             await resource_monitor.analyze_resource_trends(metrics)
             await asyncio.sleep(0.05)
@@ -209,6 +215,7 @@ async def test_resolve_alert(resource_monitor):
     """Test de resolución de alertas"""
     # Generar una alerta primero
     with patch("psutil.cpu_percent", return_value=90.0):
+        get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
         metrics = await resource_monitor.collect_system_metrics()
         await resource_monitor.analyze_resource_trends(metrics)
 
@@ -296,6 +303,7 @@ async def test_alert_severity_levels(resource_monitor):
     """Test de niveles de severidad de alertas"""
     # Mock de métricas críticas
     with patch("psutil.cpu_percent", return_value=95.0):
+        get_host_sampler().sample_now()  # el sampler publica la lectura parcheada
         metrics = await resource_monitor.collect_system_metrics()
         await resource_monitor.analyze_resource_trends(metrics)
 
@@ -0,0 +1,142 @@
+from datetime import date
+from unittest.mock import AsyncMock
+
+import fakeredis.aioredis
+import pytest
+
+from app.exceptions.pms_exceptions import PMSUnknownRoomTypeError
+from app.services.pms_adapter import QloAppsAdapter
+from app.services.room_type_catalog import RoomTypeCatalog, RoomTypeCatalogRefresher, alias_key
+from tests.mocks.pms_mock_server import QloAppsStub
+
+PMS_ROOM_TYPES = [
+    {"id": 11, "name": "Habitación Individual"},
+    {"id": 12, "name": "Doble Estándar"},
+    {"id": 13, "name": "Doble Superior"},
+    {"id": 14, "name": "Suite Junior"},
+    {"id": 15, "name": "Familiar"},
+]
+
+
+@pytest.fixture
+def catalog():
+    return RoomTypeCatalog(PMS_ROOM_TYPES)
+
+
+def test_alias_key_folds_accents_plurals_and_filler():
+    assert alias_key("Habitaciones DOBLES") == alias_key("habitación doble")
+    assert alias_key("Suítes") == alias_key("suite") == "suite"
+    assert alias_key("individuales") == alias_key("Individual")
+    assert alias_key("familiares") == alias_key("familiar")
+
+
+@pytest.mark.parametrize(
+    "phrase, expected",
+    [
+        ("individual", 11),
+        ("single", 11),  # sinónimo en inglés del concepto
+        ("sencillas", 11),
+        ("doble superior", 13),
+        ("superior", 13),
+        ("Suite", 14),
+        ("suíte júnior", 14),
+        ("family", 15),
+        ("familia", 15),
+        ("sute", 14),  # error de tipeo (distancia 1)
+        ("dobel superior", 13),  # transposición
+        ("13", 13),
+    ],
+)
+def test_resolves_guest_phrasing_to_pms_id(catalog, phrase, expected):
+    assert catalog.resolve(phrase) == expected
+
+
+def test_ambiguous_or_unknown_phrases_do_not_guess(catalog):
+    # "doble" aparece en dos tipos del PMS: mejor sin filtro que la habitación equivocada
+    assert catalog.resolve("doble") is None
+    assert catalog.resolve("penthouse") is None
+    assert catalog.resolve("sol") is None  # demasiado corto para fuzzy
+    assert catalog.resolve("") is None
+
+
+def test_defaults_keep_historical_ids_before_first_load():
+    catalog = RoomTypeCatalog()
+    assert [catalog.resolve(p) for p in ("single", "doble", "double", "twin", "suite", "deluxe", "superior")] == [
+        1,
+        2,
+        2,
+        3,
+        4,
+        5,
+        6,
+    ]
+
+
+async def test_refresh_failure_or_empty_response_keeps_previous_catalog(catalog):
+    failing = AsyncMock()
+    failing.get_room_types.side_effect = RuntimeError("PMS down")
+    assert await catalog.refresh(failing) is False
+
+    empty = AsyncMock()
+    empty.get_room_types.return_value = []
+    assert await catalog.refresh(empty) is False
+    assert catalog.resolve("suite") == 14
+
+
+@pytest.fixture
+async def adapter():
+    stub = QloAppsStub(
+        room_types=[
+            {"id_product": 21, "name": "Doble", "price": 120.0, "max_occupancy": 2, "inventory": 5},
+            {"id_product": 22, "name": "Suite Deluxe", "price": 300.0, "max_occupancy": 4, "inventory": 1},
+        ]
+    )
+    adapter = QloAppsAdapter(redis_client=fakeredis.aioredis.FakeRedis())
+    adapter.room_types = RoomTypeCatalog()
+    adapter.qloapps.client = stub.client()
+    yield adapter, stub
+    await adapter.close()
+
+
+async def test_catalog_loaded_from_pms_drives_availability_filter(adapter):
+    adapter, stub = adapter
+    await RoomTypeCatalogRefresher(adapter, interval=3600).catalog.refresh(adapter.qloapps)
+
+    rooms = await adapter.check_availability(date(2030, 7, 12), date(2030, 7, 13), 2, room_type="suites de lujo")
+
+    assert [r["room_type"] for r in rooms] == ["Suite Deluxe"]
+    assert adapter._get_room_type_id("matrimonial") == 21
+
+
+async def test_unresolved_room_type_queries_all_types_instead_of_a_wrong_one(adapter):
+    adapter, stub = adapter
+    await adapter.get_room_types()  # también recarga el catálogo
+
+    rooms = await adapter.check_availability(date(2030, 7, 12), date(2030, 7, 13), 2, room_type="penthouse")
+
+    assert {r["room_type"] for r in rooms} == {"Doble", "Suite Deluxe"}
+
+
+async def test_unknown_room_type_is_rejected_instead_of_booking_a_default(adapter):
+    adapter, stub = adapter
+    await adapter.get_room_types()
+
+    with pytest.raises(PMSUnknownRoomTypeError):
+        await adapter.create_reservation(
+            {"checkin": "2030-07-12", "checkout": "2030-07-13", "room_type": "penthouse", "guest_name": "Ana"}
+        )
+    assert stub.calls["/hotel_bookings"] == 0
+
+
+async def test_catalog_is_built_from_cached_room_types(adapter):
+    adapter, stub = adapter
+    await adapter.get_room_types()  # otro worker ya cacheó el listado
+
+    worker = QloAppsAdapter(redis_client=adapter.redis)
+    worker.room_types = RoomTypeCatalog([{"id": 99, "name": "Otro"}])
+    worker.qloapps.client = stub.client()
+    assert len(await worker.get_room_types()) == 2
+    await worker.close()
+
+    assert stub.calls["/room_types"] == 1
+    assert worker.room_types.resolve("suite deluxe") == 22
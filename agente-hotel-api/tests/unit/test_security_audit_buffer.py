@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.security import audit_logger as audit_module
+from app.security.audit_logger import (
+    SecurityAuditLogger,
+    SecurityEvent,
+    SecurityEventType,
+    SecuritySeverity,
+    security_audit_dropped_total,
+)
+
+
+def _dropped() -> float:
+    return security_audit_dropped_total.labels(reason="queue_full")._value.get()
+
+
+def _event(i: int = 0, severity: SecuritySeverity = SecuritySeverity.LOW) -> SecurityEvent:
+    return SecurityEvent(
+        event_type=SecurityEventType.DATA_ACCESS, severity=severity, user_id="u1", ip_address=f"10.0.0.{i % 250}"
+    )
+
+
+@pytest.fixture
+def redis():
+    return fakeredis.aioredis.FakeRedis()
+
+
+@pytest.fixture
+def audit(redis):
+    audit = SecurityAuditLogger()
+    audit.redis_client = redis
+    audit.flush_interval = 0.01
+    return audit
+
+
+def _count_pipelines(redis, delay: float = 0.0) -> list:
+    pipelines = []
+    pipeline = redis.pipeline
+
+    def spy(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def delayed(*a, **kw):
+            await asyncio.sleep(delay)
+            return await execute(*a, **kw)
+
+        pipe.execute = delayed
+        pipelines.append(pipe)
+        return pipe
+
+    redis.pipeline = spy
+    return pipelines
+
+
+async def test_events_and_indexes_are_written_in_one_pipelined_round_trip(audit, redis):
+    pipelines = _count_pipelines(redis)
+
+    for i in range(50):
+        assert await audit.log_security_event(_event(i))
+    await asyncio.sleep(0.05)
+
+    assert len(pipelines) == 1
+    assert len(await redis.keys("security_event:*")) == 50
+    day = (await redis.keys("security_timeline:*"))[0]
+    assert await redis.zcard(day) == 50 and await redis.ttl(day) > 0
+    assert await redis.zcard("user_events:u1") == 50
+    await audit.stop()
+
+
+async def test_full_buffer_sheds_low_severity_events_and_counts_them(audit, redis):
+    audit.queue_size = 3
+    dropped = _dropped()
+
+    accepted = [audit.submit_security_event(_event(i)) for i in range(5)]
+
+    assert accepted == [True, True, True, False, False]
+    assert _dropped() - dropped == 2
+    await audit.stop()
+    stored = [json.loads(await redis.get(key)) for key in await redis.keys("security_event:*")]
+    # Submitted events are analyzed by the flusher before storage
+    assert len(stored) == 3 and all(event["correlation_id"] for event in stored)
+
+
+async def test_high_severity_events_wait_for_room_instead_of_being_dropped(audit, redis):
+    audit.queue_size = 1
+    dropped = _dropped()
+
+    assert audit.submit_security_event(_event(1))
+    assert await audit.log_security_event(_event(2, SecuritySeverity.HIGH))
+
+    await audit.stop()
+    assert _dropped() == dropped
+    assert len(await redis.keys("security_event:*")) == 2
+
+
+async def test_stop_flushes_everything_still_buffered(audit, redis):
+    audit.batch_size = 100
+    pipelines = _count_pipelines(redis, delay=0.01)
+    for i in range(450):
+        audit.submit_security_event(_event(i))
+    await asyncio.sleep(0.015)
+
+    await audit.stop()
+
+    assert len(await redis.keys("security_event:*")) == 450
+    assert len(pipelines) == 5
+    assert audit._queue.empty()
+
+
+async def test_access_granted_does_not_wait_for_the_audit_write(audit, redis, monkeypatch):
+    from app.security.security_middleware import SecurityMiddleware
+
+    _count_pipelines(redis, delay=0.3)
+    monkeypatch.setattr(audit_module, "_audit_logger", audit)
+    app = FastAPI()
+    app.add_middleware(SecurityMiddleware)
+
+    @app.get("/health/live")
+    async def live():
+        return {"ok": True}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        started = time.perf_counter()
+        response = await client.get("/health/live")
+        elapsed = time.perf_counter() - started
+
+    assert response.status_code == 200
+    assert elapsed < 0.3
+    await audit.stop()
+    (key,) = await redis.keys("security_event:*")
+    stored = json.loads(await redis.get(key))
+    assert stored["event_type"] == "access_granted" and stored["endpoint"] == "/health/live"
+
+
+async def test_submitted_events_count_activity_in_the_flush_pipeline(audit, redis, monkeypatch):
+    audit.batch_size = 100
+    audit.rate_limit_threshold = 30
+    pipelines = _count_pipelines(redis)
+    lookups = []
+
+    async def geolocation(ip):
+        lookups.append(ip)
+        return {"country": "AR"}
+
+    monkeypatch.setattr(audit, "_get_ip_geolocation", geolocation)
+    for i in range(40):
+        event = _event(i % 2)
+        event.event_type, event.endpoint = SecurityEventType.ACCESS_GRANTED, "/api/rooms"
+        audit.submit_security_event(event)
+    await asyncio.sleep(0.05)
+
+    # Un solo round trip para guardar y contar; una geolocalización por IP
+    assert len(pipelines) == 1
+    assert sorted(lookups) == ["10.0.0.0", "10.0.0.1"]
+    (window,) = await redis.keys("requests:10.0.0.0:*")
+    assert int(await redis.get(window)) == 20 and await redis.ttl(window) > 0
+
+    # La actividad sospechosa se detecta con los conteos del pipeline
+    for i in range(20):
+        event = _event(0)
+        event.event_type, event.endpoint = SecurityEventType.ACCESS_GRANTED, "/api/rooms"
+        audit.submit_security_event(event)
+    await asyncio.sleep(0.1)
+    await audit.stop()
+    stored = [json.loads(await redis.get(key)) for key in await redis.keys("security_event:*")]
+    assert any(event["event_type"] == "suspicious_activity" for event in stored)
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import random
+import string
+
+import pytest
+from unittest.mock import AsyncMock
+
+from app.models.unified_message import UnifiedMessage
+from app.services import template_service as ts
+from app.services.orchestrator import Orchestrator
+from app.services.template_service import (
+    TemplatePackWatcher,
+    TemplateService,
+    register_tenant_pack,
+    unregister_tenant_pack,
+)
+
+PT_CHECK_IN = "O check-in é a partir das 15:00."
+
+
+@pytest.fixture
+def pt_tenant_pack():
+    register_tenant_pack("tenant-pt", {"pt": {"check_in_info": PT_CHECK_IN}})
+    yield "tenant-pt"
+    unregister_tenant_pack("tenant-pt")
+
+
+def test_compiled_templates_match_str_format():
+    """La ruta precompilada produce exactamente lo mismo que str.format."""
+    formatter = string.Formatter()
+    for lang, templates in ts._TEXT_TEMPLATES_BY_LANG.items():
+        for name, source in templates.items():
+            params = {f: f"<{f}-{i}>" for i, (_, f, _, _) in enumerate(formatter.parse(source)) if f}
+            rendered = TemplateService().get_response(name, language=lang, **params)
+            assert rendered == source.format(**params), name
+
+
+def test_missing_placeholder_raises_key_error():
+    with pytest.raises(KeyError):
+        TemplateService().get_response("availability_found", language="es", checkin="hoy")
+
+
+def test_interactive_structures_are_shared_not_copied():
+    svc = TemplateService()
+    first = svc.get_interactive_buttons("info_menu", language="en")
+    second = svc.get_interactive_buttons("info_menu", language="en")
+    assert first is not second
+    assert first["action_buttons"] is second["action_buttons"]
+    assert first["header_text"] == "Hotel information"
+
+
+def test_tenant_pack_precedence(pt_tenant_pack):
+    svc = TemplateService()
+    # Idioma agregado por el tenant
+    assert svc.get_response("check_in_info", language="pt", tenant_id=pt_tenant_pack) == PT_CHECK_IN
+    # Plantillas que el pack no define caen al español global
+    assert svc.get_response("help_message", language="pt", tenant_id=pt_tenant_pack).startswith("Puedo ayudarte")
+    # Otros tenants no ven el pack
+    assert svc.get_response("check_in_info", language="pt", tenant_id="other").startswith("El check-in")
+
+
+def test_tenant_pack_rejects_unknown_placeholders():
+    with pytest.raises(ValueError):
+        register_tenant_pack("tenant-bad", {"es": {"check_in_info": "Hola {guest_name}"}})
+    assert "tenant-bad" not in ts._TENANT_TEXT_TABLES
+
+
+def test_pack_watcher_hot_reload(tmp_path):
+    pack_file = tmp_path / "tenant-hot.json"
+    pack_file.write_text(json.dumps({"es": {"help_message": "v1"}}), encoding="utf-8")
+    watcher = TemplatePackWatcher(str(tmp_path))
+    svc = TemplateService()
+    try:
+        assert watcher.reload() == 1
+        assert svc.get_response("help_message", tenant_id="tenant-hot") == "v1"
+        # Sin cambios de mtime no se recompila nada
+        assert watcher.reload() == 0
+
+        pack_file.write_text(json.dumps({"es": {"help_message": "v2"}}), encoding="utf-8")
+        stat = pack_file.stat()
+        os.utime(pack_file, (stat.st_atime, stat.st_mtime + 5))
+        assert watcher.reload() == 1
+        assert svc.get_response("help_message", tenant_id="tenant-hot") == "v2"
+
+        pack_file.unlink()
+        assert watcher.reload() == 1
+        assert svc.get_response("help_message", tenant_id="tenant-hot") == "Puedo ayudarte con lo siguiente:"
+    finally:
+        unregister_tenant_pack("tenant-hot")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_messages_render_in_their_own_language(monkeypatch, pt_tenant_pack):
+    """Mensajes concurrentes ES/EN/PT sobre un único Orchestrator no mezclan idiomas."""
+
+    class SlowFF:
+        async def is_enabled(self, flag: str, default=None) -> bool:
+            # Ceder el loop entre la resolución de idioma y el render
+            await asyncio.sleep(random.random() / 1000)
+            return False
+
+    async def get_ff():
+        return SlowFF()
+
+    monkeypatch.setattr("app.services.orchestrator.get_feature_flag_service", get_ff)
+    orch = Orchestrator(AsyncMock(), AsyncMock(), AsyncMock())
+
+    expected = {
+        "es": "El check-in es a partir de las 15:00",
+        "en": "Check-in starts at 15:00",
+        "pt": PT_CHECK_IN,
+    }
+
+    async def run(i: int, lang: str):
+        msg = UnifiedMessage(
+            message_id=f"m{i}",
+            canal="whatsapp",
+            user_id=f"u{i}",
+            timestamp_iso="2025-01-01T00:00:00Z",
+            tipo="text",
+            texto="check-in?",
+            metadata={"detected_language": lang},
+            tenant_id=pt_tenant_pack,
+        )
+        nlp_result = {"intent": {"name": "check_in_info", "confidence": 0.9}, "language": lang}
+        resp = await orch._handle_info_intent(nlp_result, {}, msg)
+        return lang, resp["content"]
+
+    langs = [random.choice(list(expected)) for _ in range(150)]
+    results = await asyncio.gather(*(run(i, lang) for i, lang in enumerate(langs)))
+
+    for lang, content in results:
+        assert content.startswith(expected[lang]), (lang, content)
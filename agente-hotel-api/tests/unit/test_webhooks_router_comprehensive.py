@@ -186,7 +186,7 @@ def test_handle_whatsapp_webhook_invalid_json():
 @patch("app.services.dlq_service.DLQService")
 @patch("app.routers.webhooks.Orchestrator")
 @patch("app.routers.webhooks.MessageGateway")
-@patch("app.routers.webhooks.WhatsAppMetaClient")
+@patch("app.routers.webhooks.get_whatsapp_client")
 def test_handle_whatsapp_webhook_success(
     mock_whatsapp_cls,
     mock_gateway_cls,
@@ -239,7 +239,7 @@ def test_handle_whatsapp_webhook_success(
 @patch("app.services.dlq_service.DLQService")
 @patch("app.routers.webhooks.Orchestrator")
 @patch("app.routers.webhooks.MessageGateway")
-@patch("app.routers.webhooks.WhatsAppMetaClient")
+@patch("app.routers.webhooks.get_whatsapp_client")
 def test_handle_whatsapp_webhook_rate_limit(
     mock_whatsapp_cls,
     mock_gateway_cls,
@@ -301,7 +301,7 @@ async def test_concurrent_webhook_requests_isolation(valid_payload):
          patch("app.services.dlq_service.DLQService") as mock_dlq, \
          patch("app.routers.webhooks.Orchestrator") as mock_orchestrator_cls, \
          patch("app.routers.webhooks.MessageGateway") as mock_gateway_cls, \
-         patch("app.routers.webhooks.WhatsAppMetaClient") as mock_whatsapp_cls:
+         patch("app.routers.webhooks.get_whatsapp_client") as mock_whatsapp_cls:
         
         mock_redis = AsyncMock()
         mock_get_redis.return_value = mock_redis
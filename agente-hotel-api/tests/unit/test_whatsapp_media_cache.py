@@ -0,0 +1,173 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import whatsapp_media_cache as wmc
+from app.exceptions.whatsapp_exceptions import WhatsAppMediaError
+from app.services.whatsapp_client import WhatsAppMetaClient
+from app.services.whatsapp_media_cache import MediaIdCache, phrase_bank, preload_media_assets, room_image_urls
+from tests.mocks.graph_api_stub import GraphAPIStub
+
+AUDIO = b"OggS" + b"\x01" * 4096
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(monkeypatch, clock):
+    c = MediaIdCache(ttl_seconds=3600, clock=clock)
+    monkeypatch.setattr(wmc, "_media_cache", c)
+    return c
+
+
+@pytest.fixture
+def stub():
+    return GraphAPIStub()
+
+
+@pytest.fixture
+async def client(stub):
+    c = WhatsAppMetaClient(http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=stub.app)))
+    c.phone_number_id = "111"
+    yield c
+    await c.client.aclose()
+
+
+async def test_same_audio_is_uploaded_once(cache, stub, client):
+    for guest in ("a", "b", "c"):
+        result = await client.send_cached_media(guest, "audio", AUDIO, "audio/ogg")
+        assert result["status"] == "sent"
+
+    assert len(stub.uploads) == 1
+    assert {m["audio"]["id"] for m in stub.messages} == {stub.uploads[0]["id"]}
+    assert cache.stats()["hits"] == 2
+
+
+async def test_concurrent_sends_share_one_upload(cache, stub, client):
+    await asyncio.gather(*(client.send_cached_media(f"g{i}", "audio", AUDIO, "audio/ogg") for i in range(20)))
+    assert len(stub.uploads) == 1
+    assert len(stub.messages) == 20
+
+
+async def test_entries_expire_and_are_reuploaded(cache, clock, stub, client):
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    clock.now += 3601
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    assert len(stub.uploads) == 2
+
+
+async def test_reupload_when_meta_rejects_media_id(cache, stub, client):
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    stub.expire_media(stub.uploads[0]["id"])
+
+    result = await client.send_cached_media("b", "audio", AUDIO, "audio/ogg")
+
+    assert result["status"] == "sent"
+    assert len(stub.uploads) == 2
+    assert stub.messages[-1]["audio"]["id"] == stub.uploads[1]["id"]
+
+
+async def test_media_is_cached_per_phone_number(cache, stub, client):
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    client.phone_number_id = "222"
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    assert [u["phone_number_id"] for u in stub.uploads] == ["111", "222"]
+
+
+async def test_preloaded_room_image_is_sent_by_id(cache, stub, client):
+    url = room_image_urls()[0]
+    media_id = await client.preload_image(url)
+
+    await client.send_image(to="a", image_url=url, caption="Habitación")
+
+    assert stub.messages[0]["image"] == {"id": media_id, "caption": "Habitación"}
+    # Imágenes no precargadas siguen yendo por link
+    await client.send_image(to="a", image_url="https://cdn.example.com/otra.jpg")
+    assert stub.messages[1]["image"] == {"link": "https://cdn.example.com/otra.jpg"}
+
+
+async def test_rejected_preloaded_image_falls_back_to_link(cache, stub, client):
+    url = room_image_urls()[0]
+    media_id = await client.preload_image(url)
+    stub.expire_media(media_id)
+
+    await client.send_image(to="a", image_url=url)
+
+    assert stub.messages[0]["image"] == {"link": url}
+    assert cache.lookup_url("111", url) is None
+
+
+async def test_other_bad_requests_keep_the_cached_media_id(cache, stub, client):
+    url = room_image_urls()[0]
+    media_id = await client.preload_image(url)
+    stub.fail_next(400)  # p. ej. destinatario inválido: no es culpa del media id
+
+    with pytest.raises(WhatsAppMediaError):
+        await client.send_image(to="a", image_url=url)
+
+    assert stub.attempts == 1
+    assert cache.lookup_url("111", url) == media_id
+
+
+@pytest.mark.parametrize(
+    "status, error, expected",
+    [
+        (400, {"code": 131053, "message": "Media upload error"}, True),
+        (400, {"code": 100, "message": "(#100) Invalid media id"}, True),
+        (400, {"code": 100, "error_data": {"details": "Param image['id'] is not a valid media ID"}}, True),
+        (400, {"code": 100, "message": "(#100) Invalid parameter", "error_data": {"details": "Param to"}}, False),
+        (400, {"code": 131026, "message": "Message undeliverable"}, False),
+        (500, {"code": 131053, "message": "Media upload error"}, False),
+    ],
+)
+def test_only_media_id_errors_trigger_a_reupload(status, error, expected):
+    assert wmc.is_media_id_rejection(status, {"error": error}) is expected
+
+
+async def test_bytes_uploaded_per_hour_window(cache, clock, stub, client):
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    await client.send_cached_media("a", "audio", AUDIO, "audio/ogg")
+    assert cache.bytes_uploaded_last_hour() == len(AUDIO)
+
+    clock.now += 3601
+    assert cache.bytes_uploaded_last_hour() == 0
+
+
+def test_phrase_bank_only_contains_fixed_templates():
+    phrases = phrase_bank()
+    assert phrases
+    assert all("{" not in p for p in phrases)
+    assert len(phrases) == len(set(phrases))
+
+
+def test_room_image_urls_are_unique():
+    urls = room_image_urls()
+    assert len(urls) == len(set(urls))
+    # Varios alias (double/doble/matrimonial) comparten archivo
+    assert any(u.endswith("/double-room.jpg") for u in urls)
+
+
+async def test_preload_assets_uploads_images_and_phrase_audio(cache, stub, client):
+    class FakeTTS:
+        async def generate_audio_response(self, text, content_type=None):
+            return b"OggS" + text.encode()
+
+    result = await preload_media_assets(client, FakeTTS())
+
+    assert result == {"images": len(room_image_urls()), "audio": len(phrase_bank()), "failed": 0}
+    # Un huésped recibe luego el mismo audio: no hay subida nueva
+    uploads_before = len(stub.uploads)
+    await client.send_cached_media("a", "audio", b"OggS" + phrase_bank()[0].encode(), "audio/ogg")
+    assert len(stub.uploads) == uploads_before
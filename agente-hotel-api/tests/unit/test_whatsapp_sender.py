@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.exceptions.whatsapp_exceptions import WhatsAppError
+from app.services import whatsapp_client as wc
+from app.services.whatsapp_sender import (
+    PriorityTokenBucket,
+    SendPriority,
+    WhatsAppOutboundSender,
+    send_concurrently,
+    send_priority,
+)
+from tests.mocks.graph_api_stub import GraphAPIStub
+
+
+def _client_for(sender: WhatsAppOutboundSender) -> wc.WhatsAppMetaClient:
+    client = wc.WhatsAppMetaClient(http_client=sender.client)
+    client.phone_number_id = "111"
+    return client
+
+
+@pytest.fixture
+def stub():
+    return GraphAPIStub()
+
+
+@pytest.fixture
+async def sender(stub):
+    s = WhatsAppOutboundSender(rate_per_second=1000, burst=1000, transport=httpx.ASGITransport(app=stub.app))
+    yield s
+    await s.aclose()
+
+
+async def test_bucket_serves_higher_priority_first():
+    bucket = PriorityTokenBucket(rate=100, burst=1)
+    await bucket.acquire()  # agota el único token
+
+    order: list[str] = []
+
+    async def take(name: str, priority: SendPriority):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    tasks = [asyncio.create_task(take(f"bulk{i}", SendPriority.BULK)) for i in range(3)]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(take("reply", SendPriority.INTERACTIVE)))
+    await asyncio.gather(*tasks)
+
+    assert order[0] == "reply"
+    assert order[1:] == ["bulk0", "bulk1", "bulk2"]
+
+
+async def test_bucket_enforces_rate():
+    bucket = PriorityTokenBucket(rate=200, burst=1)
+    start = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(11)))
+    # 10 tokens tras el burst inicial a 200/s ≈ 50ms
+    assert time.monotonic() - start >= 0.04
+
+
+async def test_cancelled_waiter_does_not_leak_token():
+    bucket = PriorityTokenBucket(rate=50, burst=1)
+    await bucket.acquire()
+    waiter = asyncio.create_task(bucket.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert await asyncio.wait_for(bucket.acquire(), timeout=1) >= 0
+
+
+async def test_retries_429_then_succeeds(stub, sender):
+    stub.fail_next(429, times=2, retry_after=0)
+    result = await _client_for(sender).send_message(to="34600000000", text="hola")
+
+    assert result["messages"][0]["id"].startswith("wamid.stub")
+    assert stub.attempts == 3
+    assert stub.messages[0]["phone_number_id"] == "111"
+
+
+async def test_retries_5xx_with_jitter_then_gives_up(stub, sender):
+    sender.transport.backoff_base = 0.001
+    stub.fail_next(503, times=sender.transport.max_retries + 1)
+
+    with pytest.raises(WhatsAppError):
+        await _client_for(sender).send_message(to="34600000000", text="hola")
+    assert stub.attempts == sender.transport.max_retries + 1
+
+
+async def test_client_errors_are_not_retried(stub, sender):
+    stub.fail_next(400)
+    with pytest.raises(WhatsAppError):
+        await _client_for(sender).send_message(to="34600000000", text="hola")
+    assert stub.attempts == 1
+
+
+async def test_priority_lanes_through_transport(stub):
+    sender = WhatsAppOutboundSender(rate_per_second=10, burst=1, transport=httpx.ASGITransport(app=stub.app))
+    client = _client_for(sender)
+    bucket = sender.transport.bucket_for("111")
+    try:
+
+        async def reminder(i: int):
+            with send_priority(SendPriority.BULK):
+                await client.send_message(to=f"reminder{i}", text="¿Nos dejas una reseña?")
+
+        tasks = [asyncio.create_task(reminder(i)) for i in range(4)]
+        # reminder0 consume el token del burst; esperar a que el resto haga cola
+        while len(bucket._waiters) < 3:
+            await asyncio.sleep(0)
+        tasks.append(asyncio.create_task(client.send_message(to="guest", text="Sí, hay disponibilidad")))
+        await asyncio.gather(*tasks)
+    finally:
+        await sender.aclose()
+
+    recipients = [m["to"] for m in stub.messages]
+    assert recipients == ["reminder0", "guest", "reminder1", "reminder2", "reminder3"]
+
+
+async def test_shared_client_does_not_close_pool(sender):
+    client = _client_for(sender)
+    await client.close()
+    assert not sender.client.is_closed
+
+
+async def test_get_whatsapp_client_is_process_wide():
+    try:
+        first = wc.get_whatsapp_client()
+        assert wc.get_whatsapp_client() is first
+    finally:
+        await wc.close_whatsapp_client()
+    assert wc.get_whatsapp_client() is not first
+    await wc.close_whatsapp_client()
+
+
+async def test_send_concurrently_runs_parts_in_parallel():
+    async def part(value):
+        await asyncio.sleep(0.05)
+        return value
+
+    start = time.monotonic()
+    assert await send_concurrently(part("image"), part("text")) == ["image", "text"]
+    assert time.monotonic() - start < 0.09
+
+
+async def test_send_concurrently_waits_for_all_before_raising():
+    done = []
+
+    async def ok():
+        await asyncio.sleep(0.01)
+        done.append("text")
+
+    async def boom():
+        raise WhatsAppError("image failed")
+
+    with pytest.raises(WhatsAppError):
+        await send_concurrently(boom(), ok())
+    assert done == ["text"]
+
+
+async def test_humanize_flag_is_cached(monkeypatch):
+    calls = 0
+
+    class FF:
+        async def is_enabled(self, flag, default=False):
+            nonlocal calls
+            calls += 1
+            return False
+
+    async def get_ff():
+        return FF()
+
+    monkeypatch.setattr(wc, "get_feature_flag_service", get_ff)
+    monkeypatch.setattr(wc, "_humanize_flag_cache", (0.0, False))
+
+    for _ in range(5):
+        assert await wc._humanize_delay_enabled() is False
+    assert calls == 1